@@ -433,7 +433,7 @@ Status SparseTensor::ValidateBlockSparseShapes(const TensorShape& values_shape,
     ORT_RETURN_IF_NOT(indices_shape.NumDimensions() == 2,
                       "Expecting indices to have 2-D shape . Got: ", indices_shape.NumDimensions());
     ORT_RETURN_IF_NOT(indices_shape.GetDims()[0] == 2, "Indices shape must have dim[0] == 2");
-    const auto values_blocks = values_shape.SizeFromDimension(2);
+    const auto values_blocks = values_shape[0];  // (num_blocks, block_size, block_size)
     const auto index_blocks = indices_shape.Size() / 2;  // Two integers per block
     ORT_RETURN_IF_NOT(values_blocks == index_blocks,
                       "Expecting index blocks: ", index_blocks, " to be equal to values blocks: ", values_blocks);
@@ -5,16 +5,82 @@
 """
 Implements ONNX's backend API.
 """
+import collections
+import hashlib
 import os
+import threading
 import unittest
 
+import numpy as np
 import packaging.version
-from onnx import ModelProto, helper, version  # noqa: F401
+from onnx import ModelProto, TensorProto, TypeProto, helper, version
 from onnx.backend.base import Backend
 from onnx.checker import check_model
 
 from onnxruntime import InferenceSession, SessionOptions, get_available_providers, get_device
 from onnxruntime.backend.backend_rep import OnnxRuntimeBackendRep
+from onnxruntime.capi._pybind_state import get_all_operator_schema
+
+
+class _SessionCache:
+    """
+    Least recently used cache of :class:`OnnxRuntimeBackendRep`.
+    A cache with a size of 0 keeps nothing.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.reps_ = collections.OrderedDict()
+        self.lock_ = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock_:
+            rep = self.reps_.get(key) if self.max_size > 0 else None
+            if rep is None:
+                self.misses += 1
+                return None
+            self.reps_.move_to_end(key)
+            self.hits += 1
+            return rep
+
+    def add(self, key, rep):
+        with self.lock_:
+            self.reps_[key] = rep
+            while len(self.reps_) > self.max_size:
+                self.reps_.popitem(last=False)
+
+    def clear(self):
+        with self.lock_:
+            self.reps_.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+_operator_since_versions = None
+
+
+def _get_operator_versions(domain, op_type=None):
+    """
+    Returns the versions of an operator known by onnxruntime,
+    or the versions of all the operators of the domain if `op_type` is None.
+    """
+    global _operator_since_versions  # noqa: PLW0603
+    if _operator_since_versions is None:
+        since_versions = {}
+        for schema in get_all_operator_schema():
+            since_versions.setdefault((schema.domain, schema.name), []).append(schema.since_version)
+        _operator_since_versions = since_versions
+    if op_type is not None:
+        return _operator_since_versions.get((domain, op_type), [])
+    return [v for (d, _), versions in _operator_since_versions.items() if d == domain for v in versions]
+
+
+def _make_tensor_value_info(name, dtype, shape):
+    dtype = np.dtype(dtype)
+    elem_type = TensorProto.STRING if dtype.kind in "OSU" else helper.np_dtype_to_tensor_dtype(dtype)
+    return helper.make_tensor_value_info(name, elem_type, shape)
 
 
 class OnnxRuntimeBackend(Backend):
@@ -31,6 +97,11 @@ class OnnxRuntimeBackend(Backend):
 
     allowReleasedOpsetsOnly = bool(os.getenv("ALLOW_RELEASED_ONNX_OPSET_ONLY", "1") == "1")  # noqa: N815
 
+    # Sessions prepared by run_model and run_node, the oldest ones are released
+    # when the cache is full. Set max_size to 0 to disable caching.
+    model_session_cache = _SessionCache(max_size=8)
+    node_session_cache = _SessionCache(max_size=256)
+
     @classmethod
     def is_compatible(cls, model, device=None, **kwargs):
         """
@@ -142,13 +213,46 @@ class OnnxRuntimeBackend(Backend):
                 bin = bin.SerializeToString()
             return cls.prepare(bin, device, **kwargs)
 
+    @classmethod
+    def clear_session_cache(cls):
+        """
+        Releases the sessions cached by *run_model* and *run_node*.
+        """
+        cls.model_session_cache.clear()
+        cls.node_session_cache.clear()
+
+    @staticmethod
+    def _get_options_key(device, kwargs):
+        excluded_providers = os.getenv("ORT_ONNX_BACKEND_EXCLUDE_PROVIDERS", default="")
+        return (device, excluded_providers, tuple(sorted((k, repr(v)) for k, v in kwargs.items())))
+
+    @classmethod
+    def _get_model_key(cls, model, device, kwargs):
+        """
+        Returns the key of a model in the session cache or None if the model is not cached.
+        Models are identified by the hash of their content, files by their path,
+        size and modification time.
+        """
+        if isinstance(model, ModelProto):
+            model_key = hashlib.sha256(model.SerializeToString()).digest()
+        elif isinstance(model, bytes):
+            model_key = hashlib.sha256(model).digest()
+        elif isinstance(model, str):
+            stat = os.stat(model)
+            model_key = (os.path.abspath(model), stat.st_size, stat.st_mtime_ns)
+        else:
+            return None
+        return (model_key, cls._get_options_key(device, kwargs))
+
     @classmethod
     def run_model(cls, model, inputs, device=None, **kwargs):
         """
         Compute the prediction.
+        Unless *model* is already prepared, the prepared session
+        is cached to be reused by the next calls with the same model.
 
         :param model: :class:`onnxruntime.InferenceSession` returned
-            by function *prepare*
+            by function *prepare*, or any model *prepare* accepts
         :param inputs: inputs
         :param device: requested device for the computation,
             None means the default one which depends on
@@ -156,19 +260,99 @@ class OnnxRuntimeBackend(Backend):
         :param kwargs: see :class:`onnxruntime.RunOptions`
         :return: predictions
         """
-        rep = cls.prepare(model, device, **kwargs)
+        key = cls._get_model_key(model, device, kwargs) if cls.model_session_cache.max_size > 0 else None
+        rep = None if key is None else cls.model_session_cache.get(key)
+        if rep is None:
+            rep = cls.prepare(model, device, **kwargs)
+            if key is not None:
+                cls.model_session_cache.add(key, rep)
         return rep.run(inputs, **kwargs)
 
+    @classmethod
+    def _make_node_model(cls, node, inputs, outputs_info, opset_version):
+        """
+        Creates a model with a single node. The inputs and outputs are renamed so that
+        the model only depends on the operator, its attributes and the types of the inputs.
+        """
+        input_names = [f"input_{i}" if name else "" for i, name in enumerate(node.input)]
+        output_names = [f"output_{i}" if name else "" for i, name in enumerate(node.output)]
+        graph_inputs = [
+            _make_tensor_value_info(name, inp.dtype, [None] * inp.ndim)
+            for name, inp in zip([name for name in input_names if name], inputs)
+        ]
+        graph_outputs = []
+        for i, name in enumerate([name for name in output_names if name]):
+            if outputs_info is not None and i < len(outputs_info):
+                graph_outputs.append(_make_tensor_value_info(name, *outputs_info[i]))
+            else:
+                # onnxruntime infers the type of the output.
+                graph_outputs.append(helper.make_value_info(name, TypeProto()))
+
+        domain = "" if node.domain == "ai.onnx" else node.domain
+        model_node = helper.make_node(node.op_type, input_names, output_names, domain=domain)
+        model_node.attribute.extend(node.attribute)
+        if opset_version is None:
+            # The latest version of the operator, it also avoids operator versions onnxruntime does not implement.
+            versions = _get_operator_versions("", node.op_type) if domain == "" else None
+            opset_version = max(versions or _get_operator_versions(""))
+        opset_imports = [helper.make_opsetid("", opset_version)]
+        ir_version = helper.find_min_ir_version_for(opset_imports)
+        if domain != "":
+            versions = _get_operator_versions(domain, node.op_type)
+            opset_imports.append(helper.make_opsetid(domain, max(versions) if versions else 1))
+        graph = helper.make_graph([model_node], f"run_node_{node.op_type}", graph_inputs, graph_outputs)
+        return helper.make_model(graph, opset_imports=opset_imports, ir_version=ir_version)
+
     @classmethod
     def run_node(cls, node, inputs, device=None, outputs_info=None, **kwargs):
         """
-        This method is not implemented as it is much more efficient
-        to run a whole model than every node independently.
+        Runs a single node.
+        The session running the node is cached to be reused by the next calls with a node
+        of the same type and the same attributes, and inputs of the same types and ranks.
+
+        :param node: NodeProto to run
+        :param inputs: list of inputs, one for every non empty input of the node
+        :param device: requested device for the computation,
+            None means the default one which depends on
+            the compilation settings
+        :param outputs_info: optional list of tuples (element type, shape), one for every
+            output of the node
+        :param kwargs: see :class:`onnxruntime.SessionOptions` and :class:`onnxruntime.RunOptions`,
+            *opset_version* is the version of the main domain used to run the node,
+            it defaults to the latest version of the operator
+        :return: predictions
         """
-        raise NotImplementedError("It is much more efficient to run a whole model than every node independently.")
+        opset_version = kwargs.pop("opset_version", None)
+        inputs = [np.asarray(inp) for inp in inputs]
+        if len(inputs) != sum(1 for name in node.input if name):
+            raise RuntimeError(f"Node expects {sum(1 for name in node.input if name)} inputs, got {len(inputs)}")
+
+        key = (
+            node.op_type,
+            node.domain,
+            b"".join(attr.SerializeToString() for attr in node.attribute),
+            tuple(bool(name) for name in node.input),
+            tuple(bool(name) for name in node.output),
+            tuple((inp.dtype.str, inp.ndim) for inp in inputs),
+            None if outputs_info is None else repr([(np.dtype(t).str, s) for t, s in outputs_info]),
+            opset_version,
+            cls._get_options_key(device, kwargs),
+        )
+        rep = cls.node_session_cache.get(key)
+        if rep is None:
+            if node.domain == "":
+                # The session validates the nodes of other domains.
+                check_kwargs = {} if opset_version is None else {"opset_version": opset_version}
+                super().run_node(node, inputs, device=device, outputs_info=outputs_info, **check_kwargs)
+            model = cls._make_node_model(node, inputs, outputs_info, opset_version)
+            rep = cls.prepare(model.SerializeToString(), device, **kwargs)
+            if cls.node_session_cache.max_size > 0:
+                cls.node_session_cache.add(key, rep)
+        return rep.run(inputs, **kwargs)
 
 
 is_compatible = OnnxRuntimeBackend.is_compatible
 prepare = OnnxRuntimeBackend.prepare
 run = OnnxRuntimeBackend.run_model
+run_node = OnnxRuntimeBackend.run_node
 supports_device = OnnxRuntimeBackend.supports_device
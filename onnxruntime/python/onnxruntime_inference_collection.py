@@ -4,13 +4,22 @@
 # --------------------------------------------------------------------------
 from __future__ import annotations
 
+import asyncio
 import collections
 import collections.abc
+import contextlib
+import hashlib
+import json
 import os
+import threading
+import time
 import typing
 import warnings
+import weakref
 from typing import Any, Sequence
 
+import numpy as np
+
 from onnxruntime.capi import _pybind_state as C
 
 if typing.TYPE_CHECKING:
@@ -274,6 +283,55 @@ class Session:
                 return self._sess.run(output_names, input_feed, run_options)
             raise
 
+    def prepare(self, output_names=None, input_names=None, run_options=None):
+        """
+        Prepare a function to compute the predictions for fixed lists of inputs and outputs.
+        The names are checked once here instead of in every call like :meth:`run`, which reduces
+        the overhead per call for small models.
+
+        :param output_names: name of the outputs, all outputs if not given
+        :param input_names: name of the inputs in the order of the arguments of the returned function,
+            all inputs of the model if not given
+        :param run_options: See :class:`onnxruntime.RunOptions`. It is used by every call.
+        :return: a function that takes the input values in the order of ``input_names``,
+            and returns the list of results like :meth:`run`.
+
+        ::
+
+            run = sess.prepare([output_name], [input_name])
+            for x in inputs:
+                results = run(x)
+        """
+        input_names = [input.name for input in self._inputs_meta] if input_names is None else list(input_names)
+        self._validate_input(input_names)
+        valid_input_names = {input.name for input in self._inputs_meta}
+        valid_input_names.update(initializer.name for initializer in self._overridable_initializers)
+        invalid_input_names = [name for name in input_names if name not in valid_input_names]
+        if invalid_input_names:
+            raise ValueError(f"Inputs ({invalid_input_names}) are not inputs of the model.")
+
+        valid_output_names = [output.name for output in self._outputs_meta]
+        if not output_names:
+            output_names = valid_output_names
+        invalid_output_names = [name for name in output_names if name not in valid_output_names]
+        if invalid_output_names:
+            raise ValueError(f"Outputs ({invalid_output_names}) are not outputs of the model.")
+        output_names = list(output_names)
+        num_inputs = len(input_names)
+
+        def run(*input_values):
+            if len(input_values) != num_inputs:
+                raise TypeError(f"Expected {num_inputs} input values, got {len(input_values)}.")
+            input_feed = dict(zip(input_names, input_values))
+            try:
+                return self._sess.run(output_names, input_feed, run_options)
+            except C.EPFail:
+                if self._enable_fallback:
+                    return self.run(output_names, input_feed, run_options)
+                raise
+
+        return run
+
     def run_async(self, output_names, input_feed, callback, user_data, run_options=None):
         """
         Compute the predictions asynchronously in a separate cxx thread from ort intra-op threadpool.
@@ -304,6 +362,39 @@ class Session:
             output_names = [output.name for output in self._outputs_meta]
         return self._sess.run_async(output_names, input_feed, callback, user_data, run_options)
 
+    async def run_coro(self, output_names, input_feed, run_options=None):
+        """
+        Compute the predictions in a coroutine. The model runs asynchronously like :meth:`run_async`,
+        so the event loop is not blocked, and the results are returned to the event loop of the caller.
+
+        :param output_names: name of the outputs
+        :param input_feed: dictionary ``{ input_name: input_value }``
+        :param run_options: See :class:`onnxruntime.RunOptions`.
+        :return: list of results, every result is either a numpy array,
+            a sparse tensor, a list or a dictionary.
+
+        ::
+
+            results = await sess.run_coro([output_name], {input_name: x})
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def set_result(results, err):
+            if future.done():  # cancelled by the caller
+                return
+            if err:
+                future.set_exception(RuntimeError(err))
+            else:
+                future.set_result(results)
+
+        def callback(results, user_data, err):
+            loop.call_soon_threadsafe(set_result, results, err)
+
+        # The input feed is passed as user data to keep the inputs alive until the run completes.
+        self.run_async(output_names, input_feed, callback, input_feed, run_options)
+        return await future
+
     def run_with_ort_values(self, output_names, input_dict_ort_values, run_options=None):
         """
         Compute the predictions.
@@ -403,14 +494,19 @@ class InferenceSession(Session):
 
     def __init__(
         self,
-        path_or_bytes: str | bytes | os.PathLike,
+        path_or_bytes: str | bytes | os.PathLike | memoryview,
         sess_options: onnxruntime.SessionOptions | None = None,
         providers: Sequence[str | tuple[str, dict[Any, Any]]] | None = None,
         provider_options: Sequence[dict[Any, Any]] | None = None,
+        *,
+        release_model_buffer: bool = False,
+        tuning_results_db: str | os.PathLike | TuningResultsDatabase | None = None,
         **kwargs,
     ) -> None:
         """
-        :param path_or_bytes: Filename or serialized ONNX or ORT format model in a byte string.
+        :param path_or_bytes: Filename or serialized ONNX or ORT format model in a byte string, or in an object
+            supporting the buffer protocol like memoryview or mmap.mmap. A model in a buffer is parsed without
+            copying it into a byte string, so sessions can load a memory-mapped model file.
         :param sess_options: Session options.
         :param providers: Optional sequence of providers in order of decreasing
             precedence. Values can either be provider names or tuples of
@@ -418,6 +514,13 @@ class InferenceSession(Session):
             providers are used with the default precedence.
         :param provider_options: Optional sequence of options dicts corresponding
             to the providers listed in 'providers'.
+        :param release_model_buffer: Release the serialized model after the session is created, instead of
+            holding it for the lifetime of the session. The session cannot be re-created afterwards, like by
+            :meth:`set_providers` or by the fallback of providers on error. It is ignored when the session uses
+            the model bytes directly (session config entry 'session.use_ort_model_bytes_directly').
+        :param tuning_results_db: Directory of a :class:`onnxruntime.TuningResultsDatabase`, or the database. The
+            session is created with the tuning results stored for the model, its execution providers and the device,
+            and the results of ops tuned by the session are added to the database when the session is destroyed.
 
         The model type will be inferred unless explicitly set in the SessionOptions.
         To explicitly set:
@@ -446,9 +549,13 @@ class InferenceSession(Session):
             self._model_bytes = None
         elif isinstance(path_or_bytes, bytes):
             self._model_path = None
-            self._model_bytes = path_or_bytes  # TODO: This is bad as we're holding the memory indefinitely
+            self._model_bytes = path_or_bytes  # held to re-create the session unless release_model_buffer is set
         else:
-            raise TypeError(f"Unable to load from type '{type(path_or_bytes)}'")
+            self._model_path = None
+            try:
+                self._model_bytes = memoryview(path_or_bytes)
+            except TypeError:
+                raise TypeError(f"Unable to load from type '{type(path_or_bytes)}'") from None
 
         self._sess_options = sess_options
         self._sess_options_initial = sess_options
@@ -460,6 +567,16 @@ class InferenceSession(Session):
 
         # internal parameters that we don't expect to be used in general so aren't documented
         disabled_optimizers = kwargs.get("disabled_optimizers")
+        self._prepacked_weights_container = kwargs.get("prepacked_weights_container")
+
+        if tuning_results_db is not None and not isinstance(tuning_results_db, TuningResultsDatabase):
+            tuning_results_db = TuningResultsDatabase(tuning_results_db)
+        self._tuning_results_db = tuning_results_db
+        # Session and key to save tuning results of, updated when the session is re-created.
+        self._tuning_results_state = {}
+        if tuning_results_db is not None:
+            self._model_hash = TuningResultsDatabase.get_model_hash(path_or_bytes)
+            weakref.finalize(self, tuning_results_db._save_session_results, self._tuning_results_state)
 
         try:
             self._create_inference_session(providers, provider_options, disabled_optimizers)
@@ -473,11 +590,28 @@ class InferenceSession(Session):
                     self._create_inference_session(self._fallback_providers, None)
                     # Fallback only once.
                     self.disable_fallback()
-                    return
                 except Exception as fallback_error:
                     raise fallback_error from e
-            # Fallback is disabled. Raise the original error.
-            raise e
+            else:
+                # Fallback is disabled. Raise the original error.
+                raise e
+
+        if release_model_buffer:
+            self._release_model_buffer()
+
+    def _release_model_buffer(self):
+        if self._model_bytes is None:
+            return
+        try:
+            uses_model_bytes = self._sess_options.get_session_config_entry("session.use_ort_model_bytes_directly")
+        except RuntimeError:  # not set
+            uses_model_bytes = "0"
+        if uses_model_bytes == "1":
+            return
+
+        if isinstance(self._model_bytes, memoryview):
+            self._model_bytes.release()
+        self._model_bytes = None
 
     def _create_inference_session(self, providers, provider_options, disabled_optimizers=None):
         available_providers = C.get_available_providers()
@@ -524,8 +658,12 @@ class InferenceSession(Session):
 
         if self._model_path:
             sess = C.InferenceSession(session_options, self._model_path, True, self._read_config_from_model)
-        else:
+        elif isinstance(self._model_bytes, bytes):
             sess = C.InferenceSession(session_options, self._model_bytes, False, self._read_config_from_model)
+        elif self._model_bytes is not None:
+            sess = C.InferenceSession(session_options, self._model_bytes, self._read_config_from_model)
+        else:
+            raise RuntimeError("The session cannot be re-created since its model buffer was released.")
 
         if disabled_optimizers is None:
             disabled_optimizers = set()
@@ -533,6 +671,9 @@ class InferenceSession(Session):
             # convert to set. assumes iterable
             disabled_optimizers = set(disabled_optimizers)
 
+        if self._prepacked_weights_container is not None:
+            sess.add_prepacked_weights_container(self._prepacked_weights_container)
+
         # initialize the C++ InferenceSession
         sess.initialize_session(providers, provider_options, disabled_optimizers)
 
@@ -546,8 +687,18 @@ class InferenceSession(Session):
         self._provider_options = self._sess.get_provider_options()
         self._profiling_start_time_ns = self._sess.get_profiling_start_time_ns
 
+        if self._tuning_results_db is not None:
+            key = self._tuning_results_db.get_key(self._model_hash, self._providers, self._provider_options)
+            results = self._tuning_results_db.load(key)
+            if results:
+                self._sess.set_tuning_results(results, False)
+            self._tuning_results_state.update(sess=self._sess, key=key)
+
     def _reset_session(self, providers, provider_options):
         "release underlying session object."
+        if self._tuning_results_db is not None:
+            self._tuning_results_db._save_session_results(self._tuning_results_state)
+
         # meta data references session internal structures
         # so they must be set to None to decrement _sess reference count.
         self._sess_options = None
@@ -576,6 +727,536 @@ class InferenceSession(Session):
                 C.register_tensorrt_plugins_as_custom_ops(session_options, providers[i][1])
 
 
+class SessionBatcher:
+    """
+    Coalesce concurrent requests of an asyncio application into batched runs of a session.
+
+    Requests with the same output names, and inputs of the same types and shapes except for the first dimension,
+    are concatenated along the first dimension and computed by one :meth:`Session.run_coro` call.
+    The outputs are split along the first dimension and returned to each caller.
+    The model must handle the first dimension of all inputs and outputs as a batch dimension.
+    Requests that could not be batched, like those with inputs that are not numpy arrays, are run alone.
+
+    ::
+
+        batcher = SessionBatcher(sess, max_batch_size=32, max_wait_time=0.002)
+        results = await batcher.run([output_name], {input_name: x})
+    """
+
+    class _Batch:
+        def __init__(self):
+            self.requests = []  # list of (input_feed, batch_size, future)
+            self.batch_size = 0
+            self.timer = None
+
+    def __init__(self, sess: Session, max_batch_size: int = 32, max_wait_time: float = 0.001, run_options=None):
+        """
+        :param sess: the session to run.
+        :param max_batch_size: maximum total batch size of the requests in one run.
+        :param max_wait_time: maximum time in seconds that a request waits for other requests to batch with.
+        :param run_options: See :class:`onnxruntime.RunOptions`. It is used for all runs.
+        """
+        if max_batch_size < 1:
+            raise ValueError(f"max_batch_size must be positive, got {max_batch_size}")
+        if max_wait_time < 0:
+            raise ValueError(f"max_wait_time must not be negative, got {max_wait_time}")
+        self._sess = sess
+        self._max_batch_size = max_batch_size
+        self._max_wait_time = max_wait_time
+        self._run_options = run_options
+        self._batches = {}  # pending batch of each signature
+        self._tasks = set()  # keep references to running tasks
+
+    @staticmethod
+    def _get_batch_size(input_feed):
+        batch_size = None
+        for value in input_feed.values():
+            if not isinstance(value, np.ndarray) or value.ndim == 0:
+                return None
+            if batch_size is None:
+                batch_size = value.shape[0]
+            elif value.shape[0] != batch_size:
+                return None
+        return batch_size
+
+    async def run(self, output_names, input_feed):
+        """
+        Compute the predictions, batched with concurrent requests of the same signature.
+
+        :param output_names: name of the outputs
+        :param input_feed: dictionary ``{ input_name: input_value }``
+        :return: list of results like :meth:`Session.run`.
+        """
+        if not output_names:
+            output_names = [output.name for output in self._sess.get_outputs()]
+
+        batch_size = SessionBatcher._get_batch_size(input_feed)
+        if not batch_size or batch_size >= self._max_batch_size:
+            return await self._sess.run_coro(output_names, input_feed, self._run_options)
+
+        signature = (
+            tuple(output_names),
+            tuple((name, value.dtype.str, value.shape[1:]) for name, value in sorted(input_feed.items())),
+        )
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        batch = self._batches.get(signature)
+        if batch is not None and batch.batch_size + batch_size > self._max_batch_size:
+            self._flush(signature, batch)
+            batch = None
+        if batch is None:
+            batch = SessionBatcher._Batch()
+            self._batches[signature] = batch
+            batch.timer = loop.call_later(self._max_wait_time, self._flush, signature, batch)
+
+        batch.requests.append((input_feed, batch_size, future))
+        batch.batch_size += batch_size
+        if batch.batch_size >= self._max_batch_size:
+            self._flush(signature, batch)
+
+        return await future
+
+    def _flush(self, signature, batch):
+        if self._batches.get(signature) is not batch:
+            return
+        del self._batches[signature]
+        batch.timer.cancel()
+        task = asyncio.get_running_loop().create_task(self._run_batch(list(signature[0]), batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, output_names, batch):
+        requests = batch.requests
+        if len(requests) == 1:
+            input_feed = requests[0][0]
+        else:
+            input_feed = {name: np.concatenate([request[0][name] for request in requests]) for name in requests[0][0]}
+
+        try:
+            results = await self._sess.run_coro(output_names, input_feed, self._run_options)
+            if len(requests) == 1:
+                if not requests[0][2].done():
+                    requests[0][2].set_result(results)
+                return
+            for name, result in zip(output_names, results):
+                if not isinstance(result, np.ndarray) or result.ndim == 0 or result.shape[0] != batch.batch_size:
+                    raise ValueError(f"Output {name} could not be split since its first dimension is not batch size.")
+        except Exception as e:
+            for _, _, future in requests:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        start = 0
+        for _, batch_size, future in requests:
+            end = start + batch_size
+            if not future.done():
+                future.set_result([result[start:end] for result in results])
+            start = end
+
+
+class InferenceSessionPool:
+    """
+    A pool of sessions of one model, leased to threads to serve requests concurrently.
+
+    The sessions are created with the same :class:`onnxruntime.SessionOptions`. The initializers of the model are
+    added to these options so that all sessions use the same copy of the weights, and the sessions share the
+    pre-packed versions of these weights if the build supports it.
+    A thread leases an idle session for each run and waits while all sessions are in use, so the number of
+    concurrent runs is capped by the size of the pool.
+
+    ::
+
+        pool = InferenceSessionPool("model.onnx", pool_size=4, providers=["CPUExecutionProvider"])
+        results = pool.run([output_name], {input_name: x})  # from any thread
+
+        with pool.lease() as sess:
+            results = sess.run([output_name], {input_name: x})
+    """
+
+    # Smaller initializers are not worth sharing, and sharing would exclude them from constant sharing.
+    _min_shared_initializer_size = 1024
+
+    _warmup_dtypes: typing.ClassVar[dict[str, type]] = {
+        "tensor(float)": np.float32,
+        "tensor(float16)": np.float16,
+        "tensor(double)": np.float64,
+        "tensor(int8)": np.int8,
+        "tensor(int16)": np.int16,
+        "tensor(int32)": np.int32,
+        "tensor(int64)": np.int64,
+        "tensor(uint8)": np.uint8,
+        "tensor(uint16)": np.uint16,
+        "tensor(uint32)": np.uint32,
+        "tensor(uint64)": np.uint64,
+        "tensor(bool)": np.bool_,
+    }
+
+    class _Stats:
+        def __init__(self, latency_window):
+            self.in_use = False
+            self.runs = 0
+            self.total_latency = 0.0
+            self.max_latency = 0.0
+            self.latencies = collections.deque(maxlen=latency_window)
+
+    def __init__(
+        self,
+        path_or_bytes: str | bytes | os.PathLike | memoryview,
+        pool_size: int = 2,
+        sess_options: onnxruntime.SessionOptions | None = None,
+        providers: Sequence[str | tuple[str, dict[Any, Any]]] | None = None,
+        provider_options: Sequence[dict[Any, Any]] | None = None,
+        *,
+        share_initializers: bool = True,
+        use_env_allocators: bool = False,
+        warmup_feed: dict[str, Any] | None = None,
+        latency_window: int = 1024,
+        **kwargs,
+    ) -> None:
+        """
+        :param path_or_bytes: the model, see :class:`onnxruntime.InferenceSession`.
+        :param pool_size: number of sessions, which is the maximum number of concurrent runs.
+        :param sess_options: session options of all sessions. The shared initializers and the session config entries
+            set by the pool are added to it.
+        :param providers: Optional sequence of providers, see :class:`onnxruntime.InferenceSession`.
+        :param provider_options: Optional sequence of options dicts corresponding to the providers.
+        :param share_initializers: Share the initializers of an ONNX model between the sessions. It requires the
+            onnx package to read the initializers of the model.
+        :param use_env_allocators: Use the allocators registered in the environment, like by
+            :func:`onnxruntime.create_and_register_allocator`, so that the sessions share one memory arena.
+        :param warmup_feed: inputs of a run done by each session after its creation. By default, the sessions run
+            with zeros of the input types and shapes, with 1 for the symbolic dimensions, if the model accepts them.
+        :param latency_window: number of the latest runs of each session used for the latency percentiles.
+        :param kwargs: other arguments of :class:`onnxruntime.InferenceSession`.
+        """
+        if pool_size < 1:
+            raise ValueError(f"pool_size must be positive, got {pool_size}")
+        if sess_options is None:
+            sess_options = C.SessionOptions()
+        if use_env_allocators:
+            sess_options.add_session_config_entry("session.use_env_allocators", "1")
+
+        # The sessions use these values without copying them, so they are kept alive as long as the pool.
+        self._shared_initializers = (
+            InferenceSessionPool._load_shared_initializers(path_or_bytes) if share_initializers else {}
+        )
+        for name, value in self._shared_initializers.items():
+            sess_options.add_initializer(name, value)
+        # Older builds cannot share the pre-packed weights.
+        self._prepacked_weights_container = (
+            C.PrepackedWeightsContainer()
+            if self._shared_initializers and hasattr(C, "PrepackedWeightsContainer")
+            else None
+        )
+
+        self._sessions = []
+        for _ in range(pool_size):
+            sess = InferenceSession(
+                path_or_bytes,
+                sess_options,
+                providers,
+                provider_options,
+                prepacked_weights_container=self._prepacked_weights_container,
+                **kwargs,
+            )
+            if warmup_feed is not None:
+                sess.run(None, warmup_feed)
+            else:
+                InferenceSessionPool._warm_up(sess)
+            self._sessions.append(sess)
+
+        self._condition = threading.Condition()
+        # The most recently released session is leased first, its memory is more likely to be in cache.
+        self._idle = list(reversed(range(pool_size)))
+        self._stats = [InferenceSessionPool._Stats(latency_window) for _ in range(pool_size)]
+        self._waiting = 0
+        self._max_waiting = 0
+        self._leases = 0
+        self._total_wait_time = 0.0
+
+    @staticmethod
+    def _load_shared_initializers(path_or_bytes):
+        try:
+            import onnx
+            from onnx import numpy_helper
+        except ImportError:
+            warnings.warn("onnx is not installed, so the sessions of the pool do not share the initializers.")
+            return {}
+
+        try:
+            if isinstance(path_or_bytes, (str, os.PathLike)):
+                model = onnx.load(path_or_bytes)
+            else:
+                model = onnx.load_model_from_string(bytes(path_or_bytes))
+        except Exception:
+            # The model is not in ONNX format, like a model in ORT format.
+            warnings.warn("The model could not be loaded by onnx, so the sessions of the pool do not share weights.")
+            return {}
+
+        numpy_tensor_types = {
+            onnx.TensorProto.FLOAT,
+            onnx.TensorProto.FLOAT16,
+            onnx.TensorProto.DOUBLE,
+            onnx.TensorProto.INT8,
+            onnx.TensorProto.INT16,
+            onnx.TensorProto.INT32,
+            onnx.TensorProto.INT64,
+            onnx.TensorProto.UINT8,
+            onnx.TensorProto.UINT16,
+            onnx.TensorProto.UINT32,
+            onnx.TensorProto.UINT64,
+            onnx.TensorProto.BOOL,
+        }
+        shared_initializers = {}
+        for initializer in model.graph.initializer:
+            if initializer.data_type not in numpy_tensor_types:
+                continue
+            value = numpy_helper.to_array(initializer)
+            if value.nbytes >= InferenceSessionPool._min_shared_initializer_size:
+                shared_initializers[initializer.name] = OrtValue.ortvalue_from_numpy(value)
+        return shared_initializers
+
+    @staticmethod
+    def _warm_up(sess):
+        input_feed = {}
+        for node_arg in sess.get_inputs():
+            dtype = InferenceSessionPool._warmup_dtypes.get(node_arg.type)
+            if dtype is None:
+                return
+            shape = [dim if isinstance(dim, int) and dim >= 0 else 1 for dim in node_arg.shape]
+            input_feed[node_arg.name] = np.zeros(shape, dtype=dtype)
+        try:
+            sess.run(None, input_feed)
+        except Exception as e:
+            warnings.warn(f"The session could not be warmed up with zeros, pass warmup_feed instead: {e}")
+
+    @property
+    def pool_size(self) -> int:
+        "Number of sessions of the pool."
+        return len(self._sessions)
+
+    @contextlib.contextmanager
+    def lease(self, timeout: float | None = None):
+        """
+        Lease an idle session of the pool for the duration of the with statement, waiting for one if all are in use.
+        The session must not be used after the with statement.
+
+        :param timeout: maximum time in seconds to wait for an idle session, or None to wait indefinitely.
+        :raises TimeoutError: if no session was available within the timeout.
+        """
+        start = time.perf_counter()
+        with self._condition:
+            self._waiting += 1
+            self._max_waiting = max(self._max_waiting, self._waiting)
+            try:
+                if not self._condition.wait_for(lambda: self._idle, timeout):
+                    raise TimeoutError(f"No session of the pool was available within {timeout} seconds.")
+            finally:
+                self._waiting -= 1
+            index = self._idle.pop()
+            self._stats[index].in_use = True
+            self._leases += 1
+            leased = time.perf_counter()
+            self._total_wait_time += leased - start
+
+        try:
+            yield self._sessions[index]
+        finally:
+            latency = time.perf_counter() - leased
+            with self._condition:
+                stats = self._stats[index]
+                stats.in_use = False
+                stats.runs += 1
+                stats.total_latency += latency
+                stats.max_latency = max(stats.max_latency, latency)
+                stats.latencies.append(latency)
+                self._idle.append(index)
+                self._condition.notify()
+
+    def run(self, output_names, input_feed, run_options=None, timeout: float | None = None):
+        """
+        Compute the predictions with an idle session of the pool. It can be called from multiple threads.
+
+        :param output_names: name of the outputs
+        :param input_feed: dictionary ``{ input_name: input_value }``
+        :param run_options: See :class:`onnxruntime.RunOptions`.
+        :param timeout: maximum time in seconds to wait for an idle session, or None to wait indefinitely.
+        :return: list of results like :meth:`Session.run`.
+        """
+        with self.lease(timeout) as sess:
+            return sess.run(output_names, input_feed, run_options)
+
+    def get_stats(self) -> dict[str, Any]:
+        """
+        Return the usage statistics of the pool, to size it under load. Latencies and waiting times are in seconds.
+        The latency of a session is the time it was leased, like the time of a :meth:`run`.
+
+        * ``waiting``: number of threads waiting for a session, which is the queue depth of the pool.
+        * ``max_waiting``: maximum queue depth since the creation of the pool.
+        * ``mean_wait_time``: mean time waited for a session.
+        * ``sessions``: list of the statistics of each session: ``in_use``, ``runs``, ``mean_latency``,
+          ``max_latency`` and the percentiles ``p50_latency``, ``p90_latency`` and ``p99_latency`` of the latest runs.
+        """
+        with self._condition:
+            sessions = []
+            for stats in self._stats:
+                if stats.latencies:
+                    p50, p90, p99 = np.percentile(stats.latencies, [50, 90, 99]).tolist()
+                else:
+                    p50 = p90 = p99 = 0.0
+                sessions.append(
+                    {
+                        "in_use": stats.in_use,
+                        "runs": stats.runs,
+                        "mean_latency": stats.total_latency / stats.runs if stats.runs else 0.0,
+                        "max_latency": stats.max_latency,
+                        "p50_latency": p50,
+                        "p90_latency": p90,
+                        "p99_latency": p99,
+                    }
+                )
+            return {
+                "waiting": self._waiting,
+                "max_waiting": self._max_waiting,
+                "mean_wait_time": self._total_wait_time / self._leases if self._leases else 0.0,
+                "sessions": sessions,
+            }
+
+
+class TuningResultsDatabase:
+    """
+    A directory of tuning results of sessions, to reuse the kernels tuned by a session in other processes and hosts.
+
+    Results are stored per model, execution providers and their device ids, in a JSON file with the format of
+    :meth:`onnxruntime.InferenceSession.get_tuning_results`. Results tuned on other device models or with other
+    versions of onnxruntime are kept apart by their validators, and rejected when a session loads them. Processes
+    writing to the same database lock the file they update, and readers see either the previous or the updated
+    content.
+
+    ::
+
+        sess = InferenceSession("model.onnx", sess_options, providers, tuning_results_db="/shared/tuning_db")
+        # the session is created with the stored results, and adds the ones it tuned when it is destroyed.
+    """
+
+    def __init__(self, path: str | os.PathLike):
+        self.path = os.fspath(path)
+        os.makedirs(self.path, exist_ok=True)
+
+    @staticmethod
+    def get_model_hash(path_or_bytes: str | bytes | os.PathLike | memoryview) -> str:
+        h = hashlib.sha256()
+        if isinstance(path_or_bytes, (str, os.PathLike)):
+            with open(path_or_bytes, "rb") as model_file:
+                for chunk in iter(lambda: model_file.read(1 << 24), b""):
+                    h.update(chunk)
+        else:
+            h.update(path_or_bytes)
+        return h.hexdigest()
+
+    @staticmethod
+    def get_key(model_hash: str, providers: Sequence[str], provider_options: dict[str, dict[str, str]]) -> str:
+        """
+        Returns the key of the tuning results of a model on execution providers. Only the type and the device id of
+        the execution providers are part of the key. Other provider options, like the tunable op options or pointers
+        to streams, do not change the kernels to use, and the validators of the results check the rest.
+        """
+        signature = {
+            "model": model_hash,
+            "providers": [
+                [provider, str(provider_options.get(provider, {}).get("device_id", ""))] for provider in providers
+            ],
+        }
+        return hashlib.sha256(json.dumps(signature, sort_keys=True).encode()).hexdigest()
+
+    def _get_path(self, key: str) -> str:
+        return os.path.join(self.path, key + ".json")
+
+    def load(self, key: str) -> list[dict[str, Any]]:
+        """Returns the tuning results stored for a key, or an empty list."""
+        try:
+            with open(self._get_path(key)) as results_file:
+                return json.load(results_file)
+        except FileNotFoundError:
+            return []
+        except ValueError:
+            warnings.warn(f"Ignoring invalid tuning results file {self._get_path(key)}.")
+            return []
+
+    def store(self, key: str, tuning_results: list[dict[str, Any]]) -> bool:
+        """
+        Adds tuning results to the results stored for a key. Results already stored for an op and its parameters are
+        kept. Returns whether the stored results changed.
+        """
+        with self._lock(key):
+            stored = self.load(key)
+            merged = TuningResultsDatabase._merge(stored, tuning_results)
+            if merged == stored:
+                return False
+            temp_path = f"{self._get_path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                with open(temp_path, "w") as results_file:
+                    json.dump(merged, results_file)
+                os.replace(temp_path, self._get_path(key))
+            except BaseException:
+                with contextlib.suppress(OSError):
+                    os.remove(temp_path)
+                raise
+        return True
+
+    @staticmethod
+    def _merge(stored, tuning_results):
+        merged = [{"ep": trs["ep"], "validators": trs["validators"], "results": dict(trs["results"])} for trs in stored]
+        for trs in tuning_results:
+            target = next(
+                (m for m in merged if m["ep"] == trs["ep"] and m["validators"] == trs["validators"]),
+                None,
+            )
+            if target is None:
+                target = {"ep": trs["ep"], "validators": trs["validators"], "results": {}}
+                merged.append(target)
+            for op_sig, kernel_map in trs["results"].items():
+                target_map = target["results"].setdefault(op_sig, {})
+                target["results"][op_sig] = {**kernel_map, **target_map}
+        return merged
+
+    @contextlib.contextmanager
+    def _lock(self, key: str):
+        with open(self._get_path(key) + ".lock", "a+b") as lock_file:
+            if os.name == "nt":
+                import msvcrt
+
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                try:
+                    yield
+                finally:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _save_session_results(self, state):
+        # Called when a session is destroyed or re-created, state has the C session and its key.
+        sess = state.pop("sess", None)
+        if sess is None:
+            return
+        try:
+            tuning_results = sess.get_tuning_results()
+            if tuning_results:
+                self.store(state["key"], tuning_results)
+        except Exception as e:
+            warnings.warn(f"Failed to save tuning results to {self.path}: {e}")
+
+
 class IOBinding:
     """
     This class provides API to bind input/output to a specified device, e.g. GPU.
@@ -1017,6 +1698,30 @@ class SparseTensor:
             )
         )
 
+    @staticmethod
+    def sparse_blocksparse_from_numpy(dense_shape, values, blocksparse_indices, ort_device):
+        """
+        Factory method to construct a SparseTensor in BlockSparse format from given arguments
+
+        :param dense_shape: 1-D numpy array(int64) or a python list that contains a dense_shape of the
+            sparse tensor must be on cpu memory
+        :param values: a contiguous, homogeneous numpy array of shape (num_blocks, block_size, block_size)
+            that contains the blocks with non-zero elements.
+        :param blocksparse_indices: contiguous numpy array(int32) of shape (2, num_blocks) that contains
+            the block row indices followed by the block column indices of the blocks.
+        :param ort_device: - describes the backing memory owned by the supplied nummpy arrays. Only CPU memory is
+            suppored for non-numeric data types.
+
+        For primitive types, the method will map values and indices arrays into native memory and will use them as
+        backing storage. It will increment the reference count and it will decrement then count when it is GCed.
+        The buffers may reside in any storage either CPU or GPU.
+        For strings and objects, it will create a copy of the arrays in CPU memory as ORT does not support those
+        on other devices and their memory can not be mapped.
+        """
+        return SparseTensor(
+            C.SparseTensor.blocksparse_from_numpy(dense_shape, values, blocksparse_indices, ort_device._get_c_device())
+        )
+
     def values(self):
         """
         The method returns a numpy array that is backed by the native memory
@@ -1056,7 +1761,7 @@ class SparseTensor:
 
     def as_blocksparse_view(self):
         """
-        The method will return coo representation of the sparse tensor which will enable
+        The method will return BlockSparse representation of the sparse tensor which will enable
         querying BlockSparse indices. If the instance did not contain BlockSparse format, it would throw.
         You can query coo indices as:
 
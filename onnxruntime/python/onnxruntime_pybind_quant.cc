@@ -53,6 +53,8 @@ void QuantizeMatMul4BitsBlockwise(
   py::buffer_info scale_buf = scale.request();
   py::buffer_info zp_buf = zero_points.request();
 
+  // The buffers are owned by the caller, release the GIL so that several weights can be quantized concurrently.
+  py::gil_scoped_release release;
   MlasQuantizeBlockwise<T, 4>(
       reinterpret_cast<uint8_t*>(dst_buf.ptr),
       reinterpret_cast<T*>(scale_buf.ptr),
@@ -85,6 +87,7 @@ bool QuantizeQDQMatMul4BitsBlockwise(
   py::buffer_info scale_buf = scale.request();
   py::buffer_info zp_buf = zero_points.request();
 
+  py::gil_scoped_release release;
   return MlasQDQQuantizeBlockwise<T, 4>(
       reinterpret_cast<const T*>(src_buf.ptr),
       reinterpret_cast<T*>(scale_buf.ptr),
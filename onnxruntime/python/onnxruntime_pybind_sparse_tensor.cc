@@ -48,7 +48,10 @@ struct MakeDType {
 /// <returns>numpy array</returns>
 py::array MakeNumpyArrayFromIndices(const Tensor& indices, const py::object& parent) {
   // See https://github.com/pybind/pybind11/issues/2271 for more information on parent
-  py::array result(indices.Shape().GetDims(), indices.Data<int64_t>(), parent);
+  // BlockSparse indices are int32_t, COO and CSR(C) indices are int64_t
+  py::array result = indices.IsDataType<int32_t>()
+                         ? py::array(indices.Shape().GetDims(), indices.Data<int32_t>(), parent)
+                         : py::array(indices.Shape().GetDims(), indices.Data<int64_t>(), parent);
   assert(!result.owndata());
   // Set a read-only flag
   PyArray_CLEARFLAGS(reinterpret_cast<PyArrayObject*>(result.ptr()), NPY_ARRAY_WRITEABLE);
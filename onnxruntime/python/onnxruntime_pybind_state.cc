@@ -18,6 +18,7 @@
 #include "core/framework/arena_extend_strategy.h"
 #include "core/framework/data_transfer_utils.h"
 #include "core/framework/data_types_internal.h"
+#include "core/framework/prepacked_weights_container.h"
 #include "core/framework/provider_options_utils.h"
 #include "core/framework/random_seed.h"
 #include "core/framework/sparse_tensor.h"
@@ -1995,6 +1996,9 @@ including arg name, arg type (contains both type and shape).)pbdoc")
             return arr; }, "node shape (assuming the node holds a tensor)");
 
   py::class_<SessionObjectInitializer> sessionObjectInitializer(m, "SessionObjectInitializer");
+  py::class_<PrepackedWeightsContainer>(m, "PrepackedWeightsContainer",
+                                        R"pbdoc(Container of pre-packed weights shared between sessions.)pbdoc")
+      .def(py::init<>());
   py::class_<PyInferenceSession>(m, "InferenceSession", R"pbdoc(This is the main class used to run a model.)pbdoc")
       // In Python3, a Python bytes object will be passed to C++ functions that accept std::string or char*
       // without any conversion. So this init method can be used for model file path (string) and model content (bytes)
@@ -2030,6 +2034,45 @@ including arg name, arg type (contains both type and shape).)pbdoc")
 
         return sess;
       }))
+      // Model content in an object supporting the buffer protocol, like memoryview or mmap.mmap.
+      // The model is parsed from the buffer directly, without copying it into a Python bytes object first.
+      .def(py::init([](const PySessionOptions& so, const py::buffer& model_buffer, bool load_config_from_model = false) {
+        Py_buffer view;
+        if (PyObject_GetBuffer(model_buffer.ptr(), &view, PyBUF_SIMPLE) != 0) {
+          throw py::error_already_set();
+        }
+        std::unique_ptr<Py_buffer, decltype(&PyBuffer_Release)> view_releaser(&view, PyBuffer_Release);
+
+        auto env = GetEnv();
+        std::unique_ptr<PyInferenceSession> sess;
+        if (load_config_from_model) {
+#if !defined(ORT_MINIMAL_BUILD)
+          sess = std::make_unique<PyInferenceSession>(std::move(env), so, view.buf, narrow<int>(view.len));
+
+          RegisterCustomOpDomains(sess.get(), so);
+
+          OrtPybindThrowIfError(sess->GetSessionHandle()->Load());
+#else
+          ORT_THROW("Loading configuration from an ONNX model is not supported in this build.");
+#endif
+        } else {
+          sess = std::make_unique<PyInferenceSession>(std::move(env), so);
+#if !defined(ORT_MINIMAL_BUILD) || defined(ORT_MINIMAL_BUILD_CUSTOM_OPS)
+          RegisterCustomOpDomains(sess.get(), so);
+#endif
+          OrtPybindThrowIfError(sess->GetSessionHandle()->Load(view.buf, narrow<int>(view.len)));
+        }
+
+        return sess;
+      }))
+      .def(
+          "add_prepacked_weights_container",
+          [](PyInferenceSession* sess, PrepackedWeightsContainer* prepacked_weights_container) {
+            OrtPybindThrowIfError(sess->GetSessionHandle()->AddPrePackedWeightsContainer(prepacked_weights_container));
+          },
+          py::keep_alive<1, 2>(),
+          R"pbdoc(Share the pre-packed weights of the shared initializers with other sessions using the same container.
+It must be called before the session is initialized.)pbdoc")
       .def(
           "initialize_session",
           [ep_registration_fn](PyInferenceSession* sess,
@@ -239,11 +239,24 @@ struct PyInferenceSession {
       sess_ = std::make_unique<InferenceSession>(so.value, *env_, buffer);
     }
   }
+
+  PyInferenceSession(std::shared_ptr<Environment> env, const PySessionOptions& so, const void* model_data,
+                     int model_data_len)
+      : env_(std::move(env)) {
+    sess_ = std::make_unique<InferenceSession>(so.value, *env_, model_data, model_data_len);
+  }
 #endif
 
   InferenceSession* GetSessionHandle() const { return sess_.get(); }
 
-  virtual ~PyInferenceSession() = default;
+  virtual ~PyInferenceSession() {
+    // The session waits for its threads to complete. Release the GIL since a thread might need it to invoke
+    // the callback of run_async.
+    if (sess_ && PyGILState_Check()) {
+      pybind11::gil_scoped_release release;
+      sess_.reset();
+    }
+  }
 
  protected:
   PyInferenceSession(std::shared_ptr<Environment> env, std::unique_ptr<InferenceSession> sess)
@@ -1,21 +1,35 @@
 #!/usr/bin/python
 
 import argparse
+import contextlib
 import fnmatch
 import json
+import os
 import subprocess as sp
 from collections import defaultdict
 
 import pandas as pd
 
+from onnxruntime.transformers.profiler import iter_profile_json
 
-def _demangle(name, demangler="c++filt"):
+# Version of the summary that is cached next to a trace. Bump it when the aggregates change.
+_CACHE_VERSION = 2
+
+
+def _demangle(names, demangler="c++filt"):
+    """
+    Demangles the given names with a single call of the demangler, which reads one name per line from stdin.
+    Returns a dictionary of name to demangled name. Names are returned as is if the demangler fails.
+    """
+    names = list(names)
     try:
-        with sp.Popen([demangler, name], stdin=sp.PIPE, stdout=sp.PIPE) as proc:
-            out, _ = proc.communicate()
-            return out.decode("utf-8").strip()
+        proc = sp.run([demangler], input="\n".join(names).encode("utf-8"), stdout=sp.PIPE, check=True)
+        demangled_names = proc.stdout.decode("utf-8").splitlines()
+        if len(demangled_names) == len(names):
+            return dict(zip(names, (demangled.strip() for demangled in demangled_names)))
     except Exception:
-        return name
+        pass
+    return {name: name for name in names}
 
 
 def _get_args():
@@ -72,6 +86,12 @@ def _get_args():
         action="store_true",
         help="Whether dump op-kernel correlation",
     )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="Save a summary of the trace next to the trace file as <input>.summary.json. "
+        "Later runs with --cache read the summary instead of parsing the trace again while the trace does not change.",
+    )
 
     args = parser.parse_args()
     return args
@@ -90,15 +110,27 @@ def _shape_to_string(shape):
     return res
 
 
-def _json_to_df(data, filter_matcher):
-    cpu_entries = []
-    gpu_entries = []
+_LAUNCH_DIMENSIONS = ("block_x", "block_y", "block_z", "grid_x", "grid_y", "grid_z")
+_CPU_COLUMNS = ["run", "event_name", "name", "input_type_shape", "output_type_shape", "duration", "count"]
+_GPU_COLUMNS = ["run", "name", "dimensions", "op_name", "input_type_shape", "duration", "count"]
 
-    most_recent_kernel_launch_event = None
-    num_missing_kernel_launch_events = 0
-    total_kernel_events = 0
 
-    for item in data:
+def _aggregate_events(events):
+    """
+    Reduces the events to the total duration and count of each CPU op and GPU kernel per model run, op,
+    input shapes and launch dimensions, so that the events do not need to be kept in memory.
+    Returns a tuple of CPU and GPU rows with _CPU_COLUMNS and _GPU_COLUMNS and the number of model_run events.
+    """
+    cpu_stats = defaultdict(lambda: [0, 0])
+    gpu_stats = defaultdict(lambda: [0, 0])
+    run = 0
+    most_recent_input_type_shape = "unknown"
+
+    for item in events:
+        name = item.get("name")
+        if name == "model_run":
+            # events after the n-th model_run event belong to the next run
+            run += 1
         cat = item.get("cat")
         if cat is None:
             continue
@@ -108,62 +140,88 @@ def _json_to_df(data, filter_matcher):
         arg = item.get("args")
         if arg is None:
             continue
-        op_name = arg.get("op_name")
-
-        name = item["name"]
-
-        if not filter_matcher(name) and op_name is not None and not filter_matcher(op_name):
-            continue
 
-        if cat != "Kernel" and not name.endswith("kernel_time"):
+        if cat == "Kernel":
+            # formatted once per aggregate when creating the rows
+            dimensions = tuple(arg.get(key, -1) for key in _LAUNCH_DIMENSIONS)
+            stat = gpu_stats[(run, name, dimensions, arg.get("op_name"), most_recent_input_type_shape)]
+        elif name.endswith("kernel_time"):
+            most_recent_input_type_shape = _shape_to_string(arg["input_type_shape"])
+            stat = cpu_stats[
+                (run, name, arg["op_name"], most_recent_input_type_shape, _shape_to_string(arg["output_type_shape"]))
+            ]
+        else:
             continue
-        if name.endswith("kernel_time"):
-            most_recent_kernel_launch_event = item
+        stat[0] += dur
+        stat[1] += 1
 
-        block_x = arg.get("block_x", -1)
-        block_y = arg.get("block_y", -1)
-        block_z = arg.get("block_z", -1)
-        grid_x = arg.get("grid_x", -1)
-        grid_y = arg.get("grid_y", -1)
-        grid_z = arg.get("grid_z", -1)
+    cpu_rows = [[*key, duration, count] for key, (duration, count) in cpu_stats.items()]
+    gpu_rows = [
+        [run, name, "b{}x{}x{},g{}x{}x{}".format(*dimensions), op_name, input_type_shape, duration, count]
+        for (run, name, dimensions, op_name, input_type_shape), (duration, count) in gpu_stats.items()
+    ]
+    return cpu_rows, gpu_rows, run
 
-        if cat == "Kernel":
-            gpu_entries.append(
-                {
-                    "name": name,
-                    "duration": dur,
-                    "dimensions": f"b{block_x}x{block_y}x{block_z},g{grid_x}x{grid_y}x{grid_z}",
-                    "op_name": op_name,
-                    "input_type_shape": (
-                        _shape_to_string(most_recent_kernel_launch_event["args"]["input_type_shape"])
-                        if most_recent_kernel_launch_event is not None
-                        else "unknown"
-                    ),
-                }
-            )
-            total_kernel_events += 1
-            if gpu_entries[-1]["input_type_shape"] == "unknown" and "hipMem" not in gpu_entries[-1]["name"]:
-                num_missing_kernel_launch_events += 1
-        else:
-            cpu_entries.append(
-                {
-                    "name": item["args"]["op_name"],
-                    "duration": dur,
-                    "input_type_shape": _shape_to_string(item["args"]["input_type_shape"]),
-                    "output_type_shape": _shape_to_string(item["args"]["output_type_shape"]),
-                }
-            )
 
+def _load_aggregates(profile_path, use_cache=False):
+    """
+    Returns the aggregates of the trace as CPU and GPU data frames and the number of model runs.
+    With use_cache, they are saved to <trace>.summary.json, and read from there instead of parsing the trace again
+    as long as the trace has the same size and modification time.
+    """
+    cache_path = profile_path + ".summary.json"
+    stat = os.stat(profile_path)
+    trace_id = [_CACHE_VERSION, stat.st_size, stat.st_mtime_ns]
+    summary = None
+    if use_cache and os.path.isfile(cache_path):
+        try:
+            with open(cache_path, encoding="utf-8") as cache_file:
+                cached = json.load(cache_file)
+            if cached["trace_id"] == trace_id:
+                summary = cached
+        except Exception as e:
+            print(f"WARNING: Ignoring {cache_path}: {e}")
+
+    if summary is None:
+        cpu_rows, gpu_rows, num_model_runs = _aggregate_events(iter_profile_json(profile_path))
+        summary = {"trace_id": trace_id, "cpu": cpu_rows, "gpu": gpu_rows, "num_model_runs": num_model_runs}
+        if use_cache:
+            try:
+                with open(cache_path, "w", encoding="utf-8") as cache_file:
+                    json.dump(summary, cache_file)
+            except OSError as e:
+                print(f"WARNING: Could not save the summary of the trace to {cache_path}: {e}")
+                with contextlib.suppress(OSError):
+                    os.remove(cache_path)
+
+    cpu_df = pd.DataFrame(summary["cpu"], columns=_CPU_COLUMNS)
+    gpu_df = pd.DataFrame(summary["gpu"], columns=_GPU_COLUMNS)
+    return cpu_df, gpu_df, summary["num_model_runs"]
+
+
+def _filter_df(frame, name_column, filter_matcher):
+    def matches(column):
+        values = frame[column].dropna().unique()
+        return frame[column].isin([value for value in values if filter_matcher(value)])
+
+    # An entry is kept if its name matches, or if it has no op_name, or if its op_name matches.
+    return frame[matches(name_column) | frame["op_name"].isna() | matches("op_name")]
+
+
+def _aggregates_to_df(cpu_df, gpu_df, filter_matcher):
+    cpu_df = _filter_df(cpu_df.rename(columns={"name": "op_name"}), "event_name", filter_matcher)
+    cpu_df = cpu_df.rename(columns={"op_name": "name"}).drop(columns=["run", "event_name"])
+    gpu_df = _filter_df(gpu_df, "name", filter_matcher).drop(columns=["run"])
+
+    unknown_shapes = (gpu_df["input_type_shape"] == "unknown") & ~gpu_df["name"].str.contains("hipMem", regex=False)
+    num_missing_kernel_launch_events = gpu_df.loc[unknown_shapes, "count"].sum()
     if num_missing_kernel_launch_events > 0:
+        total_kernel_events = gpu_df["count"].sum()
         print(
             f"WARNING: Could not resolve shapes for {num_missing_kernel_launch_events} of {total_kernel_events} kernels."
         )
 
-    cpu_df = pd.DataFrame(cpu_entries)
-    gpu_df = pd.DataFrame(gpu_entries)
-    cpu_df["count"] = 1
-    gpu_df["count"] = 1
-    return cpu_df, gpu_df
+    return cpu_df.reset_index(drop=True), gpu_df.reset_index(drop=True)
 
 
 def _print_top_hitters(frame, args, target="cpu"):
@@ -188,7 +246,7 @@ def _print_top_hitters(frame, args, target="cpu"):
     frame1["cumulative_dur"] = frame1["duration"].cumsum()
 
     if target.lower() == "gpu":
-        frame1["name"] = frame1["name"].apply(lambda x: _demangle(x, args.demangler))
+        frame1["name"] = frame1["name"].map(_demangle(frame1["name"].unique(), args.demangler))
 
     print(f"\n------ Top {target.upper()} Kernel Times ------")
     print(frame1.round(2).to_string(index=False))
@@ -198,45 +256,36 @@ def _print_top_hitters(frame, args, target="cpu"):
 
 def _print_op_kernel_mapping_info(cpu_df, gpu_df, num_runs, csv=None):
     # Count op occurrences in the selected runs
-    op_counts = defaultdict(int)
-    for op in cpu_df.T.to_dict().values():
-        identifiers = tuple([op["name"], op["input_type_shape"]])
-        op_counts[identifiers] += 1
-
-    # Collect kernel stats: count/duration
-    stat_dict = defaultdict(lambda: defaultdict(float))
-    for kernel in gpu_df.T.to_dict().values():
-        op_name = kernel["op_name"]
-        if op_name is None:  # Only interested in op related kernels
-            continue
-        input_type_shape = kernel["input_type_shape"]
-        kernel_name = kernel["name"]
-        dimensions = kernel["dimensions"]
-        identifiers = tuple([op_name, input_type_shape, kernel_name, dimensions])
-        stat_dict[identifiers]["count"] += 1
-        stat_dict[identifiers]["duration"] += kernel["duration"]
+    op_counts = (
+        cpu_df.groupby(["name", "input_type_shape"])["count"]
+        .sum()
+        .reset_index()
+        .rename(columns={"name": "op_name", "count": "op_count"})
+    )
+
+    # Collect kernel stats: count/duration. Only interested in op related kernels
+    kernel_df = (
+        gpu_df[gpu_df["op_name"].notna()]
+        .groupby(["op_name", "input_type_shape", "name", "dimensions"])[["count", "duration"]]
+        .sum()
+        .reset_index()
+    )
 
     # Create the DataFrame for kernel entries with op correlation info
-    kernel_list = []
-    for identifiers, stat in stat_dict.items():
-        op_name, input_type_shape, kernel_name, dimensions = identifiers
-        op_count = op_counts.get(tuple([op_name, input_type_shape]))
-        if op_count is None:
-            continue
-        kernel_list.append(
-            {
-                "op_name": op_name,
-                "input_type_shape": input_type_shape,
-                "op_count": op_count / num_runs,  # Average op count per run
-                "kernel_name": kernel_name,
-                "kernel_dimensions": dimensions,
-                "kernel_count": stat["count"] / num_runs,  # Average kernel count per run
-                "kernel_avg_dur (us)": stat["duration"] / stat["count"],
-                "kernel_total_dur (us)": stat["duration"] / num_runs,
-            }
-        )
+    df = kernel_df.merge(op_counts, on=["op_name", "input_type_shape"], how="inner")
+    df = pd.DataFrame(
+        {
+            "op_name": df["op_name"],
+            "input_type_shape": df["input_type_shape"],
+            "op_count": df["op_count"] / num_runs,  # Average op count per run
+            "kernel_name": df["name"],
+            "kernel_dimensions": df["dimensions"],
+            "kernel_count": df["count"] / num_runs,  # Average kernel count per run
+            "kernel_avg_dur (us)": df["duration"] / df["count"],
+            "kernel_total_dur (us)": df["duration"] / num_runs,
+        }
+    )
 
-    df = pd.DataFrame(kernel_list)
     df["op_dur (us)"] = df.groupby(["op_name", "input_type_shape"])["kernel_total_dur (us)"].transform("sum")
     df["op_avg_dur (us)"] = df["op_dur (us)"] / df["op_count"]
     df = df.sort_values(
@@ -271,17 +320,15 @@ def _construct_filter_matcher(args):
     return _match_item
 
 
-def _split_data_across_runs(data, start=1, end=None):
+def _select_runs(cpu_df, gpu_df, total_num_runs, start=1, end=None):
     """
-    Splits the traces according to model runs they belong to.
+    Selects the aggregates of the model runs to analyze.
     By default, we skip the first model run (run 0) and consider all subsequent runs.
     """
     # Here we assume that the traces are properly ordered, so we can simplify the splitting logic.
-    model_run_splits = [i for i, item in enumerate(data) if item.get("name") == "model_run"]
-    if not model_run_splits:
+    if total_num_runs == 0:
         print('WARNING: Could not find "model_run" event in trace. Using entire traces.')
-        return data
-    total_num_runs = len(model_run_splits)
+        return cpu_df, gpu_df, 1
     print(f"Found {total_num_runs} model_run events in trace.")
 
     assert -total_num_runs <= start < total_num_runs, f"Invalid start index {start}."
@@ -297,26 +344,19 @@ def _split_data_across_runs(data, start=1, end=None):
     assert num_runs > 0, "No valid model runs are included in the split."
     print(f"Analyzing {num_runs} model run(s): {start}-{end - 1}.")
 
-    # Add index 0 in case user wants to include the first model run.
-    model_run_splits = [0, *model_run_splits]
-    return data[model_run_splits[start] : model_run_splits[end]], num_runs
-
+    def select(frame):
+        return frame[(frame["run"] >= start) & (frame["run"] < end)]
 
-def _load_json(profile_path):
-    with open(profile_path, encoding="utf-8") as file_obj:
-        data = json.load(file_obj)
-    if isinstance(data, dict):
-        data = data["traceEvents"]
-    return data
+    return select(cpu_df), select(gpu_df), num_runs
 
 
 def main():
     args = _get_args()
     filter_matcher = _construct_filter_matcher(args)
 
-    data = _load_json(args.input)
-    data, num_runs = _split_data_across_runs(data, args.start, args.end)
-    cpu_df, gpu_df = _json_to_df(data, filter_matcher)
+    cpu_df, gpu_df, total_num_runs = _load_aggregates(args.input, use_cache=args.cache)
+    cpu_df, gpu_df, num_runs = _select_runs(cpu_df, gpu_df, total_num_runs, args.start, args.end)
+    cpu_df, gpu_df = _aggregates_to_df(cpu_df, gpu_df, filter_matcher)
 
     pd.set_option("display.max_colwidth", 120)
     _print_top_hitters(cpu_df, args, target="cpu")
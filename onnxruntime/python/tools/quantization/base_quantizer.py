@@ -19,14 +19,15 @@ except ImportError:
 from .calibrate import TensorData
 from .onnx_model import ONNXModel
 from .quant_utils import (
+    ONNX_INT_TYPE_RANGE,
     ONNX_TYPE_TO_NP_TYPE,
     TENSOR_NAME_QUANT_SUFFIX,
     QuantType,
-    find_by_name,
     model_has_infer_metadata,
     normalize_axis,
     pack_bytes_to_4bit,
     quantize_data,
+    quantize_data_per_channel,
     quantize_nparray,
     save_and_reload_model_with_shape_infer,
     tensor_proto_to_array,
@@ -135,14 +136,14 @@ class BaseQuantizer:
         raise NotImplementedError
 
     def is_input_a_initializer(self, input_name):
-        initializer = find_by_name(input_name, self.model.initializer())
+        initializer = self.model.get_initializer(input_name)
         return initializer is not None
 
     def is_per_channel(self):
         return self.per_channel
 
     def is_valid_quantize_weight(self, weight_name):
-        weight = find_by_name(weight_name, self.model.initializer())
+        weight = self.model.get_initializer(weight_name)
         if weight is not None:
             return weight.data_type in (onnx.TensorProto.FLOAT, onnx.TensorProto.FLOAT16)
         if (not self.enable_subgraph_quantization) or (self.parent is None):
@@ -206,7 +207,7 @@ class BaseQuantizer:
         """
 
         # get bias
-        bias_initializer = find_by_name(bias_name, self.model.initializer())
+        bias_initializer = self.model.get_initializer(bias_name)
         bias_data = tensor_proto_to_array(bias_initializer)
         quantized_bias_name = bias_name + TENSOR_NAME_QUANT_SUFFIX
 
@@ -371,7 +372,7 @@ class BaseQuantizer:
         reduce_range=True,
         keep_float_weight=False,
     ):
-        initializer = find_by_name(weight_name, self.model.initializer())
+        initializer = self.model.get_initializer(weight_name)
         if initializer is None:
             raise ValueError("{} is not an initializer", weight_name)
 
@@ -417,6 +418,119 @@ class BaseQuantizer:
             ),
         )
         reduce_range = quant_overrides_for_channels[0].get("reduce_range", self.reduce_range and reduce_range)
+        # Broadcasting the parameters of a few channels over large channels is slower than quantizing channels one by
+        # one. A min_real_range of another type than a python number could change the float type of some channels.
+        if (
+            weight_qType in ONNX_INT_TYPE_RANGE
+            and weights.size > 0
+            and channel_count >= 16
+            and (self.min_real_range is None or type(self.min_real_range) in (int, float))
+        ):
+            zero_point_list, scale_list, quantized_weights = self._quantize_weight_channels(
+                weights, weight_qType, channel_axis, quant_overrides_for_channels, symmetric, reduce_range
+            )
+        else:
+            zero_point_list, scale_list, quantized_weights = self._quantize_weight_channels_one_by_one(
+                weights, weight_qType, channel_axis, quant_overrides_for_channels, symmetric, reduce_range
+            )
+
+        weights_shape = list(weights.shape)
+        q_weight_name = weight_name + TENSOR_NAME_QUANT_SUFFIX
+        zp_name = weight_name + "_zero_point"
+        scale_name = weight_name + "_scale"
+
+        # Update packed weight, zero point, and scale initializers
+        zero_scale_shape = [initializer.dims[channel_axis]]
+        scale_initializer = onnx.helper.make_tensor(
+            scale_name, initializer.data_type, zero_scale_shape, np.hstack(scale_list).tolist()
+        )
+        zero_initializer = onnx.helper.make_tensor(
+            zp_name, weight_qType, zero_scale_shape, np.hstack(zero_point_list).tolist()
+        )
+
+        self.model.initializer_extend([scale_initializer, zero_initializer])
+
+        if not keep_float_weight:
+            if weight_qType in (onnx.TensorProto.INT4, onnx.TensorProto.UINT4):
+                if quantized_weights.dtype not in (np.int8, np.uint8):
+                    raise RuntimeError(
+                        f"Quantized weights for {q_weight_name} must be 8-bit before packing as 4-bit values."
+                    )
+
+                # We do not use onnx.helper.pack_float32_to_4bit() due to performance.
+                # This can be the difference between a large model taking 30 minutes to quantize vs 5 minutes.
+                packed_data = bytes(pack_bytes_to_4bit(quantized_weights.tobytes()))
+
+                # We only use onnx.helper.make_tensor with raw data due to bug: https://github.com/onnx/onnx/pull/6161
+                q_weight_initializer = onnx.helper.make_tensor(
+                    q_weight_name, weight_qType, weights_shape, packed_data, raw=True
+                )
+                self.model.initializer_extend([q_weight_initializer])
+            else:
+                quantized_weights = np.asarray(
+                    quantized_weights,
+                    dtype=onnx.helper.tensor_dtype_to_np_dtype(weight_qType),
+                ).reshape(initializer.dims)
+                q_weight_initializer = onnx.numpy_helper.from_array(quantized_weights, q_weight_name)
+                self.model.initializer_extend([q_weight_initializer])
+
+        return q_weight_name, zp_name, scale_name
+
+    def _quantize_weight_channels(
+        self, weights, weight_qType, channel_axis, quant_overrides_for_channels, symmetric, reduce_range
+    ):
+        """
+        Quantizes all channels of weights to an integer type at once. The results are identical to the results of
+        _quantize_weight_channels_one_by_one.
+        """
+        channel_count = weights.shape[channel_axis]
+        other_axes = tuple(i for i in range(weights.ndim) if i != channel_axis)
+
+        # Apply overrides of rmin and rmax to the ranges of the channels, and quantize the channels with an explicit
+        # scale and zero point separately.
+        rmin = weights.min(axis=other_axes)
+        rmax = weights.max(axis=other_axes)
+        explicit_channels = []
+        for i, channel_quant_overrides in enumerate(quant_overrides_for_channels):
+            # A single dictionary of overrides applies to all channels.
+            index = i if len(quant_overrides_for_channels) == channel_count else slice(None)
+            if "scale" in channel_quant_overrides and "zero_point" in channel_quant_overrides:
+                explicit_channels.extend(range(channel_count)[index] if isinstance(index, slice) else [index])
+                continue
+            if channel_quant_overrides.get("rmin") is not None:
+                rmin[index] = np.array(channel_quant_overrides["rmin"], dtype=weights.dtype)
+            if channel_quant_overrides.get("rmax") is not None:
+                rmax[index] = np.array(channel_quant_overrides["rmax"], dtype=weights.dtype)
+
+        zero_point, scale, quantized_weights = quantize_data_per_channel(
+            weights, channel_axis, weight_qType, symmetric, reduce_range, self.min_real_range, rmin, rmax
+        )
+        zero_point_list = [zero_point]
+        scale_list = [scale]
+        if explicit_channels:
+            # One element per channel, so that the explicit values keep their types when they are combined.
+            zero_point_list = list(zero_point[:, np.newaxis])
+            scale_list = list(scale[:, np.newaxis])
+            for i in explicit_channels:
+                channel_quant_overrides = quant_overrides_for_channels[
+                    i if len(quant_overrides_for_channels) == channel_count else 0
+                ]
+                zero_point_list[i] = np.array(
+                    channel_quant_overrides["zero_point"], dtype=ONNX_TYPE_TO_NP_TYPE[weight_qType]
+                )
+                scale_list[i] = np.array(channel_quant_overrides["scale"])
+                channel = (slice(None),) * channel_axis + (i,)
+                quantized_weights[channel] = quantize_nparray(
+                    weight_qType, weights[channel], scale_list[i], zero_point_list[i]
+                )
+
+        return zero_point_list, scale_list, quantized_weights
+
+    def _quantize_weight_channels_one_by_one(
+        self, weights, weight_qType, channel_axis, quant_overrides_for_channels, symmetric, reduce_range
+    ):
+        channel_count = weights.shape[channel_axis]
+        num_channel_overrides = len(quant_overrides_for_channels)
         zero_point_list = []
         scale_list = []
         quantized_per_channel_data_list = []
@@ -469,46 +583,7 @@ class BaseQuantizer:
 
         # combine per_channel_data into one
         quantized_weights = np.concatenate(quantized_per_channel_data_list, channel_axis)
-        q_weight_name = weight_name + TENSOR_NAME_QUANT_SUFFIX
-        zp_name = weight_name + "_zero_point"
-        scale_name = weight_name + "_scale"
-
-        # Update packed weight, zero point, and scale initializers
-        zero_scale_shape = [initializer.dims[channel_axis]]
-        scale_initializer = onnx.helper.make_tensor(
-            scale_name, initializer.data_type, zero_scale_shape, np.hstack(scale_list).tolist()
-        )
-        zero_initializer = onnx.helper.make_tensor(
-            zp_name, weight_qType, zero_scale_shape, np.hstack(zero_point_list).tolist()
-        )
-
-        self.model.initializer_extend([scale_initializer, zero_initializer])
-
-        if not keep_float_weight:
-            if weight_qType in (onnx.TensorProto.INT4, onnx.TensorProto.UINT4):
-                if quantized_weights.dtype not in (np.int8, np.uint8):
-                    raise RuntimeError(
-                        f"Quantized weights for {q_weight_name} must be 8-bit before packing as 4-bit values."
-                    )
-
-                # We do not use onnx.helper.pack_float32_to_4bit() due to performance.
-                # This can be the difference between a large model taking 30 minutes to quantize vs 5 minutes.
-                packed_data = bytes(pack_bytes_to_4bit(quantized_weights.tobytes()))
-
-                # We only use onnx.helper.make_tensor with raw data due to bug: https://github.com/onnx/onnx/pull/6161
-                q_weight_initializer = onnx.helper.make_tensor(
-                    q_weight_name, weight_qType, weights_shape, packed_data, raw=True
-                )
-                self.model.initializer_extend([q_weight_initializer])
-            else:
-                quantized_weights = np.asarray(
-                    quantized_weights,
-                    dtype=onnx.helper.tensor_dtype_to_np_dtype(weight_qType),
-                ).reshape(initializer.dims)
-                q_weight_initializer = onnx.numpy_helper.from_array(quantized_weights, q_weight_name)
-                self.model.initializer_extend([q_weight_initializer])
-
-        return q_weight_name, zp_name, scale_name
+        return zero_point_list, scale_list, quantized_weights
 
     def adjust_tensor_ranges(self):
         if self.tensors_range is None:
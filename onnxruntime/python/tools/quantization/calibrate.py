@@ -5,6 +5,7 @@
 # license information.
 # --------------------------------------------------------------------------
 import abc
+import concurrent.futures
 import copy
 import itertools
 import os
@@ -19,7 +20,7 @@ from onnx import ModelProto, TensorProto, helper, numpy_helper
 
 import onnxruntime
 
-from .quant_utils import apply_plot, load_model_with_shape_infer, smooth_distribution
+from .quant_utils import apply_plot, load_model_with_shape_infer
 
 
 def rel_entr(pk: np.ndarray, qk: np.ndarray) -> np.ndarray:
@@ -64,6 +65,150 @@ def entropy(
     return s.astype(pk.dtype)
 
 
+def _get_entropy_threshold(histogram, num_quantized_bins, eps=0.0001, max_chunk_size=2**22):
+    """
+    Scores every candidate threshold of one histogram and returns the one with the lowest KL divergence.
+    Candidates are processed in chunks stored as rows of a padded 2D array. Merged and expanded bins
+    come from cumulative sums, smoothing (see :func:`quant_utils.smooth_distribution`) and :func:`entropy`
+    are evaluated elementwise on the whole chunk. Only the float32 sums are done row by row
+    so that they are accumulated in the same order as when every candidate is scored on its own.
+    It is a module function so that it can be sent to a process pool.
+    """
+    hist = histogram[0]
+    hist_edges = histogram[1]
+    num_bins = hist.size
+    zero_bin_index = num_bins // 2
+    num_half_quantized_bin = num_quantized_bins // 2
+
+    dtype = histogram[1].dtype
+
+    # <------------ num bins ---------------->
+    #        <--- quantized bins ---->
+    # |======|===========|===========|=======|
+    #              zero bin index
+    #        ^                       ^
+    #        |                       |
+    #   start index               end index          (start of iteration)
+    #     ^                             ^
+    #     |                             |
+    #  start index                  end index               ...
+    # ^                                      ^
+    # |                                      |
+    # start index                    end index       (end of iteration)
+
+    half_widths = np.arange(num_half_quantized_bin, zero_bin_index + 1, dtype=np.int64)
+    start_indices = zero_bin_index - half_widths
+    end_indices = np.minimum(zero_bin_index + half_widths + 1, num_bins)
+
+    hist_cumsum = np.zeros(num_bins + 1, dtype=np.int64)
+    np.cumsum(hist, out=hist_cumsum[1:])
+
+    kl_divergence = np.zeros(half_widths.size)
+    chunk_size = max(1, max_chunk_size // max(num_bins, 1))
+    for chunk_start in range(0, half_widths.size, chunk_size):
+        chunk = slice(chunk_start, chunk_start + chunk_size)
+        kl_divergence[chunk] = _entropy_of_candidates(
+            hist, hist_cumsum, start_indices[chunk], end_indices[chunk], num_quantized_bins, eps, dtype
+        )
+
+    min_kl_divergence_idx = np.argmin(kl_divergence)
+    optimal_threshold = (
+        hist_edges[start_indices[min_kl_divergence_idx]],
+        hist_edges[end_indices[min_kl_divergence_idx]],
+    )
+    min_value = histogram[2]
+    max_value = histogram[3]
+    if optimal_threshold[0] < min_value:
+        optimal_threshold = (min_value, optimal_threshold[1])
+    if optimal_threshold[1] > max_value:
+        optimal_threshold = (optimal_threshold[0], max_value)
+    assert hasattr(optimal_threshold[0], "dtype")
+    assert hasattr(optimal_threshold[1], "dtype")
+    return optimal_threshold
+
+
+def _smooth_distributions(dist, valid, lengths, eps):
+    """
+    Row-wise version of :func:`quant_utils.smooth_distribution`,
+    rows which are all zeros are flagged in the returned mask.
+    """
+    is_zeros = (dist == 0) & valid
+    n_zeros = is_zeros.sum(axis=1)
+    n_nonzeros = lengths - n_zeros
+    malformed = n_nonzeros == 0
+
+    eps1 = eps * n_zeros.astype(np.float64) / np.where(malformed, 1, n_nonzeros).astype(np.float64)
+    assert (eps1[~malformed] < 1.0).all(), f"n_zeros={n_zeros}, n_nonzeros={n_nonzeros}, eps1={eps1}"
+
+    smoothed = dist.astype(np.float32)
+    smoothed += np.where(is_zeros, np.float32(eps), np.where(valid, (-eps1).astype(np.float32)[:, None], 0))
+    assert ((smoothed <= 0) & valid)[~malformed].sum() == 0
+    return smoothed, malformed
+
+
+def _entropy_of_candidates(hist, hist_cumsum, start_indices, end_indices, num_quantized_bins, eps, dtype):
+    """
+    KL divergence of a chunk of candidate thresholds, see :func:`_get_entropy_threshold`.
+    """
+    num_candidates = start_indices.size
+    lengths = end_indices - start_indices
+    num_merged_bins = lengths // num_quantized_bins
+    rows = np.arange(num_candidates)
+    positions = np.arange(lengths.max())
+    valid = positions < lengths[:, None]
+
+    # reference distribution p: the sliced histogram with the outliers added to its first and last bins,
+    # consecutive candidates start one bin apart so the slices are a strided view of the histogram
+    padded_hist = np.zeros(hist.size + positions.size, dtype=np.int64)
+    padded_hist[: hist.size] = hist
+    candidate_stride = padded_hist.strides[0] * int(start_indices[1] - start_indices[0]) if num_candidates > 1 else 0
+    sliced = np.lib.stride_tricks.as_strided(
+        padded_hist[start_indices[0] :],
+        shape=(num_candidates, positions.size),
+        strides=(candidate_stride, *padded_hist.strides),
+        writeable=False,
+    )
+    p = np.where(valid, sliced, 0)
+    p[:, 0] += hist_cumsum[start_indices]
+    p[rows, lengths - 1] += hist_cumsum[-1] - hist_cumsum[end_indices]
+
+    # merge the sliced histogram into quantized bins (default 128 bins),
+    # the bins left over after the last full quantized bin are added to it
+    bounds = start_indices[:, None] + np.arange(num_quantized_bins + 1) * num_merged_bins[:, None]
+    quantized_bins = hist_cumsum[bounds[:, 1:]] - hist_cumsum[bounds[:, :-1]]
+    quantized_bins[:, -1] += hist_cumsum[end_indices] - hist_cumsum[bounds[:, -1]]
+
+    # expand quantized bins back into p.size bins, spreading every quantized bin over the non-zero bins of p,
+    # the left over bins stay empty
+    nonzeros_cumsum = np.zeros((num_candidates, positions.size + 1), dtype=np.int64)
+    np.cumsum(p != 0, axis=1, out=nonzeros_cumsum[:, 1:])
+    local_bounds = bounds - start_indices[:, None]
+    norms = nonzeros_cumsum[rows[:, None], local_bounds[:, 1:]] - nonzeros_cumsum[rows[:, None], local_bounds[:, :-1]]
+    expanded_bins = np.zeros(quantized_bins.shape, dtype=np.float64)
+    np.divide(quantized_bins, norms, out=expanded_bins, where=norms != 0)
+    expanded_bins = expanded_bins.astype(np.int64)
+    q = np.zeros(p.shape, dtype=np.int64)
+    q[positions < (num_quantized_bins * num_merged_bins)[:, None]] = np.repeat(
+        expanded_bins.ravel(), np.repeat(num_merged_bins, num_quantized_bins)
+    )
+
+    p, p_malformed = _smooth_distributions(p, valid, lengths, eps)
+    q, q_malformed = _smooth_distributions(q, valid, lengths, eps)
+
+    # sums are accumulated row by row, over the exact length of each candidate
+    p_sums = np.array([np.sum(p[i, : lengths[i]]) for i in range(num_candidates)], dtype=np.float32)
+    q_sums = np.array([np.sum(q[i, : lengths[i]]) for i in range(num_candidates)], dtype=np.float32)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pk = 1.0 * p / p_sums[:, None]
+        qk = 1.0 * q / q_sums[:, None]
+        vec = rel_entr(pk, qk)
+    kl = np.array([np.sum(vec[i, : lengths[i]]) for i in range(num_candidates)], dtype=np.float32)
+
+    divergences = kl.astype(dtype).astype(np.float64)
+    divergences[p_malformed | q_malformed] = np.inf
+    return divergences
+
+
 class TensorData:
     _allowed = frozenset(["avg", "std", "lowest", "highest", "hist", "hist_edges", "bins"])
     _floats = frozenset(["avg", "std", "lowest", "highest", "hist_edges"])
@@ -422,6 +567,7 @@ class MinMaxCalibrater(CalibraterBase):
                 self.max_intermediate_outputs is not None
                 and len(self.intermediate_outputs) == self.max_intermediate_outputs
             ):
+                self.compute_data()
                 self.clear_collected_data()
 
         if len(self.intermediate_outputs) == 0 and self.calibrate_tensors_range is None:
@@ -529,6 +675,8 @@ class HistogramCalibrater(CalibraterBase):
         num_quantized_bins=2048,
         percentile=99.999,
         scenario="same",
+        max_intermediate_outputs=None,
+        num_workers=1,
     ):
         """
         :param model_path: ONNX model to calibrate. It is a model path.
@@ -541,6 +689,11 @@ class HistogramCalibrater(CalibraterBase):
         :param num_quantized_bins: number of quantized bins. Default 128.
         :param percentile: A float number between [0, 100]. Default 99.99.
         :param scenario: see :class:`DistributionCalibrater`
+        :param max_intermediate_outputs: maximum number of intermediate outputs kept in memory before they are
+            merged into the histograms and released. By default, all outputs are kept until the data reader
+            is exhausted. Otherwise, the inputs are kept and run twice (see :meth:`collect_data`), the
+            histograms and the computed ranges are the same.
+        :param num_workers: number of processes used to search the entropy thresholds of the tensors.
         """
         super().__init__(
             model_path,
@@ -560,6 +713,8 @@ class HistogramCalibrater(CalibraterBase):
         self.percentile = percentile
         self.tensors_to_calibrate = None
         self.scenario = scenario
+        self.max_intermediate_outputs = max_intermediate_outputs
+        self.num_workers = num_workers
 
     def augment_graph(self):
         """
@@ -583,30 +738,74 @@ class HistogramCalibrater(CalibraterBase):
     def collect_data(self, data_reader: CalibrationDataReader):
         """
         Entropy Calibrator collects operators' tensors as well as generates tensor histogram for each operator.
+        If max_intermediate_outputs is set, every batch is run twice. The first run only computes the range
+        of every tensor. The second run updates the histograms, binned on that range, every
+        max_intermediate_outputs batches and releases the collected tensors. Peak memory then does not depend
+        on the number of batches, except for the inputs, and the histograms are the same as without
+        max_intermediate_outputs.
         """
         input_names_set = {node_arg.name for node_arg in self.infer_session.get_inputs()}
         output_names = [node_arg.name for node_arg in self.infer_session.get_outputs()]
 
+        if self.max_intermediate_outputs is not None:
+            self._collect_data_in_groups(data_reader, input_names_set, output_names)
+            return
+
         while True:
             inputs = data_reader.get_next()
             if not inputs:
                 break
-            outputs = self.infer_session.run(None, inputs)
-
-            # Copy np.ndarray only for graph outputs that are also graph inputs to workaround bug:
-            # https://github.com/microsoft/onnxruntime/issues/21922
-            fixed_outputs = []
-            for output_index, output in enumerate(outputs):
-                if output_names[output_index] in input_names_set:
-                    fixed_outputs.append(copy.copy(output))
-                else:
-                    fixed_outputs.append(output)
-
-            self.intermediate_outputs.append(fixed_outputs)
+            self.intermediate_outputs.append(self._run(inputs, input_names_set, output_names))
 
         if len(self.intermediate_outputs) == 0:
             raise ValueError("No data is collected.")
 
+        self._create_collector()
+        self.collector.collect(self._merge_intermediate_outputs(output_names))
+
+        self.clear_collected_data()
+
+    def _collect_data_in_groups(self, data_reader, input_names_set, output_names):
+        inputs_list = []
+        value_ranges = {}
+        self._create_collector()
+        while True:
+            inputs = data_reader.get_next()
+            if not inputs:
+                break
+            inputs_list.append(inputs)
+            outputs = dict(zip(output_names, self._run(inputs, input_names_set, output_names)))
+            self.collector.update_value_ranges(
+                value_ranges, {name: outputs[name] for name in output_names if name in self.tensors_to_calibrate}
+            )
+
+        if len(inputs_list) == 0:
+            raise ValueError("No data is collected.")
+
+        def iter_groups():
+            for start in range(0, len(inputs_list), self.max_intermediate_outputs):
+                for inputs in inputs_list[start : start + self.max_intermediate_outputs]:
+                    self.intermediate_outputs.append(self._run(inputs, input_names_set, output_names))
+                merged_dict = self._merge_intermediate_outputs(output_names)
+                self.clear_collected_data()
+                yield merged_dict
+
+        self.collector.collect_in_groups(value_ranges, iter_groups())
+
+    def _run(self, inputs, input_names_set, output_names):
+        outputs = self.infer_session.run(None, inputs)
+
+        # Copy np.ndarray only for graph outputs that are also graph inputs to workaround bug:
+        # https://github.com/microsoft/onnxruntime/issues/21922
+        fixed_outputs = []
+        for output_index, output in enumerate(outputs):
+            if output_names[output_index] in input_names_set:
+                fixed_outputs.append(copy.copy(output))
+            else:
+                fixed_outputs.append(output)
+        return fixed_outputs
+
+    def _merge_intermediate_outputs(self, output_names):
         output_dicts_list = [
             dict(zip(output_names, intermediate_output)) for intermediate_output in self.intermediate_outputs
         ]
@@ -616,8 +815,9 @@ class HistogramCalibrater(CalibraterBase):
             for k, v in d.items():
                 merged_dict.setdefault(k, []).append(v)
 
-        clean_merged_dict = {i: merged_dict[i] for i in merged_dict if i in self.tensors_to_calibrate}
+        return {i: merged_dict[i] for i in merged_dict if i in self.tensors_to_calibrate}
 
+    def _create_collector(self):
         if not self.collector:
             self.collector = HistogramCollector(
                 method=self.method,
@@ -626,10 +826,8 @@ class HistogramCalibrater(CalibraterBase):
                 num_quantized_bins=self.num_quantized_bins,
                 percentile=self.percentile,
                 scenario=self.scenario,
+                num_workers=self.num_workers,
             )
-        self.collector.collect(clean_merged_dict)
-
-        self.clear_collected_data()
 
     def compute_data(self) -> TensorsData:
         """
@@ -661,6 +859,8 @@ class EntropyCalibrater(HistogramCalibrater):
         symmetric=False,
         num_bins=128,
         num_quantized_bins=128,
+        max_intermediate_outputs=None,
+        num_workers=1,
     ):
         """
         :param model_path: ONNX model to calibrate. It is a model path
@@ -671,6 +871,8 @@ class EntropyCalibrater(HistogramCalibrater):
         :param symmetric: make range of tensor symmetric (central point is 0).
         :param num_bins: number of bins to create a new histogram for collecting tensor values.
         :param num_quantized_bins: number of quantized bins. Default 128.
+        :param max_intermediate_outputs: maximum number of intermediate outputs before the histograms are updated.
+        :param num_workers: number of processes used to search the entropy thresholds of the tensors.
         """
         super().__init__(
             model_path,
@@ -681,6 +883,8 @@ class EntropyCalibrater(HistogramCalibrater):
             symmetric=symmetric,
             num_bins=num_bins,
             num_quantized_bins=num_quantized_bins,
+            max_intermediate_outputs=max_intermediate_outputs,
+            num_workers=num_workers,
         )
 
 
@@ -695,6 +899,7 @@ class PercentileCalibrater(HistogramCalibrater):
         symmetric=False,
         num_bins=2048,
         percentile=99.999,
+        max_intermediate_outputs=None,
     ):
         """
         :param model_path: ONNX model to calibrate. It is a model path
@@ -705,6 +910,7 @@ class PercentileCalibrater(HistogramCalibrater):
         :param symmetric: make range of tensor symmetric (central point is 0).
         :param num_quantized_bins: number of quantized bins. Default 128.
         :param percentile: A float number between [0, 100]. Default 99.99.
+        :param max_intermediate_outputs: maximum number of intermediate outputs before the histograms are updated.
         """
         super().__init__(
             model_path,
@@ -715,6 +921,7 @@ class PercentileCalibrater(HistogramCalibrater):
             symmetric=symmetric,
             num_bins=num_bins,
             percentile=percentile,
+            max_intermediate_outputs=max_intermediate_outputs,
         )
 
 
@@ -728,6 +935,7 @@ class DistributionCalibrater(HistogramCalibrater):
         method="distribution",
         num_bins=128,
         scenario="same",
+        max_intermediate_outputs=None,
     ):
         """
         :param model_path: ONNX model to calibrate. It is a model path
@@ -741,6 +949,7 @@ class DistributionCalibrater(HistogramCalibrater):
             the algorithm weights and float 8 follow the same distribution,
             if `scenario="p3"`, it assumes the weights follow
             a gaussian law and float 8 ~ X^3 where X is a gaussian law
+        :param max_intermediate_outputs: maximum number of intermediate outputs before the histograms are updated.
         """
         super().__init__(
             model_path,
@@ -750,6 +959,7 @@ class DistributionCalibrater(HistogramCalibrater):
             method=method,
             num_bins=num_bins,
             scenario=scenario,
+            max_intermediate_outputs=max_intermediate_outputs,
         )
 
 
@@ -784,7 +994,7 @@ class HistogramCollector(CalibrationDataCollector):
                  pytorch_quantization/calib/histogram.html
     """
 
-    def __init__(self, method, symmetric, num_bins, num_quantized_bins, percentile, scenario):
+    def __init__(self, method, symmetric, num_bins, num_quantized_bins, percentile, scenario, num_workers=1):
         self.histogram_dict = {}
         self.method = method
         self.symmetric = symmetric
@@ -792,6 +1002,7 @@ class HistogramCollector(CalibrationDataCollector):
         self.num_quantized_bins = num_quantized_bins
         self.percentile = percentile
         self.scenario = scenario
+        self.num_workers = num_workers
 
     def get_histogram_dict(self):
         return self.histogram_dict
@@ -853,22 +1064,132 @@ class HistogramCollector(CalibrationDataCollector):
                 assert hasattr(old_min, "dtype"), f"old_min should be a numpy array but is {type(old_min)}"
                 assert hasattr(old_max, "dtype"), f"old_min should be a numpy array but is {type(old_max)}"
                 old_hist = old_histogram[0]
-                old_hist_edges = old_histogram[1]
-                temp_amax = np.max(data_arr_np)
-                if temp_amax > old_hist_edges[-1]:
-                    # increase the number of bins
-                    width = old_hist_edges[1] - old_hist_edges[0]
-                    # NOTE: np.arange may create an extra bin after the one containing temp_amax
-                    new_bin_edges = np.arange(old_hist_edges[-1] + width, temp_amax + width, width)
-                    old_hist_edges = np.hstack((old_hist_edges, new_bin_edges))
+                temp_amin = np.min(data_arr_np) if data_arr_np.size > 0 else None
+                temp_amax = np.max(data_arr_np) if data_arr_np.size > 0 else None
+                old_hist_edges, num_prepended_bins = self._extend_absolute_histogram_edges(
+                    old_histogram[1], temp_amin, temp_amax
+                )
                 hist, hist_edges = np.histogram(data_arr_np, bins=old_hist_edges)
                 hist_edges = hist_edges.astype(data_arr_np.dtype)
-                hist[: len(old_hist)] += old_hist
+                hist[num_prepended_bins : num_prepended_bins + len(old_hist)] += old_hist
                 assert (
                     data_arr_np.dtype != np.float64
                 ), "only float32 or float16 is supported, every constant must be explicitly typed"
                 self.histogram_dict[tensor] = (hist, hist_edges, min(old_min, min_value), max(old_max, max_value))
 
+    @staticmethod
+    def _extend_absolute_histogram_edges(old_hist_edges, temp_amin, temp_amax):
+        """
+        Adds bins of the same width to the edges of a histogram of absolute values so that they cover
+        [temp_amin, temp_amax], returns the new edges and the number of bins added before the first edge.
+        """
+        if temp_amin is None:
+            return old_hist_edges, 0
+        width = old_hist_edges[1] - old_hist_edges[0]
+        num_prepended_bins = 0
+        if temp_amin < old_hist_edges[0]:
+            # the first histogram starts at the smallest absolute value it saw, add bins before it
+            num_prepended_bins = int(np.ceil((old_hist_edges[0] - temp_amin) / width))
+            new_bin_edges = old_hist_edges[0] - width * np.arange(num_prepended_bins, 0, -1)
+            old_hist_edges = np.hstack((new_bin_edges, old_hist_edges))
+        if temp_amax > old_hist_edges[-1]:
+            # increase the number of bins
+            # NOTE: np.arange may create an extra bin after the one containing temp_amax
+            new_bin_edges = np.arange(old_hist_edges[-1] + width, temp_amax + width, width)
+            old_hist_edges = np.hstack((old_hist_edges, new_bin_edges))
+        # rounding errors may leave the extreme values just outside the new edges
+        if old_hist_edges[0] > temp_amin:
+            old_hist_edges = np.hstack(([old_hist_edges[0] - width], old_hist_edges))
+            num_prepended_bins += 1
+        if old_hist_edges[-1] < temp_amax:
+            old_hist_edges = np.hstack((old_hist_edges, [old_hist_edges[-1] + width]))
+        return old_hist_edges, num_prepended_bins
+
+    def update_value_ranges(self, value_ranges, name_to_arr):
+        """
+        Updates value_ranges, a dictionary {tensor name: (min value, max value, min absolute value,
+        max absolute value)}, with the values of name_to_arr. The absolute values are None until
+        a non empty array is seen, the minimum and maximum values are then 0.
+        """
+        for tensor, data_arr in name_to_arr.items():
+            data_arr = np.asarray(data_arr)  # noqa: PLW2901
+            value_range = value_ranges.get(tensor)
+            if data_arr.size == 0:
+                if value_range is None:
+                    zero = np.array(0, dtype=data_arr.dtype)
+                    value_ranges[tensor] = (zero, zero, None, None)
+                continue
+
+            abs_data_arr = np.absolute(data_arr)
+            new_range = (np.min(data_arr), np.max(data_arr), np.min(abs_data_arr), np.max(abs_data_arr))
+            if value_range is not None and value_range[2] is not None:
+                new_range = (
+                    np.minimum(value_range[0], new_range[0]),
+                    np.maximum(value_range[1], new_range[1]),
+                    np.minimum(value_range[2], new_range[2]),
+                    np.maximum(value_range[3], new_range[3]),
+                )
+            value_ranges[tensor] = new_range
+
+    def collect_in_groups(self, value_ranges, groups):
+        """
+        Gives the same histograms as :meth:`collect` called once on all the values of every tensor,
+        without keeping them in memory at once. groups yields dictionaries {tensor name: list of arrays}
+        and value_ranges covers all of them (see :meth:`update_value_ranges`). The histograms are binned
+        on these ranges before the groups are read, the histograms of the groups are then added up.
+        """
+        print("Collecting tensor data and making histogram ...")
+
+        if self.method in {"distribution", "entropy"}:
+            absolute = False
+        elif self.method == "percentile":
+            absolute = self.symmetric
+        else:
+            raise ValueError("Only 'entropy', 'percentile' or 'distribution' methods are supported")
+
+        histogram_args = {}
+        for tensor, (min_value, max_value, abs_min, abs_max) in value_ranges.items():
+            empty_arr = np.empty(0, dtype=min_value.dtype)
+            if absolute:
+                if tensor in self.histogram_dict:
+                    old_hist, old_hist_edges, old_min, old_max = self.histogram_dict[tensor]
+                    hist_edges, num_prepended_bins = self._extend_absolute_histogram_edges(
+                        old_hist_edges, abs_min, abs_max
+                    )
+                    hist = np.zeros(len(hist_edges) - 1, dtype=np.intp)
+                    hist[num_prepended_bins : num_prepended_bins + len(old_hist)] += old_hist
+                    self.histogram_dict[tensor] = (
+                        hist,
+                        hist_edges.astype(min_value.dtype),
+                        min(old_min, min_value),
+                        max(old_max, max_value),
+                    )
+                    histogram_args[tensor] = {"bins": hist_edges}
+                else:
+                    # same edges as np.histogram(data_arr, bins=self.num_bins) on all the values
+                    hist_range = None if abs_min is None else (abs_min, abs_max)
+                    hist, hist_edges = np.histogram(empty_arr, bins=self.num_bins, range=hist_range)
+                    self.histogram_dict[tensor] = (hist, hist_edges.astype(min_value.dtype), min_value, max_value)
+                    histogram_args[tensor] = {"bins": self.num_bins, "range": hist_range}
+            else:
+                threshold = np.array(max(abs(min_value), abs(max_value)), dtype=min_value.dtype)
+                if tensor in self.histogram_dict:
+                    self.histogram_dict[tensor] = self.merge_histogram(
+                        self.histogram_dict[tensor], empty_arr, min_value, max_value, threshold
+                    )
+                else:
+                    hist, hist_edges = np.histogram(empty_arr, self.num_bins, range=(-threshold, threshold))
+                    self.histogram_dict[tensor] = (hist, hist_edges, min_value, max_value, threshold)
+                hist, _, _, _, threshold = self.histogram_dict[tensor]
+                histogram_args[tensor] = {"bins": len(hist), "range": (-threshold, threshold)}
+
+        for name_to_arr in groups:
+            for tensor, data_arr in name_to_arr.items():
+                data_arr = np.asarray(data_arr).flatten()  # noqa: PLW2901
+                if absolute:
+                    data_arr = np.absolute(data_arr)  # noqa: PLW2901
+                self.histogram_dict[tensor][0][:] += np.histogram(data_arr, **histogram_args[tensor])[0]
+
     def collect_value(self, name_to_arr):
         """
         Collect histogram on real value
@@ -1003,9 +1324,23 @@ class HistogramCollector(CalibrationDataCollector):
         print(f"Number of histogram bins : {self.num_bins} (The number may increase depends on the data it collects)")
         print(f"Number of quantized bins : {self.num_quantized_bins}")
 
-        for tensor, histogram in histogram_dict.items():
-            optimal_threshold = self.get_entropy_threshold(histogram, num_quantized_bins)
-            thresholds_dict[tensor] = optimal_threshold
+        if self.num_workers > 1 and len(histogram_dict) > 1:
+            # thresholds of different tensors are independent, each process searches the thresholds of some tensors
+            with concurrent.futures.ProcessPoolExecutor(max_workers=self.num_workers) as executor:
+                optimal_thresholds = list(
+                    executor.map(
+                        _get_entropy_threshold,
+                        histogram_dict.values(),
+                        itertools.repeat(num_quantized_bins),
+                        chunksize=max(1, len(histogram_dict) // (4 * self.num_workers)),
+                    )
+                )
+        else:
+            optimal_thresholds = [
+                self.get_entropy_threshold(histogram, num_quantized_bins) for histogram in histogram_dict.values()
+            ]
+
+        for (tensor, histogram), optimal_threshold in zip(histogram_dict.items(), optimal_thresholds):
             thresholds_dict[tensor] = (*optimal_threshold, *histogram[:2])
 
             # Plot histogram for debug only
@@ -1082,89 +1417,7 @@ class HistogramCollector(CalibrationDataCollector):
         `q` is a truncated version of the original distribution.
         Ref: http://on-demand.gputechconf.com/gtc/2017/presentation/s7310-8-bit-inference-with-tensorrt.pdf
         """
-        hist = histogram[0]
-        hist_edges = histogram[1]
-        num_bins = hist.size
-        zero_bin_index = num_bins // 2
-        num_half_quantized_bin = num_quantized_bins // 2
-
-        dtype = histogram[1].dtype
-        kl_divergence = np.zeros(zero_bin_index - num_half_quantized_bin + 1)
-        thresholds = [(np.array(0, dtype=dtype), np.array(0, dtype=dtype)) for i in range(kl_divergence.size)]
-
-        # <------------ num bins ---------------->
-        #        <--- quantized bins ---->
-        # |======|===========|===========|=======|
-        #              zero bin index
-        #        ^                       ^
-        #        |                       |
-        #   start index               end index          (start of iteration)
-        #     ^                             ^
-        #     |                             |
-        #  start index                  end index               ...
-        # ^                                      ^
-        # |                                      |
-        # start index                    end index       (end of iteration)
-
-        for i in range(num_half_quantized_bin, zero_bin_index + 1, 1):
-            start_index = zero_bin_index - i
-            end_index = min(zero_bin_index + i + 1, num_bins)
-
-            thresholds[i - num_half_quantized_bin] = (hist_edges[start_index], hist_edges[end_index])
-
-            sliced_distribution = copy.deepcopy(hist[start_index:end_index])
-
-            # reference distribution p
-            p = sliced_distribution.copy()  # a copy of np array
-            left_outliers_count = sum(hist[:start_index])
-            right_outliers_count = sum(hist[end_index:])
-            p[0] += left_outliers_count
-            p[-1] += right_outliers_count
-
-            # nonzeros[i] incidates whether p[i] is non-zero
-            nonzeros = (p != 0).astype(np.int64)
-
-            # quantize p.size bins into quantized bins (default 128 bins)
-            quantized_bins = np.zeros(num_quantized_bins, dtype=np.int64)
-            num_merged_bins = sliced_distribution.size // num_quantized_bins
-
-            # merge bins into quantized bins
-            for index in range(num_quantized_bins):
-                start = index * num_merged_bins
-                end = start + num_merged_bins
-                quantized_bins[index] = sum(sliced_distribution[start:end])
-            quantized_bins[-1] += sum(sliced_distribution[num_quantized_bins * num_merged_bins :])
-
-            # in order to compare p and q, we need to make length of q equals to length of p
-            # expand quantized bins into p.size bins
-            q = np.zeros(p.size, dtype=np.int64)
-            for index in range(num_quantized_bins):
-                start = index * num_merged_bins
-                end = start + num_merged_bins
-
-                norm = sum(nonzeros[start:end])
-                if norm != 0:
-                    q[start:end] = quantized_bins[index] / norm
-
-            p = smooth_distribution(p)
-            q = smooth_distribution(q)
-            if p is None or q is None:
-                div = np.array(np.inf, dtype=dtype)
-            else:
-                div = np.array(entropy(p, q), dtype=dtype)
-            kl_divergence[i - num_half_quantized_bin] = div
-
-        min_kl_divergence_idx = np.argmin(kl_divergence)
-        optimal_threshold = thresholds[min_kl_divergence_idx]
-        min_value = histogram[2]
-        max_value = histogram[3]
-        if optimal_threshold[0] < min_value:
-            optimal_threshold = (min_value, optimal_threshold[1])
-        if optimal_threshold[1] > max_value:
-            optimal_threshold = (optimal_threshold[0], max_value)
-        assert hasattr(optimal_threshold[0], "dtype")
-        assert hasattr(optimal_threshold[1], "dtype")
-        return optimal_threshold
+        return _get_entropy_threshold(histogram, num_quantized_bins)
 
 
 def create_calibrator(
@@ -1199,6 +1452,8 @@ def create_calibrator(
         num_bins = extra_options.get("num_bins", 128)
         num_quantized_bins = extra_options.get("num_quantized_bins", 128)
         symmetric = extra_options.get("symmetric", False)
+        max_intermediate_outputs = extra_options.get("max_intermediate_outputs", None)
+        num_workers = extra_options.get("num_workers", 1)
         calibrator = EntropyCalibrater(
             model,
             op_types_to_calibrate,
@@ -1207,12 +1462,15 @@ def create_calibrator(
             symmetric=symmetric,
             num_bins=num_bins,
             num_quantized_bins=num_quantized_bins,
+            max_intermediate_outputs=max_intermediate_outputs,
+            num_workers=num_workers,
         )
     elif calibrate_method == CalibrationMethod.Percentile:
         # default settings for percentile algorithm
         num_bins = extra_options.get("num_bins", 2048)
         percentile = extra_options.get("percentile", 99.999)
         symmetric = extra_options.get("symmetric", True)
+        max_intermediate_outputs = extra_options.get("max_intermediate_outputs", None)
         calibrator = PercentileCalibrater(
             model,
             op_types_to_calibrate,
@@ -1221,12 +1479,14 @@ def create_calibrator(
             symmetric=symmetric,
             num_bins=num_bins,
             percentile=percentile,
+            max_intermediate_outputs=max_intermediate_outputs,
         )
 
     elif calibrate_method == CalibrationMethod.Distribution:
         # default settings for percentile algorithm
         num_bins = extra_options.get("num_bins", 2048)
         scenario = extra_options.get("scenario", "same")
+        max_intermediate_outputs = extra_options.get("max_intermediate_outputs", None)
 
         calibrator = DistributionCalibrater(
             model,
@@ -1235,6 +1495,7 @@ def create_calibrator(
             use_external_data_format=use_external_data_format,
             num_bins=num_bins,
             scenario=scenario,
+            max_intermediate_outputs=max_intermediate_outputs,
         )
 
     if calibrator:
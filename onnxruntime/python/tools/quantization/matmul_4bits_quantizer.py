@@ -7,8 +7,11 @@
 from __future__ import annotations
 
 import argparse
+import collections
+import concurrent.futures
 import copy
 import importlib
+import itertools
 import logging
 import os
 
@@ -19,6 +22,13 @@ from onnx.onnx_pb import GraphProto, ModelProto, NodeProto, TensorProto
 from packaging import version
 
 from onnxruntime.capi._pybind_state import quantize_matmul_4bits, quantize_qdq_matmul_4bits
+from onnxruntime.transformers.external_data import (
+    copy_external_data,
+    get_all_tensors,
+    get_external_data_files_not_loaded,
+    is_external_data_not_loaded,
+    set_external_data_location,
+)
 
 from .calibrate import CalibrationDataReader
 from .onnx_model import ONNXModel
@@ -233,8 +243,10 @@ class HQQWeightOnlyQuantizer:
     def __init__(
         self,
         config: HQQWeightOnlyQuantConfig,
+        external_data_dir: str = "",
     ):
         self.config = config
+        self.external_data_dir = external_data_dir
 
     # Proximal solver || weight - dequantize(quantize(weight))||_p^p
     @staticmethod
@@ -393,10 +405,10 @@ class HQQWeightOnlyQuantizer:
             logger.info("MatMul doesn't have const weight. Skip to quantize")
             return [node]  # only care about constant weight
 
-        b_array = onnx.numpy_helper.to_array(b_pb)
-        if len(b_array.shape) != 2:
+        if len(b_pb.dims) != 2:
             logger.info("MatMul weight is not 2D. Skip to quantize")
             return [node]  # can only process 2-D matrix
+        b_array = get_initializer_array(b_pb, self.external_data_dir)
         b_array_torch = torch.from_numpy(b_array)
         if torch.cuda.is_available():
             b_array_torch = b_array_torch.cuda()
@@ -471,9 +483,27 @@ def get_initializer(name, graph_path: list[GraphProto]) -> tuple[TensorProto, Gr
     return None, None
 
 
+def get_initializer_array(tensor: TensorProto, base_dir: str = "") -> np.ndarray:
+    """
+    Converts an initializer to a numpy array. Unlike onnx.numpy_helper.to_array, an initializer stored
+    in external data is read directly from its file and is not loaded into the TensorProto.
+    """
+    if not onnx.external_data_helper.uses_external_data(tensor):
+        return onnx.numpy_helper.to_array(tensor)
+
+    info = onnx.external_data_helper.ExternalDataInfo(tensor)
+    dtype = onnx.helper.tensor_dtype_to_np_dtype(tensor.data_type)
+    count = int(np.prod(tensor.dims)) if info.length is None else info.length // np.dtype(dtype).itemsize
+    array = np.fromfile(os.path.join(base_dir, info.location), dtype=dtype, count=count, offset=info.offset or 0)
+    return array.reshape(tuple(tensor.dims))
+
+
 class DefaultWeightOnlyQuantizer:
-    def __init__(self, config: DefaultWeightOnlyQuantConfig):
+    def __init__(self, config: DefaultWeightOnlyQuantConfig, external_data_dir: str = ""):
         self.config = config
+        self.external_data_dir = external_data_dir
+        # weights quantized ahead of time, see MatMul4BitsQuantizer num_workers
+        self.quantized_weights = {}
 
     def int4_block_quant(self, fp32weight: npt.ArrayLike) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
         """4b quantize fp32 weight to int4 using C++ kernels."""
@@ -509,6 +539,10 @@ class DefaultWeightOnlyQuantizer:
 
         return (packed, scales, zero_point)
 
+    def quantize_initializer(self, tensor: TensorProto) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Reads the 2D weight of a MatMul node and quantizes it, it only reads the TensorProto."""
+        return self.int4_block_quant(get_initializer_array(tensor, self.external_data_dir))
+
     def quantize_matmul(self, node: NodeProto, graph_stack: list[GraphProto]) -> list[NodeProto]:
         """
         Quantize weight B of MatMul node to int4.
@@ -521,18 +555,21 @@ class DefaultWeightOnlyQuantizer:
             logger.info("MatMul doesn't have const weight. Skip to quantize")
             return [node]  # only care about constant weight
 
-        b_ndarray = onnx.numpy_helper.to_array(b_tensor)
-        if len(b_ndarray.shape) != 2:
+        if len(b_tensor.dims) != 2:
             logger.info("MatMul weight is not 2D. Skip to quantize")
             return [node]  # can only process 2-D matrix
+        b_shape = tuple(b_tensor.dims)
 
-        packed, scales, zero_points = self.int4_block_quant(b_ndarray)
+        if input_b in self.quantized_weights:
+            packed, scales, zero_points = self.quantized_weights.pop(input_b)
+        else:
+            packed, scales, zero_points = self.quantize_initializer(b_tensor)
 
         if self.config.quant_format == QuantFormat.QOperator:
             b_quant = onnx.numpy_helper.from_array(packed, b_tensor.name + "_Q4")
             scales_tensor = onnx.numpy_helper.from_array(scales, b_tensor.name + "_scales")
         else:
-            b_quant = onnx.helper.make_tensor(b_tensor.name + "_DQ_Q4", qtype, b_ndarray.shape, packed.tobytes(), True)
+            b_quant = onnx.helper.make_tensor(b_tensor.name + "_DQ_Q4", qtype, b_shape, packed.tobytes(), True)
             scales_tensor = onnx.numpy_helper.from_array(scales, b_tensor.name + "_DQ_scales")
 
         for input in b_graph.input:
@@ -551,7 +588,7 @@ class DefaultWeightOnlyQuantizer:
                 input_names.append(zp_tensor.name)
                 b_graph.initializer.extend([zp_tensor])
             kwargs = {}
-            rows, cols = b_ndarray.shape
+            rows, cols = b_shape
             kwargs["K"] = rows
             kwargs["N"] = cols
             kwargs["bits"] = 4
@@ -697,7 +734,7 @@ class DefaultWeightOnlyQuantizer:
             logger.info("Gather doesn't have const weight. Skip quantization.")
             return [node]  # only care about constant weight
 
-        data_ndarray = onnx.numpy_helper.to_array(data_tensorproto)
+        data_ndarray = get_initializer_array(data_tensorproto, self.external_data_dir)
         data_rank = len(data_ndarray.shape)
         quantize_axis = self.config.quant_axes.get("Gather", 1)
         block_size = self.config.block_size
@@ -796,6 +833,13 @@ class MatMul4BitsQuantizer:
     Note:
       - for quantized gather, the memory usage of "DequantizeLinear + Gather" is the same as the original Gather
         during runtime. Therefor it is not recommended.
+      - with the DEFAULT and HQQ algorithms, a model given as a path is loaded without its external data. Each
+        weight is read from the external data file when it is quantized. See process() for the initializers
+        which are not quantized.
+      - with the DEFAULT algorithm and num_workers > 1, the weights of the MatMul nodes are read and quantized
+        by a pool of num_workers threads, at most num_workers weights ahead of the node being replaced.
+        The HQQ algorithm quantizes the weights one at a time with torch, on the GPU when it is available,
+        and ignores num_workers.
     """
 
     def __init__(
@@ -810,11 +854,13 @@ class MatMul4BitsQuantizer:
         op_types_to_quantize: tuple[str, ...] | None = None,
         quant_axes: tuple[tuple[str, int], ...] | None = None,
         algo_config: WeightOnlyQuantConfig | None = None,
+        num_workers: int = 1,
     ):
         if nodes_to_exclude is None:
             nodes_to_exclude = []
-        self.model = ONNXModel(onnx.load(model)) if isinstance(model, str) else ONNXModel(model)
         self.model_path = model if isinstance(model, str) else None
+        self.external_data_dir = os.path.dirname(os.path.abspath(model)) if isinstance(model, str) else ""
+        self.num_workers = num_workers
         self.block_size = block_size
         self.is_symmetric = is_symmetric
         self.accuracy_level = accuracy_level
@@ -831,16 +877,62 @@ class MatMul4BitsQuantizer:
                 quant_axes=quant_axes,
             )
         self.algo_config = algo_config
+        # weights in external data are read one at a time by DefaultWeightOnlyQuantizer and HQQWeightOnlyQuantizer
+        self.load_external_data = algo_config.algorithm not in ["HQQ", "DEFAULT"]
+        if isinstance(model, str):
+            self.model = ONNXModel(onnx.load(model, load_external_data=self.load_external_data))
+        else:
+            self.model = ONNXModel(model)
         if algo_config.algorithm == "HQQ":
-            self.node_quantizer = HQQWeightOnlyQuantizer(self.algo_config)
+            self.node_quantizer = HQQWeightOnlyQuantizer(self.algo_config, self.external_data_dir)
         elif algo_config.algorithm == "DEFAULT":
-            self.node_quantizer = DefaultWeightOnlyQuantizer(self.algo_config)
+            self.node_quantizer = DefaultWeightOnlyQuantizer(self.algo_config, self.external_data_dir)
+        self._executor = None
+        # external data file of the output model, see process()
+        self._data_file = None
+        self._data_location = None
+        self._written_initializers = set()
+
+    def _should_quantize(self, node: NodeProto) -> bool:
+        return node.name not in self.nodes_to_exclude and (
+            (self.nodes_to_include and node.name in self.nodes_to_include)
+            or node.op_type in self.algo_config.op_types_to_quantize
+        )
+
+    def _prefetch_quantized_weights(self, weights: list[TensorProto]):
+        """
+        Yields (weight name, quantized weight) in the order of weights. The next num_workers weights
+        are read and quantized on the worker pool while the caller replaces the current node.
+        """
+        remaining = iter(weights)
+        pending = collections.deque(
+            (tensor.name, self._executor.submit(self.node_quantizer.quantize_initializer, tensor))
+            for tensor in itertools.islice(remaining, self.num_workers)
+        )
+        while pending:
+            name, future = pending.popleft()
+            tensor = next(remaining, None)
+            if tensor is not None:
+                pending.append((tensor.name, self._executor.submit(self.node_quantizer.quantize_initializer, tensor)))
+            yield name, future.result()
 
     def _process_subgraph(self, graph_stack: list[GraphProto]):
         new_nodes = []
         graph = graph_stack[-1]
 
-        for node in graph.node:
+        prefetched_nodes = set()
+        prefetched_weights = None
+        if self._executor is not None:
+            weights = []
+            for node_index, node in enumerate(graph.node):
+                if node.op_type == "MatMul" and self._should_quantize(node):
+                    weight, _ = get_initializer(node.input[1], graph_stack)
+                    if weight is not None and len(weight.dims) == 2:
+                        prefetched_nodes.add(node_index)
+                        weights.append(weight)
+            prefetched_weights = self._prefetch_quantized_weights(weights)
+
+        for node_index, node in enumerate(graph.node):
             graph_attrs = [
                 attr
                 for attr in node.attribute
@@ -870,10 +962,14 @@ class MatMul4BitsQuantizer:
             if node.name in self.nodes_to_exclude:
                 logger.info(f"exclude to quantize {node.name} as specified by nodes_to_exclude...")
                 out_nodes = [node]
-            elif (self.nodes_to_include and node.name in self.nodes_to_include) or (
-                node.op_type in self.algo_config.op_types_to_quantize
-            ):
+            elif self._should_quantize(node):
+                if node_index in prefetched_nodes:
+                    weight_name, quantized_weight = next(prefetched_weights)
+                    self.node_quantizer.quantized_weights[weight_name] = quantized_weight
+                num_initializers = [len(g.initializer) for g in graph_stack]
                 out_nodes = self.node_quantizer.quantize(node, graph_stack)
+                if self._data_file is not None:
+                    self._write_new_initializers(graph_stack, num_initializers)
             else:
                 logger.info(f"skip to quantize {node.name} ...")
                 out_nodes = [node]
@@ -884,6 +980,27 @@ class MatMul4BitsQuantizer:
         graph_stack.pop()
         return graph
 
+    def _write_new_initializers(self, graph_stack: list[GraphProto], num_initializers: list[int]):
+        """
+        Writes the initializers added to the graphs of graph_stack by the node quantizer, the graphs had
+        num_initializers initializers before, to the external data file of the output model.
+        """
+        for graph, start in zip(graph_stack, num_initializers):
+            for tensor in graph.initializer[start:]:
+                # smaller initializers are kept in the model, like convert_model_to_external_data does
+                if len(tensor.raw_data) < 1024:
+                    continue
+                offset = self._data_file.tell()
+                self._data_file.write(tensor.raw_data)
+                set_external_data_location(tensor, self._data_location, offset, len(tensor.raw_data))
+                self._written_initializers.add(tensor.name)
+
+    def _copy_external_data_not_loaded(self):
+        """Copies the tensors left in the input external data to the external data file of the output model."""
+        for tensor in get_all_tensors(self.model.model):
+            if is_external_data_not_loaded(tensor) and tensor.name not in self._written_initializers:
+                copy_external_data(tensor, self.external_data_dir, self._data_file, self._data_location)
+
     def _generate_q4_node_config(self):
         """Generate weight only quant configuration for nodes."""
         q4_node_config = {}
@@ -945,7 +1062,15 @@ class MatMul4BitsQuantizer:
             )
         logger.info(f"complete quantization of model with {algorithm} algorithm.")
 
-    def process(self):
+    def process(self, output_model_path: str | None = None):
+        """
+        Quantizes the model. If output_model_path is given, the quantized model is saved to it with its
+        initializers in the external data file output_model_path + ".data". With the DEFAULT and HQQ
+        algorithms, the quantized weights are then written to that file as soon as each node is quantized,
+        and the initializers left in the external data of the input model are copied to it in chunks without
+        being loaded. Otherwise, the quantized model is only kept in self.model and these initializers are
+        loaded into it.
+        """
         if self.algo_config.algorithm in ["HQQ", "DEFAULT"]:
             # use a stack to keep track of sub-graphs
             graph_stack = [self.model.graph()]
@@ -964,8 +1089,29 @@ class MatMul4BitsQuantizer:
                         )
                         self.model.set_opset_import(opset.domain, 21)
 
-            self._process_subgraph(graph_stack)
-            self.model.clean_initializers()
+            if output_model_path is not None:
+                self._open_external_data_file(output_model_path)
+            if self.num_workers > 1 and isinstance(self.node_quantizer, DefaultWeightOnlyQuantizer):
+                self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.num_workers)
+            try:
+                self._process_subgraph(graph_stack)
+                self.model.clean_initializers()
+                if self._data_file is not None:
+                    # only the initializers which were not quantized are still in the input external data
+                    self._copy_external_data_not_loaded()
+            finally:
+                if self._executor is not None:
+                    self._executor.shutdown()
+                    self._executor = None
+                if self._data_file is not None:
+                    self._data_file.close()
+                    self._data_file = None
+
+            if output_model_path is not None:
+                self.external_data_dir = os.path.dirname(os.path.abspath(output_model_path))
+                self.model.save_model_to_file(output_model_path, True)
+            elif not self.load_external_data:
+                onnx.external_data_helper.load_external_data_for_model(self.model.model, self.external_data_dir)
         else:
             # use Intel® Neural Compressor for RTN or GPTQ weight-only quantize algorithm
             try:
@@ -983,6 +1129,17 @@ class MatMul4BitsQuantizer:
             ), "Require neural-compressor >= 2.3.2 to support weight only quantization!"
 
             self.int4_quant_algo()
+            if output_model_path is not None:
+                self.model.save_model_to_file(output_model_path, True)
+
+    def _open_external_data_file(self, output_model_path: str):
+        """Creates the external data file of the output model, see save_model_to_file of ONNXModel."""
+        self._data_location = os.path.basename(output_model_path) + ".data"
+        data_path = os.path.join(os.path.dirname(os.path.abspath(output_model_path)), self._data_location)
+        if os.path.realpath(data_path) in get_external_data_files_not_loaded(self.model.model, self.external_data_dir):
+            raise ValueError(f"The external data of the output model would overwrite the input data file {data_path}")
+        self._data_file = open(data_path, "wb")  # noqa: SIM115
+        self._written_initializers = set()
 
 
 def ort_convert_str_to_bool(value):
@@ -1076,6 +1233,13 @@ set of 4b integers with a scaling factor and an optional offset.
         "Specify the axis to quantize for an op. Default {MatMul:0, Gather:1}"
         "Example: --quant_axes MatMul:0 Gather:1",
     )
+    parser.add_argument(
+        "--num_workers",
+        default=1,
+        type=int,
+        help="Number of threads reading and quantizing MatMul weights ahead of time with the default algorithm. "
+        "The hqq algorithm quantizes one weight at a time and ignores it.",
+    )
 
     return parser.parse_args()
 
@@ -1099,7 +1263,6 @@ if __name__ == "__main__":
         logger.warning("symmetric is not supportted by hqq, will force to symmetric=False")
         args.symmetric = False
 
-    model = onnx.load(input_model_path)
     if args.quant_method == "hqq":
         quant_config = HQQWeightOnlyQuantConfig(
             block_size=args.block_size, bits=args.bits, op_types_to_quantize=op_types_to_quantize, quant_axes=quant_axes
@@ -1121,11 +1284,11 @@ if __name__ == "__main__":
         raise ValueError(f"Unsupported quantization method: {args.quant_method}")
 
     quant = MatMul4BitsQuantizer(
-        model=model,
+        model=input_model_path,
         accuracy_level=args.accuracy_level,
         nodes_to_exclude=args.nodes_to_exclude,
         nodes_to_include=args.nodes_to_include,
         algo_config=quant_config,
+        num_workers=args.num_workers,
     )
-    quant.process()
-    quant.model.save_model_to_file(output_model_path, True)
+    quant.process(output_model_path)
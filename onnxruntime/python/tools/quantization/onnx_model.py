@@ -86,9 +86,103 @@ def _clean_initializers_helper(graph, model):
     return graph, requesting_tensor_names
 
 
+class _NameIndex:
+    """
+    Maps item names to the first item with that name in a repeated protobuf field.
+    The index remembers the container, its length and its last item it was built from and
+    is rebuilt when the field is modified without going through ONNXModel. The last item
+    detects an item removed and another one appended, e.g. an initializer replaced by a
+    new tensor with the same name.
+    """
+
+    def __init__(self, items):
+        self.items = items
+        self.size = len(items)
+        self.last = items[-1] if items else None
+        self.by_name = {}
+        self.duplicated_names = set()
+        self.checked = False
+        for item in items:
+            self._insert(item)
+
+    def _insert(self, item):
+        if not item.name:
+            return
+        if item.name in self.by_name:
+            self.duplicated_names.add(item.name)
+        else:
+            self.by_name[item.name] = item
+
+    def is_valid(self, items):
+        return self.items is items and self.size == len(items) and (not items or items[-1] is self.last)
+
+    def index_appended_items(self):
+        # Protobuf copies the messages appended to a repeated field, the copies are indexed.
+        for item in self.items[self.size :]:
+            self._insert(item)
+        self.size = len(self.items)
+        self.last = self.items[-1] if self.items else None
+
+    def remove(self, item):
+        """Returns False if the index can no longer be updated incrementally."""
+        self.size -= 1
+        self.last = self.items[-1] if self.items else None
+        if item.name in self.duplicated_names:
+            return False
+        self.by_name.pop(item.name, None)
+        return True
+
+
 class ONNXModel:
+    """
+    Wraps a ModelProto to provide the graph manipulations used by the quantizers.
+
+    Initializers and nodes are looked up through name indexes which are kept up to date
+    by the methods of this class. The indexes are rebuilt if the graph is modified directly,
+    call `reset_indexes` after a modification which does not change the number of
+    initializers or nodes (e.g. renaming them).
+    """
+
     def __init__(self, model: ModelProto):
         self.model = model
+        self.reset_indexes()
+
+    def reset_indexes(self):
+        self._initializer_index = None
+        self._node_index = None
+        self._node_name_suffixes = {}
+        self._new_node_index = None
+
+    def _get_initializer_index(self):
+        initializers = self.model.graph.initializer
+        if self._initializer_index is None or not self._initializer_index.is_valid(initializers):
+            self._initializer_index = _NameIndex(initializers)
+        return self._initializer_index
+
+    def _get_node_index(self):
+        nodes = self.model.graph.node
+        if self._node_index is None or not self._node_index.is_valid(nodes):
+            self._node_index = _NameIndex(nodes)
+            self._node_name_suffixes = {}
+        return self._node_index
+
+    def _add_node_name_suffix(self, node_name):
+        for prefix, suffix in self._node_name_suffixes.items():
+            if node_name.startswith(prefix):
+                try:
+                    self._node_name_suffixes[prefix] = max(int(node_name[len(prefix) :]), suffix)
+                except ValueError:
+                    continue
+
+    def _remove_node_name_suffix(self, node_name):
+        for prefix in [prefix for prefix in self._node_name_suffixes if node_name.startswith(prefix)]:
+            try:
+                index = int(node_name[len(prefix) :])
+            except ValueError:
+                continue
+            if index == self._node_name_suffixes[prefix]:
+                # Another node may have the same suffix, the largest one is computed again when needed.
+                del self._node_name_suffixes[prefix]
 
     def nodes(self):
         return self.model.graph.node
@@ -99,11 +193,16 @@ class ONNXModel:
     def initializer_extend(self, inits):
         if len(inits) == 0:
             raise ValueError("Can add an empty list.")
-        for init in self.initializer():
-            self._check_init(init, "gain")
+        index = self._get_initializer_index()
+        if not index.checked:
+            # Initializers added after this check are checked when they are added.
+            for init in self.initializer():
+                self._check_init(init, "gain")
+            index.checked = True
         for init in inits:
             self._check_init(init)
             self.model.graph.initializer.append(init)
+            index.index_appended_items()
 
     def graph(self):
         return self.model.graph
@@ -124,29 +223,53 @@ class ONNXModel:
 
     def remove_node(self, node):
         if node in self.model.graph.node:
+            index = self._get_node_index()
             self.model.graph.node.remove(node)
+            if not index.remove(node):
+                self._node_index = None
+                self._node_name_suffixes = {}
+            elif node.name:
+                self._remove_node_name_suffix(node.name)
 
     def remove_nodes(self, nodes_to_remove):
         for node in nodes_to_remove:
             self.remove_node(node)
 
     def add_node(self, node):
+        index = self._get_node_index()
         self.model.graph.node.extend([self._check_node(node)])
+        index.index_appended_items()
+        if node.name:
+            self._add_node_name_suffix(node.name)
 
     def add_nodes(self, nodes_to_add):
         for node in nodes_to_add:
             self.add_node(node)
 
     def add_initializer(self, tensor):
-        if find_by_name(tensor.name, self.model.graph.initializer) is None:
+        if self.get_initializer(tensor.name) is None:
             self._check_init(tensor)
             self.model.graph.initializer.extend([tensor])
+            self._initializer_index.index_appended_items()
 
     def get_initializer(self, name):
-        for tensor in self.model.graph.initializer:
-            if tensor.name == name:
-                return tensor
-        return None
+        tensor = self._get_initializer_index().by_name.get(name)
+        if tensor is not None and tensor.name != name:
+            # The initializer was renamed in place.
+            self._initializer_index = None
+            tensor = self._get_initializer_index().by_name.get(name)
+        return tensor
+
+    def get_node(self, name):
+        """
+        Returns the first node of the graph named `name` or None.
+        """
+        node = self._get_node_index().by_name.get(name)
+        if node is not None and node.name != name:
+            # The node was renamed in place.
+            self._node_index = None
+            node = self._get_node_index().by_name.get(name)
+        return node
 
     def find_graph_input(self, input_name):
         for input in self.model.graph.input:
@@ -192,11 +315,14 @@ class ONNXModel:
         return None
 
     def get_initializer_name_set(self):
-        return {initializer.name for initializer in self.model.graph.initializer}
+        return set(self._get_initializer_index().by_name)
 
     def remove_initializer(self, tensor):
         if tensor in self.model.graph.initializer:
+            index = self._get_initializer_index()
             self.model.graph.initializer.remove(tensor)
+            if not index.remove(tensor):
+                self._initializer_index = None
             for input in self.model.graph.input:
                 if input.name == tensor.name:
                     self.model.graph.input.remove(input)
@@ -274,16 +400,43 @@ class ONNXModel:
         Returns:
             The node found or None.
         """
-        graph_nodes_list = list(graph.node)  # deep copy
-        graph_nodes_list.extend(new_nodes_list)
-        node = find_by_name(node_name, graph_nodes_list)
+        if graph is self.model.graph:
+            node = self.get_node(node_name)
+        else:
+            node = find_by_name(node_name, graph.node)
+        if node is None:
+            node = self.find_new_node_by_name(node_name, new_nodes_list)
         return node
 
+    def find_new_node_by_name(self, node_name, new_nodes_list):
+        """Find out if a node is in the new set of nodes created during quantization.
+
+        The quantizers only append to their list of new nodes, nodes added
+        since the previous call are indexed before looking up `node_name`.
+
+        Returns:
+            The node found or None.
+        """
+        if (
+            self._new_node_index is None
+            or self._new_node_index.items is not new_nodes_list
+            or self._new_node_index.size > len(new_nodes_list)
+        ):
+            self._new_node_index = _NameIndex(new_nodes_list)
+        else:
+            self._new_node_index.index_appended_items()
+        node = self._new_node_index.by_name.get(node_name)
+        return node if node is not None and node.name == node_name else None
+
     def get_largest_node_name_suffix(self, node_name_prefix):
         """
         Gets the largest node name (int) suffix for all node names that begin with `node_name_prefix`.
         Example: for nodes my_prefix_0 and my_prefix_3, this method returns 3.
         """
+        self._get_node_index()
+        if node_name_prefix in self._node_name_suffixes:
+            return self._node_name_suffixes[node_name_prefix]
+
         suffix = -1
 
         for node in self.model.graph.node:
@@ -294,6 +447,7 @@ class ONNXModel:
                 except ValueError:
                     continue
 
+        self._node_name_suffixes[node_name_prefix] = suffix
         return suffix
 
     def find_nodes_by_initializer(self, graph, initializer):
@@ -413,6 +567,7 @@ class ONNXModel:
     def replace_gemm_with_matmul(self):
         graph_path = [self.graph()]
         ONNXModel.__replace_gemm_with_matmul(graph_path)
+        self.reset_indexes()
 
     def save_model_to_file(self, output_path, use_external_data_format=False):
         """
@@ -548,9 +703,12 @@ class ONNXModel:
         assert end == len(self.graph().node), "Graph is not a DAG"
         self.graph().ClearField("node")
         self.graph().node.extend(sorted_nodes)
+        self.reset_indexes()
 
     def clean_initializers(self):
-        return _clean_initializers_helper(self.graph(), self.model)
+        result = _clean_initializers_helper(self.graph(), self.model)
+        self.reset_indexes()
+        return result
 
     def _check_init(self, init, test=None):
         if init.data_type == onnx.TensorProto.FLOAT8E4M3FN:
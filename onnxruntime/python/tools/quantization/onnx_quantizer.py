@@ -24,7 +24,6 @@ from .quant_utils import (
     attribute_to_kwarg,
     compute_scale_zp,
     compute_scale_zp_float8,
-    find_by_name,
     get_qmin_qmax_for_qType,
     get_qrange_for_qType,
     ms_domain,
@@ -182,7 +181,7 @@ class ONNXQuantizer(BaseQuantizer):
         )
 
     def find_initializer_in_path(self, initializer_name):
-        if find_by_name(initializer_name, self.model.initializer()) is not None:
+        if self.model.get_initializer(initializer_name) is not None:
             return True
         if self.parent is not None:
             return self.parent.find_initializer_in_path(initializer_name)
@@ -257,7 +256,7 @@ class ONNXQuantizer(BaseQuantizer):
         )
 
     def get_tensor_type(self, tensor_name, mandatory=False):
-        weight = find_by_name(tensor_name, self.model.initializer())
+        weight = self.model.get_initializer(tensor_name)
         if weight is not None:
             return weight.data_type
         if tensor_name in self.value_infos:
@@ -646,7 +645,7 @@ class ONNXQuantizer(BaseQuantizer):
 
         # get scale for weight
         weight_scale_name = self.quantized_value_map[weight_name].scale_name
-        weight_initializer = find_by_name(weight_scale_name, self.model.initializer())
+        weight_initializer = self.model.get_initializer(weight_scale_name)
         weight_scale = tensor_proto_to_array(weight_initializer)
 
         # get scale for input
@@ -657,7 +656,7 @@ class ONNXQuantizer(BaseQuantizer):
         else:
             raise ValueError(f"Expected {input_name} to be in quantized value map for static quantization")
 
-        inputscale_initializer = find_by_name(input_scale_name, self.model.initializer())
+        inputscale_initializer = self.model.get_initializer(input_scale_name)
         input_scale = tensor_proto_to_array(inputscale_initializer)
 
         (
@@ -771,7 +770,7 @@ class ONNXQuantizer(BaseQuantizer):
                 zero_point_names.append("")
                 continue
             # Quantize the input
-            initializer = find_by_name(node_input, self.model.initializer())
+            initializer = self.model.get_initializer(node_input)
             if initializer is not None:
                 if self.per_channel and op_level_per_channel:
                     (
@@ -935,7 +934,7 @@ class ONNXQuantizer(BaseQuantizer):
             quantized_value = self.quantized_value_map[value_name]
             # Add DequantizeLinear Node for this input
 
-            scale_init = find_by_name(quantized_value.scale_name, self.model.initializer())
+            scale_init = self.model.get_initializer(quantized_value.scale_name)
 
             # In case we are working with subgraphs, the graph `producer_name` is set to `"onnx-quantizer"` in the `quantize_subgraph` method. In this case, the scale initializer may be on the top level graph, so the check below can not be done.
             if self.model.model.producer_name != "onnx-quantizer" or (
@@ -7,7 +7,6 @@ from ..quant_utils import (
     QuantizedValue,
     QuantizedValueType,
     attribute_to_kwarg,
-    find_by_name,
     get_mul_node,
 )
 from .base_operator import QuantOperatorBase
@@ -31,7 +30,7 @@ class ConvInteger(QuantOperatorBase):
         node = self.node
         model = self.quantizer.model
         # Add tensors for the shape to be reshaped to
-        weight = find_by_name(node.input[1], model.initializer())
+        weight = model.get_initializer(node.input[1])
         if weight is None:
             raise ValueError(f"Expected {node.input[1]} to be an initializer")
 
@@ -107,7 +106,7 @@ class ConvInteger(QuantOperatorBase):
         else:
             scales_mul_op = scale_names[0] + "_" + scale_names[1] + "_mul"
 
-        scales_mul_node = find_by_name(scales_mul_op, self.quantizer.new_nodes)
+        scales_mul_node = self.quantizer.model.find_new_node_by_name(scales_mul_op, self.quantizer.new_nodes)
         if scales_mul_node is None:
             scales_mul_node = get_mul_node(scale_names, scales_mul_op + ":0", scales_mul_op)
             nodes.append(scales_mul_node)
@@ -4,7 +4,7 @@ import logging
 import onnx
 from onnx import onnx_pb as onnx_proto
 
-from ..quant_utils import TENSOR_NAME_QUANT_SUFFIX, QuantizedValue, QuantizedValueType, find_by_name, get_mul_node
+from ..quant_utils import TENSOR_NAME_QUANT_SUFFIX, QuantizedValue, QuantizedValueType, get_mul_node
 from .base_operator import QuantOperatorBase
 from .qdq_base_operator import QDQOperatorBase
 
@@ -93,7 +93,7 @@ class MatMulInteger(QOpMatMul):
             else scale_names[0] + "_" + scale_names[1] + "_mul"
         )
 
-        scales_mul_node = find_by_name(scales_mul_op, self.quantizer.new_nodes)
+        scales_mul_node = self.quantizer.model.find_new_node_by_name(scales_mul_op, self.quantizer.new_nodes)
         if scales_mul_node is None:
             scales_mul_node = get_mul_node(scale_names, scales_mul_op + ":0", scales_mul_op)
             nodes.append(scales_mul_node)
@@ -219,7 +219,7 @@ class QDQMatMul(QDQOperatorBase):
             nodes_to_iterate = itertools.chain(node.input, node.output)
 
         for tensor_name in nodes_to_iterate:
-            if find_by_name(tensor_name, self.quantizer.model.initializer()):
+            if self.quantizer.model.get_initializer(tensor_name):
                 is_per_channel, channel_axis = self.quantizer.is_tensor_per_channel(
                     tensor_name, default_axis=1, op_type=node.op_type
                 )
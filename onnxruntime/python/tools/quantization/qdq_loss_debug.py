@@ -32,13 +32,25 @@ Example Usage:
 `tensor_dict` points to a dictionary where the keys are tensor names and each value
 is a list of tensors, one from each model run
 
+For large models, keeping the activations of every batch in memory may not be possible.
+`collect_activations` can save them to memory-mapped `.npy` files instead, and
+`compute_activation_error_streaming` runs the float and the QDQ models side by side and
+only keeps the statistics needed to compute the errors:
+
+```python
+    activations_error = compute_activation_error_streaming(
+        augmented_qdq_model_path, input_data_reader, augmented_float_model_path
+    )
+```
+
 """
 
 import logging
 import math
+import re
 import time
 from pathlib import Path
-from typing import Callable, Dict, List, Optional, Sequence, Union
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
 
 import numpy
 import onnx
@@ -53,7 +65,6 @@ from .quant_utils import (
     DEQUANT_OUTPUT_SUFFIX,
     QUANT_INPUT_SUFFIX,
     TENSOR_NAME_QUANT_SUFFIX,
-    find_by_name,
     load_model_with_shape_infer,
 )
 
@@ -112,11 +123,64 @@ def modify_model_output_intermediate_tensors(
     )
 
 
+def _create_augmented_session(augmented_model: str, session_options, execution_providers):
+    if session_options is None:
+        session_options = onnxruntime.SessionOptions()
+        session_options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_DISABLE_ALL
+    if execution_providers is None:
+        execution_providers = ["CPUExecutionProvider"]
+
+    return onnxruntime.InferenceSession(
+        augmented_model,
+        sess_options=session_options,
+        providers=execution_providers,
+    )
+
+
+class _ActivationRunner:
+    """Runs an augmented model one batch at a time and returns the saved activations by tensor name.
+
+    If `activations_dir` is given, the activations are written to `.npy` files in that directory
+    and memory-mapped arrays are returned instead of the arrays computed by the model.
+    """
+
+    def __init__(self, augmented_model: str, session_options, execution_providers, activations_dir=None):
+        self.session = _create_augmented_session(augmented_model, session_options, execution_providers)
+        self.output_names = {}
+        for output_index, output in enumerate(self.session.get_outputs()):
+            if output.name.endswith(_TENSOR_SAVE_POSTFIX):
+                self.output_names[output_index] = output.name[:-_TENSOR_SAVE_POSTFIX_LEN]
+        self.activations_dir = None
+        if activations_dir is not None:
+            self.activations_dir = Path(activations_dir)
+            self.activations_dir.mkdir(parents=True, exist_ok=True)
+        self.batch_count = 0
+
+    def activation_names(self) -> List[str]:
+        return list(self.output_names.values())
+
+    def run(self, input_d) -> Dict[str, numpy.ndarray]:
+        batch = self.session.run(None, input_d)
+        activations = {}
+        for output_index, output_name in self.output_names.items():
+            output_data = batch[output_index]
+            if self.activations_dir is not None:
+                # Tensor names may not be valid file names, the output index keeps the file names unique.
+                file_stem = re.sub(r"[^\w.-]", "_", output_name)
+                file_name = f"{output_index}_{file_stem}_{self.batch_count}.npy"
+                numpy.save(self.activations_dir / file_name, output_data)
+                output_data = numpy.load(self.activations_dir / file_name, mmap_mode="r")
+            activations[output_name] = output_data
+        self.batch_count += 1
+        return activations
+
+
 def collect_activations(
     augmented_model: str,
     input_reader: CalibrationDataReader,
     session_options=None,
     execution_providers: Optional[Sequence[str]] = None,
+    activations_dir: Optional[Union[str, Path]] = None,
 ) -> Dict[str, List[numpy.ndarray]]:
     """Run augmented model and collect activations tensors.
 
@@ -128,53 +192,49 @@ def collect_activations(
             By default graph optimization is turned off
         execution_providers: Collection of execution providers for running the model.
             Only CPU EP is used by default.
+        activations_dir: Optional directory where the activations of each batch are saved
+            as `.npy` files. The returned tensors are then memory-mapped from these files,
+            so only the activations of one batch are kept in memory.
 
     Returns:
         A dictionary where the key is tensor name and values are list of tensors from each batch
     """
 
-    if session_options is None:
-        session_options = onnxruntime.SessionOptions()
-        session_options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_DISABLE_ALL
-    if execution_providers is None:
-        execution_providers = ["CPUExecutionProvider"]
-
-    inference_session = onnxruntime.InferenceSession(
-        augmented_model,
-        sess_options=session_options,
-        providers=execution_providers,
-    )
+    runner = _ActivationRunner(augmented_model, session_options, execution_providers, activations_dir)
 
-    intermediate_outputs = []
+    output_dict = {}
     for input_d in input_reader:
-        intermediate_outputs.append(inference_session.run(None, input_d))
-    if not intermediate_outputs:
+        for output_name, output_data in runner.run(input_d).items():
+            output_dict.setdefault(output_name, []).append(output_data)
+    if runner.batch_count == 0:
         raise RuntimeError("No data is collected while running augmented model!")
 
-    output_dict = {}
-    output_info = inference_session.get_outputs()
-    for batch in intermediate_outputs:
-        for output, output_data in zip(output_info, batch):
-            if output.name.endswith(_TENSOR_SAVE_POSTFIX):
-                output_name = output.name[:-_TENSOR_SAVE_POSTFIX_LEN]
-                output_dict.setdefault(output_name, []).append(output_data)
-
     return output_dict
 
 
 _POST_QDQ_POSTFIX1 = DEQUANT_OUTPUT_SUFFIX + "_1"
 
 
-def _add_pre_post_qdq_pair(
-    qdq_cmp: Dict[str, Dict[str, Sequence[numpy.ndarray]]],
-    activation_name: str,
-    pre_qdq_tensors: Optional[Sequence[numpy.ndarray]],
-    post_qdq_tensors: Optional[Sequence[numpy.ndarray]],
-) -> None:
-    if post_qdq_tensors is not None and pre_qdq_tensors is not None:
-        qdq_cmp[activation_name] = {}
-        qdq_cmp[activation_name]["pre_qdq"] = pre_qdq_tensors
-        qdq_cmp[activation_name]["post_qdq"] = post_qdq_tensors
+def _match_pre_post_qdq_names(qdq_activation_names: Iterable[str]) -> Dict[str, Tuple[str, str]]:
+    """Returns the names of the tensors before and after QDQ for each activation of the QDQ model."""
+    qdq_activation_names = list(qdq_activation_names)
+    name_set = set(qdq_activation_names)
+    matches: Dict[str, Tuple[str, str]] = {}
+    for tensor_name in qdq_activation_names:
+        if tensor_name.endswith(QUANT_INPUT_SUFFIX):
+            activation_name = tensor_name[: -len(QUANT_INPUT_SUFFIX)]
+            pre_name, post_name = tensor_name, activation_name
+        elif tensor_name.endswith(DEQUANT_OUTPUT_SUFFIX):
+            activation_name = tensor_name[: -len(DEQUANT_OUTPUT_SUFFIX)]
+            pre_name, post_name = activation_name, tensor_name
+        elif tensor_name.endswith(_POST_QDQ_POSTFIX1):
+            activation_name = tensor_name[: -len(_POST_QDQ_POSTFIX1)]
+            pre_name, post_name = activation_name, tensor_name
+        else:
+            continue
+        if pre_name in name_set and post_name in name_set:
+            matches[activation_name] = (pre_name, post_name)
+    return matches
 
 
 def create_activation_matching(
@@ -211,22 +271,10 @@ def create_activation_matching(
     """
 
     qdq_cmp: Dict[str, Dict[str, Sequence[numpy.ndarray]]] = {}
-    for tensor_name, tensors in qdq_activations.items():
-        if tensor_name.endswith(QUANT_INPUT_SUFFIX):
-            pre_name = tensor_name[: -len(QUANT_INPUT_SUFFIX)]
-            post_qdq_tensors = qdq_activations.get(pre_name)
-            pre_qdq_tensors = tensors
-            _add_pre_post_qdq_pair(qdq_cmp, pre_name, pre_qdq_tensors, post_qdq_tensors)
-        elif tensor_name.endswith(DEQUANT_OUTPUT_SUFFIX):
-            pre_name = tensor_name[: -len(DEQUANT_OUTPUT_SUFFIX)]
-            pre_qdq_tensors = qdq_activations.get(pre_name)
-            post_qdq_tensors = tensors
-            _add_pre_post_qdq_pair(qdq_cmp, pre_name, pre_qdq_tensors, post_qdq_tensors)
-        elif tensor_name.endswith(_POST_QDQ_POSTFIX1):
-            pre_name = tensor_name[: -len(_POST_QDQ_POSTFIX1)]
-            pre_qdq_tensors = qdq_activations.get(pre_name)
-            post_qdq_tensors = tensors
-            _add_pre_post_qdq_pair(qdq_cmp, pre_name, pre_qdq_tensors, post_qdq_tensors)
+    for activation_name, (pre_name, post_name) in _match_pre_post_qdq_names(qdq_activations).items():
+        qdq_cmp[activation_name] = {}
+        qdq_cmp[activation_name]["pre_qdq"] = qdq_activations[pre_name]
+        qdq_cmp[activation_name]["post_qdq"] = qdq_activations[post_name]
 
     if not float_activations:
         return qdq_cmp
@@ -289,12 +337,11 @@ def create_weight_matching(float_model_path: str, qdq_model_path: str) -> Dict[s
     qdq_onnx_model = ONNXModel(load_model_with_shape_infer(Path(qdq_model_path)))
 
     matched_weights: Dict[str, Dict[str, numpy.ndarray]] = {}
-    initializers = qdq_onnx_model.initializer()
     for node in qdq_onnx_model.nodes():
         if node.op_type != DEQUANT_OP_NAME:
             continue  # Only care about DQ node
         weight_name: str = node.input[0]
-        weight_values = find_by_name(weight_name, initializers)
+        weight_values = qdq_onnx_model.get_initializer(weight_name)
         if not weight_values:
             continue  # Only care about DQ node with const inputs
         if not weight_name.endswith(TENSOR_NAME_QUANT_SUFFIX):
@@ -307,9 +354,9 @@ def create_weight_matching(float_model_path: str, qdq_model_path: str) -> Dict[s
                 axis = attr.i
 
         weight_tensor = numpy_helper.to_array(weight_values)
-        weight_scale = numpy_helper.to_array(find_by_name(node.input[1], initializers))
+        weight_scale = numpy_helper.to_array(qdq_onnx_model.get_initializer(node.input[1]))
         if len(node.input) > 2:
-            weight_zp = numpy_helper.to_array(find_by_name(node.input[2], initializers))
+            weight_zp = numpy_helper.to_array(qdq_onnx_model.get_initializer(node.input[2]))
         else:
             weight_zp = numpy.zeros(weight_scale.shape, dtype=numpy.int32)
 
@@ -328,7 +375,7 @@ def create_weight_matching(float_model_path: str, qdq_model_path: str) -> Dict[s
             logging.error(f"Model Error in '{qdq_model_path}': '{weight_name}' per-channel quantization on 0 channel")
             continue
 
-        float_values = find_by_name(weight_name, float_onnx_model.initializer())
+        float_values = float_onnx_model.get_initializer(weight_name)
         if not float_values:
             logging.error(f"Model Error in '{float_model_path}': weight tensor '{weight_name}' not found!")
             continue
@@ -355,9 +402,13 @@ def compute_signal_to_quantization_noice_ratio(
     left = numpy.concatenate(xlist).flatten()
     right = numpy.concatenate(ylist).flatten()
 
+    return _signal_to_quantization_noise_ratio(numpy.linalg.norm(left), numpy.linalg.norm(left - right))
+
+
+def _signal_to_quantization_noise_ratio(tensor_norm: float, diff_norm: float) -> float:
     epsilon = numpy.finfo("float").eps
-    tensor_norm = max(numpy.linalg.norm(left), epsilon)
-    diff_norm = max(numpy.linalg.norm(left - right), epsilon)
+    tensor_norm = max(tensor_norm, epsilon)
+    diff_norm = max(diff_norm, epsilon)
     res = tensor_norm / diff_norm
     return 20 * math.log10(res)
 
@@ -387,3 +438,114 @@ def compute_activation_error(
             err_result["xmodel_err"] = err_func(float_activation, match["post_qdq"])
         result[name] = err_result
     return result
+
+
+class _ActivationErrorAccumulator:
+    """Accumulates the error between two activations one batch at a time.
+
+    The signal to quantization noise ratio is computed from the accumulated squared norms,
+    it is the same as the one `compute_signal_to_quantization_noice_ratio` computes on the
+    concatenated batches.
+    """
+
+    def __init__(self):
+        self.tensor_square_norm = 0.0
+        self.diff_square_norm = 0.0
+        self.max_abs_diff = 0.0
+        self.abs_diff_sum = 0.0
+        self.count = 0
+
+    def add(self, x: numpy.ndarray, y: numpy.ndarray) -> None:
+        left = numpy.asarray(x).reshape(-1)
+        right = numpy.asarray(y).reshape(-1)
+        diff = left - right
+        self.tensor_square_norm += float(numpy.square(left, dtype=numpy.float64).sum())
+        self.diff_square_norm += float(numpy.square(diff, dtype=numpy.float64).sum())
+        if diff.size > 0:
+            abs_diff = numpy.abs(diff)
+            self.max_abs_diff = max(self.max_abs_diff, float(abs_diff.max()))
+            self.abs_diff_sum += float(abs_diff.sum(dtype=numpy.float64))
+        self.count += diff.size
+
+    def sqnr(self) -> float:
+        return _signal_to_quantization_noise_ratio(math.sqrt(self.tensor_square_norm), math.sqrt(self.diff_square_norm))
+
+    def mean_abs_diff(self) -> float:
+        return self.abs_diff_sum / self.count if self.count else 0.0
+
+
+def compute_activation_error_streaming(
+    qdq_augmented_model: str,
+    input_reader: CalibrationDataReader,
+    float_augmented_model: Optional[str] = None,
+    session_options=None,
+    execution_providers: Optional[Sequence[str]] = None,
+    activations_dir: Optional[Union[str, Path]] = None,
+) -> Dict[str, Dict[str, float]]:
+    """Compute the activation errors of a QDQ model without keeping all activations in memory.
+
+    This computes the same signal to quantization noise ratios as
+    `compute_activation_error(create_activation_matching(qdq_activations, float_activations))`
+    but the QDQ model and the float model run side by side on each batch and only the statistics
+    needed to compute the errors are accumulated.
+
+    Args:
+        qdq_augmented_model: Path to the QDQ model augmented by modify_model_output_intermediate_tensors ()
+        input_reader: Logic for reading input for the models, it is used for both models.
+        float_augmented_model: Optional path to the float point model augmented by
+            modify_model_output_intermediate_tensors ().
+        session_options: Optional OnnxRuntime session options for controlling model run.
+            By default graph optimization is turned off
+        execution_providers: Collection of execution providers for running the models.
+            Only CPU EP is used by default.
+        activations_dir: Optional directory where the raw activations are saved as `.npy` files,
+            in sub-directories `qdq` and `float`.
+
+    Returns:
+        Dict of errors for each activation. `qdq_err` is the signal to quantization noise ratio
+        between the activation before and after QDQ, `xmodel_err` is the one between the float
+        model activation and the QDQ model activation. The maximum and mean absolute differences
+        are in `qdq_max_abs_err`, `qdq_mean_abs_err`, `xmodel_max_abs_err` and `xmodel_mean_abs_err`.
+    """
+
+    def activations_subdir(name):
+        return None if activations_dir is None else Path(activations_dir) / name
+
+    qdq_runner = _ActivationRunner(qdq_augmented_model, session_options, execution_providers, activations_subdir("qdq"))
+    float_runner = None
+    if float_augmented_model is not None:
+        float_runner = _ActivationRunner(
+            float_augmented_model, session_options, execution_providers, activations_subdir("float")
+        )
+
+    matches = _match_pre_post_qdq_names(qdq_runner.activation_names())
+    float_names = set() if float_runner is None else set(float_runner.activation_names())
+    qdq_errors = {activation_name: _ActivationErrorAccumulator() for activation_name in matches}
+    xmodel_errors = {
+        activation_name: _ActivationErrorAccumulator() for activation_name in matches if activation_name in float_names
+    }
+
+    for input_d in input_reader:
+        qdq_activations = qdq_runner.run(input_d)
+        for activation_name, (pre_name, post_name) in matches.items():
+            qdq_errors[activation_name].add(qdq_activations[pre_name], qdq_activations[post_name])
+        if xmodel_errors:
+            float_activations = float_runner.run(input_d)
+            for activation_name, accumulator in xmodel_errors.items():
+                accumulator.add(float_activations[activation_name], qdq_activations[matches[activation_name][1]])
+    if qdq_runner.batch_count == 0:
+        raise RuntimeError("No data is collected while running augmented model!")
+
+    result: Dict[str, Dict[str, float]] = {}
+    for activation_name, qdq_error in qdq_errors.items():
+        err_result: Dict[str, float] = {}
+        err_result["qdq_err"] = qdq_error.sqnr()
+        err_result["qdq_max_abs_err"] = qdq_error.max_abs_diff
+        err_result["qdq_mean_abs_err"] = qdq_error.mean_abs_diff()
+        xmodel_error = xmodel_errors.get(activation_name)
+        if xmodel_error is not None:
+            err_result["xmodel_err"] = xmodel_error.sqnr()
+            err_result["xmodel_max_abs_err"] = xmodel_error.max_abs_diff
+            err_result["xmodel_mean_abs_err"] = xmodel_error.mean_abs_diff()
+        result[activation_name] = err_result
+    return result
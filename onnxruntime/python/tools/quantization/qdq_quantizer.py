@@ -32,7 +32,6 @@ from .quant_utils import (
     add_quant_suffix,
     compute_scale_zp,
     compute_scale_zp_float8,
-    find_by_name,
     get_qmin_qmax_for_qType,
     ms_domain,
     normalize_axis,
@@ -221,7 +220,7 @@ class QDQQuantizer(BaseQuantizer):
         """
         Check if tensor can be quantized
         """
-        weight = find_by_name(tensor_name, self.model.initializer())
+        weight = self.model.get_initializer(tensor_name)
         if weight is not None:
             return weight.data_type
         elif tensor_name in self.value_infos:
@@ -234,7 +233,7 @@ class QDQQuantizer(BaseQuantizer):
         """
         Check if tensor can be quantized
         """
-        weight = find_by_name(tensor_name, self.model.initializer())
+        weight = self.model.get_initializer(tensor_name)
         if weight is not None:
             if weight.data_type in (onnx_proto.TensorProto.FLOAT, onnx_proto.TensorProto.FLOAT16):
                 return True
@@ -319,7 +318,7 @@ class QDQQuantizer(BaseQuantizer):
         return self.__quantize_tensor(tensor_name, None, QDQQuantTensorType.WEIGHT)
 
     def quantize_weight_tensor_per_channel(self, tensor_name, axis):
-        weight = find_by_name(tensor_name, self.model.initializer())
+        weight = self.model.get_initializer(tensor_name)
         if weight:
             if weight.data_type in (onnx_proto.TensorProto.FLOAT, onnx_proto.TensorProto.FLOAT16):
                 self.tensors_to_quantize[tensor_name] = QDQTensorQuantInfo(
@@ -353,7 +352,7 @@ class QDQQuantizer(BaseQuantizer):
                 self.quantize_weight_tensor(bias_name)
             return
 
-        weight = find_by_name(bias_name, self.model.initializer())
+        weight = self.model.get_initializer(bias_name)
         if weight is not None:
             if weight.data_type in (onnx_proto.TensorProto.FLOAT, onnx_proto.TensorProto.FLOAT16):
                 if bias_name not in self.bias_to_quantize:
@@ -765,7 +764,7 @@ class QDQQuantizer(BaseQuantizer):
 
             if not tensor_info.is_shared:
                 # Quantize the input
-                initializer = find_by_name(tensor_name, self.model.initializer())
+                initializer = self.model.get_initializer(tensor_name)
                 if initializer:
                     self._add_qdq_pair_for_initializer(initializer, tensor_info.tensor_type, tensor_info.axis)
                 else:
@@ -860,7 +859,7 @@ class QDQQuantizer(BaseQuantizer):
                 continue
             # Quantize the input
             self.quantize_bias_static(bias_name, bias_info)
-            init = find_by_name(bias_name, self.model.initializer())
+            init = self.model.get_initializer(bias_name)
             self.model.remove_initializer(init)
             quant_value = self.quantized_value_map[bias_name].original
             if quant_value.node_type == "Cast":
@@ -1040,14 +1039,14 @@ class QDQQuantizer(BaseQuantizer):
 
         # get scale for weight
         weight_scale_name = self.quantized_value_map[bias_info.weight_name].original.scale_name
-        weight_initializer = find_by_name(weight_scale_name, self.model.initializer())
+        weight_initializer = self.model.get_initializer(weight_scale_name)
         weight_scale = tensor_proto_to_array(weight_initializer)
 
         # get scale for input
         input_scale_name = (
             self.quantized_value_map[bias_info.input_name].get_for_consumer(bias_info.node_name).scale_name
         )
-        inputscale_initializer = find_by_name(input_scale_name, self.model.initializer())
+        inputscale_initializer = self.model.get_initializer(input_scale_name)
         input_scale = tensor_proto_to_array(inputscale_initializer)
 
         (
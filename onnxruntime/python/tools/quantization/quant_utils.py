@@ -15,15 +15,16 @@ import numpy
 import onnx
 from onnx import ModelProto, TensorProto, external_data_helper
 from onnx import onnx_pb as onnx_proto
-from onnx.helper import make_graph, make_model, make_node, make_tensor_value_info
-from onnx.reference import ReferenceEvaluator
 
 from onnxruntime import GraphOptimizationLevel, InferenceSession, SessionOptions
 
 try:
-    from onnx.reference.custom_element_types import float8e4m3fn
+    from onnx.reference.custom_element_types import float8e4m3fn, float8e4m3fnuz, float8e5m2, float8e5m2fnuz
 except ImportError:
     float8e4m3fn = None
+    float8e4m3fnuz = None
+    float8e5m2 = None
+    float8e5m2fnuz = None
 
 # INT4 np.dtypes added in ONNX 1.16. These map to np.int8/np.uint8 because numpy
 # does not support sub-byte types.
@@ -170,6 +171,89 @@ ONNX_INT_TYPE_REDUCED_RANGE = {
 }
 
 
+# Parameters of the conversion of float32 values to each float 8 type, which follows the conversion of
+# onnx.helper.float32_to_float8e4m3 and onnx.helper.float32_to_float8e5m2 used by QuantizeLinear in the reference
+# implementation of onnx, bit for bit:
+#   (numpy type, mantissa bits, exponent bias offset, lowest exponent of subnormal values, first overflowing exponent,
+#    largest finite value, no negative zero and NaN (uz), value OR'ed when rounding overflows without saturation)
+# The exponents are the biased exponents of the float32 values.
+_FLOAT8_CONVERSIONS = {
+    onnx_proto.TensorProto.FLOAT8E4M3FN: (float8e4m3fn, 3, 120, 117, 136, 0x7E, False, 0x7F),
+    onnx_proto.TensorProto.FLOAT8E4M3FNUZ: (float8e4m3fnuz, 3, 119, 116, 135, 0x7F, True, None),
+    onnx_proto.TensorProto.FLOAT8E5M2: (float8e5m2, 2, 112, 110, 143, 0x7B, False, 0x7C),
+    onnx_proto.TensorProto.FLOAT8E5M2FNUZ: (float8e5m2fnuz, 2, 111, 109, 143, 0x7F, True, None),
+}
+
+
+def float32_to_float8(x: numpy.ndarray, qType, saturate=True) -> numpy.ndarray:
+    """
+    Converts an array to a float 8 type with whole-array operations. The results are identical to the results of the
+    onnx reference implementation of QuantizeLinear and Cast, including rounding, saturation, infinities and NaN.
+
+    :param x: values to convert, which are rounded to float32 first
+    :param qType: FLOAT8E4M3FN, FLOAT8E4M3FNUZ, FLOAT8E5M2 or FLOAT8E5M2FNUZ
+    :param saturate: if True, values out of range become the largest finite value, otherwise they become NaN (or
+        infinity for FLOAT8E5M2)
+    :return: array of the float 8 type of onnx.reference.custom_element_types
+    """
+    dtype, mbits, bias, subnormal_exponent, overflow_exponent, max_value, uz, overflow_or = _FLOAT8_CONVERSIONS[qType]
+    bits = numpy.ascontiguousarray(x, dtype=numpy.float32).view(numpy.uint32).astype(numpy.int64)
+    sign = (bits & 0x80000000) >> 24
+    e = (bits & 0x7F800000) >> 23
+    m = bits & 0x007FFFFF
+
+    # Subnormal values. Exponents are clipped to the range of the branch, the values of other elements are ignored.
+    ex = numpy.clip(e - bias, -mbits, 0)
+    has_leading_bit = ex >= 1 - mbits
+    subnormal = numpy.where(
+        has_leading_bit,
+        sign | (1 << numpy.maximum(mbits - 1 + ex, 0)) | (m >> (24 - mbits - ex)),
+        numpy.where(m > 0, sign | 1, 0 if uz else sign),
+    )
+    mask = 1 << (23 - mbits - ex)
+    subnormal += (
+        ((m & mask) != 0)
+        & (((subnormal & 1) != 0) | ((m & (mask - 1)) != 0) | (((m & (mask << 1)) != 0) & ((m & (mask - 1)) == 0)))
+    ).astype(numpy.int64)
+
+    # Normal values.
+    normal = sign | (numpy.maximum(e - bias, 0) << mbits) | (m >> (23 - mbits))
+    if qType == onnx_proto.TensorProto.FLOAT8E4M3FN:
+        normal = numpy.where((normal & 0x7F) == 0x7F, normal & 0xFE, normal)
+    round_bit = 1 << (22 - mbits)
+    rounds = ((m & round_bit) != 0) & (((m & (round_bit << 1)) != 0) | ((m & (round_bit - 1)) != 0))
+    rounds_up = rounds & ((normal & 0x7F) < max_value)
+    normal = normal + rounds_up.astype(numpy.int64)
+    if saturate:
+        if qType == onnx_proto.TensorProto.FLOAT8E5M2:
+            normal = numpy.where(rounds & ~rounds_up, normal | 0x7B, normal)
+    elif uz:
+        normal = numpy.where(rounds & ~rounds_up, 0x80, normal)
+    else:
+        normal = numpy.where(rounds & ~rounds_up, normal | overflow_or, normal)
+
+    # Values out of range and infinities.
+    if saturate:
+        overflow = sign | max_value
+    elif uz:
+        overflow = numpy.full_like(sign, 0x80)
+    else:
+        overflow = sign | overflow_or
+    nan = numpy.full_like(sign, 0x80) if uz else sign | 0x7F
+    underflow = numpy.zeros_like(sign) if uz else sign
+
+    result = numpy.where(
+        (bits & 0x7FFFFFFF) > 0x7F800000,  # all NaN are quiet NaN after a division, like in the reference
+        nan,
+        numpy.where(
+            e >= overflow_exponent,
+            overflow,
+            numpy.where(e >= bias + 1, normal, numpy.where(e >= subnormal_exponent, subnormal, underflow)),
+        ),
+    )
+    return result.astype(dtype)
+
+
 def _check_type(*args, zero_point_index=-1):
     new_args = []
     for i, a in enumerate(args):
@@ -188,40 +272,15 @@ def _check_type(*args, zero_point_index=-1):
 
 def quantize_nparray(qType, arr, scale, zero_point, low=None, high=None):
     assert (
-        qType in ONNX_TYPE_TO_NP_TYPE
+        qType in ONNX_TYPE_TO_NP_TYPE or qType in _FLOAT8_CONVERSIONS
     ), f"Unexpected data type {qType} requested. Only INT8, UINT8, INT16, and UINT16 are supported."
-    if qType in (
-        onnx_proto.TensorProto.FLOAT8E4M3FN,
-        onnx_proto.TensorProto.FLOAT8E4M3FNUZ,
-        onnx_proto.TensorProto.FLOAT8E5M2,
-        onnx_proto.TensorProto.FLOAT8E5M2FNUZ,
-    ):
+    if qType in _FLOAT8_CONVERSIONS:
         if zero_point != 0:
             raise NotImplementedError(f"zero_point is expected to be null for float 8 not {zero_point!r}.")
-        if arr.dtype == numpy.float32:
-            onnx_type = TensorProto.FLOAT
-        elif arr.dtype == numpy.float16:
-            onnx_type = TensorProto.FLOAT16
-        else:
+        if arr.dtype not in (numpy.float32, numpy.float16):
             raise ValueError(f"Unexpected dtype {arr.dtype}.")
-        onnx_model = make_model(
-            make_graph(
-                [
-                    make_node(
-                        "Constant", [], ["zero_point"], value=onnx.helper.make_tensor("zero_point", qType, [], [0])
-                    ),
-                    make_node("QuantizeLinear", ["X", "scale", "zero_point"], ["Y"]),
-                ],
-                "qu",
-                [
-                    make_tensor_value_info("X", onnx_type, None),
-                    make_tensor_value_info("scale", onnx_type, None),
-                ],
-                [make_tensor_value_info("Y", qType, None)],
-            )
-        )
-        ref = ReferenceEvaluator(onnx_model)
-        return _check_type(ref.run(None, {"X": arr, "scale": scale})[0])
+        # Same operations as QuantizeLinear of the onnx reference implementation, without building a model.
+        return _check_type(float32_to_float8(arr / scale, qType))
     else:
         # Quantizes data for all integer types.
         #
@@ -414,6 +473,63 @@ def quantize_data(
     raise ValueError(f"Unexpected value for qType={qType}.")
 
 
+def quantize_data_per_channel(
+    data, axis, qType, symmetric, reduce_range=False, min_real_range=None, rmin=None, rmax=None
+):
+    """
+    Quantizes each channel of an array with whole-array operations. The results are identical to the results of
+    quantize_data for each channel, which this function follows operation by operation. Only integer types are supported.
+
+    :param data: array to quantize
+    :param axis: axis of the channels, which must be non-negative
+    :param qType: data type to quantize to, one of the integer types of ONNX_INT_TYPE_RANGE
+    :param symmetric: whether symmetric quantization is used or not
+    :parameter reduce_range: True if the quantization range should be reduced. Defaults to False.
+    :parameter min_real_range: Minimum floating-point range (i.e., rmax - rmin) to enforce. Defaults to None.
+    :parameter rmin: minimum of each channel to use, defaults to the minimum of the channels.
+    :parameter rmax: maximum of each channel to use, defaults to the maximum of the channels.
+    :return: zero points and scales with one value per channel, and the quantized data with the shape of data
+    """
+    if qType not in ONNX_INT_TYPE_RANGE:
+        raise ValueError(f"Unexpected value for qType={qType}.")
+    if data.size == 0:
+        raise ValueError(f"Expected non-empty channels, got shape {data.shape}.")
+
+    other_axes = tuple(i for i in range(data.ndim) if i != axis)
+    rmin = numpy.asarray(data.min(axis=other_axes) if rmin is None else rmin, dtype=data.dtype)
+    rmax = numpy.asarray(data.max(axis=other_axes) if rmax is None else rmax, dtype=data.dtype)
+    qmin, qmax = get_qmin_qmax_for_qType(qType, reduce_range, symmetric=symmetric)
+
+    # Same steps as compute_scale_zp.
+    rmin = numpy.minimum(rmin, numpy.array(0, dtype=rmin.dtype))
+    rmax = numpy.maximum(rmax, numpy.array(0, dtype=rmax.dtype))
+    if min_real_range is not None:
+        # Like max(rmax, rmin + min_real_range), which keeps rmax unless the other value is greater.
+        min_rmax = rmin + min_real_range
+        rmax = numpy.where(min_rmax > rmax, min_rmax, rmax)
+    if symmetric:
+        absmax = numpy.maximum(numpy.abs(rmin), numpy.abs(rmax))
+        rmin = -absmax
+        rmax = +absmax
+
+    dr = numpy.array(rmax - rmin, dtype=numpy.float64)
+    dq = numpy.array(qmax, dtype=numpy.float64) - numpy.array(qmin, dtype=numpy.float64)
+    scale = dr / dq
+    is_tiny = scale < numpy.finfo(rmax.dtype).tiny
+    if symmetric:
+        zero_point = numpy.broadcast_to(numpy.round((qmin + qmax) / numpy.array(2.0, dtype=numpy.float64)), scale.shape)
+    else:
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            zero_point = numpy.round(qmin - rmin / scale)
+    zero_point = numpy.array(numpy.where(is_tiny, 0, zero_point), dtype=qmin.dtype)
+    scale = numpy.where(is_tiny, 1.0, scale).astype(rmax.dtype)
+
+    channel_shape = [1] * data.ndim
+    channel_shape[axis] = -1
+    quantized_data = quantize_nparray(qType, data, scale.reshape(channel_shape), zero_point.reshape(channel_shape))
+    return zero_point, scale, quantized_data
+
+
 def get_qmin_qmax_for_qType(qType, reduce_range=False, symmetric=False):  # noqa: N802
     """
     Return qmin and qmax, the minimum and maximum value representable by the given qType
@@ -475,26 +591,31 @@ def pack_bytes_to_4bit(src_8bit: bytes) -> bytearray:
     :parameter src_8bit: The 8-bit element values to pack.
     :return A bytearray with every two 8-bit src elements packed into a single byte.
     """
-    num_elems = len(src_8bit)
-    if num_elems == 0:
-        return bytearray()
-
-    dst_size = (num_elems + 1) // 2  # Ex: 5 8-bit elems packed into 3 bytes
-    dst = bytearray(dst_size)
-
-    src_i: int = 0
-    dst_i: int = 0
+    src = numpy.frombuffer(src_8bit, dtype=numpy.uint8)
+    if len(src) % 2:
+        # Odd number of elements, the high bits of the last byte are 0.
+        src = numpy.append(src, numpy.uint8(0))
 
-    # Pack two 8-bit elements into a single byte in each iteration.
-    while src_i < num_elems - 1:
-        dst[dst_i] = ((src_8bit[src_i + 1] & 0xF) << 4) | (src_8bit[src_i] & 0xF)
-        dst_i += 1
-        src_i += 2
+    # The first element of each pair is in the low bits.
+    return bytearray(((src[1::2] & 0xF) << 4 | (src[0::2] & 0xF)).tobytes())
 
-    if src_i < num_elems:
-        # Odd number of elements.
-        dst[dst_i] = src_8bit[src_i] & 0xF
 
+def unpack_4bit_to_bytes(src_4bit: bytes, num_elems: int, signed: bool) -> numpy.ndarray:
+    """
+    Unpacks 4-bit values packed by pack_bytes_to_4bit into an array of 8-bit values.
+    :parameter src_4bit: The packed 4-bit element values.
+    :parameter num_elems: The number of elements, which may be one less than twice the number of bytes.
+    :parameter signed: Whether the elements are signed (INT4), or unsigned (UINT4).
+    :return An int8 array if signed, or an uint8 array.
+    """
+    src = numpy.frombuffer(src_4bit, dtype=numpy.uint8)
+    dst = numpy.empty(len(src) * 2, dtype=numpy.uint8)
+    dst[0::2] = src & 0xF
+    dst[1::2] = src >> 4
+    dst = dst[:num_elems]
+    if signed:
+        # Sign-extend the 4-bit values.
+        return (dst ^ 0x8).astype(numpy.int8) - numpy.int8(8)
     return dst
 
 
@@ -394,7 +394,13 @@ def quantize_static(
                 CalibMaxIntermediateOutputs = Optional[int] :
                     Default is None. If set to an integer, during calculation of the min-max range of the tensors
                     it will load at max value number of outputs before computing and merging the range. This will
-                    produce the same result as all computing with None, but is more memory efficient.
+                    produce the same result as computing with None unless CalibMovingAverage is enabled, in which
+                    case the moving average is updated once per group of outputs, but is more memory efficient.
+                    For histogram-based methods (Entropy, Percentile, Distribution), every calibration sample
+                    is run twice: once to compute the range of the tensors, then to update the histograms every
+                    value number of outputs and release the outputs. The memory used by calibration no longer
+                    grows with the number of calibration samples, except for the inputs, and the result is the
+                    same as with None.
                 SmoothQuant = True/False :
                     Default is False. If enabled, SmoothQuant algorithm will be applied before quantization to do
                     fake input channel quantization.
@@ -3,6 +3,8 @@
 
 # -*- coding: UTF-8 -*-
 import argparse
+import collections
+import hashlib
 import logging
 
 import numpy as np
@@ -122,8 +124,110 @@ def sympy_reduce_product(x):
     return value
 
 
+def get_sympy_data_key(value):
+    # hashable key of sympy data, which is equal for equal values of the same types
+    if isinstance(value, np.ndarray):
+        data = tuple(value.ravel().tolist()) if value.dtype == object else value.tobytes()
+        return ("ndarray", value.dtype.str, value.shape, data)
+    if isinstance(value, (list, tuple)):
+        return (type(value).__name__, tuple([get_sympy_data_key(v) for v in value]))
+    return (type(value).__name__, value)
+
+
+def has_subgraph(node):
+    return any(attr.type in [onnx.AttributeProto.GRAPH, onnx.AttributeProto.GRAPHS] for attr in node.attribute)
+
+
+class SymbolicShapeInferenceCache:
+    """
+    Cache of symbolic shape inference results, to share between the runs of inference on similar models, like the
+    models of successive steps of an optimization pipeline.
+
+    The inferred model is cached with a hash of the graph and the inference parameters as key, so that inference of
+    a model seen before is skipped. The result of each node is also cached with a hash of the node, its input shapes
+    and values as key, so that in a model with a few changed nodes, only the nodes whose inputs changed are inferred
+    again. Results of nodes are reused only before any merge of symbolic dims, and not for nodes with subgraphs.
+    """
+
+    def __init__(self, max_models=4, max_nodes=2**18):
+        self.max_models = max_models
+        self.max_nodes = max_nodes
+        self.models_ = collections.OrderedDict()  # model key -> graph with inferred inputs, outputs and value_info
+        self.nodes_ = collections.OrderedDict()  # node key -> NodeRecord
+        self.model_hits = 0
+        self.node_hits = 0
+        self.node_misses = 0
+
+    class NodeRecord:
+        def __init__(self, value_infos, sympy_data, sympy_data_keys, symbolic_dims, node_index):
+            self.value_infos = value_infos  # serialized value info of each output
+            self.sympy_data = sympy_data  # sympy data of outputs
+            self.sympy_data_keys = sympy_data_keys  # keys of sympy data of outputs, added once computed
+            self.symbolic_dims = symbolic_dims  # symbolic dims added by the node
+            self.node_index = node_index  # index of node in graph if it is used in names of new symbolic dims
+
+    @staticmethod
+    def get_model_key(in_mp, context):
+        h = hashlib.sha256(context)
+        graph = in_mp.graph
+        # value_info is not hashed since inference replaces it.
+        for items in [
+            graph.node,
+            graph.input,
+            graph.output,
+            graph.initializer,
+            graph.sparse_initializer,
+            in_mp.functions,
+        ]:
+            h.update(len(items).to_bytes(8, "little"))
+            for item in items:
+                data = item.SerializeToString()
+                h.update(len(data).to_bytes(8, "little"))
+                h.update(data)
+        return h.digest()
+
+    def get_model(self, model_key, in_mp):
+        graph = self.models_.get(model_key)
+        if graph is None:
+            return None
+        self.models_.move_to_end(model_key)
+        self.model_hits += 1
+        out_mp = onnx.ModelProto()
+        out_mp.CopyFrom(in_mp)
+        for field in ["input", "output", "value_info"] + (["node"] if len(graph.node) else []):
+            out_mp.graph.ClearField(field)
+            getattr(out_mp.graph, field).extend(getattr(graph, field))
+        return out_mp
+
+    def add_model(self, model_key, out_mp):
+        graph = onnx.GraphProto()
+        graph.input.extend(out_mp.graph.input)
+        graph.output.extend(out_mp.graph.output)
+        graph.value_info.extend(out_mp.graph.value_info)
+        # Nodes are only changed by inference of subgraphs.
+        if any(has_subgraph(node) for node in out_mp.graph.node):
+            graph.node.extend(out_mp.graph.node)
+        self.models_[model_key] = graph
+        while len(self.models_) > self.max_models:
+            self.models_.popitem(last=False)
+
+    def get_node(self, node_key):
+        record = self.nodes_.get(node_key)
+        if record is None:
+            self.node_misses += 1
+            return None
+        self.nodes_.move_to_end(node_key)
+        self.node_hits += 1
+        return record
+
+    def add_node(self, node_key, record):
+        self.nodes_[node_key] = record
+        while len(self.nodes_) > self.max_nodes:
+            self.nodes_.popitem(last=False)
+
+
 class SymbolicShapeInference:
-    def __init__(self, int_max, auto_merge, guess_output_rank, verbose, prefix=""):
+    def __init__(self, int_max, auto_merge, guess_output_rank, verbose, prefix="", cache=None):
         self.dispatcher_ = {
             "Add": self._infer_symbolic_compute_ops,
             "ArrayFeatureExtractor": self._infer_ArrayFeatureExtractor,
@@ -256,6 +360,8 @@ class SymbolicShapeInference:
         self.int_max_ = int_max
         self.subgraph_id_ = 0
         self.prefix_ = prefix
+        self.cache_ = cache
+        self.node_index_used_ = False
 
     def _add_suggested_merge(self, symbols, apply=False):
         assert all([(type(s) is str and s in self.symbolic_dims_) or is_literal(s) for s in symbols])
@@ -684,6 +790,7 @@ class SymbolicShapeInference:
         return new_symbolic_dim
 
     def _new_symbolic_dim_from_output(self, node, out_idx=0, dim=0):
+        self.node_index_used_ = True
         return self._new_symbolic_dim(
             f"{node.op_type}{self.prefix_}_{list(self.out_mp_.graph.node).index(node)}_o{out_idx}_",
             dim,
@@ -2684,8 +2791,23 @@ class SymbolicShapeInference:
                 ):
                     raise Exception("Invalid model with cyclic graph")
 
+        if self.cache_ is not None:
+            self.cache_context_ = self._get_cache_context(self.out_mp_)
+            self.initializer_digests_ = {}
+            self.sympy_data_keys_ = {}
+            self.node_records_ = {}  # output name -> record of the node
+
         for node in sorted_nodes:
             assert all([i in self.known_vi_ for i in node.input if i])
+            # results of nodes are not reused after symbolic dims are merged, since merges change the results
+            node_key = None
+            if self.cache_ is not None and not self.suggested_merge_ and not has_subgraph(node):
+                node_key = self._get_node_key(node)
+                if self._reuse_node_result(node, node_key):
+                    continue
+                symbolic_dims_count = len(self.symbolic_dims_)
+                self.node_index_used_ = False
+
             self._onnx_infer_single_node(node)
             known_aten_op = False
             if node.op_type in self.dispatcher_:
@@ -2907,21 +3029,98 @@ class SymbolicShapeInference:
                             logger.debug("Merging: " + str(self.suggested_merge_))  # noqa: G003
                     return False
 
+            if node_key is not None and not self.suggested_merge_:
+                self._add_node_result(node, node_key, symbolic_dims_count)
+
         self.run_ = False
         return True
 
+    def _get_cache_context(self, mp):
+        # parameters of inference which affect the results
+        opsets = sorted((opset.domain, opset.version) for opset in mp.opset_import)
+        return repr((self.int_max_, self.auto_merge_, self.guess_output_rank_, self.prefix_, opsets)).encode()
+
+    def _get_node_key(self, node):
+        # sympy data is compared as objects, since it is slow to convert to bytes
+        h = hashlib.sha256(self.cache_context_)
+        h.update(node.SerializeToString())
+        sympy_data_keys = []
+        for name in node.input:
+            h.update(b"|")
+            if not name:
+                continue
+            if name in self.known_vi_:
+                h.update(b"v" + self.known_vi_[name].SerializeToString())
+            if name in self.sympy_data_:
+                sympy_data_keys.append(self._get_sympy_data_key(name))
+                h.update(b"d")
+            if name in self.initializers_:
+                if name not in self.initializer_digests_:
+                    self.initializer_digests_[name] = hashlib.sha256(
+                        self.initializers_[name].SerializeToString()
+                    ).digest()
+                h.update(b"i" + self.initializer_digests_[name])
+            if name in self.graph_inputs_:
+                h.update(b"g")
+        return h.digest(), tuple(sympy_data_keys)
+
+    def _get_sympy_data_key(self, name):
+        if name not in self.sympy_data_keys_:
+            self.sympy_data_keys_[name] = get_sympy_data_key(self.sympy_data_[name])
+            # keys are computed when the data is used, so they are added to the record of the node then
+            if name in self.node_records_:
+                self.node_records_[name].sympy_data_keys[name] = self.sympy_data_keys_[name]
+        return self.sympy_data_keys_[name]
+
+    def _reuse_node_result(self, node, node_key):
+        record = self.cache_.get_node(node_key)
+        if record is None:
+            return False
+        # the names of new symbolic dims would be different for a node at another index
+        if record.node_index is not None and record.node_index != list(self.out_mp_.graph.node).index(node):
+            return False
+
+        for o, value_info in zip([o for o in node.output if o], record.value_infos):
+            vi = self.out_mp_.graph.value_info.add()
+            vi.ParseFromString(value_info)
+            self.known_vi_[o] = vi
+        self.sympy_data_.update(record.sympy_data)
+        self.sympy_data_keys_.update(record.sympy_data_keys)
+        self.node_records_.update({o: record for o in record.sympy_data})
+        for name, dim in record.symbolic_dims:
+            self.symbolic_dims_.setdefault(name, dim)
+        return True
+
+    def _add_node_result(self, node, node_key, symbolic_dims_count):
+        outputs = [o for o in node.output if o]
+        record = SymbolicShapeInferenceCache.NodeRecord(
+            [self.known_vi_[o].SerializeToString() for o in outputs],
+            {o: self.sympy_data_[o] for o in outputs if o in self.sympy_data_},
+            {o: self.sympy_data_keys_[o] for o in outputs if o in self.sympy_data_keys_},
+            list(self.symbolic_dims_.items())[symbolic_dims_count:],
+            list(self.out_mp_.graph.node).index(node) if self.node_index_used_ else None,
+        )
+        self.cache_.add_node(node_key, record)
+        self.node_records_.update({o: record for o in record.sympy_data})
+
     def _update_output_from_vi(self):
         for output in self.out_mp_.graph.output:
             if output.name in self.known_vi_:
                 output.CopyFrom(self.known_vi_[output.name])
 
     @staticmethod
-    def infer_shapes(in_mp, int_max=2**31 - 1, auto_merge=False, guess_output_rank=False, verbose=0):
+    def infer_shapes(in_mp, int_max=2**31 - 1, auto_merge=False, guess_output_rank=False, verbose=0, cache=None):
         onnx_opset = get_opset(in_mp)
         if (not onnx_opset) or onnx_opset < 7:
             logger.warning("Only support models of onnx opset 7 and above.")
             return None
-        symbolic_shape_inference = SymbolicShapeInference(int_max, auto_merge, guess_output_rank, verbose)
+        symbolic_shape_inference = SymbolicShapeInference(int_max, auto_merge, guess_output_rank, verbose, cache=cache)
+        if cache is not None:
+            model_key = cache.get_model_key(in_mp, symbolic_shape_inference._get_cache_context(in_mp))
+            out_mp = cache.get_model(model_key, in_mp)
+            if out_mp is not None:
+                return out_mp
+
         all_shapes_inferred = False
         symbolic_shape_inference._preprocess(in_mp)
         while symbolic_shape_inference.run_:
@@ -2930,6 +3129,8 @@ class SymbolicShapeInference:
         if not all_shapes_inferred:
             onnx.save_model(symbolic_shape_inference.out_mp_, "sym_shape_infer_temp.onnx", save_as_external_data=True)
             raise Exception("Incomplete symbolic shape inference")
+        if cache is not None:
+            cache.add_model(model_key, symbolic_shape_inference.out_mp_)
         return symbolic_shape_inference.out_mp_
 
 
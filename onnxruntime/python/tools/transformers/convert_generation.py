@@ -885,6 +885,7 @@ def remove_shared_initializers(
     min_elements: int = 1024,
     signature_cache1: Optional[dict] = None,
     signature_cache2: Optional[dict] = None,
+    base_dir: Optional[str] = None,
 ):
     """Remove initializers with same value from two graphs.
 
@@ -895,6 +896,7 @@ def remove_shared_initializers(
         min_elements (int, optional): minimal number of elements for initializers to be considered. Defaults to 1024.
         signature_cache1 (dict): Optional dictionary to store data signatures of tensors in graph1 in order to speed up comparison
         signature_cache2 (dict): Optional dictionary to store data signatures of tensors in graph2 in order to speed up comparison
+        base_dir (str): Optional directory of external data that is not loaded into the graphs
     """
 
     mapping_initializers_1 = {}
@@ -911,7 +913,7 @@ def remove_shared_initializers(
             if not (initializer2.dims and sum(initializer2.dims) >= min_elements):
                 continue
 
-            if OnnxModel.has_same_value(initializer1, initializer2, signature_cache1, signature_cache2):
+            if OnnxModel.has_same_value(initializer1, initializer2, signature_cache1, signature_cache2, base_dir):
                 mapping_initializers_1[initializer1.name] = shared_prefix + initializer2.name
                 shared_initializers_1.append(initializer1)
 
@@ -975,7 +977,7 @@ def remove_shared_initializers(
         initializer.name = mapping_initializers_2[initializer.name]
 
     for initializer in shared_initializers_2:
-        shape = onnx.numpy_helper.to_array(initializer).shape
+        shape = initializer.dims
         value_info = onnx.helper.make_tensor_value_info(initializer.name, initializer.data_type, shape)
         # Need add value_info for initializers moved to parent graph. Otherwise, ORT will fail.
         graph1.value_info.append(value_info)
@@ -3,8 +3,10 @@
 # Licensed under the MIT License.
 # --------------------------------------------------------------------------
 import logging
+from typing import Optional
 
 import onnx
+from onnx_model import OnnxModel
 
 
 class DynamoOnnxHelper:
@@ -12,8 +14,17 @@ class DynamoOnnxHelper:
     Helper class for processing ONNX models exported by torch Dynamo.
     """
 
-    def __init__(self, model: onnx.ModelProto):
+    def __init__(self, model: onnx.ModelProto, onnx_model: Optional[OnnxModel] = None):
         self.model = model
+        # OnnxModel wrapping the same model, whose graph index is invalidated by the changes made here
+        self.onnx_model = onnx_model
+
+    def mark_graph_index_dirty(self) -> None:
+        """
+        Rebuilds the graph index of onnx_model on its next lookup. Call it after changing nodes in place.
+        """
+        if self.onnx_model is not None:
+            self.onnx_model.mark_graph_index_dirty()
 
     def update_edges(self, edge_mapping: dict) -> None:
         """
@@ -33,6 +44,7 @@ class DynamoOnnxHelper:
         for graph_output in self.model.graph.output:
             if graph_output.name in edge_mapping:
                 graph_output.name = edge_mapping[graph_output.name]
+        self.mark_graph_index_dirty()
 
     def unroll_function(self, func_name: str) -> None:
         """
@@ -63,6 +75,7 @@ class DynamoOnnxHelper:
             self.model.graph.node.append(node)
         if func_to_remove is not None:
             self.model.functions.remove(func_to_remove)
+        self.mark_graph_index_dirty()
 
         edge_mapping = {}
         for i in range(len(edges_to_remove)):
@@ -85,6 +98,7 @@ class DynamoOnnxHelper:
                 nodes_to_remove.append(node)
         for node in nodes_to_remove:
             self.model.graph.node.remove(node)
+        self.mark_graph_index_dirty()
 
         self.update_edges(edge_mapping)
 
@@ -0,0 +1,192 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation.  All rights reserved.
+# Licensed under the MIT License.
+# --------------------------------------------------------------------------
+
+# Helpers to work on models loaded with load_external_data=False, without loading the weights into memory.
+# Data of a tensor in an external data file is memory-mapped when it is read, and copied in chunks when the
+# model is saved, so peak memory stays near the size of the largest tensor that is actually rewritten.
+
+import math
+import mmap
+import os
+import uuid
+from typing import BinaryIO, Iterator, Optional, Set
+
+import numpy as np
+from onnx import AttributeProto, GraphProto, ModelProto, TensorProto, helper, numpy_helper
+from onnx.external_data_helper import ExternalDataInfo
+
+# Size of chunks when copying external data between files.
+COPY_CHUNK_SIZE = 64 * 1024 * 1024
+
+# Data types whose raw data layout is the same as the layout of a numpy array of that type, so they can be
+# memory-mapped. Other types (like bfloat16, float8 and int4) are loaded into a copy of the tensor instead.
+_MEMMAP_DATA_TYPES = [
+    TensorProto.FLOAT,
+    TensorProto.FLOAT16,
+    TensorProto.DOUBLE,
+    TensorProto.INT8,
+    TensorProto.INT16,
+    TensorProto.INT32,
+    TensorProto.INT64,
+    TensorProto.UINT8,
+    TensorProto.UINT16,
+    TensorProto.UINT32,
+    TensorProto.UINT64,
+    TensorProto.BOOL,
+    TensorProto.COMPLEX64,
+    TensorProto.COMPLEX128,
+]
+
+
+def is_external_data_not_loaded(tensor: TensorProto) -> bool:
+    """Returns True when the data of a tensor is in an external data file and not loaded into the tensor."""
+    return tensor.data_location == TensorProto.EXTERNAL and not tensor.HasField("raw_data")
+
+
+def get_external_data_path(tensor: TensorProto, base_dir: Optional[str]) -> str:
+    return os.path.join(base_dir or "", ExternalDataInfo(tensor).location)
+
+
+def external_tensor_to_array(tensor: TensorProto, base_dir: Optional[str]) -> np.ndarray:
+    """Returns the value of a tensor in an external data file without loading it into the tensor.
+    The returned array is a read-only memory map of the external data file when the data type allows it.
+    """
+    shape = tuple(tensor.dims)
+    if tensor.data_type not in _MEMMAP_DATA_TYPES:
+        copy = TensorProto()
+        copy.CopyFrom(tensor)
+        load_external_data(copy, base_dir)
+        return numpy_helper.to_array(copy)
+
+    dtype = np.dtype(helper.tensor_dtype_to_np_dtype(tensor.data_type)).newbyteorder("<")
+    size = math.prod(shape)
+    if size == 0:
+        return np.empty(shape, dtype=dtype)
+
+    info = ExternalDataInfo(tensor)
+    data = np.memmap(
+        get_external_data_path(tensor, base_dir), dtype=dtype, mode="r", offset=info.offset or 0, shape=(size,)
+    )
+    return data.reshape(shape)
+
+
+def external_data_buffer(tensor: TensorProto, base_dir: Optional[str]) -> memoryview:
+    """Returns a read-only memory map of the external data of a tensor, which has the bytes of its raw_data."""
+    info = ExternalDataInfo(tensor)
+    path = get_external_data_path(tensor, base_dir)
+    offset = info.offset or 0
+    length = info.length or os.path.getsize(path) - offset
+    if length == 0:
+        return memoryview(b"")
+    with open(path, "rb") as data_file:
+        # Unlike numpy.memmap, a memoryview of mmap is hashable and has the same hash as the bytes it contains.
+        data = mmap.mmap(data_file.fileno(), 0, access=mmap.ACCESS_READ)
+    return memoryview(data)[offset : offset + length]
+
+
+def load_external_data(tensor: TensorProto, base_dir: Optional[str]):
+    """Loads the external data of a tensor into raw_data, and makes it a tensor with data inside the model.
+    Unlike onnx.external_data_helper.load_external_data_for_tensor, the location can be an absolute path, like the
+    temporary file of float16 data written by OnnxModel.convert_float_to_float16.
+    """
+    tensor.raw_data = bytes(external_data_buffer(tensor, base_dir))
+    tensor.data_location = TensorProto.DEFAULT
+    del tensor.external_data[:]
+
+
+def load_small_external_data(model: ModelProto, base_dir: Optional[str], size_threshold: int = 1024 * 1024):
+    """Loads external data of tensors smaller than size_threshold bytes, like shapes and indices.
+    Values of these tensors are read by shape inference and fusions, which do not know the external data directory.
+    """
+    for tensor in get_all_tensors(model):
+        if is_external_data_not_loaded(tensor) and len(external_data_buffer(tensor, base_dir)) < size_threshold:
+            load_external_data(tensor, base_dir)
+
+
+def copy_external_data(tensor: TensorProto, base_dir: Optional[str], data_file: BinaryIO, location: str):
+    """Appends the external data of a tensor to an opened data file in chunks, and points the tensor to it.
+
+    Args:
+        tensor (TensorProto): a tensor with external data not loaded.
+        base_dir (str): directory of the external data file of the tensor.
+        data_file (BinaryIO): the data file to append to.
+        location (str): location of data_file relative to the directory of the saved model.
+    """
+    info = ExternalDataInfo(tensor)
+    data_file.seek(0, os.SEEK_END)
+    offset = data_file.tell()
+    with open(get_external_data_path(tensor, base_dir), "rb") as source:
+        source.seek(info.offset or 0)
+        remaining = info.length or math.inf
+        while remaining > 0:
+            chunk = source.read(min(remaining, COPY_CHUNK_SIZE))
+            if not chunk:
+                break
+            data_file.write(chunk)
+            remaining -= len(chunk)
+    set_external_data_location(tensor, location, offset, data_file.tell() - offset)
+
+
+def set_external_data_location(tensor: TensorProto, location: str, offset: int, length: int):
+    """Points a tensor to data written to an external data file, and clears data in the tensor.
+    Unlike onnx.external_data_helper.set_external_data, the tensor does not need to have raw_data.
+    """
+    tensor.ClearField("raw_data")
+    tensor.data_location = TensorProto.EXTERNAL
+    del tensor.external_data[:]
+    for key, value in (("location", location), ("offset", offset), ("length", length)):
+        entry = tensor.external_data.add()
+        entry.key = key
+        entry.value = str(value)
+
+
+def get_all_tensors(model: ModelProto) -> Iterator[TensorProto]:
+    """Yields initializers and tensor attributes of all graphs and subgraphs of a model."""
+    graph_queue = [model.graph]
+    while graph_queue:
+        graph: GraphProto = graph_queue.pop(0)
+        yield from graph.initializer
+        for node in graph.node:
+            for attr in node.attribute:
+                if attr.type == AttributeProto.TENSOR:
+                    yield attr.t
+                elif attr.type == AttributeProto.TENSORS:
+                    yield from attr.tensors
+                elif attr.type == AttributeProto.GRAPH:
+                    graph_queue.append(attr.g)
+                elif attr.type == AttributeProto.GRAPHS:
+                    graph_queue.extend(attr.graphs)
+
+
+def get_external_data_files_not_loaded(model: ModelProto, base_dir: Optional[str]) -> Set[str]:
+    """Returns real paths of the external data files that have data not loaded into the model."""
+    return {
+        os.path.realpath(get_external_data_path(tensor, base_dir))
+        for tensor in get_all_tensors(model)
+        if is_external_data_not_loaded(tensor)
+    }
+
+
+def save_external_data_not_loaded(model: ModelProto, base_dir: Optional[str], output_dir: str, location: Optional[str]):
+    """Copies external data that is not loaded from its original files to external data files of a saved model.
+
+    Args:
+        model (ModelProto): the model to save.
+        base_dir (str): directory of the original external data files.
+        output_dir (str): directory of the saved model.
+        location (str): name of the data file for all tensors, or None to save each tensor to its own file.
+    """
+    data_files = {}
+    try:
+        for tensor in get_all_tensors(model):
+            if not is_external_data_not_loaded(tensor):
+                continue
+            tensor_location = location if location is not None else str(uuid.uuid1())
+            if tensor_location not in data_files:
+                data_files[tensor_location] = open(os.path.join(output_dir, tensor_location), "ab")  # noqa: SIM115
+            copy_external_data(tensor, base_dir, data_files[tensor_location], tensor_location)
+    finally:
+        for data_file in data_files.values():
+            data_file.close()
@@ -12,15 +12,25 @@
 # (5) handle Resize and GroupNorm with mixed float inputs
 # (6) allow convert_float_to_float16 to accept model path
 
+import contextlib
+import hashlib
 import itertools
 import logging
 import os
 import tempfile
-from typing import Dict
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, Optional
 
 import numpy as np
 import onnx
-from onnx import AttributeProto, GraphProto, ModelProto, NodeProto, TensorProto, helper, numpy_helper
+from external_data import (
+    external_tensor_to_array,
+    get_external_data_files_not_loaded,
+    is_external_data_not_loaded,
+    set_external_data_location,
+)
+from onnx import AttributeProto, GraphProto, ModelProto, NodeProto, TensorProto, helper
 from onnx.shape_inference import infer_shapes, infer_shapes_path
 from packaging import version
 
@@ -71,13 +81,16 @@ def convert_np_to_float16(np_array, min_positive_val=5.96e-08, max_finite_val=65
     return np.float16(np_array)
 
 
-def convert_tensor_float_to_float16(tensor, min_positive_val=5.96e-08, max_finite_val=65504.0):
+def convert_tensor_float_to_float16(tensor, min_positive_val=5.96e-08, max_finite_val=65504.0, external_data_dir=None):
     """Convert tensor float to float16.
 
     Args:
         tensor (TensorProto): the tensor to convert.
         min_positive_val (float, optional): minimal positive value. Defaults to 1e-7.
         max_finite_val (float, optional): maximal finite value. Defaults to 1e4.
+        external_data_dir (str, optional): directory of external data that is not loaded into the tensor.
+                                           The float data is memory-mapped, and the float16 data is stored in the
+                                           tensor. Defaults to None.
 
     Raises:
         ValueError: input type is not TensorProto.
@@ -90,6 +103,13 @@ def convert_tensor_float_to_float16(tensor, min_positive_val=5.96e-08, max_finit
         raise ValueError(f"Expected input type is an ONNX TensorProto but got {type(tensor)}")
 
     if tensor.data_type == TensorProto.FLOAT:
+        float32_list = None
+        if is_external_data_not_loaded(tensor):
+            # read float data from a memory map of the external data file, instead of loading it into the tensor
+            float32_list = external_tensor_to_array(tensor, external_data_dir).ravel()
+            tensor.data_location = TensorProto.DEFAULT
+            del tensor.external_data[:]
+
         tensor.data_type = TensorProto.FLOAT16
         # convert float_data (float type) to float16 and write to int32_data
         if tensor.float_data:
@@ -101,6 +121,7 @@ def convert_tensor_float_to_float16(tensor, min_positive_val=5.96e-08, max_finit
         if tensor.raw_data:
             # convert n.raw_data to float
             float32_list = np.frombuffer(tensor.raw_data, dtype="float32")
+        if float32_list is not None:
             # convert float to float16
             float16_list = convert_np_to_float16(float32_list, min_positive_val, max_finite_val)
             # convert float16 to bytes and write back to raw_data
@@ -108,9 +129,205 @@ def convert_tensor_float_to_float16(tensor, min_positive_val=5.96e-08, max_finit
     return tensor
 
 
+# Number of elements converted at a time, which bounds the memory used by temporary arrays of the conversion.
+CONVERSION_CHUNK_SIZE = 1 << 20
+
+
+class Float16ConversionCache:
+    """
+    Persistent cache of the float16 data of converted initializers, so that converting a model again after a few
+    changes only converts the initializers that changed.
+
+    The float16 data is stored in a file of cache_dir, named by a hash of the float data and conversion parameters.
+    When the files take more than max_size bytes, the least recently used ones are removed. The modification time
+    of a file is its last use, so that the order is kept across conversions.
+    """
+
+    def __init__(self, cache_dir: str, max_size: int = 16 << 30):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        os.makedirs(cache_dir, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+
+        # path to size of the cached files, from the least to the most recently used
+        files = [entry for entry in os.scandir(cache_dir) if entry.name.endswith(".fp16") and entry.is_file()]
+        files.sort(key=lambda entry: entry.stat().st_mtime_ns)
+        self._sizes = OrderedDict((entry.path, entry.stat().st_size) for entry in files)
+        self._total_size = sum(self._sizes.values())
+
+    @staticmethod
+    def get_key(float32_data: np.ndarray, min_positive_val: float, max_finite_val: float) -> str:
+        h = hashlib.sha256(f"{min_positive_val},{max_finite_val},{float32_data.size}".encode())
+        for i in range(0, float32_data.size, CONVERSION_CHUNK_SIZE):
+            h.update(np.ascontiguousarray(float32_data[i : i + CONVERSION_CHUNK_SIZE]).view(np.uint8))
+        return h.hexdigest()
+
+    def get_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + ".fp16")
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """Returns a memory map of cached float16 data, or None if it is not cached."""
+        path = self.get_path(key)
+        if not os.path.isfile(path):
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._touch(path)
+        if os.path.getsize(path) == 0:
+            return np.empty(0, dtype=np.float16)
+        return np.memmap(path, dtype=np.float16, mode="r")
+
+    def add(self, key: str, data_path: str):
+        """
+        Moves a file with the float16 data of key into the cache. The least recently used files are then removed
+        while the cache takes more than max_size bytes.
+        """
+        path = self.get_path(key)
+        os.replace(data_path, path)
+        self._touch(path)
+
+        while self._total_size > self.max_size and self._sizes:
+            evicted_path, size = self._sizes.popitem(last=False)
+            self._total_size -= size
+            # The file might have been removed by another conversion using the same cache, or be in use.
+            with contextlib.suppress(OSError):
+                os.remove(evicted_path)
+
+    def _touch(self, path: str):
+        try:
+            os.utime(path)
+            size = os.path.getsize(path)
+        except OSError:
+            return
+        self._total_size += size - self._sizes.pop(path, 0)
+        self._sizes[path] = size
+
+
+class _InitializerFloat16Converter:
+    """
+    Converts float initializers to float16 in chunks of CONVERSION_CHUNK_SIZE elements, which are converted by
+    num_workers threads in parallel. The float16 data is written chunk by chunk, to the tensor or to an external
+    data file, and to the cache.
+    """
+
+    def __init__(
+        self,
+        min_positive_val: float,
+        max_finite_val: float,
+        num_workers: int = 1,
+        cache: Optional[Float16ConversionCache] = None,
+        external_data_dir: Optional[str] = None,
+        external_data_location: Optional[str] = None,
+    ):
+        if external_data_location is not None and external_data_dir is None:
+            raise ValueError("external_data_dir is required to save float16 data to external_data_location")
+        self.min_positive_val = min_positive_val
+        self.max_finite_val = max_finite_val
+        self.num_workers = num_workers
+        self.cache = cache
+        self.external_data_dir = external_data_dir
+        self.external_data_location = external_data_location
+        self.executor = None
+        self.data_file = None
+        self.temp_data_path = None
+
+    def __enter__(self):
+        if self.num_workers > 1:
+            self.executor = ThreadPoolExecutor(self.num_workers)
+        if self.external_data_location is not None:
+            # Write a new file that replaces any existing one once all the initializers are converted.
+            data_dir = os.path.dirname(os.path.join(self.external_data_dir, self.external_data_location))
+            fd, self.temp_data_path = tempfile.mkstemp(dir=data_dir or None, suffix=".tmp")
+            self.data_file = os.fdopen(fd, "wb")
+        return self
+
+    def __exit__(self, exc_type, *args):
+        if self.executor is not None:
+            self.executor.shutdown()
+        if self.data_file is not None:
+            self.data_file.close()
+            if exc_type is None:
+                os.replace(self.temp_data_path, os.path.join(self.external_data_dir, self.external_data_location))
+            else:
+                os.remove(self.temp_data_path)
+
+    def _convert_chunks(self, float32_data: np.ndarray) -> Iterator[np.ndarray]:
+        chunks = (
+            float32_data[i : i + CONVERSION_CHUNK_SIZE] for i in range(0, float32_data.size, CONVERSION_CHUNK_SIZE)
+        )
+        if self.executor is None:
+            for chunk in chunks:
+                yield convert_np_to_float16(chunk, self.min_positive_val, self.max_finite_val)
+            return
+
+        # Keep at most two chunks per worker in flight, so that memory does not grow with the size of the tensor.
+        pending = deque()
+        for chunk in chunks:
+            pending.append(
+                self.executor.submit(convert_np_to_float16, chunk, self.min_positive_val, self.max_finite_val)
+            )
+            if len(pending) >= 2 * self.num_workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+    def _get_float16_chunks(self, float32_data: np.ndarray) -> Iterator[np.ndarray]:
+        if self.cache is None:
+            yield from self._convert_chunks(float32_data)
+            return
+
+        key = self.cache.get_key(float32_data, self.min_positive_val, self.max_finite_val)
+        cached = self.cache.get(key)
+        if cached is not None:
+            for i in range(0, cached.size, CONVERSION_CHUNK_SIZE):
+                yield cached[i : i + CONVERSION_CHUNK_SIZE]
+            return
+
+        # Write to a temporary file first, so that an interrupted conversion does not leave a partial entry.
+        fd, temp_path = tempfile.mkstemp(dir=self.cache.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as cache_file:
+                for chunk in self._convert_chunks(float32_data):
+                    cache_file.write(chunk.tobytes())
+                    yield chunk
+            self.cache.add(key, temp_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def convert(self, tensor: TensorProto) -> TensorProto:
+        if tensor.data_type != TensorProto.FLOAT or tensor.float_data:
+            return convert_tensor_float_to_float16(
+                tensor, self.min_positive_val, self.max_finite_val, self.external_data_dir
+            )
+
+        if is_external_data_not_loaded(tensor):
+            float32_data = external_tensor_to_array(tensor, self.external_data_dir).ravel()
+        else:
+            float32_data = np.frombuffer(tensor.raw_data, dtype=np.float32)
+
+        if self.data_file is not None:
+            offset = self.data_file.tell()
+            for chunk in self._get_float16_chunks(float32_data):
+                self.data_file.write(chunk.tobytes())
+            set_external_data_location(tensor, self.external_data_location, offset, self.data_file.tell() - offset)
+        else:
+            float16_data = np.empty(float32_data.size, dtype=np.float16)
+            position = 0
+            for chunk in self._get_float16_chunks(float32_data):
+                float16_data[position : position + chunk.size] = chunk
+                position += chunk.size
+            tensor.data_location = TensorProto.DEFAULT
+            del tensor.external_data[:]
+            tensor.raw_data = float16_data.tobytes()
+
+        tensor.data_type = TensorProto.FLOAT16
+        return tensor
+
+
 def make_value_info_from_tensor(tensor):
-    shape = numpy_helper.to_array(tensor).shape
-    return helper.make_tensor_value_info(tensor.name, tensor.data_type, shape)
+    return helper.make_tensor_value_info(tensor.name, tensor.data_type, tensor.dims)
 
 
 DEFAULT_OP_BLOCK_LIST = [
@@ -175,6 +392,10 @@ def convert_float_to_float16(
     force_fp16_initializers=False,
     force_fp16_inputs=None,
     use_bfloat16_as_blocked_nodes_dtype=False,
+    external_data_dir=None,
+    num_workers=1,
+    conversion_cache=None,
+    external_data_location=None,
 ):
     """Convert tensor float type in the input ONNX model to tensor float16.
 
@@ -194,6 +415,16 @@ def convert_float_to_float16(
                                        Default to false, which will convert only the one needed to avoid precision loss.
         force_fp16_inputs(Dict[str, List[int]]): Force the conversion of the inputs of some operators to float16, even if
                                                  this script's preference it to keep them in float32.
+        external_data_dir (str, optional): directory of external data that is not loaded into the model.
+                                           Defaults to None.
+        num_workers (int, optional): number of threads converting chunks of initializers in parallel. Defaults to 1.
+        conversion_cache (Float16ConversionCache, optional): cache of converted initializers, to only convert the
+                                                             initializers that changed since a previous conversion.
+                                                             Defaults to None.
+        external_data_location (str, optional): name of a file in external_data_dir to save the float16 data of
+                                                converted initializers to, instead of keeping it in the model.
+                                                An existing file is replaced, unless the model has external data
+                                                in it. Defaults to None.
     Raises:
         ValueError: input type is not ModelProto.
 
@@ -223,6 +454,11 @@ def convert_float_to_float16(
     if not isinstance(model, ModelProto):
         raise ValueError(f"Expected an ONNX ModelProto but got {type(model)}")
 
+    if external_data_location is not None and external_data_dir is not None:
+        external_data_path = os.path.realpath(os.path.join(external_data_dir, external_data_location))
+        if external_data_path in get_external_data_files_not_loaded(model, external_data_dir):
+            raise ValueError(f"Cannot overwrite external data file {external_data_path} that is not loaded.")
+
     func_infer_shape = None
     if not disable_shape_infer and version.parse(onnx.__version__) >= version.parse("1.2.0"):
         try:
@@ -383,9 +619,11 @@ def convert_float_to_float16(
                 next_level.append(q.g)
                 for n in q.graphs:
                     next_level.append(n)  # noqa: PERF402
-                q.t.CopyFrom(convert_tensor_float_to_float16(q.t, min_positive_val, max_finite_val))
+                q.t.CopyFrom(convert_tensor_float_to_float16(q.t, min_positive_val, max_finite_val, external_data_dir))
                 for n in q.tensors:
-                    n = convert_tensor_float_to_float16(n, min_positive_val, max_finite_val)  # noqa: PLW2901
+                    n = convert_tensor_float_to_float16(  # noqa: PLW2901
+                        n, min_positive_val, max_finite_val, external_data_dir
+                    )
             # if q is graph, process input, output and value_info (ValueInfoProto)
             if isinstance(q, GraphProto):
                 # Note that float initializers tracked by fp32_initializers will be processed later.
@@ -404,15 +642,18 @@ def convert_float_to_float16(
 
         queue = next_level
 
-    for value in fp32_initializers.values():
-        # By default, to avoid precision loss, do not convert an initializer to fp16 when it is used only by fp32 nodes.
-        if force_fp16_initializers or value.fp16_nodes:
-            value.initializer = convert_tensor_float_to_float16(value.initializer, min_positive_val, max_finite_val)
-            value_info_list.append(make_value_info_from_tensor(value.initializer))
-            if value.fp32_nodes and not force_fp16_initializers:
-                logger.info(
-                    f"initializer is used by both fp32 and fp16 nodes. Consider add these nodes to block list:{value.fp16_nodes}"
-                )
+    with _InitializerFloat16Converter(
+        min_positive_val, max_finite_val, num_workers, conversion_cache, external_data_dir, external_data_location
+    ) as converter:
+        for value in fp32_initializers.values():
+            # By default, to avoid precision loss, do not convert an initializer to fp16 when it is used only by fp32 nodes.
+            if force_fp16_initializers or value.fp16_nodes:
+                value.initializer = converter.convert(value.initializer)
+                value_info_list.append(make_value_info_from_tensor(value.initializer))
+                if value.fp32_nodes and not force_fp16_initializers:
+                    logger.info(
+                        f"initializer is used by both fp32 and fp16 nodes. Consider add these nodes to block list:{value.fp16_nodes}"
+                    )
 
     # Some operators have data type fixed as float for some input. Add a float16 to float cast for those inputs.
     for node in mixed_float_type_node_list:
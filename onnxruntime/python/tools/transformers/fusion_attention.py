@@ -8,7 +8,7 @@ from typing import List, Optional, Tuple, Union
 import numpy as np
 from fusion_base import Fusion
 from fusion_options import AttentionMaskFormat
-from fusion_utils import FusionUtils, NumpyHelper
+from fusion_utils import FusionUtils
 from onnx import NodeProto, TensorProto, helper, numpy_helper
 from onnx_model import OnnxModel
 
@@ -181,7 +181,7 @@ class FusionAttention(Fusion):
             logger.debug(f"{reshape_q.input[1]} is not initializer.")
             return self.num_heads, self.hidden_size  # Fall back to user specified value
 
-        q_shape_value = NumpyHelper.to_array(q_shape)
+        q_shape_value = self.model.to_array(q_shape)
         if len(q_shape_value) != 4 or (q_shape_value[2] <= 0 or q_shape_value[3] <= 0):
             logger.debug(f"q_shape_value={q_shape_value}. Expected value are like [0, 0, num_heads, head_size].")
             return self.num_heads, self.hidden_size  # Fall back to user specified value
@@ -446,15 +446,15 @@ class FusionAttention(Fusion):
         name_prefix: str,
     ) -> Union[NodeProto, None]:
         q_bias = self.model.get_initializer(q_add.input[1]) or self.model.get_initializer(q_add.input[0])
-        qb = NumpyHelper.to_array(q_bias)
+        qb = self.model.to_array(q_bias)
         kb = np.zeros_like(qb)
         vb = np.zeros_like(qb)
         if k_add is not None:
             k_bias = self.model.get_initializer(k_add.input[1]) or self.model.get_initializer(k_add.input[0])
-            kb = NumpyHelper.to_array(k_bias)
+            kb = self.model.to_array(k_bias)
         if v_add is not None:
             v_bias = self.model.get_initializer(v_add.input[1]) or self.model.get_initializer(v_add.input[0])
-            vb = NumpyHelper.to_array(v_bias)
+            vb = self.model.to_array(v_bias)
 
         qkv_bias = np.stack((qb, kb, vb), axis=0)
         qkv_bias_dim = 3 * np.prod(qb.shape)
@@ -504,9 +504,9 @@ class FusionAttention(Fusion):
         k_weight = self.model.get_initializer(k_matmul.input[1])
         v_weight = self.model.get_initializer(v_matmul.input[1])
 
-        qw = NumpyHelper.to_array(q_weight)
-        kw = NumpyHelper.to_array(k_weight)
-        vw = NumpyHelper.to_array(v_weight)
+        qw = self.model.to_array(q_weight)
+        kw = self.model.to_array(k_weight)
+        vw = self.model.to_array(v_weight)
 
         assert qw.shape == kw.shape and kw.shape == vw.shape
         d = qw.shape[0]
@@ -587,21 +587,21 @@ class FusionAttention(Fusion):
         if self.disable_multi_head_attention_bias:
             if q_add is not None:
                 initializer_input = 1 if self.model.get_initializer(q_add.input[1]) else 0
-                if np.any(NumpyHelper.to_array(self.model.get_initializer(q_add.input[initializer_input]))):
+                if np.any(self.model.to_array(self.model.get_initializer(q_add.input[initializer_input]))):
                     q_add.input[1 - initializer_input] = q_slice_output
                     q_output = q_add
                     qkv_nodes.append(q_add)
                     self.node_name_to_graph_name[q_add.name] = self.this_graph_name
             if k_add is not None:
                 initializer_input = 1 if self.model.get_initializer(k_add.input[1]) else 0
-                if np.any(NumpyHelper.to_array(self.model.get_initializer(k_add.input[initializer_input]))):
+                if np.any(self.model.to_array(self.model.get_initializer(k_add.input[initializer_input]))):
                     k_add.input[1 - initializer_input] = k_slice_output
                     k_output = k_add
                     qkv_nodes.append(k_add)
                     self.node_name_to_graph_name[k_add.name] = self.this_graph_name
             if v_add is not None:
                 initializer_input = 1 if self.model.get_initializer(v_add.input[1]) else 0
-                if np.any(NumpyHelper.to_array(self.model.get_initializer(v_add.input[initializer_input]))):
+                if np.any(self.model.to_array(self.model.get_initializer(v_add.input[initializer_input]))):
                     v_add.input[1 - initializer_input] = v_slice_output
                     v_output = v_add
                     qkv_nodes.append(v_add)
@@ -798,9 +798,9 @@ class FusionAttention(Fusion):
             )
             return None
 
-        qw = NumpyHelper.to_array(q_weight)
-        kw = NumpyHelper.to_array(k_weight)
-        vw = NumpyHelper.to_array(v_weight)
+        qw = self.model.to_array(q_weight)
+        kw = self.model.to_array(k_weight)
+        vw = self.model.to_array(v_weight)
 
         # assert q and k have same shape as expected
         assert qw.shape == kw.shape
@@ -837,9 +837,9 @@ class FusionAttention(Fusion):
             qkv_weight_dim = 3 * qw_out_size
 
         if has_bias:
-            qb = NumpyHelper.to_array(q_bias)
-            kb = NumpyHelper.to_array(k_bias)
-            vb = NumpyHelper.to_array(v_bias)
+            qb = self.model.to_array(q_bias)
+            kb = self.model.to_array(k_bias)
+            vb = self.model.to_array(v_bias)
 
             q_bias_shape = np.prod(qb.shape)
             k_bias_shape = np.prod(kb.shape)
@@ -7,7 +7,6 @@ from typing import Tuple, Union
 
 import numpy as np
 from fusion_base import Fusion
-from fusion_utils import NumpyHelper
 from onnx import NodeProto, helper, numpy_helper
 from onnx_model import OnnxModel
 
@@ -91,7 +90,7 @@ class FusionMultiHeadAttentionSam2(Fusion):
         """
         layernorm_bias = self.model.get_initializer(layernorm_node.input[2])
         if layernorm_bias:
-            return NumpyHelper.to_array(layernorm_bias).shape[0]
+            return self.model.to_array(layernorm_bias).shape[0]
 
         return 0
 
@@ -169,9 +168,9 @@ class FusionMultiHeadAttentionSam2(Fusion):
         if not (q_weight and k_weight and v_weight):
             return None
 
-        qw = NumpyHelper.to_array(q_weight)
-        kw = NumpyHelper.to_array(k_weight)
-        vw = NumpyHelper.to_array(v_weight)
+        qw = self.model.to_array(q_weight)
+        kw = self.model.to_array(k_weight)
+        vw = self.model.to_array(v_weight)
         logger.debug(f"qw={qw.shape} kw={kw.shape} vw={vw.shape} hidden_size={hidden_size}")
 
         attention_node_name = self.model.create_node_name("MultiHeadAttention")
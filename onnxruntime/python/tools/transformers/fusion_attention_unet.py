@@ -7,7 +7,6 @@ from typing import Tuple, Union
 
 import numpy as np
 from fusion_base import Fusion
-from fusion_utils import NumpyHelper
 from onnx import NodeProto, TensorProto, helper
 from onnx_model import OnnxModel
 
@@ -85,7 +84,7 @@ class FusionAttentionUnet(Fusion):
         """
         layernorm_bias = self.model.get_initializer(layernorm_node.input[2])
         if layernorm_bias:
-            return NumpyHelper.to_array(layernorm_bias).shape[0]
+            return self.model.to_array(layernorm_bias).shape[0]
 
         return 0
 
@@ -181,9 +180,9 @@ class FusionAttentionUnet(Fusion):
         # Sometimes weights are stored in fp16
         float_type = q_weight.data_type
 
-        qw = NumpyHelper.to_array(q_weight)
-        kw = NumpyHelper.to_array(k_weight)
-        vw = NumpyHelper.to_array(v_weight)
+        qw = self.model.to_array(q_weight)
+        kw = self.model.to_array(k_weight)
+        vw = self.model.to_array(v_weight)
         logger.debug(f"qw={qw.shape} kw={kw.shape} vw={vw.shape} hidden_size={hidden_size}")
 
         # assert q and k have same shape as expected
@@ -487,9 +486,9 @@ class FusionAttentionUnet(Fusion):
             logger.debug("weights are in fp16. Please run fp16 conversion after optimization")
             return None
 
-        qw = NumpyHelper.to_array(q_weight)
-        kw = NumpyHelper.to_array(k_weight)
-        vw = NumpyHelper.to_array(v_weight)
+        qw = self.model.to_array(q_weight)
+        kw = self.model.to_array(k_weight)
+        vw = self.model.to_array(v_weight)
         logger.debug(f"qw={qw.shape} kw={kw.shape} vw={vw.shape} hidden_size={hidden_size}")
 
         # assert q and k have same shape as expected
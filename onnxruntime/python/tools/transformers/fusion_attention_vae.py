@@ -7,7 +7,7 @@ from typing import Tuple, Union
 
 import numpy as np
 from fusion_base import Fusion
-from onnx import NodeProto, TensorProto, helper, numpy_helper
+from onnx import NodeProto, TensorProto, helper
 from onnx_model import OnnxModel
 
 logger = getLogger(__name__)
@@ -121,9 +121,9 @@ class FusionAttentionVae(Fusion):
         k_bias_tensor = self.model.get_initializer(k_add.input[1]) or self.model.get_initializer(k_add.input[0])
         v_bias_tensor = self.model.get_initializer(v_add.input[1]) or self.model.get_initializer(v_add.input[0])
 
-        q_bias = numpy_helper.to_array(q_bias_tensor)
-        k_bias = numpy_helper.to_array(k_bias_tensor)
-        v_bias = numpy_helper.to_array(v_bias_tensor)
+        q_bias = self.model.to_array(q_bias_tensor)
+        k_bias = self.model.to_array(k_bias_tensor)
+        v_bias = self.model.to_array(v_bias_tensor)
 
         q_bias_shape = np.prod(q_bias.shape)
         k_bias_shape = np.prod(k_bias.shape)
@@ -134,9 +134,9 @@ class FusionAttentionVae(Fusion):
             logger.debug("weights are in fp16. Please run fp16 conversion after optimization")
             return None
 
-        q_weight = numpy_helper.to_array(q_weight_tensor)
-        k_weight = numpy_helper.to_array(k_weight_tensor)
-        v_weight = numpy_helper.to_array(v_weight_tensor)
+        q_weight = self.model.to_array(q_weight_tensor)
+        k_weight = self.model.to_array(k_weight_tensor)
+        v_weight = self.model.to_array(v_weight_tensor)
 
         # assert q and k have same shape as expected
         if q_weight.shape != k_weight.shape or q_weight.shape != v_weight.shape:
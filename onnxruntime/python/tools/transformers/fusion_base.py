@@ -2,6 +2,7 @@
 # Copyright (c) Microsoft Corporation.  All rights reserved.
 # Licensed under the MIT License.
 # --------------------------------------------------------------------------
+import time
 from collections import defaultdict
 from logging import getLogger
 from typing import Any, Dict, List, Optional, Sequence, Union
@@ -58,23 +59,42 @@ class Fusion:
         It searched nodes of given operators, and start fusion on each of those nodes.
         """
         logger.debug(f"start {self.description} fusion...")
+        start_time = time.perf_counter()
+
+        # Look up nodes of all search op types in one traversal. A pass without any of them cannot match anything,
+        # so it is skipped before building the input and output maps. This assumes that fuse() defers adding and
+        # removing nodes to the end of the pass, like all fusions do.
+        search_nodes = self.model.get_nodes_by_op_types(self.search_op_types)
+        if not any(search_nodes.values()):
+            logger.debug(f"skip {self.description} fusion since there is no {self.search_op_types} node")
+            self.model.add_fusion_pass_statistics(self.description, 0, time.perf_counter() - start_time, skipped=True)
+            return
+
         input_name_to_nodes = self.model.input_name_to_nodes()
         output_name_to_node = self.model.output_name_to_node()
+        search_node_graphs = [
+            (node, self.model.get_graph_by_node(node))
+            for search_op_type in self.search_op_types
+            for node in search_nodes[search_op_type]
+        ]
+        # Fusions change nodes and the maps in place. Mark the graph index dirty so that the maps are owned by this
+        # pass like the ones built without the index, and again after the pass to rebuild the index with its changes.
+        self.model.mark_graph_index_dirty()
 
         # This assumes that two search ops will not be fused at same time!
-        for search_op_type in self.search_op_types:
-            for node in self.model.get_nodes_by_op_type(search_op_type):
-                graph = self.model.get_graph_by_node(node)
-                if graph is None:
-                    raise Exception("Can not find node in any graph")
-                self.this_graph_name = graph.name
-                self.fuse(node, input_name_to_nodes, output_name_to_node)
+        for node, graph in search_node_graphs:
+            if graph is None:
+                raise Exception("Can not find node in any graph")
+            self.this_graph_name = graph.name
+            self.fuse(node, input_name_to_nodes, output_name_to_node)
+        self.model.mark_graph_index_dirty()
 
         op_list = [node.op_type for node in self.nodes_to_add]
         if self.fused_count:
             for key, value in self.fused_count.items():
                 if value:
                     logger.info(f"Fused {key}: {value}")
+            count = sum(self.fused_count.values())
         else:
             count = op_list.count(self.fused_op_type)
             if count > 0:
@@ -88,6 +108,8 @@ class Fusion:
         elif self.nodes_to_remove or self.nodes_to_add:
             self.model.update_graph()
 
+        self.model.add_fusion_pass_statistics(self.description, count, time.perf_counter() - start_time)
+
     def add_initializer(self, name: str, data_type: int, dims: Sequence[int], vals: Any, raw: bool = True):
         if raw:
             np_type = helper.tensor_dtype_to_np_dtype(data_type)
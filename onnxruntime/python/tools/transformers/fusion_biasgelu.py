@@ -6,7 +6,6 @@
 from logging import getLogger
 
 from fusion_base import Fusion
-from fusion_utils import NumpyHelper
 from onnx import helper
 from onnx_model import OnnxModel
 
@@ -40,7 +39,7 @@ class FusionBiasGelu(Fusion):
             if initializer is None:
                 continue
             bias_index = i
-            bias_weight = NumpyHelper.to_array(initializer)
+            bias_weight = self.model.to_array(initializer)
             break
         if bias_weight is None:
             return
@@ -7,7 +7,6 @@ from logging import getLogger
 from typing import Dict, List, Union
 
 from fusion_base import Fusion
-from fusion_utils import NumpyHelper
 from onnx import NodeProto, TensorProto, helper
 from onnx_model import OnnxModel
 
@@ -73,7 +72,7 @@ class FusionGemmFastGelu(Fusion):
                 x_dims = self.get_dimensions(matmul.input[i])
             else:
                 weight_index = i
-                weight = NumpyHelper.to_array(initializer)
+                weight = self.model.to_array(initializer)
         if weight is None:
             return
         if len(weight.shape) != 2:
@@ -90,7 +89,7 @@ class FusionGemmFastGelu(Fusion):
                 if initializer is None:
                     continue
                 bias_index = i
-                bias_weight = NumpyHelper.to_array(initializer)
+                bias_weight = self.model.to_array(initializer)
                 break
             if bias_weight is None:
                 return
@@ -8,7 +8,7 @@ from typing import List
 
 from fusion_base import Fusion
 from fusion_utils import FusionUtils
-from onnx import helper, numpy_helper
+from onnx import helper
 from onnx_model import OnnxModel
 
 logger = getLogger(__name__)
@@ -47,7 +47,7 @@ class FusionNhwcConv(Fusion):
         weight_tensor = self.model.get_initializer(conv.input[1])
         if weight_tensor is None:
             return
-        weight = numpy_helper.to_array(weight_tensor)
+        weight = self.model.to_array(weight_tensor)
         if len(weight.shape) != 4:
             return
 
@@ -64,6 +64,13 @@ class FusionOptions:
         self.enable_gemm_fast_gelu = False
         self.group_norm_channels_last = True
 
+        # Maintain an index of nodes during fusion instead of searching the graph. It speeds up optimization of large
+        # graphs. Code changing nodes in place outside of fusions shall call OnnxModel.mark_graph_index_dirty().
+        self.enable_graph_index = False
+
+        # Reuse symbolic shape inference results of unchanged nodes between the shape inferences of fusions.
+        self.enable_shape_infer_cache = False
+
         if model_type == "clip":
             self.enable_embed_layer_norm = False
 
@@ -132,6 +139,10 @@ class FusionOptions:
             options.use_raw_attention_mask(True)
         if args.no_attention_mask:
             options.disable_attention_mask()
+        if args.enable_graph_index:
+            options.enable_graph_index = True
+        if args.enable_shape_infer_cache:
+            options.enable_shape_infer_cache = True
 
         if args.model_type in ["unet", "vae", "clip"]:
             if args.use_group_norm_channels_first:
@@ -268,6 +279,22 @@ class FusionOptions:
         )
         parser.set_defaults(use_multi_head_attention=False)
 
+        parser.add_argument(
+            "--enable_graph_index",
+            required=False,
+            action="store_true",
+            help="maintain an index of nodes during fusion to speed up optimization of large models",
+        )
+        parser.set_defaults(enable_graph_index=False)
+
+        parser.add_argument(
+            "--enable_shape_infer_cache",
+            required=False,
+            action="store_true",
+            help="cache symbolic shape inference results of nodes to speed up repeated shape inference in fusions",
+        )
+        parser.set_defaults(enable_shape_infer_cache=False)
+
         parser.add_argument(
             "--disable_group_norm",
             required=False,
@@ -9,7 +9,7 @@ from typing import Tuple
 import numpy as np
 from fusion_attention import AttentionMask
 from fusion_base import Fusion
-from fusion_utils import FusionUtils, NumpyHelper
+from fusion_utils import FusionUtils
 from onnx import NodeProto, helper
 from onnx_model import OnnxModel
 
@@ -58,7 +58,7 @@ class FusionQOrderedAttention(Fusion):
                 # This is assuming it is a Tensor attribute (this is a safe assumption)
                 q_shape = constant_node.attribute[0].t
 
-        q_shape_value = NumpyHelper.to_array(q_shape)
+        q_shape_value = self.model.to_array(q_shape)
         if len(q_shape_value) != 4 or (q_shape_value[2] <= 0 or q_shape_value[3] <= 0):
             logger.debug(f"q_shape_value={q_shape_value}. Expected value are like [0, 0, num_heads, head_size].")
             return self.num_heads, self.hidden_size  # Fall back to user specified value
@@ -311,9 +311,9 @@ class FusionQOrderedAttention(Fusion):
         k_weight = self.model.get_initializer(dequantize_k_matmul_weight.input[0])
         v_weight = self.model.get_initializer(dequantize_v_matmul_weight.input[0])
 
-        qw = NumpyHelper.to_array(q_weight)
-        kw = NumpyHelper.to_array(k_weight)
-        vw = NumpyHelper.to_array(v_weight)
+        qw = self.model.to_array(q_weight)
+        kw = self.model.to_array(k_weight)
+        vw = self.model.to_array(v_weight)
 
         qw_out_size = np.prod(qw.shape[1:])
         kw_out_size = np.prod(kw.shape[1:])
@@ -7,7 +7,7 @@ from typing import Optional, Union
 
 from fusion_attention import FusionAttention
 from fusion_base import Fusion
-from onnx import FunctionProto, NodeProto, TensorProto, helper, numpy_helper
+from onnx import FunctionProto, NodeProto, TensorProto, helper
 from onnx_model import OnnxModel
 
 logger = logging.getLogger(__name__)
@@ -1168,8 +1168,8 @@ class FusionRotaryEmbeddings(Fusion):
             and self.model.get_initializer(cos_cache_name) is None
             and self.model.get_initializer(sin_cache_name) is None
         ):
-            cos_cache = numpy_helper.to_array(cos_cache_node[0].attribute[0].t).squeeze()
-            sin_cache = numpy_helper.to_array(sin_cache_node[0].attribute[0].t).squeeze()
+            cos_cache = self.model.to_array(cos_cache_node[0].attribute[0].t).squeeze()
+            sin_cache = self.model.to_array(sin_cache_node[0].attribute[0].t).squeeze()
 
             cos_cache_tensor = helper.make_tensor(
                 name=cos_cache_name,
@@ -1233,8 +1233,8 @@ class FusionRotaryEmbeddings(Fusion):
             and self.model.get_initializer(cos_cache_name) is None
             and self.model.get_initializer(sin_cache_name) is None
         ):
-            cos_cache = numpy_helper.to_array(cos_cache_node[0].attribute[0].t).squeeze()
-            sin_cache = numpy_helper.to_array(sin_cache_node[0].attribute[0].t).squeeze()
+            cos_cache = self.model.to_array(cos_cache_node[0].attribute[0].t).squeeze()
+            sin_cache = self.model.to_array(sin_cache_node[0].attribute[0].t).squeeze()
 
             # Reshape cos/sin cache from (M, H) to (M, H/2)
             head_size = cos_cache.shape[1]
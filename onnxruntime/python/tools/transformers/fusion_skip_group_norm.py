@@ -6,7 +6,6 @@ from logging import getLogger
 from typing import List
 
 from fusion_base import Fusion
-from fusion_utils import NumpyHelper
 from onnx import helper
 from onnx_model import OnnxModel
 
@@ -85,7 +84,7 @@ class FusionSkipGroupNorm(Fusion):
         if initializer is None:
             return False
 
-        bias_weight = NumpyHelper.to_array(initializer)
+        bias_weight = self.model.to_array(initializer)
         if bias_weight is None:
             logger.debug("Bias weight not found")
             return False
@@ -6,7 +6,6 @@
 from logging import getLogger
 
 from fusion_base import Fusion
-from fusion_utils import NumpyHelper
 from onnx import helper
 from onnx_model import OnnxModel
 
@@ -167,7 +166,7 @@ class FusionBiasSkipLayerNormalization(Fusion):
         initializer = self.model.get_initializer(bias_input)
         if initializer is None:
             return
-        bias_weight = NumpyHelper.to_array(initializer)
+        bias_weight = self.model.to_array(initializer)
         if bias_weight is None:
             logger.debug("Bias weight not found")
             return
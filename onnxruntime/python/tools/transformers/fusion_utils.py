@@ -7,7 +7,7 @@ from typing import Optional, Tuple
 
 import numpy
 from numpy import array_equal, ndarray
-from onnx import NodeProto, TensorProto, helper, numpy_helper
+from onnx import NodeProto, TensorProto, helper
 from onnx import onnx_pb as onnx_proto
 from onnx_model import OnnxModel
 
@@ -293,7 +293,7 @@ class FusionUtils:
 
 class NumpyHelper:
     @staticmethod
-    def to_array(tensor: TensorProto, fill_zeros: bool = False) -> ndarray:
+    def to_array(tensor: TensorProto, fill_zeros: bool = False, base_dir: Optional[str] = None) -> ndarray:
         # When weights are in external data format but not presented, we can still test the optimizer with two changes:
         # (1) set fill_zeros = True  (2) change load_external_data=False in optimizer.py
         if fill_zeros:
@@ -304,4 +304,5 @@ class NumpyHelper:
                 dtype=mapping.TENSOR_TYPE_TO_NP_TYPE[tensor.data_type],
             )
 
-        return numpy_helper.to_array(tensor)
+        # External data that is not loaded is memory-mapped from base_dir, like OnnxModel.to_array does.
+        return OnnxModel.tensor_to_array(tensor, base_dir)
@@ -7,10 +7,21 @@ import itertools
 import logging
 import os
 import sys
+import tempfile
 from collections import deque
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
+import numpy as np
+from external_data import (
+    external_data_buffer,
+    external_tensor_to_array,
+    get_all_tensors,
+    get_external_data_files_not_loaded,
+    is_external_data_not_loaded,
+    load_external_data,
+    save_external_data_not_loaded,
+)
 from float16 import convert_float_to_float16
 from onnx import (
     AttributeProto,
@@ -23,21 +34,197 @@ from onnx import (
     numpy_helper,
     save_model,
 )
-from onnx.external_data_helper import load_external_data_for_tensor, uses_external_data
-from shape_infer_helper import SymbolicShapeInferenceHelper
+from shape_infer_helper import SymbolicShapeInferenceCache, SymbolicShapeInferenceHelper
 
 logger = logging.getLogger(__name__)
 
 
+class GraphIndex:
+    """
+    Index of the nodes of a model and its subgraphs: owner graph, op_type, producer and consumers of each name.
+
+    Nodes added or removed through OnnxModel are indexed incrementally. Any other change of the nodes, like inputs
+    changed in place (node.input[0] = name) or nodes added directly to a GraphProto, shall be followed by
+    mark_dirty() (or OnnxModel.mark_graph_index_dirty()), so that the index is rebuilt on the next lookup.
+
+    Maps returned by input_name_to_nodes() and output_name_to_node() are views of the index. The consumer lists in
+    them are replaced instead of being updated, so a list obtained before adding or removing a node is unchanged.
+    Nodes are keyed by object identity, so the index keeps a reference to every indexed node.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.dirty = True
+
+    def mark_dirty(self):
+        self.dirty = True
+
+    def _build(self):
+        # Node key -> (node, graph, (index of graph in OnnxModel.graphs(), position in the graph))
+        self._nodes: Dict[int, Tuple[NodeProto, GraphProto, Tuple[int, int]]] = {}
+        # Nodes of each op_type in the order of OnnxModel.nodes(), except for op types in _unsorted_op_types.
+        self._op_type_to_nodes: Dict[str, Dict[int, NodeProto]] = {}
+        self._unsorted_op_types = set()
+        self._input_name_to_nodes: Dict[str, List[NodeProto]] = {}
+        self._output_name_to_node: Dict[str, NodeProto] = {}
+        self._graph_order: Dict[int, int] = {}
+        self._next_position: Dict[int, int] = {}
+
+        for i, graph in enumerate(self.model.graphs()):
+            self._graph_order[id(graph)] = i
+            for position, node in enumerate(graph.node):
+                key = id(node)
+                self._nodes[key] = (node, graph, (i, position))
+                self._op_type_to_nodes.setdefault(node.op_type, {})[key] = node
+                for input_name in node.input:
+                    if input_name:  # could be empty when it is optional
+                        if input_name in self._input_name_to_nodes:
+                            self._input_name_to_nodes[input_name].append(node)
+                        else:
+                            self._input_name_to_nodes[input_name] = [node]
+                for output_name in node.output:
+                    if output_name:
+                        self._output_name_to_node[output_name] = node
+            self._next_position[i] = len(graph.node)
+        self.dirty = False
+
+    def update(self):
+        """Rebuild the index if it is dirty."""
+        if self.dirty:
+            self._build()
+
+    def _register(self, node: NodeProto, graph: GraphProto, order: Tuple[int, int]):
+        key = id(node)
+        self._nodes[key] = (node, graph, order)
+        nodes = self._op_type_to_nodes.setdefault(node.op_type, {})
+        if nodes and self._nodes[id(next(reversed(nodes.values())))][2] > order:
+            self._unsorted_op_types.add(node.op_type)
+        nodes[key] = node
+
+        for input_name in set(node.input):
+            if input_name:
+                consumers = self._input_name_to_nodes.get(input_name, [])
+                # Keep consumers in the same order as OnnxModel.nodes().
+                i = len(consumers)
+                while i > 0 and self._nodes[id(consumers[i - 1])][2] > order:
+                    i -= 1
+                self._input_name_to_nodes[input_name] = [*consumers[:i], node, *consumers[i:]]
+
+        for output_name in node.output:
+            if output_name:
+                self._output_name_to_node[output_name] = node
+
+    def _unregister(self, node: NodeProto):
+        key = id(node)
+        del self._nodes[key]
+
+        nodes = self._op_type_to_nodes[node.op_type]
+        del nodes[key]
+        if not nodes:
+            del self._op_type_to_nodes[node.op_type]
+
+        for input_name in set(node.input):
+            consumers = self._input_name_to_nodes.get(input_name)
+            if consumers is not None:
+                consumers = [n for n in consumers if n is not node]
+                if consumers:
+                    self._input_name_to_nodes[input_name] = consumers
+                else:
+                    del self._input_name_to_nodes[input_name]
+
+        for output_name in node.output:
+            if self._output_name_to_node.get(output_name) is node:
+                del self._output_name_to_node[output_name]
+
+    def input_name_to_nodes(self) -> Dict[str, List[NodeProto]]:
+        self.update()
+        return self._input_name_to_nodes
+
+    def output_name_to_node(self) -> Dict[str, NodeProto]:
+        self.update()
+        return self._output_name_to_node
+
+    def get_nodes_by_op_type(self, op_type: str) -> List[NodeProto]:
+        self.update()
+        nodes = self._op_type_to_nodes.get(op_type)
+        if not nodes:
+            return []
+        if op_type in self._unsorted_op_types:
+            self._unsorted_op_types.discard(op_type)
+            nodes = dict(sorted(nodes.items(), key=lambda item: self._nodes[item[0]][2]))
+            self._op_type_to_nodes[op_type] = nodes
+        return list(nodes.values())
+
+    def get_graph_by_node(self, node: NodeProto) -> Optional[GraphProto]:
+        self.update()
+        entry = self._nodes.get(id(node))
+        return entry[1] if entry is not None and entry[0] is node else None
+
+    def find_node_index(self, graph: GraphProto, node: NodeProto) -> int:
+        """Find position of an indexed node in its graph by binary search. Returns -1 if it is not found."""
+        self.update()
+        order = self._nodes[id(node)][2]
+        low, high = 0, len(graph.node)
+        while low < high:
+            mid = (low + high) // 2
+            entry = self._nodes.get(id(graph.node[mid]))
+            if entry is None or entry[0] is not graph.node[mid]:  # The graph was changed without marking dirty.
+                break
+            if entry[2] < order:
+                low = mid + 1
+            else:
+                high = mid
+        if low < len(graph.node) and graph.node[low] is node:
+            return low
+
+        for i, n in enumerate(graph.node):
+            if n is node:
+                return i
+        return -1
+
+    def add_node(self, graph: GraphProto, index: int):
+        """Index the node at the given position of a graph, after it is appended or inserted into the graph."""
+        if self.dirty:
+            return
+        graph_order = self._graph_order.get(id(graph))
+        if graph_order is None or (index + 1 < len(graph.node) and id(graph.node[index + 1]) in self._nodes):
+            # A new subgraph, or a node inserted before indexed nodes which positions are changed.
+            self.dirty = True
+            return
+        position = self._next_position[graph_order]
+        self._next_position[graph_order] = position + 1
+        self._register(graph.node[index], graph, (graph_order, position))
+
+    def remove_node(self, node: NodeProto) -> bool:
+        """Remove a node from its graph and from the index. Returns False if the node is not indexed."""
+        graph = self.get_graph_by_node(node)
+        if graph is None:
+            return False
+        index = self.find_node_index(graph, node)
+        if index < 0:
+            return False
+        del graph.node[index]
+        self._unregister(node)
+        return True
+
+
 class OnnxModel:
     def __init__(self, model):
+        # Directory of external data files, for a model loaded with load_external_data=False. The external data is
+        # memory-mapped when it is read, and copied to the output when the model is saved, instead of being loaded.
+        self.external_data_dir: Optional[str] = None
+        # Temporary directory of float16 initializers converted from external data, see convert_float_to_float16.
+        self.float16_temp_dir: Optional[tempfile.TemporaryDirectory] = None
         self.initialize(model)
 
     def initialize(self, model):
+        graph_index_enabled = getattr(self, "_graph_index", None) is not None
         self.model: ModelProto = model
         self._node_name_suffix: Dict[str, int] = {}  # key is node name prefix, value is the last suffix generated
         self.shape_infer_helper: SymbolicShapeInferenceHelper = None
         self.enable_shape_infer: bool = True
+        # Optional cache of symbolic shape inference results, shared by the inferences of the changing model.
+        self.shape_infer_cache: Optional[SymbolicShapeInferenceCache] = None
         self.all_graphs: Optional[List[GraphProto]] = None
 
         # Cache of shape and data type from onnx graph to speed up optimization.
@@ -46,13 +233,40 @@ class OnnxModel:
         self._dtype_dict: Optional[Dict[str, int]] = None
         self._shape_dict: Optional[Dict[str, List]] = None
 
+        # Optional index of nodes to speed up lookup and removal of nodes in large graphs.
+        self._graph_index: Optional[GraphIndex] = GraphIndex(self) if graph_index_enabled else None
+
+        # Fused node count and wall time of each Fusion.apply in the order they ran, including the skipped ones.
+        self.fusion_pass_statistics: List[Dict] = []
+
     def disable_shape_inference(self):
         self.enable_shape_infer = False
 
+    def enable_shape_infer_cache(self, cache: Optional[SymbolicShapeInferenceCache] = None):
+        """Reuse symbolic shape inference results of the nodes which did not change since a previous inference."""
+        self.shape_infer_cache = cache if cache is not None else SymbolicShapeInferenceCache()
+
+    def enable_graph_index(self):
+        """Maintain a GraphIndex of nodes, instead of searching the graph in node lookup and removal."""
+        if self._graph_index is None:
+            self._graph_index = GraphIndex(self)
+
+    def disable_graph_index(self):
+        self._graph_index = None
+
+    def graph_index(self) -> Optional[GraphIndex]:
+        """Returns the graph index, or None if it is not enabled."""
+        return self._graph_index
+
+    def mark_graph_index_dirty(self):
+        """Rebuild the graph index on next lookup. Call it after changing nodes in place or directly in a graph."""
+        if self._graph_index is not None:
+            self._graph_index.mark_dirty()
+
     def infer_runtime_shape(self, dynamic_axis_mapping={}, update=False):  # noqa: B006
         if self.enable_shape_infer:
             if self.shape_infer_helper is None or update:
-                self.shape_infer_helper = SymbolicShapeInferenceHelper(self.model)
+                self.shape_infer_helper = SymbolicShapeInferenceHelper(self.model, cache=self.shape_infer_cache)
 
             try:
                 if self.shape_infer_helper.infer(dynamic_axis_mapping):
@@ -64,6 +278,9 @@ class OnnxModel:
         return None
 
     def input_name_to_nodes(self, exclude_subgraphs=False):
+        if self._graph_index is not None and not exclude_subgraphs:
+            return self._graph_index.input_name_to_nodes()
+
         input_name_to_nodes = {}
         nodes_to_search = self.nodes() if not exclude_subgraphs else self.model.graph.node
         for node in nodes_to_search:
@@ -76,6 +293,9 @@ class OnnxModel:
         return input_name_to_nodes
 
     def output_name_to_node(self, exclude_subgraphs=False):
+        if self._graph_index is not None and not exclude_subgraphs:
+            return self._graph_index.output_name_to_node()
+
         output_name_to_node = {}
         nodes_to_search = self.nodes() if not exclude_subgraphs else self.model.graph.node
         for node in nodes_to_search:
@@ -89,11 +309,7 @@ class OnnxModel:
         return all_functions
 
     def nodes(self):
-        all_nodes = []
-        for graph in self.graphs():
-            for node in graph.node:
-                all_nodes.append(node)  # noqa: PERF402
-        return all_nodes
+        return list(itertools.chain.from_iterable(graph.node for graph in self.graphs()))
 
     def graph(self):
         return self.model.graph
@@ -132,6 +348,11 @@ class OnnxModel:
         return output_names
 
     def get_graph_by_node(self, node):
+        if self._graph_index is not None:
+            graph = self._graph_index.get_graph_by_node(node)
+            if graph is not None:
+                return graph
+
         for graph in self.graphs():
             if node in graph.node:
                 return graph
@@ -151,9 +372,13 @@ class OnnxModel:
         return len(graph.node)
 
     def remove_node(self, node):
+        if self._graph_index is not None and self._graph_index.remove_node(node):
+            return
+
         for graph in self.graphs():
             if node in graph.node:
                 graph.node.remove(node)
+                self.mark_graph_index_dirty()
                 return
         logger.warning("Failed to remove node %s", node)  # It might be a bug to hit this line.
 
@@ -163,15 +388,25 @@ class OnnxModel:
 
     def add_node(self, node, graph_name=None):
         if graph_name is None or graph_name == self.model.graph.name:
-            self.model.graph.node.extend([node])
+            graph = self.model.graph
+            insert_idx = len(graph.node)
+            graph.node.extend([node])
         else:
             graph = self.get_graph_by_name(graph_name)
             insert_idx = self.get_topological_insert_id(graph, node.output)
             graph.node.insert(insert_idx, node)
 
+        if self._graph_index is not None:
+            # The graph holds a copy of the node.
+            self._graph_index.add_node(graph, insert_idx)
+
     def add_nodes(self, nodes_to_add, node_name_to_graph_name=None):
         if node_name_to_graph_name is None:
+            start = len(self.model.graph.node)
             self.model.graph.node.extend(nodes_to_add)
+            if self._graph_index is not None:
+                for i in range(start, len(self.model.graph.node)):
+                    self._graph_index.add_node(self.model.graph, i)
         else:
             for node in nodes_to_add:
                 graph_name = node_name_to_graph_name[node.name]
@@ -201,6 +436,7 @@ class OnnxModel:
     def replace_input_of_all_nodes(self, old_input_name, new_input_name):
         for node in self.model.graph.node:
             OnnxModel.replace_node_input(node, old_input_name, new_input_name)
+        self.mark_graph_index_dirty()
 
     @staticmethod
     def replace_node_output(node, old_output_name, new_output_name):
@@ -218,6 +454,7 @@ class OnnxModel:
         # The input of Transpose shall also be updated to new_name.
         for node in self.model.graph.node:
             OnnxModel.replace_node_output(node, old_output_name, new_output_name)
+        self.mark_graph_index_dirty()
 
     def get_initializer(self, name):
         for graph in self.graphs():
@@ -227,12 +464,27 @@ class OnnxModel:
         return None
 
     def get_nodes_by_op_type(self, op_type):
+        if self._graph_index is not None:
+            return self._graph_index.get_nodes_by_op_type(op_type)
+
         nodes = []
         for node in self.nodes():
             if node.op_type == op_type:
                 nodes.append(node)
         return nodes
 
+    def get_nodes_by_op_types(self, op_types: List[str]) -> Dict[str, List[NodeProto]]:
+        """Returns the nodes of each of the given op types, found in a single traversal of the graphs."""
+        graph_index = self.graph_index()
+        if graph_index is not None:
+            return {op_type: graph_index.get_nodes_by_op_type(op_type) for op_type in op_types}
+
+        nodes = {op_type: [] for op_type in op_types}
+        for node in self.nodes():
+            if node.op_type in nodes:
+                nodes[node.op_type].append(node)
+        return nodes
+
     def get_children(self, node, input_name_to_nodes=None):
         if input_name_to_nodes is None:
             input_name_to_nodes = self.input_name_to_nodes()
@@ -508,7 +760,7 @@ class OnnxModel:
         # Fall back to intializer since constant folding might have been applied.
         initializer = self.get_initializer(output_name)
         if initializer is not None:
-            return numpy_helper.to_array(initializer)
+            return self.to_array(initializer)
 
         return None
 
@@ -660,6 +912,7 @@ class OnnxModel:
                     removed_count += 1
 
         if removed_count > 0:
+            self.mark_graph_index_dirty()
             logger.info("Removed %d cascaded Cast nodes", removed_count)
             self.prune_graph()
 
@@ -736,6 +989,14 @@ class OnnxModel:
             max_finite_val (float, optional): maximal finite value. Defaults to 1e4.
             force_fp16_inputs(Dict[str, List[int]]): Force the conversion of the inputs of some operators to float16, even if
                                                      this script's preference it to keep them in float32.
+            num_workers (int, optional): number of threads converting initializers. Defaults to 1.
+            conversion_cache (Float16ConversionCache, optional): cache of converted initializers. Defaults to None.
+            external_data_location (str, optional): name of a file in the external data directory to write float16
+                                                    initializers to. An existing file is replaced. Defaults to None.
+                                                    When the model has external data that is not loaded, float16
+                                                    initializers are written to a new file of a temporary directory
+                                                    by default, which is copied to the external data of the model
+                                                    when it is saved.
         """
         if "keep_io_types" not in kwargs:
             kwargs["keep_io_types"] = True
@@ -746,7 +1007,9 @@ class OnnxModel:
             # are not recognized by onnx shape inference.
             shape_infer_helper = SymbolicShapeInferenceHelper(model)
             try:
-                model_with_shape = shape_infer_helper.infer_shapes(model, auto_merge=True, guess_output_rank=False)
+                model_with_shape = shape_infer_helper.infer_shapes(
+                    model, auto_merge=True, guess_output_rank=False, cache=self.shape_infer_cache
+                )
 
                 # auto_merge might cause issue (see https://github.com/microsoft/onnxruntime/issues/15521)
                 # we only merge tensor data type but not shape information back to the original onnx model.
@@ -788,10 +1051,26 @@ class OnnxModel:
                     "force_fp16_initializers",
                     "force_fp16_inputs",
                     "use_bfloat16_as_blocked_nodes_dtype",
+                    "num_workers",
+                    "conversion_cache",
+                    "external_data_location",
                 ]
                 if key in kwargs
             }
         )
+        parameters["external_data_dir"] = self.external_data_dir
+        if (
+            parameters.get("external_data_location") is None
+            and self.external_data_dir is not None
+            and get_external_data_files_not_loaded(model, self.external_data_dir)
+        ):
+            # Write float16 data in chunks instead of keeping it in memory. Each conversion has its own file, since
+            # initializers converted before still point to the previous one.
+            if self.float16_temp_dir is None:
+                self.float16_temp_dir = tempfile.TemporaryDirectory(prefix="float16_")
+            fd, float16_data_path = tempfile.mkstemp(dir=self.float16_temp_dir.name, suffix=".data")
+            os.close(fd)
+            parameters["external_data_location"] = float16_data_path
 
         fp16_model = convert_float_to_float16(model, **parameters)
         self.initialize(fp16_model)
@@ -1010,6 +1289,7 @@ class OnnxModel:
                 num_nodes_removed += 1
         self.model.graph.ClearField("node")
         self.model.graph.node.extend(nodes_to_keep)
+        self.mark_graph_index_dirty()
 
         # Remove graph outputs not in list
         output_to_remove = []
@@ -1164,6 +1444,7 @@ class OnnxModel:
         # for graph in self.graphs():
         #    self.graph_topological_sort(graph)
         OnnxModel.graph_topological_sort(self.model.graph, is_deterministic)
+        self.mark_graph_index_dirty()
 
     @staticmethod
     def save(
@@ -1173,7 +1454,11 @@ class OnnxModel:
         all_tensors_to_one_file=True,
         size_threshold=1024,
         convert_attribute=False,
+        external_data_dir=None,
     ):
+        """Save a model. External data that is not loaded into the model is read from external_data_dir: it is
+        copied to the external data of the saved model in chunks, or loaded when the model is saved in one file.
+        """
         Path(output_path).parent.mkdir(parents=True, exist_ok=True)
 
         # Add ms domain if needed
@@ -1193,6 +1478,10 @@ class OnnxModel:
             external_data_path = output_path + ".data"
             location = Path(external_data_path).name if all_tensors_to_one_file else None
 
+            external_data_files = get_external_data_files_not_loaded(model, external_data_dir)
+            if all_tensors_to_one_file and os.path.realpath(external_data_path) in external_data_files:
+                raise ValueError(f"Cannot overwrite external data file {external_data_path} that is not loaded.")
+
             if os.path.exists(output_path):
                 logger.info(f"Delete the existing onnx file: {output_path}")
                 os.remove(output_path)
@@ -1206,6 +1495,10 @@ class OnnxModel:
                 if os.listdir(output_dir):
                     raise RuntimeError(f"Output directory ({output_dir}) for external data is not empty.")
 
+            # Copy external data that is not loaded first, then save_model appends the data loaded in memory.
+            if external_data_files:
+                save_external_data_not_loaded(model, external_data_dir, str(output_dir), location)
+
             save_model(
                 model,
                 output_path,
@@ -1216,19 +1509,28 @@ class OnnxModel:
                 convert_attribute=convert_attribute,
             )
         else:
+            for tensor in get_all_tensors(model):
+                if is_external_data_not_loaded(tensor):
+                    load_external_data(tensor, external_data_dir)
             save_model(model, output_path)
 
     def save_model_to_file(self, output_path, use_external_data_format=False, all_tensors_to_one_file=True):
         logger.info("Sort graphs in topological order")
         self.topological_sort()
 
-        # Note: After the model is saved to another directory with external data,
-        #       You need reload the onnx model if you want to read tensor from self.model object.
-        #       It is because the base directory is not updated for self.model object so attempt to read tensor data
-        #       might encounter error since external data cannot be located.
-        OnnxModel.save(self.model, output_path, use_external_data_format, all_tensors_to_one_file)
+        OnnxModel.save(
+            self.model,
+            output_path,
+            use_external_data_format,
+            all_tensors_to_one_file,
+            external_data_dir=self.external_data_dir,
+        )
         logger.info(f"Model saved to {output_path}")
 
+        # Saving with external data moves the tensor data of self.model to the external data of the saved model.
+        if use_external_data_format:
+            self.external_data_dir = str(Path(output_path).parent)
+
     def get_graph_inputs_excluding_initializers(self):
         """
         Returns real graph inputs (excluding initializers from older onnx model).
@@ -1267,6 +1569,42 @@ class OnnxModel:
 
         return op_count
 
+    def add_fusion_pass_statistics(self, description: str, fused_count: int, seconds: float, skipped: bool = False):
+        """Record the result of a fusion pass. Skipped passes are those without any node of their search op types."""
+        self.fusion_pass_statistics.append(
+            {"fusion": description, "fused": fused_count, "seconds": seconds, "skipped": skipped}
+        )
+
+    def get_fusion_pass_statistics(self) -> List[Dict]:
+        """
+        Returns fused node count and wall time of each fusion pass.
+        """
+        total = sum(stat["seconds"] for stat in self.fusion_pass_statistics)
+        skipped = sum(1 for stat in self.fusion_pass_statistics if stat["skipped"])
+        logger.info(
+            f"Fusion passes: {len(self.fusion_pass_statistics)} in {total:.3f} seconds ({skipped} skipped without search ops)"
+        )
+
+        # Sorted by time in the descending order.
+        for stat in sorted(self.fusion_pass_statistics, key=lambda stat: -stat["seconds"]):
+            if not stat["skipped"]:
+                logger.info(f"  {stat['fusion']}: fused {stat['fused']} in {stat['seconds']:.3f} seconds")
+
+        return self.fusion_pass_statistics
+
+    def to_array(self, tensor: TensorProto) -> np.ndarray:
+        """Converts a tensor of the model to a numpy array, without loading external data into the tensor."""
+        return OnnxModel.tensor_to_array(tensor, self.external_data_dir)
+
+    @staticmethod
+    def tensor_to_array(tensor: TensorProto, base_dir: Optional[str] = None) -> np.ndarray:
+        """Converts a tensor to a numpy array. External data that is not loaded is memory-mapped from base_dir,
+        instead of being loaded into the tensor.
+        """
+        if is_external_data_not_loaded(tensor):
+            return external_tensor_to_array(tensor, base_dir)
+        return numpy_helper.to_array(tensor)
+
     @staticmethod
     def to_data_hash(tensor: TensorProto, base_dir: str = "") -> int:
         """Converts a tensor def object to a hash for data comparison purposes.
@@ -1286,9 +1624,9 @@ class OnnxModel:
         if tensor.data_type == TensorProto.STRING:
             utf8_strings = getattr(tensor, storage_field)
             return hash(tuple(s.decode("utf-8") for s in utf8_strings))
-        # Load raw data from external tensor if it exists
-        if uses_external_data(tensor):
-            load_external_data_for_tensor(tensor, base_dir)
+        # Hash a memory map of external data that is not loaded. It has the same hash as the loaded raw data.
+        if is_external_data_not_loaded(tensor):
+            return hash(external_data_buffer(tensor, base_dir))
         if tensor.HasField("raw_data"):
             return hash(tensor.raw_data)
         else:
@@ -1301,6 +1639,7 @@ class OnnxModel:
         tensor2: TensorProto,
         signature_cache1: Optional[dict] = None,
         signature_cache2: Optional[dict] = None,
+        base_dir: Optional[str] = None,
     ) -> bool:
         """Returns True when two tensors have same value.
            Note that name can be different.
@@ -1310,18 +1649,19 @@ class OnnxModel:
             tensor2 (TensorProto): initializer 2
             signature_cache1 (dict): Optional dictionary to store data signatures of tensor1 in order to speed up comparison.
             signature_cache2 (dict): Optional dictionary to store data signatures of tensor2 in order to speed up comparison.
+            base_dir (str): Optional directory of external data that is not loaded into the tensors.
         Returns:
             bool: True when two initializers has same value.
         """
         sig1 = (
             signature_cache1[tensor1.name]
             if signature_cache1 and tensor1.name in signature_cache1
-            else OnnxModel.to_data_hash(tensor1)
+            else OnnxModel.to_data_hash(tensor1, base_dir)
         )
         sig2 = (
             signature_cache2[tensor2.name]
             if signature_cache2 and tensor2.name in signature_cache2
-            else OnnxModel.to_data_hash(tensor2)
+            else OnnxModel.to_data_hash(tensor2, base_dir)
         )
         if signature_cache1 is not None:
             signature_cache1[tensor1.name] = sig1
@@ -1329,42 +1669,98 @@ class OnnxModel:
             signature_cache2[tensor2.name] = sig2
         if sig1 == sig2 and tensor1.data_type == tensor2.data_type and tensor1.dims == tensor2.dims:
             # Same signature, now do the expensive check to confirm the data is the same
-            return (numpy_helper.to_array(tensor1) == numpy_helper.to_array(tensor2)).all()
+            return (OnnxModel.tensor_to_array(tensor1, base_dir) == OnnxModel.tensor_to_array(tensor2, base_dir)).all()
 
         return False
 
+    @staticmethod
+    def find_duplicated_initializers(
+        initializers, cache: Optional[dict] = None, base_dir: Optional[str] = None
+    ) -> Dict[str, str]:
+        """Find initializers with the same value as a previous one.
+        Initializers are grouped by data type, shape and data hash, and only initializers in the same group
+        are compared, so the cost is linear in the number of initializers.
+
+        Args:
+            initializers: initializers to search, in order.
+            cache (dict): Optional dictionary to store data hashes of initializers by name.
+            base_dir (str): Optional directory of external data that is not loaded into the initializers.
+        Returns:
+            Dict[str, str]: maps the name of each duplicated initializer to the name of the first initializer
+            with the same value.
+        """
+        groups = {}
+        duplicates = {}
+        for initializer in initializers:
+            if cache is not None and initializer.name in cache:
+                data_hash = cache[initializer.name]
+            else:
+                data_hash = OnnxModel.to_data_hash(initializer, base_dir)
+                if cache is not None:
+                    cache[initializer.name] = data_hash
+
+            group = groups.setdefault((initializer.data_type, tuple(initializer.dims), data_hash), [])
+            if group:
+                # Same signature, now do the expensive check to confirm the data is the same
+                value = OnnxModel.tensor_to_array(initializer, base_dir)
+                for first in group:
+                    if (OnnxModel.tensor_to_array(first, base_dir) == value).all():
+                        duplicates[initializer.name] = first.name
+                        break
+                else:
+                    group.append(initializer)
+            else:
+                group.append(initializer)
+        return duplicates
+
+    @staticmethod
+    def replace_inputs_of_graph_nodes(graph: GraphProto, name_map: Dict[str, str]):
+        """Rename inputs of all nodes in a graph and its subgraphs in one pass.
+        A subgraph that defines a name of name_map (as input, initializer or node output) hides the outer one,
+        so the name is not replaced in that subgraph.
+        """
+        for node in graph.node:
+            for j, input_name in enumerate(node.input):
+                if input_name in name_map:
+                    node.input[j] = name_map[input_name]
+            for attr in node.attribute:
+                if attr.type == AttributeProto.AttributeType.GRAPH:
+                    subgraphs = [attr.g]
+                elif attr.type == AttributeProto.AttributeType.GRAPHS:
+                    subgraphs = attr.graphs
+                else:
+                    continue
+                for subgraph in subgraphs:
+                    defined = {i.name for i in subgraph.input} | {i.name for i in subgraph.initializer}
+                    defined.update(output for subgraph_node in subgraph.node for output in subgraph_node.output)
+                    subgraph_map = {k: v for k, v in name_map.items() if k not in defined and v not in defined}
+                    if subgraph_map:
+                        OnnxModel.replace_inputs_of_graph_nodes(subgraph, subgraph_map)
+
     def remove_duplicated_initializer(self, cache: Optional[dict] = None):
         """Remove initializers with duplicated values, and only keep the first one.
         It could help reduce size of models (like ALBert) with shared weights.
-        If require_raw_data passed, method will only compare raw_data initializers to speed runtime
-        Note: this function does not process subgraph.
+        Initializers of each subgraph are deduplicated within that subgraph.
+        If cache is passed, it stores data hashes of initializers of the main graph by name to speed up comparison.
         """
-        if len(self.graphs()) > 1:
-            logger.warning("remove_duplicated_initializer does not process subgraphs.")
-
-        initializer_count = len(self.model.graph.initializer)
-
-        same = [-1] * initializer_count
-        for i in range(initializer_count - 1):
-            if same[i] >= 0:
+        count = 0
+        for graph in self.graphs():
+            is_main_graph = graph is self.model.graph
+            duplicates = OnnxModel.find_duplicated_initializers(
+                graph.initializer, cache if is_main_graph else None, self.external_data_dir
+            )
+            if not duplicates:
                 continue
-            for j in range(i + 1, initializer_count):
-                if OnnxModel.has_same_value(
-                    self.model.graph.initializer[i],
-                    self.model.graph.initializer[j],
-                    cache,
-                    cache,
-                ):
-                    same[j] = i
 
-        count = 0
-        for i in range(initializer_count):
-            if same[i] >= 0:
-                count += 1
-                self.replace_input_of_all_nodes(
-                    self.model.graph.initializer[i].name,
-                    self.model.graph.initializer[same[i]].name,
-                )
+            count += len(duplicates)
+            OnnxModel.replace_inputs_of_graph_nodes(graph, duplicates)
+            self.mark_graph_index_dirty()
+            if not is_main_graph:
+                # update_graph only removes unused initializers of the main graph.
+                output_names = {output.name for output in graph.output}
+                for initializer in [i for i in graph.initializer if i.name in duplicates]:
+                    if initializer.name not in output_names:
+                        graph.initializer.remove(initializer)
 
         if count > 0:
             self.update_graph()
@@ -1399,6 +1795,7 @@ class OnnxModel:
                 if node.output[j] not in excluded:
                     if prefix + node.output[j] not in excluded:
                         node.output[j] = prefix + node.output[j]
+        self.mark_graph_index_dirty()
 
         for value_info in self.model.graph.value_info:
             if value_info.name not in excluded:
@@ -1500,6 +1897,7 @@ class OnnxModel:
 
                 for node in nodes_not_cast:
                     OnnxModel.replace_node_input(node, graph_input.name, output_name)
+                self.mark_graph_index_dirty()
 
             # For children that is Cast node, no need to insert Cast.
             # When the children is Cast to int32, we can remove that Cast node since input type is int32 now.
@@ -1553,6 +1951,7 @@ class OnnxModel:
             name=node_name,
         )
         graph.node.extend([cast_node])
+        self.mark_graph_index_dirty()
         graph_output.type.tensor_type.elem_type = int(new_type)
         return cast_node
 
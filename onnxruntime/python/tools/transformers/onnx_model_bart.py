@@ -9,7 +9,6 @@ from fusion_attention import AttentionMask
 from fusion_bart_attention import FusionBartAttention
 from fusion_options import FusionOptions
 from fusion_reshape import FusionReshape
-from onnx import numpy_helper
 from onnx_model import OnnxModel
 from onnx_model_bert import BertOnnxModel
 
@@ -57,9 +56,9 @@ class FusionBartReshape(FusionReshape):
             if input_1_proto is None or input_2_proto is None or input_3_proto is None:
                 return
 
-            input_1 = numpy_helper.to_array(input_1_proto)
-            input_2 = numpy_helper.to_array(input_2_proto)
-            input_3 = numpy_helper.to_array(input_3_proto)
+            input_1 = self.model.to_array(input_1_proto)
+            input_2 = self.model.to_array(input_2_proto)
+            input_3 = self.model.to_array(input_3_proto)
             if len(input_1) != 1 or len(input_2) != 1 or len(input_3) != 1:
                 return
 
@@ -96,8 +95,8 @@ class FusionBartReshape(FusionReshape):
             if input_2_proto is None or input_3_proto is None:
                 return
 
-            input_2 = numpy_helper.to_array(input_2_proto)
-            input_3 = numpy_helper.to_array(input_3_proto)
+            input_2 = self.model.to_array(input_2_proto)
+            input_3 = self.model.to_array(input_3_proto)
             if len(input_2) != 1 or len(input_3) != 1:
                 return
 
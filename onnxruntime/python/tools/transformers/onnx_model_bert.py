@@ -248,6 +248,7 @@ class BertOnnxModel(OnnxModel):
                         and expand_shape_value[1] == shape_value[0]
                     ):
                         node.input[0] = slice_node.output[0]
+                        self.mark_graph_index_dirty()
 
         if nodes_to_remove:
             self.remove_nodes(nodes_to_remove)
@@ -292,6 +293,7 @@ class BertOnnxModel(OnnxModel):
                     ) = parent_nodes
                     if shape.input[0] == self.graph().input[0].name:
                         constantOfShape.input[0] = shape.output[0]
+                        self.mark_graph_index_dirty()
                         output_name_to_node = self.output_name_to_node()
 
             if node.op_type == "Attention":
@@ -206,6 +206,7 @@ class BertOnnxModelKeras(BertOnnxModelTF):
                 nodes_to_remove.extend(reshape_nodes)
                 nodes_to_remove.append(extra_reshape_0)
                 self.replace_node_input(add, extra_reshape_0.output[0], matmul.output[0])
+                self.mark_graph_index_dirty()
             else:
                 logger.debug("Root node not matched.")
                 continue
@@ -228,6 +229,7 @@ class BertOnnxModelKeras(BertOnnxModelTF):
             parent = self.get_parent(reshape_node, 0)
             if parent is not None and parent.op_type == "Reshape":
                 reshape_node.input[0] = parent.input[0]
+                self.mark_graph_index_dirty()
                 count += 1
 
         if count > 0:
@@ -248,7 +250,7 @@ class BertOnnxModelKeras(BertOnnxModelTF):
             logger.debug("failed to get word initializer")
             return False
 
-        temp = numpy_helper.to_array(word_initializer)
+        temp = self.to_array(word_initializer)
         if len(temp.shape) == 2:
             logger.info(f"Found word embedding. name:{word_initializer.name}, shape:{temp.shape}")
             word_embedding = word_initializer.name
@@ -258,7 +260,7 @@ class BertOnnxModelKeras(BertOnnxModelTF):
 
         pos_initializer = self.get_initializer(add_node.input[1])
         if pos_initializer is not None:
-            temp = numpy_helper.to_array(pos_initializer)
+            temp = self.to_array(pos_initializer)
             if len(temp.shape) == 3 and temp.shape[0] == 1:
                 tensor = numpy_helper.from_array(temp.reshape((temp.shape[1], temp.shape[2])), "position_embedding")
                 self.add_initializer(tensor)
@@ -279,7 +281,7 @@ class BertOnnxModelKeras(BertOnnxModelTF):
                 logger.debug("failed to get pos initializer")
                 return False
 
-            temp = numpy_helper.to_array(pos_initializer)
+            temp = self.to_array(pos_initializer)
             if len(temp.shape) == 2:
                 logger.info(f"Found word embedding. name:{pos_initializer.name}, shape:{temp.shape}")
                 position_embedding = pos_initializer.name
@@ -297,7 +299,7 @@ class BertOnnxModelKeras(BertOnnxModelTF):
             logger.debug("failed to get segment initializer")
             return False
 
-        temp = numpy_helper.to_array(segment_initializer)
+        temp = self.to_array(segment_initializer)
         if len(temp.shape) == 2:
             logger.info(f"Found segment embedding. name:{segment_initializer.name}, shape:{temp.shape}")
             segment_embedding = segment_initializer.name
@@ -359,6 +361,7 @@ class BertOnnxModelKeras(BertOnnxModelTF):
                 )
                 cast_node_2.attribute.extend([onnx.helper.make_attribute("to", 1)])
                 self.replace_node_input(sub_node, sub_node.input[1], "mask_fuse_cast_output")
+                self.mark_graph_index_dirty()
 
                 nodes_to_remove.extend([slice_node, unsqueeze_node, cast_node])
                 self.add_node(unsqueeze_added_1)
@@ -407,11 +410,10 @@ class BertOnnxModelKeras(BertOnnxModelTF):
                 skiplayernorm,
             ) = path
             add_2.input[0] = matmul_2.output[0]
-            self.remove_node(reshape_3)
             matmul_1.input[0] = gelu.output[0]
-            self.remove_node(reshape_2)
             add_1.input[0] = matmul_1.output[0]
-            self.remove_node(reshape_1)
+            self.mark_graph_index_dirty()
+            self.remove_nodes([reshape_3, reshape_2, reshape_1])
             reshape_removed += 3
 
         return reshape_removed
@@ -453,16 +455,11 @@ class BertOnnxModelKeras(BertOnnxModelTF):
             ) = path
 
             matmul_2.input[0] = skiplayernorm.output[0]
-            self.remove_node(reshape_4)
-
             add_2.input[0] = matmul_2.output[0]
-            self.remove_node(reshape_3)
-
             matmul_1.input[0] = gelu.output[0]
-            self.remove_node(reshape_2)
-
             add_1.input[0] = matmul_1.output[0]
-            self.remove_node(reshape_1)
+            self.mark_graph_index_dirty()
+            self.remove_nodes([reshape_4, reshape_3, reshape_2, reshape_1])
 
             reshape_removed += 4
 
@@ -7,7 +7,7 @@ import logging
 
 import numpy as np
 import onnx
-from onnx import TensorProto, helper, numpy_helper
+from onnx import TensorProto, helper
 from onnx_model_bert import BertOnnxModel
 
 logger = logging.getLogger(__name__)
@@ -62,7 +62,7 @@ class BertOnnxModelTF(BertOnnxModel):
             for input in node.input:
                 initializer = self.get_initializer(input)
                 if initializer:
-                    temp = numpy_helper.to_array(initializer)
+                    temp = self.to_array(initializer)
                     if len(temp.shape) == 2:
                         initializers[initializer.name] = temp.shape
 
@@ -298,7 +298,7 @@ class BertOnnxModelTF(BertOnnxModel):
             if initializer is None:
                 continue
 
-            temp = numpy_helper.to_array(initializer)
+            temp = self.to_array(initializer)
             if len(temp.shape) == 2:
                 logger.info(f"Found position embedding. name:{initializer.name}, shape:{temp.shape}")
                 position_embedding = initializer.name
@@ -472,6 +472,7 @@ class BertOnnxModelTF(BertOnnxModel):
                     graph_name,
                 )
                 mask_nodes[-1].input[0] = squeeze_output_name
+                self.mark_graph_index_dirty()
 
             is_same_root = self.check_attention_input(matmul_q, matmul_k, matmul_v, parent, output_name_to_node)
             if is_same_root:
@@ -525,10 +526,11 @@ class BertOnnxModelTF(BertOnnxModel):
                         name=qkv_nodes[1].name + "_reshape",
                     )
                     qkv_nodes[1].input[0] = qkv_nodes[1].name + "_reshape_output"
+                    self.mark_graph_index_dirty()
                     self.add_node(reshape_, graph_name)
                 if parent.op_type == "Reshape":
                     # Temporary work around: we require the skiplayernorm and attention op be fed with 3-d input
-                    hidden_size = numpy_helper.to_array(self.get_initializer(parent.input[1]))[1]
+                    hidden_size = self.to_array(self.get_initializer(parent.input[1]))[1]
                     tensor = helper.make_tensor(
                         name=parent.name + "_modified",
                         data_type=TensorProto.INT64,
@@ -538,6 +540,7 @@ class BertOnnxModelTF(BertOnnxModel):
                     )
                     self.add_initializer(tensor, graph_name)
                     parent.input[1] = parent.name + "_modified"
+                    self.mark_graph_index_dirty()
 
                 self.add_node(attention_node, graph_name)
                 attention_count += 1
@@ -567,6 +570,7 @@ class BertOnnxModelTF(BertOnnxModel):
             parent = self.get_parent(reshape_node, 0)
             if parent is not None and parent.op_type == "Reshape":
                 reshape_node.input[0] = parent.input[0]
+                self.mark_graph_index_dirty()
                 count += 1
 
         if count > 0:
@@ -89,6 +89,7 @@ class Gpt2OnnxModel(BertOnnxModel):
             # Link root node output with MatMul
             self.replace_input_of_all_nodes(root_node.output[0], matmul_node_name + "_input")
             root_node.output[0] = matmul_node_name + "_input"
+            self.mark_graph_index_dirty()
 
             self.replace_input_of_all_nodes(reshape_after_gemm.output[0], add_node_name + "_output")
 
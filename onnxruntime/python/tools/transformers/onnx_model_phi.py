@@ -11,7 +11,6 @@ from dynamo_onnx_helper import DynamoOnnxHelper
 from fusion_base import Fusion
 from fusion_options import AttentionOpType, FusionOptions
 from fusion_skiplayernorm import FusionBiasSkipLayerNormalization, FusionSkipLayerNormalization
-from fusion_utils import NumpyHelper
 from onnx import ModelProto, NodeProto, TensorProto, helper, numpy_helper
 from onnx_model import OnnxModel
 
@@ -94,7 +93,7 @@ class Fission(Fusion):
 
     def process_initializer(self, initializer_name, functor, custom_name=None):
         i = self.model.get_initializer(initializer_name)
-        i_np_array = NumpyHelper.to_array(i)
+        i_np_array = self.model.to_array(i)
         processed_i_np_array = functor(i_np_array)
         new_tensor = helper.make_tensor(
             initializer_name + "_processed" if custom_name is None else custom_name,
@@ -284,8 +283,8 @@ class Fission(Fusion):
 
 
 class Phi2PreProcessor(DynamoOnnxHelper):
-    def __init__(self, model: ModelProto, num_heads: int, hidden_size: int):
-        super().__init__(model)
+    def __init__(self, model: ModelProto, num_heads: int, hidden_size: int, onnx_model: Optional[OnnxModel] = None):
+        super().__init__(model, onnx_model)
         self.num_hidden_layers = 32
         self.num_attention_heads = num_heads
         self.hidden_size = hidden_size
@@ -320,6 +319,7 @@ class Phi2PreProcessor(DynamoOnnxHelper):
             index = node.op_type.find(phi2_transformer_layer_name)
             if index != -1:
                 node.op_type = node.op_type[index:]
+        self.mark_graph_index_dirty()
 
     def process_graph_io(self, attn_op_type: AttentionOpType):
         self.use_attn = attn_op_type == AttentionOpType.Attention
@@ -632,17 +632,17 @@ class FissionTransformerBlockPhi(Fission):
         q_weight = self.model.get_initializer(q_w)
         k_weight = self.model.get_initializer(k_w)
         v_weight = self.model.get_initializer(v_w)
-        qw = np.transpose(NumpyHelper.to_array(q_weight), (1, 0))
-        kw = np.transpose(NumpyHelper.to_array(k_weight), (1, 0))
-        vw = np.transpose(NumpyHelper.to_array(v_weight), (1, 0))
+        qw = np.transpose(self.model.to_array(q_weight), (1, 0))
+        kw = np.transpose(self.model.to_array(k_weight), (1, 0))
+        vw = np.transpose(self.model.to_array(v_weight), (1, 0))
         qkv_weight = np.stack((qw, kw, vw), axis=1)
 
         q_bias = self.model.get_initializer(q_b)
         k_bias = self.model.get_initializer(k_b)
         v_bias = self.model.get_initializer(v_b)
-        qb = NumpyHelper.to_array(q_bias)
-        kb = NumpyHelper.to_array(k_bias)
-        vb = NumpyHelper.to_array(v_bias)
+        qb = self.model.to_array(q_bias)
+        kb = self.model.to_array(k_bias)
+        vb = self.model.to_array(v_bias)
         qkv_bias = np.stack((qb, kb, vb), axis=0)
 
         hidden_size = qkv_weight.shape[0]
@@ -847,7 +847,7 @@ class FissionTransformerBlockPhi(Fission):
 class PhiOnnxModel(OnnxModel):
     def __init__(self, model: ModelProto, num_heads: int, hidden_size: int):
         super().__init__(model)
-        self.phi2_preprocessor = Phi2PreProcessor(self.model, num_heads, hidden_size)
+        self.phi2_preprocessor = Phi2PreProcessor(self.model, num_heads, hidden_size, self)
         self.fission_transformer_block = FissionTransformerBlockPhi(self, num_heads)
         self.fission_causal_lm_head = FissionTransformerCausalLMHeadPhi(self)
         self.fission_transformer_layernorm = FissionTransformerLayerNormPhi(self)
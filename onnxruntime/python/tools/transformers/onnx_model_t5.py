@@ -9,7 +9,6 @@ import numpy as np
 from fusion_attention import AttentionMask, FusionAttention
 from fusion_base import Fusion
 from fusion_simplified_layernorm import FusionSimplifiedLayerNormalization, FusionSkipSimplifiedLayerNormalization
-from fusion_utils import NumpyHelper
 from onnx import NodeProto, TensorProto, helper
 from onnx_model import OnnxModel
 from onnx_model_bert import BertOnnxModel
@@ -82,9 +81,9 @@ class FusionT5Attention(FusionAttention):
             )
             return None
 
-        qw = NumpyHelper.to_array(q_weight)
-        kw = NumpyHelper.to_array(k_weight)
-        vw = NumpyHelper.to_array(v_weight)
+        qw = self.model.to_array(q_weight)
+        kw = self.model.to_array(k_weight)
+        vw = self.model.to_array(v_weight)
 
         # assert q and k have same shape as expected
         assert qw.shape == kw.shape
@@ -660,7 +659,7 @@ class FusionRelativePositionBiasBlock(Fusion):
         node_name_prefix = "encoder" if self.is_bidirectional else "decoder"
 
         table_weight_i = self.model.get_initializer(gather.input[0])
-        table_weight = NumpyHelper.to_array(table_weight_i)
+        table_weight = self.model.to_array(table_weight_i)
         table_weight_t = np.transpose(table_weight)
         bias_table = helper.make_tensor(
             name=self.model.create_node_name("bias_table_weight", name_prefix=node_name_prefix),
@@ -738,6 +737,7 @@ class T5OnnxModel(BertOnnxModel):
 
                 rpb_node = rpb_nodes[0]
                 rpb_node.output[0] = node.output[0]
+                self.mark_graph_index_dirty()
 
                 nodes_to_remove.extend(extended_mask_nodes)
                 nodes_to_remove.append(node)
@@ -774,6 +774,7 @@ class T5OnnxModel(BertOnnxModel):
 
                 rpb_node = rpb_nodes[0]
                 rpb_node.output[0] = node.output[0]
+                self.mark_graph_index_dirty()
 
                 nodes_to_remove.extend(extended_mask_nodes)
                 nodes_to_remove.append(node)
@@ -6,7 +6,6 @@ import logging
 from typing import Union
 
 from fusion_attention import AttentionMask, FusionAttention
-from fusion_utils import NumpyHelper
 from onnx import NodeProto, helper
 from onnx_model import OnnxModel
 from onnx_model_bert import BertOnnxModel
@@ -51,8 +50,8 @@ class FusionTnlrAttention(FusionAttention):
         if weight is None or bias is None:
             return None
 
-        qkv_weight = NumpyHelper.to_array(weight)
-        qkv_bias = NumpyHelper.to_array(bias)
+        qkv_weight = self.model.to_array(weight)
+        qkv_bias = self.model.to_array(bias)
 
         attention_node_name = self.model.create_node_name("Attention")
 
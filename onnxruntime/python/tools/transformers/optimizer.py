@@ -25,6 +25,7 @@ from pathlib import Path
 from typing import Dict, List, Optional, Union
 
 import coloredlogs
+from external_data import load_small_external_data
 from fusion_options import FusionOptions
 from onnx import ModelProto, load_model
 from onnx_model import OnnxModel
@@ -216,6 +217,7 @@ def optimize_by_fusion(
     num_heads: int = 0,
     hidden_size: int = 0,
     optimization_options: Optional[FusionOptions] = None,
+    external_data_dir: Optional[str] = None,
 ) -> OnnxModel:
     """Optimize Model by graph fusion logic.
 
@@ -233,6 +235,8 @@ def optimize_by_fusion(
                                      0 allows detect the parameter from graph automatically.
         optimization_options (FusionOptions, optional): optimization options that turn on/off some fusions.
                                                         Defaults to None.
+        external_data_dir (str, optional): directory of external data when the model is loaded without external data.
+                                           Defaults to None.
 
      Returns:
         object of an optimizer class.
@@ -255,7 +259,16 @@ def optimize_by_fusion(
     if optimization_options is None:
         optimization_options = FusionOptions(model_type)
 
+    if external_data_dir is not None:
+        load_small_external_data(model, external_data_dir)
+
     optimizer = optimizer_class(model, num_heads, hidden_size)
+    optimizer.external_data_dir = external_data_dir
+
+    if optimization_options.enable_graph_index:
+        optimizer.enable_graph_index()
+    if optimization_options.enable_shape_infer_cache:
+        optimizer.enable_shape_infer_cache()
 
     optimizer.optimize(optimization_options)
 
@@ -281,6 +294,7 @@ def optimize_model(
     verbose: bool = False,
     *,
     provider: Optional[str] = None,
+    load_external_data: bool = True,
 ) -> OnnxModel:
     """Optimize Model by OnnxRuntime and/or python fusion logic.
 
@@ -319,6 +333,10 @@ def optimize_model(
         only_onnxruntime (bool, optional): only use onnxruntime to optimize model, and no python fusion.
             Defaults to False.
         provider (str, optional): execution provider to use if use_gpu. Defaults to None.
+        load_external_data (bool, optional): load external data of the model into memory. When it is False, the
+            external data is memory-mapped when it is read, and copied in chunks when the optimized model is saved
+            with external data, so that large models can be optimized with limited memory. Weights created by
+            fusions are kept in memory until the model is saved. Defaults to True.
 
      Returns:
         object of an optimizer class.
@@ -392,20 +410,30 @@ def optimize_model(
     if only_onnxruntime and not temp_model_path:
         logger.warning("Please specify a positive value for opt_level when only_onnxruntime is True")
 
+    external_data_dir = None
     if temp_model_path is not None:
-        model = load_model(temp_model_path)
+        model = load_model(temp_model_path, load_external_data=load_external_data)
+        external_data_dir = temp_dir.name
     elif isinstance(input, str):
-        model = load_model(input)
+        model = load_model(input, load_external_data=load_external_data)
+        external_data_dir = os.path.dirname(input)
     else:
         model = input
 
     if only_onnxruntime:
         optimizer = optimizer_class(model, num_heads, hidden_size)
+        optimizer.external_data_dir = external_data_dir
     else:
-        optimizer = optimize_by_fusion(model, model_type, num_heads, hidden_size, optimization_options)
+        optimizer = optimize_by_fusion(
+            model, model_type, num_heads, hidden_size, optimization_options, external_data_dir
+        )
 
-    # remove the temporary directory
-    temp_dir.cleanup()
+    if load_external_data or temp_model_path is None:
+        # remove the temporary directory
+        temp_dir.cleanup()
+    else:
+        # The optimizer reads external data from the temporary directory, which is removed with the optimizer.
+        optimizer.external_data_temp_dir = temp_dir
 
     return optimizer
 
@@ -529,6 +557,16 @@ def _parse_arguments():
     )
     parser.set_defaults(use_external_data_format=False)
 
+    parser.add_argument(
+        "--memory_map_external_data",
+        required=False,
+        action="store_true",
+        help="do not load external data of the model into memory, and memory-map it when it is needed. "
+        "It reduces memory usage of large models saved with --use_external_data_format. "
+        "With --float16, float16 weights are written to a temporary file instead of being kept in memory.",
+    )
+    parser.set_defaults(memory_map_external_data=False)
+
     parser.add_argument(
         "--disable_symbolic_shape_infer",
         required=False,
@@ -582,8 +620,12 @@ def main():
         use_gpu=args.use_gpu,
         provider=args.provider,
         only_onnxruntime=args.only_onnxruntime,
+        load_external_data=not args.memory_map_external_data,
     )
 
+    # Print where the fusion time was spent, before float16 conversion re-initializes the model.
+    optimizer.get_fusion_pass_statistics()
+
     if args.float16:
         optimizer.convert_float_to_float16(keep_io_types=True)
 
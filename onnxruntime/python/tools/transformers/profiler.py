@@ -1,6 +1,7 @@
 import argparse
 import json
 import os
+import re
 
 import numpy
 import psutil
@@ -176,21 +177,70 @@ def run_profile(onnx_model_path, use_gpu, provider, basic_optimization, thread_n
     return profile_file
 
 
-def load_profile_json(profile_file):
-    print(f"loading profile output {profile_file} ...")
+def iter_profile_json(profile_file, chunk_size=1 << 20):
+    """Yield the records of a profile output file one at a time, without loading the whole file into memory.
+
+    Args:
+        profile_file (str): path of the profile output, which is a JSON list of records, or a JSON object with
+            the list of records in "traceEvents" like in the Chrome trace event format.
+        chunk_size (int, optional): number of characters to read at a time. Defaults to 1M.
+    """
+    decoder = json.JSONDecoder()
+    separators = re.compile(r"[\s,]*")
+    trace_events = re.compile(r'"traceEvents"\s*:\s*\[')
+    with open(profile_file, encoding="utf-8") as opened_file:
+        buffer = opened_file.read(chunk_size)
+        pos = separators.match(buffer).end()
+        if buffer[pos : pos + 1] == "{":
+            match = trace_events.search(buffer, pos)
+            while match is None:
+                chunk = opened_file.read(chunk_size)
+                assert chunk, 'profile output shall have a "traceEvents" list of records'
+                buffer += chunk
+                match = trace_events.search(buffer, pos)
+            pos = match.end()
+        else:
+            assert buffer[pos : pos + 1] == "[", "profile output shall be a list of records"
+            pos += 1
+        eof = False
+        while True:
+            pos = separators.match(buffer, pos).end()
+            if buffer[pos : pos + 1] == "]" or (pos == len(buffer) and eof):
+                return
+            try:
+                item, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # The record is not complete in the buffer. Profile output of a killed process may not be closed.
+                if eof:
+                    raise
+                chunk = opened_file.read(chunk_size)
+                eof = not chunk
+                buffer = buffer[pos:] + chunk
+                pos = 0
+                continue
+            yield item
 
-    with open(profile_file) as opened_file:
-        sess_time = json.load(opened_file)
 
-    assert isinstance(sess_time, list)
-    return sess_time
+class ProfileRecords:
+    """Records of a profile output file. Each iteration reads the file again instead of keeping records in memory."""
+
+    def __init__(self, profile_file):
+        self.profile_file = profile_file
+
+    def __iter__(self):
+        return iter_profile_json(self.profile_file)
+
+
+def load_profile_json(profile_file):
+    print(f"loading profile output {profile_file} ...")
+    return ProfileRecords(profile_file)
 
 
 def parse_kernel_results(sess_time, threshold=0):
     """Parse profile data and output nodes in two sections - nodes in the original order, and top expensive nodes.
 
     Args:
-        sess_time (List[Dict]): profile data
+        sess_time (Iterable[Dict]): profile data
         kernel_time_only (bool, optional): Only include items for kernel time. Defaults to False.
         threshold (int, optional): Minimum ratio of duration among all. Defaults to 0.
 
@@ -270,7 +320,7 @@ def parse_node_results(sess_time, kernel_time_only=False, threshold=0):
     """Parse profile data and output nodes in two sections - nodes in the original order, and top expensive nodes.
 
     Args:
-        sess_time (List[Dict]): profile data
+        sess_time (Iterable[Dict]): profile data
         kernel_time_only (bool, optional): Only include items for kernel time. Defaults to False.
         threshold (int, optional): Minimum ratio of duration among all. Defaults to 0.
 
@@ -357,7 +407,7 @@ def group_node_results(sess_time, kernel_time_only, use_gpu):
     """Group results by operator name.
 
     Args:
-        sess_time (List[Dict]): profile data
+        sess_time (Iterable[Dict]): profile data
         kernel_time_only (bool): Only include items for kernel time.
         use_gpu (bool): GPU is used in profiling or not.
 
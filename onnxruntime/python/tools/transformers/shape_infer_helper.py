@@ -15,14 +15,19 @@ if os.path.exists(os.path.join(file_path, "../tools/symbolic_shape_infer.py")):
 else:
     sys.path.append(os.path.join(file_path, ".."))
 
-from symbolic_shape_infer import SymbolicShapeInference, get_shape_from_type_proto, sympy  # noqa: E402
+from symbolic_shape_infer import (  # noqa: E402
+    SymbolicShapeInference,
+    SymbolicShapeInferenceCache,  # noqa: F401
+    get_shape_from_type_proto,
+    sympy,
+)
 
 logger = logging.getLogger(__name__)
 
 
 class SymbolicShapeInferenceHelper(SymbolicShapeInference):
-    def __init__(self, model, verbose=0, int_max=2**31 - 1, auto_merge=True, guess_output_rank=False):
-        super().__init__(int_max, auto_merge, guess_output_rank, verbose)
+    def __init__(self, model, verbose=0, int_max=2**31 - 1, auto_merge=True, guess_output_rank=False, cache=None):
+        super().__init__(int_max, auto_merge, guess_output_rank, verbose, cache=cache)
         self.model_ = model
         self.all_shapes_inferred_: bool = False
         self.is_inferred_: bool = False
@@ -58,6 +63,10 @@ class SymbolicShapeInferenceHelper(SymbolicShapeInference):
         self.is_inferred_ = True
         return self.all_shapes_inferred_
 
+    def _get_cache_context(self, mp):
+        # results depend on the values of dynamic axes
+        return super()._get_cache_context(mp) + repr(sorted(self.dynamic_axis_mapping_.items())).encode()
+
     def _get_sympy_shape(self, node, idx):
         """Override it to ensure shape inference by giving the actual value of dynamic axis."""
         sympy_shape = []
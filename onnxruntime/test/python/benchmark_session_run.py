@@ -0,0 +1,70 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+# --------------------------------------------------------------------------
+
+"""
+Benchmark the Python overhead per call of InferenceSession.run and of the function returned by
+InferenceSession.prepare, using a small model so that the time is dominated by the overhead.
+
+Example:
+    python benchmark_session_run.py --model mul_1.onnx --repeat 5 --number 10000
+"""
+
+import argparse
+import timeit
+
+import numpy as np
+from helper import get_name
+
+import onnxruntime as onnxrt
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Benchmark per-call overhead of InferenceSession.run")
+    parser.add_argument("--model", default="mul_1.onnx", help="model in test data directory, or path of a model")
+    parser.add_argument("--repeat", type=int, default=5, help="number of measurements")
+    parser.add_argument("--number", type=int, default=10000, help="number of calls per measurement")
+    return parser.parse_args()
+
+
+def create_input(node_arg):
+    dtype = {"tensor(float)": np.float32, "tensor(int64)": np.int64, "tensor(int32)": np.int32}[node_arg.type]
+    shape = [dim if isinstance(dim, int) else 1 for dim in node_arg.shape]
+    return np.ones(shape, dtype=dtype)
+
+
+def main():
+    args = parse_arguments()
+    so = onnxrt.SessionOptions()
+    so.intra_op_num_threads = 1
+    sess = onnxrt.InferenceSession(get_name(args.model), so, providers=["CPUExecutionProvider"])
+
+    input_names = [node_arg.name for node_arg in sess.get_inputs()]
+    output_names = [node_arg.name for node_arg in sess.get_outputs()]
+    inputs = [create_input(node_arg) for node_arg in sess.get_inputs()]
+    input_feed = dict(zip(input_names, inputs))
+    prepared_run = sess.prepare(output_names, input_names)
+
+    candidates = {
+        "run(None, feed)": lambda: sess.run(None, input_feed),
+        "run(output_names, feed)": lambda: sess.run(output_names, input_feed),
+        "prepare(...)(*inputs)": lambda: prepared_run(*inputs),
+    }
+
+    # Measure the candidates in turn in each repeat, so that they see similar system noise.
+    best = {name: float("inf") for name in candidates}
+    for _ in range(args.repeat):
+        for name, func in candidates.items():
+            func()  # warm up
+            best[name] = min(best[name], timeit.timeit(func, number=args.number))
+
+    baseline = None
+    for name, total_time in best.items():
+        latency = total_time / args.number * 1e6
+        baseline = baseline or latency
+        print(f"{name:<28} {latency:8.2f} us/call ({baseline / latency:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
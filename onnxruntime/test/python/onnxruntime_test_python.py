@@ -2,16 +2,21 @@
 # Licensed under the MIT License.
 from __future__ import annotations
 
+import asyncio
+import concurrent.futures
 import copy
 import ctypes
 import gc
+import mmap
 import os
 import pathlib
 import platform
 import queue
 import sys
+import tempfile
 import threading
 import unittest
+import unittest.mock
 
 import numpy as np
 from helper import get_name
@@ -738,6 +743,25 @@ class TestInferenceSession(unittest.TestCase):
         event.wait(10)  # timeout in 10 sec
         self.assertTrue(event.is_set())
 
+    def test_prepare(self):
+        sess = onnxrt.InferenceSession(get_name("mul_1.onnx"), providers=available_providers)
+        x = np.array([[1.0, 2.0], [3.0, 4.0], [5.0, 6.0]], dtype=np.float32)
+        output_expected = np.array([[1.0, 4.0], [9.0, 16.0], [25.0, 36.0]], dtype=np.float32)
+
+        for run in [sess.prepare(["Y"], ["X"]), sess.prepare()]:
+            res = run(x)
+            self.assertEqual(len(res), 1)
+            np.testing.assert_allclose(output_expected, res[0], rtol=1e-05, atol=1e-08)
+
+        with self.assertRaises(TypeError):
+            sess.prepare()(x, x)
+        with self.assertRaisesRegex(ValueError, "Required inputs"):
+            sess.prepare(["Y"], [])
+        with self.assertRaisesRegex(ValueError, "not inputs of the model"):
+            sess.prepare(["Y"], ["X", "Z"])
+        with self.assertRaisesRegex(ValueError, "not outputs of the model"):
+            sess.prepare(["Z"], ["X"])
+
     def test_run_model_from_bytes(self):
         with open(get_name("mul_1.onnx"), "rb") as f:
             content = f.read()
@@ -755,6 +779,34 @@ class TestInferenceSession(unittest.TestCase):
         output_expected = np.array([[1.0, 4.0], [9.0, 16.0], [25.0, 36.0]], dtype=np.float32)
         np.testing.assert_allclose(output_expected, res[0], rtol=1e-05, atol=1e-08)
 
+    def test_run_model_from_buffer(self):
+        x = np.array([[1.0, 2.0], [3.0, 4.0], [5.0, 6.0]], dtype=np.float32)
+        output_expected = np.array([[1.0, 4.0], [9.0, 16.0], [25.0, 36.0]], dtype=np.float32)
+        with open(get_name("mul_1.onnx"), "rb") as f:
+            content = f.read()
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                for model_buffer in [memoryview(content), bytearray(content), mapped]:
+                    with self.subTest(type=type(model_buffer).__name__):
+                        sess = onnxrt.InferenceSession(model_buffer, providers=["CPUExecutionProvider"])
+                        res = sess.run(["Y"], {"X": x})
+                        np.testing.assert_allclose(output_expected, res[0], rtol=1e-05, atol=1e-08)
+                        del sess
+
+        with self.assertRaises(TypeError):
+            onnxrt.InferenceSession(1, providers=["CPUExecutionProvider"])
+
+    def test_release_model_buffer(self):
+        with open(get_name("mul_1.onnx"), "rb") as f:
+            content = f.read()
+        model_buffer = memoryview(content)
+        sess = onnxrt.InferenceSession(model_buffer, providers=["CPUExecutionProvider"], release_model_buffer=True)
+        x = np.array([[1.0, 2.0], [3.0, 4.0], [5.0, 6.0]], dtype=np.float32)
+        res = sess.run(["Y"], {"X": x})
+        np.testing.assert_allclose(x * x, res[0], rtol=1e-05, atol=1e-08)
+        # The session holds no reference to the buffer anymore, so it cannot be re-created.
+        with self.assertRaisesRegex(RuntimeError, "model buffer was released"):
+            sess.set_providers(["CPUExecutionProvider"])
+
     def test_run_model2(self):
         sess = onnxrt.InferenceSession(get_name("matmul_1.onnx"), providers=onnxrt.get_available_providers())
         x = np.array([[1.0, 2.0], [3.0, 4.0], [5.0, 6.0]], dtype=np.float32)
@@ -1534,6 +1586,24 @@ class TestInferenceSession(unittest.TestCase):
             self.assertEqual(cuda_sparse_tensor.dense_shape(), shape)
             self.assertEqual(cuda_sparse_tensor.data_type(), "sparse_tensor(float)")
 
+    def test_sparse_tensor_blocksparse_format(self):
+        cpu_device = onnxrt.OrtDevice.make("cpu", 0)
+        shape = [4, 6]
+        # Three 2x2 blocks at (0, 0), (0, 2) and (1, 1)
+        values = np.arange(12, dtype=np.float32).reshape(3, 2, 2)
+        indices = np.array([[0, 0, 1], [0, 2, 1]], dtype=np.int32)
+        sparse_tensor = onnxrt.SparseTensor.sparse_blocksparse_from_numpy(shape, values, indices, cpu_device)
+        self.assertEqual(sparse_tensor.format(), onnxrt.OrtSparseFormat.ORT_SPARSE_BLOCK_SPARSE)
+        self.assertEqual(sparse_tensor.dense_shape(), shape)
+        self.assertEqual(sparse_tensor.data_type(), "sparse_tensor(float)")
+
+        indices_ret = sparse_tensor.as_blocksparse_view().indices()
+        self.assertFalse(indices_ret.flags.writeable)
+        gc.collect()
+        self.assertEqual(indices_ret.dtype, np.int32)
+        self.assertTrue(np.array_equal(indices, indices_ret))
+        self.assertTrue(np.array_equal(values, sparse_tensor.values()))
+
     def test_run_model_with_cuda_copy_stream(self):
         available_providers = onnxrt.get_available_providers()
 
@@ -1919,5 +1989,170 @@ class TestInferenceSession(unittest.TestCase):
         self.assertTrue(np.allclose(outputs[0], expected_output))
 
 
+class TestInferenceSessionAsyncio(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # Sessions are shared by the tests, and released after all runs complete.
+        so = onnxrt.SessionOptions()
+        so.intra_op_num_threads = 2
+        cls.mul_sess = onnxrt.InferenceSession(get_name("mul_1.onnx"), so, providers=available_providers)
+        cls.matmul_sess = onnxrt.InferenceSession(
+            get_name("matmul_2.onnx"), so, providers=available_providers_without_tvm
+        )
+
+    def test_run_coro(self):
+        x = np.array([[1.0, 2.0], [3.0, 4.0], [5.0, 6.0]], dtype=np.float32)
+        res = asyncio.run(asyncio.wait_for(self.mul_sess.run_coro(["Y"], {"X": x}), 10))
+        output_expected = np.array([[1.0, 4.0], [9.0, 16.0], [25.0, 36.0]], dtype=np.float32)
+        np.testing.assert_allclose(output_expected, res[0], rtol=1e-05, atol=1e-08)
+
+        with self.assertRaises(RuntimeError):
+            asyncio.run(asyncio.wait_for(self.mul_sess.run_coro(["Y"], {"X": x.reshape((2, 3))}), 10))
+
+    def test_session_batcher(self):
+        sess = self.matmul_sess
+        inputs = [np.random.rand(batch_size, 2).astype(np.float32) for batch_size in [1, 2, 3, 1, 4, 1]]
+        expected = [sess.run(["Y"], {"X": x})[0] for x in inputs]
+
+        batch_sizes = []
+        run_coro = sess.run_coro
+
+        async def counting_run_coro(output_names, input_feed, run_options=None):
+            batch_sizes.append(input_feed["X"].shape[0])
+            return await run_coro(output_names, input_feed, run_options)
+
+        async def run_all(batcher):
+            return await asyncio.gather(*[batcher.run(["Y"], {"X": x}) for x in inputs])
+
+        with unittest.mock.patch.object(sess, "run_coro", counting_run_coro):
+            batcher = onnxrt.SessionBatcher(sess, max_batch_size=4, max_wait_time=1.0)
+            results = asyncio.run(asyncio.wait_for(run_all(batcher), 10))
+
+        for result, output_expected in zip(results, expected):
+            self.assertEqual(len(result), 1)
+            np.testing.assert_allclose(output_expected, result[0], rtol=1e-05, atol=1e-08)
+        # [1, 2] is flushed when 3 arrives, [3, 1] is full, 4 runs alone and [1] waits until timeout.
+        self.assertEqual(sorted(batch_sizes), [1, 3, 4, 4])
+
+        with self.assertRaises(ValueError):
+            onnxrt.SessionBatcher(sess, max_batch_size=0)
+
+
+class TestInferenceSessionPool(unittest.TestCase):
+    def test_run_from_threads(self):
+        model_path = get_name("mobilenet_v3_small_excerpt.onnx")
+        sess = onnxrt.InferenceSession(model_path, providers=["CPUExecutionProvider"])
+        pool = onnxrt.InferenceSessionPool(model_path, pool_size=2, providers=["CPUExecutionProvider"])
+        self.assertEqual(pool.pool_size, 2)
+        self.assertEqual(list(pool._shared_initializers), ["535"])
+
+        rng = np.random.default_rng(0)
+        inputs = [rng.random((1, 3, 224, 224), dtype=np.float32) for _ in range(8)]
+        expected = [sess.run(None, {"input": x})[0] for x in inputs]
+        with concurrent.futures.ThreadPoolExecutor(4) as executor:
+            results = list(executor.map(lambda x: pool.run(None, {"input": x})[0], inputs))
+        for result, expected_result in zip(results, expected):
+            np.testing.assert_allclose(result, expected_result, rtol=1e-05, atol=1e-06)
+
+        stats = pool.get_stats()
+        self.assertEqual(stats["waiting"], 0)
+        self.assertLessEqual(stats["max_waiting"], 4)
+        self.assertEqual(sum(session_stats["runs"] for session_stats in stats["sessions"]), len(inputs))
+        for session_stats in stats["sessions"]:
+            self.assertFalse(session_stats["in_use"])
+            self.assertLessEqual(session_stats["p50_latency"], session_stats["max_latency"])
+
+    def test_lease(self):
+        pool = onnxrt.InferenceSessionPool(get_name("mul_1.onnx"), pool_size=1, providers=["CPUExecutionProvider"])
+        x = np.array([[1.0, 2.0], [3.0, 4.0], [5.0, 6.0]], dtype=np.float32)
+        with pool.lease() as sess:
+            self.assertTrue(pool.get_stats()["sessions"][0]["in_use"])
+            np.testing.assert_allclose(sess.run(None, {"X": x})[0], x * x)
+            with self.assertRaises(TimeoutError):
+                pool.run(None, {"X": x}, timeout=0.01)
+
+        self.assertEqual(pool.get_stats()["sessions"][0]["runs"], 1)
+        np.testing.assert_allclose(pool.run(None, {"X": x}, timeout=0.01)[0], x * x)
+
+
+class TestTuningResultsDatabase(unittest.TestCase):
+    @staticmethod
+    def tuning_results(results, validators=None):
+        return [{"ep": "TestExecutionProvider", "validators": validators or {"ORT_VERSION": "1"}, "results": results}]
+
+    def test_store(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db = onnxrt.TuningResultsDatabase(temp_dir)
+            self.assertEqual(db.load("key"), [])
+            self.assertTrue(db.store("key", self.tuning_results({"op": {"p0": 0}})))
+            self.assertFalse(db.store("key", self.tuning_results({"op": {"p0": 0}})))
+            # Stored kernels are kept, new parameters and validators are added.
+            self.assertTrue(db.store("key", self.tuning_results({"op": {"p0": 1, "p1": 1}, "op2": {"p0": 2}})))
+            self.assertTrue(db.store("key", self.tuning_results({"op": {"p0": 3}}, {"ORT_VERSION": "2"})))
+            self.assertEqual(
+                db.load("key"),
+                self.tuning_results({"op": {"p0": 0, "p1": 1}, "op2": {"p0": 2}})
+                + self.tuning_results({"op": {"p0": 3}}, {"ORT_VERSION": "2"}),
+            )
+
+            with concurrent.futures.ThreadPoolExecutor(4) as executor:
+                list(executor.map(lambda i: db.store("key2", self.tuning_results({"op": {f"p{i}": i}})), range(16)))
+            self.assertEqual(db.load("key2"), self.tuning_results({"op": {f"p{i}": i for i in range(16)}}))
+
+    def test_store_failure_removes_temp_file(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db = onnxrt.TuningResultsDatabase(temp_dir)
+            self.assertTrue(db.store("key", self.tuning_results({"op": {"p0": 0}})))
+            with self.assertRaises(TypeError):
+                db.store("key", self.tuning_results({"op": {"p1": object()}}))
+            self.assertEqual(sorted(os.listdir(temp_dir)), ["key.json", "key.json.lock"])
+            self.assertEqual(db.load("key"), self.tuning_results({"op": {"p0": 0}}))
+
+    def test_get_key(self):
+        get_key = onnxrt.TuningResultsDatabase.get_key
+        providers = ["CUDAExecutionProvider", "CPUExecutionProvider"]
+        options = {"CUDAExecutionProvider": {"device_id": "0", "tunable_op_enable": "1"}, "CPUExecutionProvider": {}}
+        key = get_key("model", providers, options)
+
+        # Options that do not identify the device are not part of the key.
+        other_options = {
+            "CUDAExecutionProvider": {
+                "device_id": "0",
+                "tunable_op_enable": "0",
+                "tunable_op_tuning_enable": "1",
+                "user_compute_stream": "140273928",
+            },
+            "CPUExecutionProvider": {},
+        }
+        self.assertEqual(get_key("model", providers, other_options), key)
+
+        options_of_device_1 = {"CUDAExecutionProvider": {"device_id": "1"}, "CPUExecutionProvider": {}}
+        self.assertNotEqual(get_key("model", providers, options_of_device_1), key)
+        self.assertNotEqual(get_key("model", providers[:1], options), key)
+        self.assertNotEqual(get_key("other_model", providers, options), key)
+
+    def test_session(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db = onnxrt.TuningResultsDatabase(temp_dir)
+            sess = onnxrt.InferenceSession(
+                get_name("mul_1.onnx"), providers=["CPUExecutionProvider"], tuning_results_db=db
+            )
+            key = sess._tuning_results_state["key"]
+            # The CPU execution provider does not tune ops, so tuning results of the session are simulated.
+            sess._tuning_results_state["sess"] = unittest.mock.Mock(
+                get_tuning_results=lambda: self.tuning_results({"op": {"p0": 0}})
+            )
+            del sess
+            gc.collect()
+            self.assertEqual(db.load(key), self.tuning_results({"op": {"p0": 0}}))
+
+            sess = onnxrt.InferenceSession(
+                get_name("mul_1.onnx"), providers=["CPUExecutionProvider"], tuning_results_db=temp_dir
+            )
+            self.assertEqual(sess._tuning_results_state["key"], key)
+            x = np.array([[1.0, 2.0], [3.0, 4.0], [5.0, 6.0]], dtype=np.float32)
+            np.testing.assert_allclose(sess.run(None, {"X": x})[0], x * x)
+
+
 if __name__ == "__main__":
     unittest.main(verbosity=1)
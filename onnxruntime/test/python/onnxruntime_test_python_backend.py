@@ -2,9 +2,12 @@
 # Licensed under the MIT License.
 
 # -*- coding: UTF-8 -*-
+import os
+import tempfile
 import unittest
 
 import numpy as np
+import onnx
 from helper import get_name
 from numpy.testing import assert_allclose
 
@@ -21,6 +24,70 @@ class TestBackend(unittest.TestCase):
         output_expected = np.array([[1.0, 4.0], [9.0, 16.0], [25.0, 36.0]], dtype=np.float32)
         np.testing.assert_allclose(output_expected, res[0], rtol=1e-05, atol=1e-08)
 
+    def test_run_model_session_cache(self):
+        model = onnx.helper.make_model(
+            onnx.helper.make_graph(
+                [onnx.helper.make_node("Mul", ["X", "X"], ["Y"])],
+                "mul",
+                [onnx.helper.make_tensor_value_info("X", onnx.TensorProto.FLOAT, [3, 2])],
+                [onnx.helper.make_tensor_value_info("Y", onnx.TensorProto.FLOAT, [3, 2])],
+            ),
+            opset_imports=[onnx.helper.make_opsetid("", 13)],
+            ir_version=7,
+        )
+        cache = backend.backend.OnnxRuntimeBackend.model_session_cache
+        backend.backend.OnnxRuntimeBackend.clear_session_cache()
+        x = np.array([[1.0, 2.0], [3.0, 4.0], [5.0, 6.0]], dtype=np.float32)
+        output_expected = np.array([[1.0, 4.0], [9.0, 16.0], [25.0, 36.0]], dtype=np.float32)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            name = os.path.join(temp_dir, "mul.onnx")
+            onnx.save(model, name)
+            for _ in range(2):
+                for m in [name, model, model.SerializeToString()]:
+                    res = backend.run(m, [x])
+                    np.testing.assert_allclose(output_expected, res[0], rtol=1e-05, atol=1e-08)
+        # A model and its serialized content share the same session.
+        self.assertEqual((cache.misses, cache.hits), (2, 4))
+
+        # The key of the model depends on its content.
+        model.graph.node[0].op_type = "Add"
+        res = backend.run(model, [x])
+        np.testing.assert_allclose(x + x, res[0], rtol=1e-05, atol=1e-08)
+        self.assertEqual((cache.misses, cache.hits), (3, 4))
+
+    def test_run_node(self):
+        backend.backend.OnnxRuntimeBackend.clear_session_cache()
+        cache = backend.backend.OnnxRuntimeBackend.node_session_cache
+        x = np.array([[-1.0, 2.0], [3.0, -4.0]], dtype=np.float32)
+        node = onnx.helper.make_node("LeakyRelu", ["x"], ["y"], alpha=0.5)
+        res = backend.run_node(node, [x])
+        np.testing.assert_allclose(np.where(x > 0, x, 0.5 * x), res[0])
+        res = backend.run_node(onnx.helper.make_node("LeakyRelu", ["a"], ["b"], alpha=0.5), [x + 1])
+        np.testing.assert_allclose(np.where(x + 1 > 0, x + 1, 0.5 * (x + 1)), res[0])
+        self.assertEqual((cache.misses, cache.hits), (1, 1))
+
+        # Different attributes, types or ranks need another session.
+        res = backend.run_node(onnx.helper.make_node("LeakyRelu", ["x"], ["y"], alpha=0.25), [x])
+        np.testing.assert_allclose(np.where(x > 0, x, 0.25 * x), res[0])
+        res = backend.run_node(node, [x.astype(np.float64)])
+        self.assertEqual(res[0].dtype, np.float64)
+        res = backend.run_node(node, [x[0]])
+        np.testing.assert_allclose(np.where(x[0] > 0, x[0], 0.5 * x[0]), res[0])
+        self.assertEqual((cache.misses, cache.hits), (4, 1))
+
+        # Optional inputs, several outputs and contrib operators.
+        res = backend.run_node(onnx.helper.make_node("Clip", ["x", "", "max"], ["y"]), [x, np.float32(1.0)])
+        np.testing.assert_allclose(np.minimum(x, 1.0), res[0])
+        values, indices = backend.run_node(onnx.helper.make_node("TopK", ["x", "k"], ["v", "i"]), [x, np.array([1])])
+        np.testing.assert_allclose(x.max(axis=1, keepdims=True), values)
+        np.testing.assert_array_equal(x.argmax(axis=1)[:, np.newaxis], indices)
+        node = onnx.helper.make_node("FusedMatMul", ["a", "b"], ["y"], domain="com.microsoft", alpha=2.0)
+        res = backend.run_node(node, [x, x])
+        np.testing.assert_allclose(2.0 * (x @ x), res[0])
+
+        with self.assertRaises(RuntimeError):
+            backend.run_node(onnx.helper.make_node("Add", ["a", "b"], ["c"]), [x])
+
     def test_allocation_plan_works_with_only_execute_path_to_fetches_option(self):
         """
                (inp0)  (inp1)
@@ -23,9 +23,9 @@ if os.path.exists(
     import sys
 
     sys.path.append(os.path.join(os.path.dirname(__file__), "..", "..", "python", "tools"))
-    from symbolic_shape_infer import SymbolicShapeInference
+    from symbolic_shape_infer import SymbolicShapeInference, SymbolicShapeInferenceCache
 else:
-    from onnxruntime.tools.symbolic_shape_infer import SymbolicShapeInference
+    from onnxruntime.tools.symbolic_shape_infer import SymbolicShapeInference, SymbolicShapeInferenceCache
 
 import unittest
 from pathlib import Path
@@ -766,5 +766,52 @@ class TestSymbolicShapeInferenceForSlice(unittest.TestCase):
         self.assertEqual(output_dims[0].dim_param, "N")
 
 
+class TestSymbolicShapeInferenceCache(unittest.TestCase):
+    def _create_model(self, activation):
+        # reshape input of shape [b, s, 4] to [b, s, 2, 2] with the shape computed from the input shape
+        nodes = [
+            helper.make_node("Shape", ["input"], ["shape"]),
+            helper.make_node("Slice", ["shape", "zero", "two"], ["batch_and_sequence"]),
+            helper.make_node("Concat", ["batch_and_sequence", "heads"], ["new_shape"], axis=0),
+            helper.make_node(activation, ["input"], ["activation_output"]),
+            helper.make_node("Reshape", ["activation_output", "new_shape"], ["reshaped"]),
+            helper.make_node("Transpose", ["reshaped"], ["output"], perm=[0, 2, 1, 3]),
+        ]
+        graph = helper.make_graph(
+            nodes,
+            "Cache_Test",
+            [helper.make_tensor_value_info("input", TensorProto.FLOAT, ["b", "s", 4])],
+            [helper.make_tensor_value_info("output", TensorProto.FLOAT, None)],
+            [
+                helper.make_tensor("zero", TensorProto.INT64, [1], [0]),
+                helper.make_tensor("two", TensorProto.INT64, [1], [2]),
+                helper.make_tensor("heads", TensorProto.INT64, [2], [2, 2]),
+            ],
+        )
+        return helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+
+    def test_cache(self):
+        cache = SymbolicShapeInferenceCache()
+        model = self._create_model("Relu")
+        expected = SymbolicShapeInference.infer_shapes(model, auto_merge=True)
+        inferred = SymbolicShapeInference.infer_shapes(model, auto_merge=True, cache=cache)
+        self.assertEqual(inferred, expected)
+        self.assertEqual((cache.model_hits, cache.node_hits, cache.node_misses), (0, 0, 6))
+
+        self.assertEqual(SymbolicShapeInference.infer_shapes(model, auto_merge=True, cache=cache), expected)
+        self.assertEqual(cache.model_hits, 1)
+        # other parameters of inference do not use the cached result
+        SymbolicShapeInference.infer_shapes(model, int_max=100000, auto_merge=True, cache=cache)
+        self.assertEqual((cache.model_hits, cache.node_hits, cache.node_misses), (1, 0, 12))
+
+        # only the changed node is inferred again, since its output shape is the same
+        model = self._create_model("Sigmoid")
+        expected = SymbolicShapeInference.infer_shapes(model, auto_merge=True)
+        self.assertEqual(SymbolicShapeInference.infer_shapes(model, auto_merge=True, cache=cache), expected)
+        self.assertEqual((cache.model_hits, cache.node_hits, cache.node_misses), (1, 5, 13))
+        output_dims = unique_element(expected.graph.output).type.tensor_type.shape.dim
+        self.assertEqual([dim.dim_param or dim.dim_value for dim in output_dims], ["b", 2, "s", 2])
+
+
 if __name__ == "__main__":
     unittest.main()
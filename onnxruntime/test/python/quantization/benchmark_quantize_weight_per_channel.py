@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+
+"""
+Benchmark the per-channel weight quantization of BaseQuantizer: all channels at once
+(_quantize_weight_channels) against one channel at a time (_quantize_weight_channels_one_by_one).
+The results of both are compared to check that they are identical.
+
+Example:
+    python benchmark_quantize_weight_per_channel.py --repeat 3
+"""
+
+import argparse
+import time
+
+import numpy as np
+import onnx
+
+from onnxruntime.quantization import QuantType
+from onnxruntime.quantization.qdq_quantizer import QDQQuantizer
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Benchmark per-channel weight quantization")
+    parser.add_argument("--channels", type=int, default=4096, help="number of output channels of the weights")
+    parser.add_argument("--repeat", type=int, default=3, help="number of measurements")
+    return parser.parse_args()
+
+
+def create_quantizer(weight_type: QuantType):
+    graph = onnx.helper.make_graph(
+        [onnx.helper.make_node("Relu", ["INP"], ["OUT"])],
+        "benchmark",
+        [onnx.helper.make_tensor_value_info("INP", onnx.TensorProto.FLOAT, [1])],
+        [onnx.helper.make_tensor_value_info("OUT", onnx.TensorProto.FLOAT, [1])],
+    )
+    model = onnx.helper.make_model(graph, opset_imports=[onnx.helper.make_opsetid("", 21)])
+    return QDQQuantizer(model, True, False, weight_type, QuantType.QUInt8, None, [], [], [], extra_options={})
+
+
+def main():
+    args = parse_arguments()
+    rng = np.random.default_rng(0)
+    weights = {
+        "Conv": (rng.standard_normal((args.channels, 64, 3, 3)).astype(np.float32), 0),
+        "MatMul": (rng.standard_normal((4096, args.channels)).astype(np.float32), 1),
+    }
+    cases = [
+        ("Conv", QuantType.QInt8),
+        ("Conv", QuantType.QUInt16),
+        ("Conv", QuantType.QInt4),
+        ("MatMul", QuantType.QInt8),
+    ]
+
+    for op_type, weight_type in cases:
+        weight, axis = weights[op_type]
+        quantizer = create_quantizer(weight_type)
+        candidates = {
+            "one_by_one": quantizer._quantize_weight_channels_one_by_one,
+            "vectorized": quantizer._quantize_weight_channels,
+        }
+
+        # Measure the candidates in turn in each repeat, so that they see similar system noise.
+        best = {name: float("inf") for name in candidates}
+        results = {}
+        for _ in range(args.repeat):
+            for name, func in candidates.items():
+                start = time.perf_counter()
+                results[name] = func(weight, quantizer.weight_qType, axis, [{"axis": axis}], True, False)
+                best[name] = min(best[name], time.perf_counter() - start)
+
+        for expected, actual in zip(results["one_by_one"], results["vectorized"]):
+            assert np.array_equal(np.hstack(expected), np.hstack(actual)), "quantized weights differ"
+        print(
+            f"{op_type:<6} {'x'.join(map(str, weight.shape)):<14} {weight_type.name:<8} "
+            f"one by one {best['one_by_one']:7.3f} s, vectorized {best['vectorized']:7.3f} s "
+            f"({best['one_by_one'] / best['vectorized']:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
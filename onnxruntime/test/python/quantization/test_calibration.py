@@ -14,7 +14,14 @@ import onnx
 from onnx import TensorProto, helper, numpy_helper
 
 import onnxruntime
-from onnxruntime.quantization.calibrate import CalibrationDataReader, CalibrationMethod, create_calibrator
+from onnxruntime.quantization.calibrate import (
+    CalibrationDataReader,
+    CalibrationMethod,
+    HistogramCollector,
+    create_calibrator,
+    entropy,
+)
+from onnxruntime.quantization.quant_utils import smooth_distribution
 
 
 def generate_input_initializer(tensor_shape, tensor_dtype, input_name):
@@ -392,6 +399,111 @@ class TestCalibrateMinMaxCalibrator(unittest.TestCase):
                 tensors_range = calibrator.compute_data()
                 self.assertEqual(len(tensors_range.items()), num_tensors)  # A range for every tensor in the graph.
 
+    def test_histogram_calibrators_max_intermediate_outputs(self):
+        """
+        Checks that histogram-based calibrators updating their histograms after every batch
+        (max_intermediate_outputs=1) release the outputs and merge several collect_data calls
+        like the default path.
+        """
+        test_model_path = Path(self._tmp_model_dir.name).joinpath("./test_model_4.onnx")
+        self.construct_test_compute_data_model(test_model_path.as_posix(), augmented=False)
+
+        data_reader = TestDataReader()
+        calibration_methods = [CalibrationMethod.Percentile, CalibrationMethod.Entropy, CalibrationMethod.Distribution]
+        for calibration_method in calibration_methods:
+            for symmetric in [False, True]:
+                with self.subTest(calibration_method=calibration_method, symmetric=symmetric):
+                    augmented_model_path = Path(self._tmp_model_dir.name).joinpath(
+                        f"augmented_{calibration_method}.onnx"
+                    )
+                    calibrators = []
+                    for extra_options in [{}, {"max_intermediate_outputs": 1}]:
+                        calibrator = create_calibrator(
+                            test_model_path,
+                            calibrate_method=calibration_method,
+                            augmented_model_path=augmented_model_path,
+                            extra_options={"symmetric": symmetric, **extra_options},
+                        )
+                        # the second half of the batches is scaled so that the histograms grow when it is merged
+                        for scale, batches in [(1, slice(0, 3)), (4, slice(3, None))]:
+                            partial_reader = TestDataReader()
+                            partial_reader.input_data_list = [
+                                input_data * scale for input_data in data_reader.input_data_list[batches]
+                            ]
+                            calibrator.collect_data(partial_reader)
+                        self.assertEqual(calibrator.intermediate_outputs, [])
+                        calibrators.append(calibrator)
+
+                    reference, streaming = calibrators
+                    self._assert_same_histograms(reference, streaming)
+
+    def _assert_same_histograms(self, reference, streaming):
+        self.assertEqual(
+            list(streaming.collector.histogram_dict.keys()), list(reference.collector.histogram_dict.keys())
+        )
+        for name, expected in reference.collector.histogram_dict.items():
+            actual = streaming.collector.histogram_dict[name]
+            self.assertEqual(len(actual), len(expected))
+            for actual_value, expected_value in zip(actual, expected):
+                self.assertEqual(np.asarray(actual_value).dtype, np.asarray(expected_value).dtype)
+                np.testing.assert_equal(actual_value, expected_value)
+
+        reference_range = reference.compute_data()
+        streaming_range = streaming.compute_data()
+        self.assertEqual(set(streaming_range.keys()), set(reference_range.keys()))
+        for name, expected in reference_range.items():
+            actual = streaming_range[name]
+            self.assertEqual(actual._attrs, expected._attrs)
+            for attr in expected._attrs:
+                np.testing.assert_equal(getattr(actual, attr), getattr(expected, attr))
+
+    def test_calibrators_max_intermediate_outputs_vs_default(self):
+        """
+        Compares calibrators releasing their intermediate outputs (max_intermediate_outputs) with the default
+        path collecting all the outputs at once, the histograms and the ranges are the same.
+        """
+        test_model_path = Path(self._tmp_model_dir.name).joinpath("./test_model_5.onnx")
+        self.construct_test_compute_data_model(test_model_path.as_posix(), augmented=False)
+
+        data_reader = TestDataReader()
+        calibration_methods = [
+            CalibrationMethod.MinMax,
+            CalibrationMethod.Percentile,
+            CalibrationMethod.Entropy,
+            CalibrationMethod.Distribution,
+        ]
+        for calibration_method in calibration_methods:
+            augmented_model_path = Path(self._tmp_model_dir.name).joinpath(
+                f"augmented_default_{calibration_method}.onnx"
+            )
+            data_reader.rewind()
+            reference = create_calibrator(
+                test_model_path, calibrate_method=calibration_method, augmented_model_path=augmented_model_path
+            )
+            reference.collect_data(data_reader)
+
+            for max_intermediate_outputs in [1, 3, data_reader.count]:
+                with self.subTest(
+                    calibration_method=calibration_method, max_intermediate_outputs=max_intermediate_outputs
+                ):
+                    data_reader.rewind()
+                    streaming = create_calibrator(
+                        test_model_path,
+                        calibrate_method=calibration_method,
+                        augmented_model_path=augmented_model_path,
+                        extra_options={"max_intermediate_outputs": max_intermediate_outputs},
+                    )
+                    streaming.collect_data(data_reader)
+
+                    if calibration_method == CalibrationMethod.MinMax:
+                        reference_range = reference.compute_data()
+                        streaming_range = streaming.compute_data()
+                        self.assertEqual(set(streaming_range.keys()), set(reference_range.keys()))
+                        for name, expected in reference_range.items():
+                            np.testing.assert_equal(streaming_range[name].range_value, expected.range_value)
+                    else:
+                        self._assert_same_histograms(reference, streaming)
+
     def test_augment_graph_with_zero_value_dimension(self):
         """TEST_CONFIG_5"""
         #   Conv
@@ -528,5 +640,83 @@ class TestCalibrateMinMaxCalibrator(unittest.TestCase):
             np.testing.assert_equal(output_min_max_dict[output_name], tensors_range[output_name].range_value)
 
 
+def reference_entropy_threshold(histogram, num_quantized_bins):
+    """
+    Straightforward implementation of the KL-divergence threshold search, one candidate threshold at a time.
+    """
+    hist, hist_edges = histogram[0], histogram[1]
+    num_bins = hist.size
+    zero_bin_index = num_bins // 2
+    num_half_quantized_bin = num_quantized_bins // 2
+    dtype = hist_edges.dtype
+    kl_divergence = np.zeros(zero_bin_index - num_half_quantized_bin + 1)
+    thresholds = []
+    for i in range(num_half_quantized_bin, zero_bin_index + 1):
+        start_index = zero_bin_index - i
+        end_index = min(zero_bin_index + i + 1, num_bins)
+        thresholds.append((hist_edges[start_index], hist_edges[end_index]))
+        sliced_distribution = hist[start_index:end_index]
+        p = sliced_distribution.copy()
+        p[0] += hist[:start_index].sum()
+        p[-1] += hist[end_index:].sum()
+        nonzeros = (p != 0).astype(np.int64)
+        quantized_bins = np.zeros(num_quantized_bins, dtype=np.int64)
+        num_merged_bins = sliced_distribution.size // num_quantized_bins
+        for index in range(num_quantized_bins):
+            start = index * num_merged_bins
+            quantized_bins[index] = sliced_distribution[start : start + num_merged_bins].sum()
+        quantized_bins[-1] += sliced_distribution[num_quantized_bins * num_merged_bins :].sum()
+        q = np.zeros(p.size, dtype=np.int64)
+        for index in range(num_quantized_bins):
+            start = index * num_merged_bins
+            norm = nonzeros[start : start + num_merged_bins].sum()
+            if norm != 0:
+                q[start : start + num_merged_bins] = quantized_bins[index] / norm
+        p = smooth_distribution(p)
+        q = smooth_distribution(q)
+        if p is None or q is None:
+            kl_divergence[i - num_half_quantized_bin] = np.array(np.inf, dtype=dtype)
+        else:
+            kl_divergence[i - num_half_quantized_bin] = np.array(entropy(p, q), dtype=dtype)
+    low, high = thresholds[np.argmin(kl_divergence)]
+    return max(low, histogram[2]), min(high, histogram[3])
+
+
+class TestEntropyThreshold(unittest.TestCase):
+    def _histograms(self):
+        rng = np.random.default_rng(17)
+        for num_bins, dtype in [(128, np.float32), (257, np.float32), (512, np.float16), (2048, np.float32)]:
+            data = rng.normal(size=2000).astype(dtype)
+            data[0] = 40  # one outlier
+            collector = HistogramCollector("entropy", False, num_bins, 128, 99.999, "same")
+            collector.collect({"T": data})
+            hist = collector.histogram_dict["T"]
+            sparse_hist = hist[0].copy()
+            sparse_hist[rng.integers(0, sparse_hist.size, sparse_hist.size // 3)] = 0
+            yield hist
+            yield (sparse_hist, *hist[1:])
+
+    def test_entropy_threshold_matches_reference(self):
+        collector = HistogramCollector("entropy", False, 128, 128, 99.999, "same")
+        for histogram in self._histograms():
+            for num_quantized_bins in (3, 64, 127, 128):
+                with self.subTest(num_bins=histogram[0].size, num_quantized_bins=num_quantized_bins):
+                    expected = reference_entropy_threshold(histogram, num_quantized_bins)
+                    threshold = collector.get_entropy_threshold(histogram, num_quantized_bins)
+                    self.assertEqual(threshold[0].dtype, histogram[1].dtype)
+                    self.assertEqual(threshold, expected)
+
+    def test_entropy_threshold_num_workers(self):
+        histograms = {f"T{i}": histogram for i, histogram in enumerate(self._histograms())}
+        results = []
+        for num_workers in (1, 2):
+            collector = HistogramCollector("entropy", False, 128, 128, 99.999, "same", num_workers=num_workers)
+            collector.histogram_dict = histograms
+            results.append(collector.compute_collection_result())
+        self.assertEqual(list(results[0]), list(results[1]))
+        for name, expected in results[0].items():
+            self.assertEqual(results[1][name][:2], expected[:2])
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -168,6 +168,77 @@ class TestONNXModel(unittest.TestCase):
         onnx_model.topological_sort()
         check_op_type_order(self, onnx_model.model, ["Op1", "Op1", "Op2", "Op3"])
 
+    def test_name_indexes(self):
+        test_model_path = str(Path(self._tmp_model_dir.name) / "onnx_model_name_indexes.onnx")
+        construct_model_for_topo_sort(test_model_path)
+        onnx_model = ONNXModel(onnx.load(test_model_path))
+
+        # Lookups return the protos stored in the graph.
+        self.assertIs(onnx_model.get_initializer("W1"), onnx_model.initializer()[3])
+        self.assertIs(onnx_model.get_node("Conv1"), onnx_model.nodes()[0])
+        self.assertIsNone(onnx_model.get_initializer("missing"))
+        self.assertEqual(onnx_model.get_largest_node_name_suffix("Conv"), 2)
+
+        # Modifications through ONNXModel.
+        onnx_model.add_initializer(generate_input_initializer([2], np.float32, "extra"))
+        self.assertIs(onnx_model.get_initializer("extra"), onnx_model.initializer()[-1])
+        onnx_model.add_node(helper.make_node("Relu", ["Relu_O"], ["Conv7_O"], name="Conv7"))
+        self.assertIs(onnx_model.get_node("Conv7"), onnx_model.nodes()[-1])
+        self.assertEqual(onnx_model.get_largest_node_name_suffix("Conv"), 7)
+        onnx_model.remove_node(onnx_model.get_node("Conv7"))
+        self.assertIsNone(onnx_model.get_node("Conv7"))
+        self.assertEqual(onnx_model.get_largest_node_name_suffix("Conv"), 2)
+        onnx_model.remove_initializer(onnx_model.get_initializer("extra"))
+        self.assertIsNone(onnx_model.get_initializer("extra"))
+
+        # Modifications of the graph made directly.
+        onnx_model.graph().initializer.append(generate_input_initializer([2], np.float32, "direct"))
+        self.assertIs(onnx_model.get_initializer("direct"), onnx_model.initializer()[-1])
+        onnx_model.topological_sort()
+        self.assertIs(onnx_model.get_node("Conv1"), next(n for n in onnx_model.nodes() if n.name == "Conv1"))
+        onnx_model.get_node("Conv1").name = "Conv9"
+        self.assertIsNone(onnx_model.get_node("Conv1"))
+        onnx_model.reset_indexes()
+        self.assertEqual(onnx_model.get_largest_node_name_suffix("Conv"), 9)
+
+        # Nodes created by a quantizer but not yet in the graph.
+        new_nodes = [helper.make_node("Relu", ["x"], ["y"], name="new1")]
+        self.assertIs(onnx_model.find_node_by_name("new1", new_nodes, onnx_model.graph()), new_nodes[0])
+        new_nodes.append(helper.make_node("Relu", ["y"], ["z"], name="new2"))
+        self.assertIs(onnx_model.find_node_by_name("new2", new_nodes, onnx_model.graph()), new_nodes[1])
+        self.assertIsNotNone(onnx_model.find_node_by_name("Conv2", new_nodes, onnx_model.graph()))
+        self.assertIsNone(onnx_model.find_node_by_name("new3", new_nodes, onnx_model.graph()))
+
+    def test_name_indexes_replaced_items(self):
+        input_info = helper.make_tensor_value_info("input", TensorProto.FLOAT, [2, 4])
+        output_info = helper.make_tensor_value_info("output", TensorProto.FLOAT, [2, 3])
+        weight = numpy_helper.from_array(np.arange(12, dtype=np.float32).reshape(3, 4), "B")
+        unused = generate_input_initializer([2], np.float32, "unused")
+        gemm_node = helper.make_node("Gemm", ["input", "B"], ["output"], name="Gemm", transB=1)
+        graph = helper.make_graph(
+            [gemm_node], "name_indexes", [input_info], [output_info], initializer=[unused, weight]
+        )
+        onnx_model = ONNXModel(helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)]))
+        self.assertEqual(list(onnx_model.get_initializer("B").dims), [3, 4])
+        self.assertIsNotNone(onnx_model.get_node("Gemm"))
+
+        # B is removed and its transpose is appended with the same name, the number of initializers is unchanged.
+        onnx_model.replace_gemm_with_matmul()
+        self.assertIs(onnx_model.get_initializer("B"), onnx_model.initializer()[-1])
+        self.assertEqual(list(onnx_model.get_initializer("B").dims), [4, 3])
+        self.assertIsNone(onnx_model.get_node("Gemm"))
+        self.assertIs(onnx_model.get_node("Gemm_MatMul"), onnx_model.nodes()[0])
+
+        # The same replacement made directly in the graph.
+        onnx_model.graph().initializer.remove(onnx_model.get_initializer("B"))
+        onnx_model.graph().initializer.append(numpy_helper.from_array(np.ones((4, 3), dtype=np.float32), "B"))
+        self.assertIs(onnx_model.get_initializer("B"), onnx_model.initializer()[-1])
+        self.assertEqual(numpy_helper.to_array(onnx_model.get_initializer("B")).sum(), 12)
+
+        onnx_model.clean_initializers()
+        self.assertIsNone(onnx_model.get_initializer("unused"))
+        self.assertIs(onnx_model.get_initializer("B"), onnx_model.initializer()[0])
+
 
 if __name__ == "__main__":
     unittest.main()
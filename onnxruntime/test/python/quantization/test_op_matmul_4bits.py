@@ -388,6 +388,90 @@ class TestOpMatMul4Bits(unittest.TestCase):
         data_reader = self.input_feeds(1, {"input": (100, 52)})
         self.quant_test_with_algo("HQQ", model_fp32_path, data_reader, 32, False)
 
+    @unittest.skipIf(
+        find_spec("onnxruntime.training"), "Skip because training package doesn't has quantize_matmul_4bits"
+    )
+    def test_quantize_matmul_int4_num_workers_external_data(self):
+        from onnxruntime.quantization import matmul_4bits_quantizer
+
+        np.random.seed(13)
+        num_layers = 5
+        nodes = []
+        initializers = []
+        for i in range(num_layers):
+            weight = np.random.randn(64, 64).astype(np.float32)
+            initializers.append(onnx.numpy_helper.from_array(weight, name=f"layer{i}.weight"))
+            nodes.append(
+                helper.make_node(
+                    "MatMul", [f"hidden{i - 1}" if i else "input", f"layer{i}.weight"], [f"hidden{i}"], f"MatMul_{i}"
+                )
+            )
+        # the bias is not quantized and stays in external data
+        initializers.append(onnx.numpy_helper.from_array(np.random.randn(64).astype(np.float32), name="bias"))
+        nodes.append(helper.make_node("Add", [f"hidden{num_layers - 1}", "bias"], ["output"], "Add"))
+        graph = helper.make_graph(
+            nodes,
+            "matmul_4bits_layers",
+            [helper.make_tensor_value_info("input", TensorProto.FLOAT, [-1, 64])],
+            [helper.make_tensor_value_info("output", TensorProto.FLOAT, [-1, 64])],
+            initializer=initializers,
+        )
+        model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 21)])
+        model.ir_version = 10
+        model_dir = Path(self._tmp_model_dir.name) / "external_data"
+        model_dir.mkdir(exist_ok=True)
+        model_fp32_path = str(model_dir / "matmul_layers_fp32.onnx")
+        onnx.save(
+            model,
+            model_fp32_path,
+            save_as_external_data=True,
+            location="matmul_layers_fp32.onnx.data",
+            size_threshold=0,
+        )
+
+        quantized_initializers = []
+        for model_or_path, num_workers in [(onnx.load(model_fp32_path), 1), (model_fp32_path, 3)]:
+            quant_config = matmul_4bits_quantizer.DefaultWeightOnlyQuantConfig(block_size=32, is_symmetric=False)
+            quant = matmul_4bits_quantizer.MatMul4BitsQuantizer(
+                model_or_path, algo_config=quant_config, num_workers=num_workers
+            )
+            quant.process()
+            self.assertEqual([node.op_type for node in quant.model.nodes()], ["MatMulNBits"] * num_layers + ["Add"])
+            quantized_initializers.append(
+                {init.name: onnx.numpy_helper.to_array(init) for init in quant.model.initializer()}
+            )
+
+        # The quantized weights are written to the output data file, the other initializers are copied to it.
+        output_path = str(model_dir / "matmul_layers_int4.onnx")
+        quant_config = matmul_4bits_quantizer.DefaultWeightOnlyQuantConfig(block_size=32, is_symmetric=False)
+        quant = matmul_4bits_quantizer.MatMul4BitsQuantizer(model_fp32_path, algo_config=quant_config, num_workers=2)
+        quant.process(output_path)
+        for init in quant.model.initializer():
+            self.assertFalse(init.HasField("raw_data") and len(init.raw_data) >= 1024)
+        output_model = onnx.load(output_path, load_external_data=False)
+        self.assertEqual(
+            {
+                entry.value
+                for init in output_model.graph.initializer
+                for entry in init.external_data
+                if entry.key == "location"
+            },
+            {"matmul_layers_int4.onnx.data"},
+        )
+        onnx.external_data_helper.load_external_data_for_model(output_model, str(model_dir))
+        quantized_initializers.append(
+            {init.name: onnx.numpy_helper.to_array(init) for init in output_model.graph.initializer}
+        )
+        with self.assertRaises(ValueError):
+            matmul_4bits_quantizer.MatMul4BitsQuantizer(model_fp32_path, algo_config=quant_config).process(
+                model_fp32_path
+            )
+
+        for actual in quantized_initializers[1:]:
+            self.assertEqual(set(actual), set(quantized_initializers[0]))
+            for name, expected in quantized_initializers[0].items():
+                np.testing.assert_array_equal(actual[name], expected)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -23,6 +23,7 @@ from onnxruntime.quantization.qdq_loss_debug import (
     QUANT_INPUT_SUFFIX,
     collect_activations,
     compute_activation_error,
+    compute_activation_error_streaming,
     compute_weight_error,
     create_activation_matching,
     create_weight_matching,
@@ -214,6 +215,60 @@ class TestSaveActivations(unittest.TestCase):
                 f"{tensor_name} qdq error {activations_error[tensor_name]['qdq_err']} exceeds threashold.",
             )
 
+    def test_compute_activation_error_streaming(self):
+        float_model_path = str(Path(self._tmp_model_dir.name) / "float_model_streaming.onnx")
+        construct_test_model1(float_model_path, activations_as_outputs=False)
+        data_reader = TestDataReader()
+
+        qdq_model_path = str(Path(self._tmp_model_dir.name) / "qdq_model_streaming.onnx")
+        quantize_static(
+            float_model_path,
+            qdq_model_path,
+            data_reader,
+            quant_format=QuantFormat.QDQ,
+            per_channel=False,
+            reduce_range=False,
+            activation_type=QuantType.QInt8,
+            weight_type=QuantType.QInt8,
+        )
+
+        augmented_float_model_path = str(Path(self._tmp_model_dir.name) / "augmented_float_model_streaming.onnx")
+        augmented_qdq_model_path = str(Path(self._tmp_model_dir.name) / "augmented_qdq_model_streaming.onnx")
+        modify_model_output_intermediate_tensors(float_model_path, augmented_float_model_path)
+        modify_model_output_intermediate_tensors(qdq_model_path, augmented_qdq_model_path)
+
+        data_reader.rewind()
+        float_activations = collect_activations(augmented_float_model_path, data_reader)
+        data_reader.rewind()
+        activations_dir = Path(self._tmp_model_dir.name) / "qdq_activations"
+        qdq_activations = collect_activations(augmented_qdq_model_path, data_reader, activations_dir=activations_dir)
+        for tensors in qdq_activations.values():
+            self.assertEqual(len(tensors), data_reader.count)
+            for tensor in tensors:
+                self.assertIsInstance(tensor, np.memmap)
+        compare_dict = create_activation_matching(qdq_activations, float_activations)
+        expected_error = compute_activation_error(compare_dict)
+
+        data_reader.rewind()
+        activations_error = compute_activation_error_streaming(
+            augmented_qdq_model_path, data_reader, augmented_float_model_path
+        )
+        self.assertEqual(set(activations_error), set(expected_error))
+        for tensor_name, expected in expected_error.items():
+            self.assertAlmostEqual(activations_error[tensor_name]["qdq_err"], expected["qdq_err"], places=3)
+            self.assertAlmostEqual(activations_error[tensor_name]["xmodel_err"], expected["xmodel_err"], places=3)
+            post_qdq = np.concatenate(compare_dict[tensor_name]["post_qdq"])
+            float_diff = np.abs(np.concatenate(compare_dict[tensor_name]["float"]) - post_qdq)
+            self.assertAlmostEqual(activations_error[tensor_name]["xmodel_max_abs_err"], float_diff.max(), places=5)
+            self.assertAlmostEqual(activations_error[tensor_name]["xmodel_mean_abs_err"], float_diff.mean(), places=5)
+
+        # Only the QDQ model.
+        data_reader.rewind()
+        activations_error = compute_activation_error_streaming(augmented_qdq_model_path, data_reader)
+        for tensor_name, expected in expected_error.items():
+            self.assertAlmostEqual(activations_error[tensor_name]["qdq_err"], expected["qdq_err"], places=3)
+            self.assertNotIn("xmodel_err", activations_error[tensor_name])
+
     def test_create_weight_matching(self):
         # Setup: create float model:
         float_model_path = str(Path(self._tmp_model_dir.name) / "float_model3.onnx")
@@ -12,6 +12,7 @@ from pathlib import Path
 import numpy
 import onnx
 from onnx import TensorProto, helper, numpy_helper
+from onnx.reference import ReferenceEvaluator
 
 from onnxruntime.quantization.quant_utils import (
     compute_scale_zp,
@@ -19,6 +20,9 @@ from onnxruntime.quantization.quant_utils import (
     model_has_infer_metadata,
     pack_bytes_to_4bit,
     quantize_data,
+    quantize_data_per_channel,
+    quantize_nparray,
+    unpack_4bit_to_bytes,
 )
 
 
@@ -130,6 +134,59 @@ class TestQuantUtil(unittest.TestCase):
                 expected_packed_vals = onnx.helper.pack_float32_to_4bit(src_float, signed).tobytes()
                 self.assertEqual(actual_packed_vals, expected_packed_vals)
 
+                unpacked_vals = unpack_4bit_to_bytes(actual_packed_vals, len(src_int), signed)
+                self.assertEqual(unpacked_vals.dtype, src_int.dtype)
+                numpy.testing.assert_array_equal(unpacked_vals, src_int)
+
+        self.assertEqual(pack_bytes_to_4bit(b""), bytearray())
+        self.assertEqual(len(unpack_4bit_to_bytes(b"", 0, True)), 0)
+
+    def test_quantize_nparray_float8(self):
+        """
+        Tests that float 8 quantization matches QuantizeLinear of the onnx reference implementation.
+        """
+        rng = numpy.random.default_rng(0)
+        bits = rng.integers(0, 2**32, 20000, dtype=numpy.uint64).astype(numpy.uint32)
+        # Values around the subnormal, normal and largest values of the float 8 types.
+        exponents = numpy.arange(105, 150, dtype=numpy.uint32)[:, numpy.newaxis] << 23
+        bits = numpy.concatenate([bits, (exponents | rng.integers(0, 2**23, (len(exponents), 200))).ravel()])
+        bits = numpy.concatenate([bits, (exponents | numpy.array([0, 0x80000, 0x100000, 0x180000, 0x200000])).ravel()])
+        bits = numpy.concatenate([bits, [0x7F800000, 0x7FC00000, 0x7F800001, 0]]).astype(numpy.uint32)
+        data = numpy.concatenate([bits, bits | 0x80000000]).view(numpy.float32)
+
+        for qtype in [
+            TensorProto.FLOAT8E4M3FN,
+            TensorProto.FLOAT8E4M3FNUZ,
+            TensorProto.FLOAT8E5M2,
+            TensorProto.FLOAT8E5M2FNUZ,
+        ]:
+            for dtype, scale in [(numpy.float32, 1.0), (numpy.float32, 0.375), (numpy.float16, 2.0)]:
+                with self.subTest(qtype=qtype, dtype=dtype, scale=scale):
+                    onnx_type = helper.np_dtype_to_tensor_dtype(numpy.dtype(dtype))
+                    model = helper.make_model(
+                        helper.make_graph(
+                            [
+                                helper.make_node(
+                                    "Constant", [], ["zp"], value=helper.make_tensor("zp", qtype, [], [0])
+                                ),
+                                helper.make_node("QuantizeLinear", ["X", "scale", "zp"], ["Y"]),
+                            ],
+                            "quantize",
+                            [
+                                helper.make_tensor_value_info("X", onnx_type, None),
+                                helper.make_tensor_value_info("scale", onnx_type, None),
+                            ],
+                            [helper.make_tensor_value_info("Y", qtype, None)],
+                        )
+                    )
+                    scale_array = numpy.array(scale, dtype=dtype)
+                    with numpy.errstate(invalid="ignore", over="ignore"):
+                        x = data.astype(dtype)
+                        expected = ReferenceEvaluator(model).run(None, {"X": x, "scale": scale_array})[0]
+                        actual = quantize_nparray(qtype, x, scale_array, 0)
+                    self.assertEqual(actual.dtype, expected.dtype)
+                    self.assertEqual(actual.tobytes(), expected.tobytes())
+
     def test_quantize_data_4bit(self):
         """
         Test that calling quantize_data for int4 quantization returns data of the correct type and range.
@@ -172,6 +229,55 @@ class TestQuantUtil(unittest.TestCase):
 
                     self.assertEqual(numpy.array(actual_quant_val), expected_quant_val)
 
+    def test_quantize_data_per_channel(self):
+        rng = numpy.random.default_rng(0)
+        data = rng.standard_normal((6, 50)).astype(numpy.float32)
+        data[1] = 0  # range smaller than tiny
+        data[2] = numpy.abs(data[2])
+        data[3] = -numpy.abs(data[3]) * 1e-3
+        data[4] *= 1e4
+        for qtype in [
+            TensorProto.UINT8,
+            TensorProto.INT8,
+            TensorProto.UINT16,
+            TensorProto.INT16,
+            TensorProto.UINT4,
+            TensorProto.INT4,
+        ]:
+            for symmetric, reduce_range, min_real_range in [
+                (False, False, None),
+                (True, False, None),
+                (False, True, None),
+                (True, True, None),
+                (False, False, 0.5),
+                (True, False, 0.5),
+            ]:
+                with self.subTest(qtype=qtype, symmetric=symmetric, reduce_range=reduce_range):
+                    zero_points, scales, quantized = quantize_data_per_channel(
+                        data, 0, qtype, symmetric, reduce_range, min_real_range
+                    )
+                    for i, row in enumerate(data):
+                        _, _, zero_point, scale, expected = quantize_data(
+                            row, qtype, symmetric, reduce_range, min_real_range
+                        )
+                        self.assertEqual(zero_points[i].dtype, zero_point.dtype)
+                        self.assertEqual(zero_points[i].tobytes(), zero_point.tobytes())
+                        self.assertEqual(scales[i].dtype, scale.dtype)
+                        self.assertEqual(scales[i].tobytes(), scale.tobytes())
+                        self.assertEqual(quantized[i].dtype, expected.dtype)
+                        self.assertEqual(quantized[i].tobytes(), expected.tobytes())
+
+        # Overridden ranges
+        rmin = numpy.array([-1, 0, -2, 0, -3, -4], dtype=numpy.float32)
+        rmax = numpy.array([1, 2, 0, 0, 3, 4], dtype=numpy.float32)
+        _, scales, quantized = quantize_data_per_channel(data.T, 1, TensorProto.UINT8, False, rmin=rmin, rmax=rmax)
+        for i, row in enumerate(data):
+            _, _, _, scale, expected = quantize_data(
+                row, TensorProto.UINT8, False, rmin_override=rmin[i], rmax_override=rmax[i]
+            )
+            self.assertEqual(scales[i], scale)
+            self.assertEqual(quantized[:, i].tobytes(), expected.tobytes())
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -9,12 +9,14 @@ import os
 import struct
 import tempfile
 import unittest
+from unittest import mock
 
 import numpy as np
 import onnx
 
 from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_static
 from onnxruntime.quantization.execution_providers.qnn import get_qnn_qdq_config
+from onnxruntime.quantization.qdq_quantizer import QDQQuantizer
 from onnxruntime.quantization.quant_utils import compute_scale_zp, get_qmin_qmax_for_qType, ms_domain
 
 
@@ -430,6 +432,62 @@ class TestTensorQuantOverridesOption(unittest.TestCase):
                     self.assertEqual(zp, expected_zp)
                     self.assertEqual(scale, np.float32(expected_scale))
 
+    def test_per_channel_weight_quantization_matches_one_by_one(self):
+        """
+        Test that per-channel weights quantized all at once match weights quantized channel by channel.
+        """
+        rng = np.random.default_rng(0)
+        weight = rng.standard_normal((32, 3, 2, 2)).astype(np.float32)
+        weight[1] = 0
+        graph = onnx.helper.make_graph(
+            [onnx.helper.make_node("Conv", ["INP", "WGT"], ["OUT"])],
+            "conv",
+            [onnx.helper.make_tensor_value_info("INP", onnx.TensorProto.FLOAT, [1, 3, 8, 8])],
+            [onnx.helper.make_tensor_value_info("OUT", onnx.TensorProto.FLOAT, None)],
+            initializer=[onnx.numpy_helper.from_array(weight, "WGT")],
+        )
+        model = onnx.helper.make_model(graph, opset_imports=[onnx.helper.make_opsetid("", 21)])
+
+        def quantize_weight(weight_type, axis, extra_options, one_by_one):
+            quantizer = QDQQuantizer(
+                onnx.ModelProto.FromString(model.SerializeToString()),
+                True,
+                False,
+                weight_type,
+                QuantType.QUInt8,
+                None,
+                [],
+                [],
+                ["Conv"],
+                extra_options=extra_options,
+            )
+            with mock.patch.object(
+                quantizer,
+                "_quantize_weight_channels",
+                quantizer._quantize_weight_channels_one_by_one if one_by_one else quantizer._quantize_weight_channels,
+            ):
+                quantizer.quantize_weight_per_channel_impl("WGT", quantizer.weight_qType, axis)
+            return [initializer.SerializeToString() for initializer in quantizer.model.initializer()[1:]]
+
+        per_channel_ranges = [{"axis": 0, "rmin": -float(i) / 8, "rmax": float(i) / 4} for i in range(32)]
+        per_channel_params = [
+            {"axis": 0, "scale": np.array(0.1 * i + 0.01, np.float32), "zero_point": np.array(i - 5, np.int8)}
+            for i in range(32)
+        ]
+        for weight_type, axis, extra_options in [
+            (QuantType.QInt8, 0, {}),
+            (QuantType.QUInt8, 0, {"MinimumRealRange": 0.01}),
+            (QuantType.QUInt16, 0, {"WeightSymmetric": True}),
+            (QuantType.QInt4, 0, {}),
+            (QuantType.QInt8, 0, {"TensorQuantOverrides": {"WGT": per_channel_ranges}}),
+            (QuantType.QInt8, 0, {"TensorQuantOverrides": {"WGT": per_channel_params}}),
+        ]:
+            with self.subTest(weight_type=weight_type, axis=axis, extra_options=list(extra_options)):
+                self.assertEqual(
+                    quantize_weight(weight_type, axis, extra_options, one_by_one=False),
+                    quantize_weight(weight_type, axis, extra_options, one_by_one=True),
+                )
+
     def test_16bit_overrides_set_ms_domain(self):
         """
         Test that overriding a tensor to 16bit (when default is 8bit) automatically
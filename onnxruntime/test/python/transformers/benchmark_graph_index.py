@@ -0,0 +1,164 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+# --------------------------------------------------------------------------
+
+"""
+Benchmark the graph optimization of a BERT-like model with and without the graph index of OnnxModel
+(FusionOptions.enable_graph_index, --enable_graph_index of the optimizer).
+
+The model has a stack of layers made of MatMul, Add, Gelu (erf formula) and LayerNormalization subgraphs, so that
+the fusions remove and add many nodes. The optimized models are compared to check that the index does not change
+the result.
+
+Example:
+    python benchmark_graph_index.py --num_layers 200 --repeat 3
+"""
+
+import argparse
+import time
+
+import numpy as np
+from onnx import ModelProto, TensorProto, helper, numpy_helper
+from parity_utilities import find_transformers_source
+
+if find_transformers_source():
+    from fusion_options import FusionOptions
+    from onnx_model import OnnxModel
+    from optimizer import optimize_by_fusion
+else:
+    from onnxruntime.transformers.fusion_options import FusionOptions
+    from onnxruntime.transformers.onnx_model import OnnxModel
+    from onnxruntime.transformers.optimizer import optimize_by_fusion
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Benchmark graph optimization with and without the graph index")
+    parser.add_argument("--num_layers", type=int, default=200, help="number of layers of the model")
+    parser.add_argument("--hidden_size", type=int, default=8, help="hidden size of the model")
+    parser.add_argument("--repeat", type=int, default=3, help="number of measurements")
+    parser.add_argument("--number", type=int, default=1000, help="number of calls per measurement of the lookups")
+    return parser.parse_args()
+
+
+def create_model(num_layers: int, hidden_size: int):
+    nodes = []
+    initializers = []
+
+    def add_constant(name, value):
+        initializers.append(numpy_helper.from_array(np.array(value, dtype=np.float32), name))
+        return name
+
+    add_constant("sqrt2", np.sqrt(2.0))
+    add_constant("one", 1.0)
+    add_constant("half", 0.5)
+    add_constant("two", 2.0)
+    add_constant("epsilon", 1e-12)
+
+    hidden = "input"
+    for i in range(num_layers):
+        weight = add_constant(f"weight_{i}", np.random.rand(hidden_size, hidden_size))
+        bias = add_constant(f"bias_{i}", np.random.rand(hidden_size))
+        gamma = add_constant(f"gamma_{i}", np.ones(hidden_size))
+        beta = add_constant(f"beta_{i}", np.zeros(hidden_size))
+
+        def name(suffix, i=i):
+            return f"layer_{i}_{suffix}"
+
+        nodes.extend(
+            [
+                helper.make_node("MatMul", [hidden, weight], [name("matmul")], name("MatMul")),
+                helper.make_node("Add", [name("matmul"), bias], [name("bias")], name("AddBias")),
+                # Gelu: x * 0.5 * (1 + erf(x / sqrt(2)))
+                helper.make_node("Div", [name("bias"), "sqrt2"], [name("div")], name("Div")),
+                helper.make_node("Erf", [name("div")], [name("erf")], name("Erf")),
+                helper.make_node("Add", [name("erf"), "one"], [name("erf_plus_one")], name("AddOne")),
+                helper.make_node("Mul", [name("bias"), name("erf_plus_one")], [name("mul")], name("Mul")),
+                helper.make_node("Mul", [name("mul"), "half"], [name("gelu")], name("MulHalf")),
+                helper.make_node("Add", [name("gelu"), hidden], [name("skip")], name("AddSkip")),
+                # LayerNormalization
+                helper.make_node("ReduceMean", [name("skip")], [name("mean")], name("ReduceMean"), axes=[-1]),
+                helper.make_node("Sub", [name("skip"), name("mean")], [name("sub")], name("Sub")),
+                helper.make_node("Pow", [name("sub"), "two"], [name("pow")], name("Pow")),
+                helper.make_node("ReduceMean", [name("pow")], [name("var")], name("ReduceMeanVar"), axes=[-1]),
+                helper.make_node("Add", [name("var"), "epsilon"], [name("var_eps")], name("AddEps")),
+                helper.make_node("Sqrt", [name("var_eps")], [name("std")], name("Sqrt")),
+                helper.make_node("Div", [name("sub"), name("std")], [name("norm")], name("DivStd")),
+                helper.make_node("Mul", [name("norm"), gamma], [name("scaled")], name("MulGamma")),
+                helper.make_node("Add", [name("scaled"), beta], [name("output")], name("AddBeta")),
+            ]
+        )
+        hidden = name("output")
+
+    nodes.append(helper.make_node("Identity", [hidden], ["output"], "output"))
+    graph = helper.make_graph(
+        nodes,
+        "graph_index_benchmark",
+        [helper.make_tensor_value_info("input", TensorProto.FLOAT, ["batch", "sequence", hidden_size])],
+        [helper.make_tensor_value_info("output", TensorProto.FLOAT, ["batch", "sequence", hidden_size])],
+        initializer=initializers,
+    )
+    return helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+
+
+def optimize(model, enable_graph_index: bool):
+    optimization_options = FusionOptions("bert")
+    optimization_options.enable_graph_index = enable_graph_index
+    model_copy = ModelProto()
+    model_copy.CopyFrom(model)  # the optimizer changes the model in place
+    start = time.perf_counter()
+    optimizer = optimize_by_fusion(
+        model_copy, model_type="bert", num_heads=0, hidden_size=0, optimization_options=optimization_options
+    )
+    return time.perf_counter() - start, optimizer.model
+
+
+def measure_lookups(model, enable_graph_index: bool, number: int):
+    onnx_model = OnnxModel(model)
+    if enable_graph_index:
+        onnx_model.enable_graph_index()
+    lookups = {
+        "get_nodes_by_op_type": lambda: onnx_model.get_nodes_by_op_type("Erf"),
+        "input_name_to_nodes": onnx_model.input_name_to_nodes,
+        "output_name_to_node": onnx_model.output_name_to_node,
+    }
+    results = {}
+    for name, lookup in lookups.items():
+        lookup()  # warm up
+        start = time.perf_counter()
+        for _ in range(number):
+            lookup()
+        results[name] = (time.perf_counter() - start) / number
+    return results
+
+
+def main():
+    args = parse_arguments()
+    model = create_model(args.num_layers, args.hidden_size)
+    print(f"{len(model.graph.node)} nodes")
+
+    lookup_times = {flag: measure_lookups(model, flag, args.number) for flag in [False, True]}
+    for name, seconds in lookup_times[False].items():
+        indexed_seconds = lookup_times[True][name]
+        print(
+            f"{name:<24} {seconds * 1e3:8.3f} ms, with index {indexed_seconds * 1e3:8.3f} ms "
+            f"({seconds / indexed_seconds:.1f}x)"
+        )
+
+    # Optimize with and without the index in turn in each repeat, so that they see similar system noise.
+    best = {False: float("inf"), True: float("inf")}
+    optimized = {}
+    for _ in range(args.repeat):
+        for enable_graph_index in best:
+            seconds, optimized[enable_graph_index] = optimize(model, enable_graph_index)
+            best[enable_graph_index] = min(best[enable_graph_index], seconds)
+
+    assert optimized[False].SerializeToString() == optimized[True].SerializeToString(), "optimized models differ"
+    print(
+        f"{'optimize_by_fusion':<24} {best[False]:8.3f} s, with index {best[True]:8.3f} s ({best[False] / best[True]:.1f}x)"
+    )
+    print("fused operators:", OnnxModel(optimized[True]).get_operator_statistics())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation.  All rights reserved.
+# Licensed under the MIT License.  See License.txt in the project root for
+# license information.
+# --------------------------------------------------------------------------
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import onnx
+from onnx import TensorProto, helper, numpy_helper
+from parity_utilities import find_transformers_source
+
+if find_transformers_source():
+    import float16
+    from fusion_gelu_approximation import FusionGeluApproximation
+    from fusion_quickgelu import FusionQuickGelu
+    from onnx_model import OnnxModel
+    from onnx_model_phi import Phi2PreProcessor
+else:
+    from onnxruntime.transformers import float16
+    from onnxruntime.transformers.fusion_gelu_approximation import FusionGeluApproximation
+    from onnxruntime.transformers.fusion_quickgelu import FusionQuickGelu
+    from onnxruntime.transformers.onnx_model import OnnxModel
+    from onnxruntime.transformers.onnx_model_phi import Phi2PreProcessor
+
+
+def float_tensor(name: str, values):
+    return numpy_helper.from_array(np.array(values, dtype=np.float32), name)
+
+
+class TestOnnxModel(unittest.TestCase):
+    def create_model_with_duplicated_initializers(self):
+        #  x -- Add(w0) -- Add(w1) -- Mul(w2) -- If(cond) -- y
+        # w1 has the same value as w0, w2 has the same shape but a different value.
+        # The then branch uses w1 from the outer scope, the else branch has two identical initializers.
+        then_branch = helper.make_graph(
+            [helper.make_node("Add", ["c", "w1"], ["then_out"], "then_add")],
+            "then_branch",
+            [],
+            [helper.make_tensor_value_info("then_out", TensorProto.FLOAT, [2])],
+        )
+        else_branch = helper.make_graph(
+            [
+                helper.make_node("Add", ["c", "e0"], ["e_tmp"], "else_add_0"),
+                helper.make_node("Add", ["e_tmp", "e1"], ["else_out"], "else_add_1"),
+            ],
+            "else_branch",
+            [],
+            [helper.make_tensor_value_info("else_out", TensorProto.FLOAT, [2])],
+            initializer=[float_tensor("e0", [3, 4]), float_tensor("e1", [3, 4])],
+        )
+        nodes = [
+            helper.make_node("Add", ["x", "w0"], ["a"], "add_0"),
+            helper.make_node("Add", ["a", "w1"], ["b"], "add_1"),
+            helper.make_node("Mul", ["b", "w2"], ["c"], "mul"),
+            helper.make_node("If", ["cond"], ["y"], "if", then_branch=then_branch, else_branch=else_branch),
+        ]
+        graph = helper.make_graph(
+            nodes,
+            "graph",
+            [
+                helper.make_tensor_value_info("x", TensorProto.FLOAT, [2]),
+                helper.make_tensor_value_info("cond", TensorProto.BOOL, []),
+            ],
+            [helper.make_tensor_value_info("y", TensorProto.FLOAT, [2])],
+            initializer=[float_tensor("w0", [1, 2]), float_tensor("w1", [1, 2]), float_tensor("w2", [2, 1])],
+        )
+        return OnnxModel(helper.make_model(graph))
+
+    def test_remove_duplicated_initializer(self):
+        model = self.create_model_with_duplicated_initializers()
+        cache = {}
+        model.remove_duplicated_initializer(cache)
+
+        self.assertEqual([i.name for i in model.model.graph.initializer], ["w0", "w2"])
+        self.assertEqual(set(cache), {"w0", "w1", "w2"})
+        nodes = {node.name: node for node in model.nodes()}
+        self.assertEqual(list(nodes["add_1"].input), ["a", "w0"])
+        self.assertEqual(list(nodes["then_add"].input), ["c", "w0"])
+        self.assertEqual(list(nodes["else_add_1"].input), ["e_tmp", "e0"])
+        else_branch = next(attr.g for attr in nodes["if"].attribute if attr.name == "else_branch")
+        self.assertEqual([i.name for i in else_branch.initializer], ["e0"])
+
+    def test_find_duplicated_initializers(self):
+        initializers = [
+            float_tensor("a", [1, 2]),
+            float_tensor("b", [[1, 2]]),  # same data but different shape
+            numpy_helper.from_array(np.array([1, 2], dtype=np.int32), "c"),  # different type
+            float_tensor("d", [1, 2]),
+            float_tensor("e", [np.nan, 2]),  # NaN is never equal to itself
+            float_tensor("f", [np.nan, 2]),
+            float_tensor("g", [[1, 2]]),
+        ]
+        self.assertEqual(OnnxModel.find_duplicated_initializers(initializers), {"d": "a", "g": "b"})
+
+    def test_external_data_not_loaded(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            input_path = os.path.join(temp_dir, "input", "model.onnx")
+            model = self.create_model_with_duplicated_initializers()
+            OnnxModel.save(model.model, input_path, save_as_external_data=True, size_threshold=0)
+
+            model = OnnxModel(onnx.load_model(input_path, load_external_data=False))
+            model.external_data_dir = os.path.dirname(input_path)
+            is_loaded = {i.name: i.HasField("raw_data") for i in model.model.graph.initializer}
+            self.assertEqual(is_loaded, {"w0": False, "w1": False, "w2": False})
+
+            np.testing.assert_array_equal(model.get_constant_value("w2"), [2, 1])
+            model.remove_duplicated_initializer()
+            self.assertEqual([i.name for i in model.model.graph.initializer], ["w0", "w2"])
+            self.assertFalse(any(i.HasField("raw_data") for i in model.model.graph.initializer))
+
+            # External data is copied to the saved model, and the model reads it from there after saving.
+            output_path = os.path.join(temp_dir, "output", "model.onnx")
+            model.save_model_to_file(output_path, use_external_data_format=True)
+            self.assertEqual(model.external_data_dir, os.path.dirname(output_path))
+            with self.assertRaises(ValueError):
+                model.save_model_to_file(output_path, use_external_data_format=True)
+
+            saved = onnx.load_model(output_path)
+            values = {i.name: numpy_helper.to_array(i).tolist() for i in saved.graph.initializer}
+            self.assertEqual(values, {"w0": [1, 2], "w2": [2, 1]})
+
+            # float16 data is written to a temporary file instead of being loaded.
+            model.convert_float_to_float16(keep_io_types=True, use_symbolic_shape_infer=False)
+            for initializer in model.model.graph.initializer:
+                self.assertEqual(initializer.data_type, TensorProto.FLOAT16)
+                self.assertFalse(initializer.HasField("raw_data"))
+            np.testing.assert_array_equal(model.get_constant_value("w2"), [2, 1])
+            model.save_model_to_file(os.path.join(temp_dir, "fp16.onnx"))
+            saved = onnx.load_model(os.path.join(temp_dir, "fp16.onnx"))
+            values = {i.name: numpy_helper.to_array(i) for i in saved.graph.initializer}
+            self.assertEqual(values["w0"].dtype, np.float16)
+            np.testing.assert_array_equal(values["w2"], [2, 1])
+
+    def test_float16_conversion_in_chunks(self):
+        values = np.random.default_rng(0).standard_normal(1000).astype(np.float32) * 1e5
+        values[:3] = [1e-9, -1e-9, 0]
+        graph = helper.make_graph(
+            [helper.make_node("MatMul", ["x", "w"], ["y"], "matmul")],
+            "graph",
+            [helper.make_tensor_value_info("x", TensorProto.FLOAT, [1, 1000])],
+            [helper.make_tensor_value_info("y", TensorProto.FLOAT, [1, 1])],
+            initializer=[float_tensor("w", values.reshape(1000, 1))],
+        )
+        model = helper.make_model(graph)
+        expected = float16.convert_np_to_float16(values).reshape(1000, 1)
+
+        with tempfile.TemporaryDirectory() as temp_dir, mock.patch.object(float16, "CONVERSION_CHUNK_SIZE", 64):
+            cache = float16.Float16ConversionCache(os.path.join(temp_dir, "cache"))
+            for _ in range(2):
+                fp16_model = float16.convert_float_to_float16(model, num_workers=4, conversion_cache=cache)
+                np.testing.assert_array_equal(numpy_helper.to_array(fp16_model.graph.initializer[0]), expected)
+            self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+            # converting again replaces the data file instead of appending to it
+            for _ in range(2):
+                fp16_model = float16.convert_float_to_float16(
+                    model, external_data_dir=temp_dir, external_data_location="fp16.data", num_workers=2
+                )
+                initializer = fp16_model.graph.initializer[0]
+                self.assertEqual(initializer.data_location, TensorProto.EXTERNAL)
+                np.testing.assert_array_equal(numpy_helper.to_array(initializer, temp_dir), expected)
+                self.assertEqual(os.path.getsize(os.path.join(temp_dir, "fp16.data")), expected.nbytes)
+            self.assertEqual(sorted(os.listdir(temp_dir)), ["cache", "fp16.data"])
+
+    def test_float16_conversion_does_not_overwrite_external_data(self):
+        graph = helper.make_graph(
+            [helper.make_node("MatMul", ["x", "w"], ["y"], "matmul")],
+            "graph",
+            [helper.make_tensor_value_info("x", TensorProto.FLOAT, [1, 4])],
+            [helper.make_tensor_value_info("y", TensorProto.FLOAT, [1, 1])],
+            initializer=[float_tensor("w", [[1], [2], [3], [4]])],
+        )
+        with tempfile.TemporaryDirectory() as temp_dir:
+            onnx.save_model(
+                helper.make_model(graph),
+                os.path.join(temp_dir, "model.onnx"),
+                save_as_external_data=True,
+                location="model.data",
+                size_threshold=0,
+            )
+            model = onnx.load_model(os.path.join(temp_dir, "model.onnx"), load_external_data=False)
+            with self.assertRaises(ValueError):
+                float16.convert_float_to_float16(
+                    model, external_data_dir=temp_dir, external_data_location="model.data", disable_shape_infer=True
+                )
+            self.assertEqual(os.path.getsize(os.path.join(temp_dir, "model.data")), 16)
+
+    def test_float16_conversion_cache_eviction(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = float16.Float16ConversionCache(temp_dir, max_size=3000)
+
+            def add(key, size):
+                data_path = os.path.join(temp_dir, key + ".data")
+                with open(data_path, "wb") as data_file:
+                    data_file.write(bytes(size))
+                cache.add(key, data_path)
+
+            add("a", 1000)
+            add("b", 1000)
+            add("c", 1000)
+            self.assertIsNotNone(cache.get("a"))  # "b" is now the least recently used
+            add("d", 1000)
+            self.assertEqual(sorted(os.listdir(temp_dir)), ["a.fp16", "c.fp16", "d.fp16"])
+
+            # a new cache on the same directory orders the files by modification time
+            for i, key in enumerate(["c", "a", "d"]):
+                os.utime(cache.get_path(key), ns=(i, i))
+            cache = float16.Float16ConversionCache(temp_dir, max_size=3000)
+            add("e", 1500)
+            self.assertEqual(sorted(os.listdir(temp_dir)), ["d.fp16", "e.fp16"])
+            self.assertIsNone(cache.get("c"))
+
+    def test_replace_inputs_of_graph_nodes_respects_shadowing(self):
+        body = helper.make_graph(
+            [helper.make_node("Identity", ["w1"], ["out"], "body_identity")],
+            "body",
+            [],
+            [helper.make_tensor_value_info("out", TensorProto.FLOAT, [2])],
+            initializer=[float_tensor("w1", [5, 6])],  # hides w1 of the outer graph
+        )
+        graph = helper.make_graph(
+            [helper.make_node("If", ["cond"], ["y"], "if", then_branch=body, else_branch=body)],
+            "graph",
+            [helper.make_tensor_value_info("cond", TensorProto.BOOL, [])],
+            [helper.make_tensor_value_info("y", TensorProto.FLOAT, [2])],
+        )
+        OnnxModel.replace_inputs_of_graph_nodes(graph, {"w1": "w0"})
+        self.assertEqual(list(graph.node[0].attribute[0].g.node[0].input), ["w1"])
+
+    def assert_same_lookups(self, indexed_model: OnnxModel, model: OnnxModel):
+        def names(nodes):
+            return [node.name for node in nodes]
+
+        def names_of_map(name_to_nodes):
+            return {name: names(nodes) for name, nodes in name_to_nodes.items()}
+
+        self.assertEqual(names_of_map(indexed_model.input_name_to_nodes()), names_of_map(model.input_name_to_nodes()))
+        self.assertEqual(
+            {name: node.name for name, node in indexed_model.output_name_to_node().items()},
+            {name: node.name for name, node in model.output_name_to_node().items()},
+        )
+        for op_type in ["Add", "Mul", "Relu", "If"]:
+            self.assertEqual(
+                names(indexed_model.get_nodes_by_op_type(op_type)), names(model.get_nodes_by_op_type(op_type))
+            )
+        for node in indexed_model.nodes():
+            self.assertIs(indexed_model.get_graph_by_node(node), model.get_graph_by_node(node))
+
+    def test_graph_index(self):
+        model = self.create_model_with_duplicated_initializers()
+        model.enable_graph_index()
+        # Lookups without the index on the same model.
+        reference = OnnxModel(model.model)
+        self.assert_same_lookups(model, reference)
+
+        graph_index = model.graph_index()
+        self.assertFalse(graph_index.dirty)
+        input_name_to_nodes = model.input_name_to_nodes()
+        self.assertIs(input_name_to_nodes, model.input_name_to_nodes())
+        consumers_of_a = input_name_to_nodes["a"]
+        names_of_consumers_of_a = [node.name for node in consumers_of_a]
+
+        # Nodes added or removed through OnnxModel are indexed without rebuilding the index.
+        nodes = {node.name: node for node in model.nodes()}
+        model.remove_nodes([nodes["add_1"], nodes["else_add_0"]])
+        model.add_node(helper.make_node("Relu", ["a"], ["b"], "relu"))
+        self.assertFalse(graph_index.dirty)
+        self.assert_same_lookups(model, reference)
+        # Inserted before other nodes of a subgraph.
+        model.add_node(helper.make_node("Relu", ["c"], ["e_tmp"], "else_relu"), "else_branch")
+        self.assertTrue(graph_index.dirty)
+        self.assertEqual([node.name for node in model.model.graph.node], ["add_0", "mul", "if", "relu"])
+        self.assert_same_lookups(model, reference)
+
+        # Consumer lists returned before are not changed by adding or removing nodes.
+        self.assertEqual([node.name for node in consumers_of_a], names_of_consumers_of_a)
+        self.assertIsNot(model.input_name_to_nodes()["a"], consumers_of_a)
+
+        # Nodes changed in place, or added to the graph directly.
+        nodes["mul"].input[1] = "w0"
+        nodes["mul"].op_type = "Add"
+        model.model.graph.node.extend([helper.make_node("Relu", ["b"], ["d"], "relu_2")])
+        model.mark_graph_index_dirty()
+        self.assert_same_lookups(model, reference)
+
+        model.replace_input_of_all_nodes("b", "a")
+        self.assertTrue(graph_index.dirty)
+        self.assert_same_lookups(model, reference)
+
+        model.topological_sort()
+        self.assert_same_lookups(model, reference)
+        model.remove_node(model.get_nodes_by_op_type("Relu")[0])
+        self.assert_same_lookups(model, reference)
+
+    def test_graph_index_phi_preprocessor(self):
+        model = self.create_model_with_duplicated_initializers()
+        model.enable_graph_index()
+        layer_op_type = "modeling_phi_PhiDecoderLayer_model_layers_0"
+        nodes = {node.name: node for node in model.nodes()}
+        nodes["mul"].op_type = "phi_" + layer_op_type
+        model.mark_graph_index_dirty()
+        self.assertEqual(len(model.get_nodes_by_op_type("phi_" + layer_op_type)), 1)
+
+        # The preprocessor changes the nodes of the ModelProto in place.
+        preprocessor = Phi2PreProcessor(model.model, 2, 4, model)
+        preprocessor.simplify_phi2_op_type()
+        self.assertEqual([node.name for node in model.get_nodes_by_op_type(layer_op_type)], ["mul"])
+        self.assertEqual(model.get_nodes_by_op_type("phi_" + layer_op_type), [])
+
+        preprocessor.update_edges({"b": "b_renamed"})
+        self.assertEqual(model.get_children(nodes["add_1"])[0].name, "mul")
+        self.assertEqual(model.output_name_to_node()["b_renamed"].name, "add_1")
+        self.assertNotIn("b", model.input_name_to_nodes())
+
+    def test_fusion_pass_statistics(self):
+        for enable_graph_index in [False, True]:
+            with self.subTest(enable_graph_index=enable_graph_index):
+                graph = helper.make_graph(
+                    [
+                        helper.make_node("Gelu", ["x"], ["gelu_0"], "gelu_0", domain="com.microsoft"),
+                        helper.make_node("Gelu", ["gelu_0"], ["y"], "gelu_1", domain="com.microsoft"),
+                    ],
+                    "gelu",
+                    [helper.make_tensor_value_info("x", TensorProto.FLOAT, [2])],
+                    [helper.make_tensor_value_info("y", TensorProto.FLOAT, [2])],
+                )
+                model = OnnxModel(helper.make_model(graph))
+                if enable_graph_index:
+                    model.enable_graph_index()
+
+                self.assertEqual(
+                    {op_type: len(nodes) for op_type, nodes in model.get_nodes_by_op_types(["Gelu", "Mul"]).items()},
+                    {"Gelu": 2, "Mul": 0},
+                )
+
+                FusionGeluApproximation(model).apply()
+                # There is no Mul node, so the QuickGelu pass is skipped.
+                FusionQuickGelu(model).apply()
+                self.assertEqual([node.op_type for node in model.nodes()], ["FastGelu", "FastGelu"])
+
+                statistics = model.get_fusion_pass_statistics()
+                self.assertEqual(
+                    [(stat["fusion"], stat["fused"], stat["skipped"]) for stat in statistics],
+                    [("FastGelu(GeluApproximation)", 2, False), ("QuickGelu", 0, True)],
+                )
+                self.assertTrue(all(stat["seconds"] >= 0 for stat in statistics))
+
+
+if __name__ == "__main__":
+    unittest.main()
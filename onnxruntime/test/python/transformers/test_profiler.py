@@ -7,7 +7,9 @@
 
 # For live logging, use the command: pytest -o log_cli=true --log-cli-level=DEBUG
 
+import json
 import os
+import tempfile
 import unittest
 
 import pytest
@@ -39,6 +41,44 @@ class TestBertProfiler(unittest.TestCase):
         self.run_profile(f"--model {input_model_path} --batch_size 1 --sequence_length 7 --dummy_inputs default")
 
 
+class TestProfileJson(unittest.TestCase):
+    records = [  # noqa: RUF012
+        {"cat": "Session", "name": "model_run", "dur": 10, "args": {}},
+        {"cat": "Node", "name": "MatMul_kernel_time", "dur": 7, "args": {"op_name": "MatMul", "shape": [[1, 2], []]}},
+        {"cat": "Kernel", "name": "kernel, with [brackets] and {braces}", "dur": 1234567, "args": {"grid_x": 8}},
+    ]
+
+    def iter_profile_json(self, text, chunk_size):
+        from onnxruntime.transformers.profiler import iter_profile_json
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            profile_file = os.path.join(temp_dir, "profile.json")
+            with open(profile_file, "w", encoding="utf-8") as opened_file:
+                opened_file.write(text)
+            return list(iter_profile_json(profile_file, chunk_size=chunk_size))
+
+    def test_records_across_chunk_boundaries(self):
+        texts = [
+            json.dumps(self.records),
+            "[\n" + ",\n".join(json.dumps(record) for record in self.records) + "\n]\n",
+            json.dumps({"otherData": {"version": 1}, "traceEvents": self.records, "displayTimeUnit": "ns"}, indent=2),
+        ]
+        for text in texts:
+            # every chunk size up to the length of the text, so that each record is split at every position
+            for chunk_size in range(1, len(text) + 1):
+                with self.subTest(text=text[:20], chunk_size=chunk_size):
+                    self.assertEqual(self.iter_profile_json(text, chunk_size), self.records)
+
+    def test_unclosed_profile(self):
+        # profile output of a process that was killed is not closed
+        text = "[\n" + ",\n".join(json.dumps(record) for record in self.records) + ",\n"
+        for chunk_size in [1, 16, 1 << 20]:
+            self.assertEqual(self.iter_profile_json(text, chunk_size), self.records)
+
+        with self.assertRaises(json.JSONDecodeError):
+            self.iter_profile_json(text + '{"cat": "Node", "na', 16)
+
+
 if __name__ == "__main__":
     import sys
 
@@ -4,10 +4,15 @@
 # license information.
 # --------------------------------------------------------------------------
 
+import functools
 import os
+import tempfile
 import unittest
+from unittest import mock
 
+import numpy as np
 import onnx
+from onnx import TensorProto, helper, numpy_helper
 from parity_utilities import find_transformers_source
 from whisper_model_generator import (
     create_whisper_decoder_attention,
@@ -18,10 +23,14 @@ from whisper_model_generator import (
 )
 
 if find_transformers_source():
+    import optimizer
+    from external_data import load_small_external_data
     from fusion_options import FusionOptions
     from onnx_model import OnnxModel
     from optimizer import optimize_model
 else:
+    from onnxruntime.transformers import optimizer
+    from onnxruntime.transformers.external_data import load_small_external_data
     from onnxruntime.transformers.fusion_options import FusionOptions
     from onnxruntime.transformers.onnx_model import OnnxModel
     from onnxruntime.transformers.optimizer import optimize_model
@@ -67,6 +76,79 @@ class TestFusion(unittest.TestCase):
         os.remove(model_path)
         self.verify_fusion(optimized_model, "encoder_attention_with_sln_fused.onnx")
 
+    def optimize_with_memory_mapped_external_data(self, model, model_path, num_heads, hidden_size):
+        OnnxModel.save(model, model_path, save_as_external_data=True, size_threshold=0)
+        # No tensor is loaded, so that fusions read the initializers from memory maps.
+        with mock.patch.object(
+            optimizer, "load_small_external_data", functools.partial(load_small_external_data, size_threshold=0)
+        ):
+            optimized_model = optimize_model(
+                model_path,
+                model_type="bart",
+                num_heads=num_heads,
+                hidden_size=hidden_size,
+                optimization_options=FusionOptions("bart"),
+                opt_level=0,
+                load_external_data=False,
+            )
+        self.assertTrue(any(not i.HasField("raw_data") for i in optimized_model.model.graph.initializer))
+        return optimized_model
+
+    def test_encoder_attention_fusion_with_memory_mapped_external_data(self):
+        num_heads = 4
+        hidden_size = 64
+        model = create_whisper_encoder_attention(
+            num_heads=num_heads, hidden_size=hidden_size, add_before_layernorm=False
+        )
+        with tempfile.TemporaryDirectory() as temp_dir:
+            model_path = os.path.join(temp_dir, "input", "whisper_encoder_attention_sln.onnx")
+            optimized_model = self.optimize_with_memory_mapped_external_data(model, model_path, num_heads, hidden_size)
+            output_path = os.path.join(temp_dir, "output", "whisper_encoder_attention_sln.onnx")
+            optimized_model.save_model_to_file(output_path, use_external_data_format=True)
+            self.verify_fusion(OnnxModel(onnx.load(output_path)), "encoder_attention_with_sln_fused.onnx")
+
+    def test_bart_reshape_fusion_with_memory_mapped_external_data(self):
+        #  x -- MatMul -- Add -- Reshape -- y
+        #  |                       |
+        #  Shape -- Gather(0) -- Unsqueeze -- Concat(-1, num_heads, head_size)
+        num_heads = 4
+        hidden_size = 64
+        head_size = hidden_size // num_heads
+        nodes = [
+            helper.make_node("MatMul", ["x", "weight"], ["matmul_out"], "matmul"),
+            helper.make_node("Add", ["bias", "matmul_out"], ["add_out"], "add"),
+            helper.make_node("Shape", ["x"], ["shape_out"], "shape"),
+            helper.make_node("Gather", ["shape_out", "index_0"], ["gather_out"], "gather", axis=0),
+            helper.make_node("Unsqueeze", ["gather_out", "axes_0"], ["unsqueeze_out"], "unsqueeze"),
+            helper.make_node(
+                "Concat", ["unsqueeze_out", "minus_one", "num_heads", "head_size"], ["concat_out"], "concat", axis=0
+            ),
+            helper.make_node("Reshape", ["add_out", "concat_out"], ["y"], "reshape"),
+        ]
+        initializers = [
+            numpy_helper.from_array(np.ones((hidden_size, hidden_size), dtype=np.float32), "weight"),
+            numpy_helper.from_array(np.zeros(hidden_size, dtype=np.float32), "bias"),
+            numpy_helper.from_array(np.array(0, dtype=np.int64), "index_0"),
+            numpy_helper.from_array(np.array([0], dtype=np.int64), "axes_0"),
+            numpy_helper.from_array(np.array([-1], dtype=np.int64), "minus_one"),
+            numpy_helper.from_array(np.array([num_heads], dtype=np.int64), "num_heads"),
+            numpy_helper.from_array(np.array([head_size], dtype=np.int64), "head_size"),
+        ]
+        graph = helper.make_graph(
+            nodes,
+            "bart_reshape",
+            [helper.make_tensor_value_info("x", TensorProto.FLOAT, ["batch_size", "sequence_length", hidden_size])],
+            [helper.make_tensor_value_info("y", TensorProto.FLOAT, ["batch_size", None, num_heads, head_size])],
+            initializer=initializers,
+        )
+        model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+        with tempfile.TemporaryDirectory() as temp_dir:
+            optimized_model = self.optimize_with_memory_mapped_external_data(
+                model, os.path.join(temp_dir, "bart_reshape.onnx"), num_heads, hidden_size
+            )
+            reshape_node = optimized_model.get_nodes_by_op_type("Reshape")[0]
+            self.assertEqual(optimized_model.get_constant_value(reshape_node.input[1]).tolist(), [0, -1, 4, 16])
+
     # Attention type #2 in fusion_bart_attention.py
     def test_decoder_attention_fusion_with_skiplayernorm(self):
         num_heads = 4
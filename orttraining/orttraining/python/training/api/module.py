@@ -6,6 +6,7 @@ from __future__ import annotations
 import os
 
 import numpy as np
+import onnx
 
 from onnxruntime.capi import _pybind_state as C
 from onnxruntime.capi.onnxruntime_inference_collection import OrtValue, get_ort_device_type
@@ -34,6 +35,14 @@ class Module:
         eval_model_uri: The path to the evaluation model.
         device: The device to run the model on. Default is "cpu".
         session_options: The session options to use for the model.
+        reuse_fetches: If True, steps taking numpy inputs reuse the output buffers of the previous step in the
+                       same mode as long as the input shapes do not change. Only use it for models whose output
+                       shapes are determined by the input shapes: a step fails when an output has a data dependent
+                       shape (for example NonZero, or TopK with a computed k) that differs from the previous step.
+        output_views: If True, the outputs of steps taking numpy inputs are returned as numpy views on the
+                      output buffers instead of copies (only for device "cpu"). With reuse_fetches, the buffers
+                      are overwritten by the next step with the same input shapes, so the views must be copied
+                      if they need to outlive the next step.
     """
 
     training: bool
@@ -45,6 +54,8 @@ class Module:
         eval_model_uri: os.PathLike | None = None,
         device: str = "cpu",
         session_options: SessionOptions | None = None,
+        reuse_fetches: bool = False,
+        output_views: bool = False,
     ) -> None:
         self.training = True
         options = device.split(":")
@@ -65,6 +76,13 @@ class Module:
             self._session_options,
         )
         self._state = state
+        self._reuse_fetches = reuse_fetches
+        self._output_views = output_views
+
+        # With reuse_fetches, fetches of the last step taking numpy inputs, for the training and the evaluation mode,
+        # along with the input shapes of that step. They are fed back as pre-allocated outputs to the next step with
+        # the same input shapes, which saves allocating new output buffers on every step.
+        self._fetches: dict[bool, tuple[tuple, OrtValueVector]] = {}
 
     def __call__(self, *user_inputs) -> tuple[np.ndarray, ...] | np.ndarray | tuple[OrtValue, ...] | OrtValue:
         """Invokes either the training or the evaluation step of the model.
@@ -80,16 +98,22 @@ class Module:
             return any(isinstance(user_input, np.ndarray) for user_input in user_inputs)
 
         def _take_generic_step(forward_inputs):
-            fetches = OrtValueVector()
-            if self.training:
-                self._model.train_step(forward_inputs, fetches)
-            else:
-                self._model.eval_step(forward_inputs, fetches)
+            # Numeric numpy inputs are bound to the OrtValue feeds without a copy.
+            fetches = self._get_reusable_fetches(forward_inputs)
+            try:
+                if self.training:
+                    self._model.train_step(forward_inputs, fetches)
+                else:
+                    self._model.eval_step(forward_inputs, fetches)
+            except Exception:
+                # The fetches may be left in an inconsistent state, do not reuse them.
+                self._fetches.pop(self.training, None)
+                raise
 
             if len(fetches) == 1:
-                return fetches[0].numpy()
+                return self._fetch_to_numpy(fetches, 0)
 
-            return tuple(val.numpy() for val in fetches)
+            return tuple(self._fetch_to_numpy(fetches, idx) for idx in range(len(fetches)))
 
         def _take_step_with_ortvalues(forward_inputs):
             ort_values = OrtValueVector()
@@ -114,6 +138,37 @@ class Module:
 
         return _take_step_with_ortvalues(user_inputs)
 
+    def _get_reusable_fetches(self, forward_inputs) -> OrtValueVector:
+        """Returns the fetches of the previous step in the current mode if reused and the input shapes are the same."""
+        if not self._reuse_fetches:
+            return OrtValueVector()
+
+        if not all(isinstance(user_input, np.ndarray) for user_input in forward_inputs):
+            # The output shapes cannot be predicted from inputs of other types.
+            return OrtValueVector()
+
+        input_shapes = tuple(user_input.shape for user_input in forward_inputs)
+        previous = self._fetches.get(self.training)
+        if previous is not None and previous[0] == input_shapes:
+            return previous[1]
+
+        fetches = OrtValueVector()
+        self._fetches[self.training] = (input_shapes, fetches)
+        return fetches
+
+    def _fetch_to_numpy(self, fetches: OrtValueVector, idx: int) -> np.ndarray:
+        """Converts the fetch at the given index to numpy, as a view on the output buffer if requested."""
+        element_type = fetches.element_type_at(idx)
+        if not self._output_views or self._device_type != "cpu" or element_type == onnx.TensorProto.STRING:
+            return fetches[idx].numpy()
+
+        # The dlpack capsule keeps the output buffer alive as long as the view exists.
+        view = np.from_dlpack(fetches[idx])
+        if element_type == onnx.TensorProto.BOOL:
+            # Boolean tensors are exported through dlpack as uint8.
+            view = view.view(np.bool_)
+        return view
+
     def train(self, mode: bool = True) -> Module:
         """Sets the Module in training mode.
 
@@ -0,0 +1,123 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+# --------------------------------------------------------------------------
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import tempfile
+from hashlib import sha256
+
+import onnx
+import torch
+
+import onnxruntime
+from onnxruntime.capi import _pybind_state as C
+
+from ._utils import get_rank
+
+# Bump this when the layout of the cached files or the meaning of the cached information changes.
+_GRAPH_CACHE_VERSION = 1
+
+_GRAPH_INFO_FIELDS = (
+    "user_input_names",
+    "user_input_grad_names",
+    "initializer_names",
+    "initializer_names_to_train",
+    "initializer_grad_names_to_train",
+    "user_output_names",
+    "output_grad_indices_non_differentiable",
+    "output_grad_indices_require_full_shape",
+    "module_output_indices_requires_save_for_backward",
+    "frontier_node_arg_map",
+    "cached_node_arg_names",
+    "module_output_gradient_name",
+)
+
+
+def graph_info_to_dict(graph_info: C.GraphInfo) -> dict:
+    """Converts a GraphInfo returned by the graph builder into a JSON serializable dict."""
+    return {field: getattr(graph_info, field) for field in _GRAPH_INFO_FIELDS}
+
+
+def graph_info_from_dict(info: dict) -> C.GraphInfo:
+    """Restores a GraphInfo from the dict created by `graph_info_to_dict`."""
+    graph_info = C.GraphInfo()
+    for field in _GRAPH_INFO_FIELDS:
+        setattr(graph_info, field, info[field])
+    return graph_info
+
+
+class GraphCache:
+    """Persistent cache of ORTModule graphs processed after the PyTorch export.
+
+    The raw exported model is cached by GraphTransitionManager._get_exported_model. This cache keeps the outputs of
+    the later, more expensive stages (post-export processing and gradient graph building/optimization) so that a
+    restarted job with the same module, inputs and options can skip them.
+
+    Each entry is stored as `<stage>_<key>.onnx` plus a `<stage>_<key>.json` sidecar holding the non-graph
+    information needed to restore the stage. Both files are written atomically, so concurrent ranks or an
+    interrupted job never leave a partially written entry behind.
+    """
+
+    def __init__(self, cache_dir: str, logger: logging.Logger):
+        self._cache_dir = os.path.join(cache_dir, "processed")
+        self._logger = logger
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        """Computes the cache key for the given parts.
+
+        The parts must have a deterministic `repr`. The ORT and PyTorch versions and the process rank are always
+        part of the key.
+        """
+        key = repr((_GRAPH_CACHE_VERSION, onnxruntime.__version__, torch.__version__, get_rank(), *parts))
+        return sha256(key.encode()).hexdigest()
+
+    def _paths(self, stage: str, key: str) -> tuple[str, str]:
+        prefix = os.path.join(self._cache_dir, f"{stage}_{key}")
+        return f"{prefix}.onnx", f"{prefix}.json"
+
+    def load(self, stage: str, key: str) -> tuple[onnx.ModelProto, dict] | None:
+        """Returns the cached (model, info) for the given stage and key, or None if not cached."""
+        model_path, info_path = self._paths(stage, key)
+        if not (os.path.isfile(model_path) and os.path.isfile(info_path)):
+            return None
+
+        try:
+            with open(info_path, encoding="utf-8") as f:
+                info = json.load(f)
+            model = onnx.load(model_path)
+        except Exception as e:
+            self._logger.warning(f"Ignoring corrupted ORTModule graph cache entry {model_path}: {e}")
+            return None
+
+        self._logger.warning(
+            f"Cached {stage} graph detected! Cached graph will be used to save initialization time. "
+            f"If you want the graph to be re-built then DELETE {model_path}."
+        )
+        return model, info
+
+    def save(self, stage: str, key: str, model: onnx.ModelProto, info: dict):
+        """Saves the (model, info) for the given stage and key."""
+        os.makedirs(self._cache_dir, exist_ok=True)
+        model_path, info_path = self._paths(stage, key)
+        self._logger.info(f"Caching {stage} graph for future runs to {model_path}.")
+
+        # The model is written first, and the info last: an entry is only visible to `load` once both exist.
+        self._atomic_write(model_path, model.SerializeToString(), "wb")
+        self._atomic_write(info_path, json.dumps(info), "w")
+
+    def _atomic_write(self, path: str, data, mode: str):
+        fd, tmp_path = tempfile.mkstemp(dir=self._cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, mode) as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
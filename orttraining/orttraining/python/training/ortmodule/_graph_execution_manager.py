@@ -20,11 +20,13 @@ from onnxruntime.training.utils import PTable, onnx_dtype_to_pytorch_dtype
 from . import _are_deterministic_algorithms_enabled, _logger, _onnx_models, _utils
 from ._fallback import ORTModuleTorchModelException, _FallbackManager, _FallbackPolicy, wrap_exception
 from ._gradient_accumulation_manager import GradientAccumulationManager
+from ._graph_cache import GraphCache, graph_info_from_dict, graph_info_to_dict
 from ._graph_execution_interface import GraphExecutionInterface
 from ._graph_transition_manager import GraphTransitionManager, PostExportProcessedModelInfo
 from ._io import _FlattenedModule
 from ._runtime_inspector import RuntimeInspector
 from ._utils import get_rank
+from .graph_optimizer_registry import GraphOptimizerRegistry
 from .options import DebugOptions, LogLevel, _MemoryOptimizationLevel, _RuntimeOptions
 from .torch_cpp_extensions.cpu.aten_op_executor import load_aten_op_executor_cpp_extension
 
@@ -80,6 +82,9 @@ class GraphExecutionManager(GraphExecutionInterface):
         self._graph_builder = None
         self._graph_info = None
 
+        # Graph cache key of the optimized model, None if it is not cacheable.
+        self._graph_cache_key: Optional[str] = None
+
         # TrainingAgent or InferenceAgent
         self._execution_agent = None
 
@@ -183,6 +188,72 @@ class GraphExecutionManager(GraphExecutionInterface):
 
         self._graph_info = self._graph_builder.get_graph_info()
 
+    def _get_graph_cache_key(self) -> Optional[str]:
+        """Returns the graph cache key of the optimized model, or None if it should not be cached.
+
+        The key extends the one of the post-export processed model with everything else the graph builder and the
+        registered graph optimizers depend on.
+        """
+        post_export_cache_key = self._graph_transition_manager._post_export_processed_model_cache_key
+        if post_export_cache_key is None or self._debug_options.save_onnx_models.save:
+            # Intermediate models can only be saved for debugging when they are actually built.
+            return None
+
+        registered_graph_optimizers = {
+            module_name: [(f"{fn.__module__}.{fn.__qualname__}", devices, priority) for fn, devices, priority in funcs]
+            for module_name, funcs in sorted(GraphOptimizerRegistry._OPTIMIZER_FUNCS.items())
+        }
+        return GraphCache.make_key(
+            post_export_cache_key,
+            type(self._flattened_module._original_module).__name__,
+            self._device.type,
+            self.is_rocm_pytorch,
+            registered_graph_optimizers,
+            self._runtime_options.enable_zero_stage3_support,
+            self._runtime_options.enable_grad_acc_optimization,
+            self._runtime_options.use_memory_efficient_gradient,
+            self._runtime_options.propagate_cast_ops_level,
+            self._runtime_options.propagate_cast_ops_allow,
+            self._runtime_options.propagate_cast_ops_strategy,
+            self._runtime_options.enable_compute_optimizer,
+            self._runtime_options.print_input_density,
+            (
+                self._graph_transition_manager._model_info_for_export.onnx_graph_input_shapes
+                if self._runtime_options.use_static_shape
+                else None
+            ),
+        )
+
+    def _load_graph_from_cache(self) -> bool:
+        """Restores the optimized model and the graph info from the graph cache.
+
+        Return True on a cache hit, the graph builder then does not need to be initialized and built.
+        """
+        self._graph_cache_key = self._get_graph_cache_key()
+        if self._graph_cache_key is None:
+            return False
+
+        cached_entry = self._graph_transition_manager._graph_cache.load("optimized", self._graph_cache_key)
+        if cached_entry is None:
+            return False
+
+        self._onnx_models.optimized_model, graph_info = cached_entry
+        self._graph_info = graph_info_from_dict(graph_info)
+        self._graph_builder = None
+        return True
+
+    def _save_graph_to_cache(self):
+        """Saves the optimized model and the graph info to the graph cache, if they are cacheable."""
+        if self._graph_cache_key is None:
+            return
+
+        self._graph_transition_manager._graph_cache.save(
+            "optimized",
+            self._graph_cache_key,
+            self._onnx_models.optimized_model,
+            graph_info_to_dict(self._graph_info),
+        )
+
     def _get_session_config(self):
         """Creates and returns the session configuration to be used for the ExecutionAgent"""
 
@@ -29,6 +29,7 @@ from onnxruntime.training.utils import (
 
 from . import _io, _utils, export_context
 from ._fallback import ORTModuleDeviceException, ORTModuleIOError, ORTModuleONNXModelException, wrap_exception
+from ._graph_cache import GraphCache
 from ._logger import LogColor, LogLevel, ORTModuleInitPhase, SuppressLogs, TimeTracker, TrackTimeForStaticFunction
 from ._onnx_models import _get_onnx_file_name, _save_model
 from ._runtime_inspector import FlagAndPrintDensity, RuntimeInspector
@@ -310,6 +311,17 @@ class GraphTransitionManager:
         # Model info after export and post export processing.
         self._post_export_processed_model_info = None
 
+        # Persistent cache for the processed graphs, only enabled together with the exported model cache.
+        self._graph_cache: GraphCache | None = (
+            GraphCache(self._runtime_options.ortmodule_cache_dir, self._logger)
+            if self._runtime_options.ortmodule_cache_dir
+            else None
+        )
+
+        # Graph cache key of the current post-export processed model, None if it is not cacheable.
+        # Execution managers extend it to key the graphs they build from the post-export processed model.
+        self._post_export_processed_model_cache_key: str | None = None
+
     def get_post_processed_model(
         self, args: Sequence[ORTModelInputOutputType], kwargs: Mapping[str, ORTModelInputOutputType]
     ) -> tuple[bool, PostExportProcessedModelInfo]:
@@ -494,6 +506,8 @@ class GraphTransitionManager:
 
         if need_re_processed:
             # At this point, the exported model is ready, and we can start post-export processing.
+            cache_key = self._get_post_export_process_cache_key()
+            cached_entry = self._graph_cache.load("post_processed", cache_key) if cache_key else None
             self._post_export_processed_model_info = GraphTransitionManager._post_export_process(
                 flatten_module=self._flatten_module,
                 export_mode=self._export_mode,
@@ -506,8 +520,18 @@ class GraphTransitionManager:
                 enable_mem_efficient_grad_management=self._export_mode != torch.onnx.TrainingMode.EVAL
                 and self._runtime_options.enable_mem_efficient_grad_management,
                 logger=self._logger,
+                cached_post_processed_model=cached_entry[0] if cached_entry else None,
             )
 
+            if cache_key and not cached_entry:
+                self._graph_cache.save(
+                    "post_processed",
+                    cache_key,
+                    self._post_export_processed_model_info._post_export_processed_model,
+                    {},
+                )
+            self._post_export_processed_model_cache_key = cache_key
+
             # Save the post_processed model
             if self._debug_options.save_onnx_models.save:
                 _save_model(
@@ -522,6 +546,36 @@ class GraphTransitionManager:
 
         return need_re_processed, self._post_export_processed_model_info
 
+    def _get_post_export_process_cache_key(self) -> str | None:
+        """Returns the graph cache key of the post-export processed model, or None if it should not be cached.
+
+        The key covers the exported graph itself (which captures the module structure and the input schema), the
+        inputs requiring gradient and the options affecting post-export processing.
+        Zero stage3 and memory efficient gradient management bind the processed graph to live parameter handles,
+        so the model is always re-processed for them.
+        """
+        if self._graph_cache is None:
+            return None
+
+        if self._runtime_options.enable_zero_stage3_support or (
+            self._export_mode != torch.onnx.TrainingMode.EVAL
+            and self._runtime_options.enable_mem_efficient_grad_management
+        ):
+            return None
+
+        return GraphCache.make_key(
+            hash_fn(self._exported_model_info.exported_model.SerializeToString()).hexdigest(),
+            str(self._flatten_module),
+            self._export_mode,
+            self._exported_model_info.module_forward_args_schema,
+            self._exported_model_info.module_forward_kwargs_schema,
+            self._exported_model_info.onnx_graph_input_names,
+            self._exported_model_info.onnx_graph_input_names_require_grad,
+            self._runtime_options.enable_custom_autograd_function,
+            self._runtime_options.run_symbolic_shape_infer,
+            self._runtime_options.onnx_opset_version,
+        )
+
     @staticmethod
     def _export_check(
         prev_exported_model_info: ExportedModelInfo | None,
@@ -612,21 +666,29 @@ class GraphTransitionManager:
         stage3_param_handle: type,
         enable_mem_efficient_grad_management: bool,
         logger: logging.Logger,
+        cached_post_processed_model: onnx.ModelProto | None = None,
     ):
-        """Post process the exported model, generate the processed model which will be used for initializing graph builder."""
+        """Post process the exported model, generate the processed model which will be used for initializing graph builder.
+
+        If `cached_post_processed_model` is given, it is used as the processed model, it must have been produced by
+        this function for the same exported model and options.
+        """
 
-        # Deepcopy the exported model, in case modification affects the exported model.
-        post_processed_model = copy.deepcopy(exported_model_info.exported_model)
+        if cached_post_processed_model is not None:
+            post_processed_model = cached_post_processed_model
+        else:
+            # Deepcopy the exported model, in case modification affects the exported model.
+            post_processed_model = copy.deepcopy(exported_model_info.exported_model)
 
-        if enable_custom_autograd_function:
-            from ._custom_autograd_function_exporter import post_process_enabling_autograd_function
+            if enable_custom_autograd_function:
+                from ._custom_autograd_function_exporter import post_process_enabling_autograd_function
 
-            post_processed_model = post_process_enabling_autograd_function(post_processed_model)
+                post_processed_model = post_process_enabling_autograd_function(post_processed_model)
 
-        if run_symbolic_shape_infer:
-            # MUST call symbolic shape inference after custom autograd function post-processing is done,
-            # Otherwise, there is no ctx output for PythonOp.
-            post_processed_model = GraphTransitionManager._infer_shapes(post_processed_model)
+            if run_symbolic_shape_infer:
+                # MUST call symbolic shape inference after custom autograd function post-processing is done,
+                # Otherwise, there is no ctx output for PythonOp.
+                post_processed_model = GraphTransitionManager._infer_shapes(post_processed_model)
 
         if export_mode == torch.onnx.TrainingMode.TRAINING:
             if enable_zero_stage3_support:
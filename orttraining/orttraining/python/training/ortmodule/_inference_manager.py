@@ -118,17 +118,22 @@ class InferenceManager(GraphExecutionManager):
                     build_graph,
                     post_export_processed_model_info,
                 ) = self._graph_transition_manager.get_post_processed_model(inputs, kwargs)
+                graph_loaded_from_cache = False
                 if build_graph:
-                    # TODO(): do we need call it for inferencing mode???
-                    self._initialize_graph_builder(post_export_processed_model_info)
+                    graph_loaded_from_cache = self._load_graph_from_cache()
+                    if not graph_loaded_from_cache:
+                        # TODO(): do we need call it for inferencing mode???
+                        self._initialize_graph_builder(post_export_processed_model_info)
 
                 # Build the inference graph
                 if build_graph:
                     self._detect_from_inputs(inputs, kwargs)
 
-                    graph_transformer_config = self._get_graph_transformer_config()
-                    # Build the graph
-                    self._build_graph(graph_transformer_config)
+                    if not graph_loaded_from_cache:
+                        graph_transformer_config = self._get_graph_transformer_config()
+                        # Build the graph
+                        self._build_graph(graph_transformer_config)
+                        self._save_graph_to_cache()
 
             # If creating the execution agent for the first time, this skip check will not take effect.
             # It will only take effect on subsequent forward calls.
@@ -256,16 +256,23 @@ class TrainingManager(GraphExecutionManager):
                     post_export_processed_model_info,
                 ) = self._graph_transition_manager.get_post_processed_model(inputs, kwargs)
 
+                graph_loaded_from_cache = False
                 if build_gradient_graph:
-                    self._initialize_graph_builder(post_export_processed_model_info)
+                    graph_loaded_from_cache = self._load_graph_from_cache()
+                    if not graph_loaded_from_cache:
+                        self._initialize_graph_builder(post_export_processed_model_info)
 
                 # Build the gradient graph
                 if build_gradient_graph:
                     self._detect_from_inputs(inputs, kwargs)
 
-                    graph_transformer_config = self._get_graph_transformer_config()
-                    # Build the gradient graph
-                    self._build_graph(graph_transformer_config)
+                    if graph_loaded_from_cache:
+                        self._build_gradient_map()
+                    else:
+                        graph_transformer_config = self._get_graph_transformer_config()
+                        # Build the gradient graph
+                        self._build_graph(graph_transformer_config)
+                        self._save_graph_to_cache()
 
             # If creating the execution agent for the first time, this skip check will not take effect.
             # It will only take effect on subsequent forward calls.
@@ -356,7 +363,11 @@ class TrainingManager(GraphExecutionManager):
                 self._export_mode,
             )
 
-        # Map each input/initializer to its gradient index in the graph output, or -1 is gradient is not required.
+        self._build_gradient_map()
+
+    def _build_gradient_map(self):
+        """Map each input/initializer to its gradient index in the graph output, or -1 is gradient is not required."""
+
         self._gradient_map = []
 
         index_for_input_requires_grad = 0
@@ -3,6 +3,7 @@
 # Licensed under the MIT License.
 # --------------------------------------------------------------------------
 
+import atexit
 import os
 import shutil
 import warnings
@@ -10,6 +11,7 @@ from io import TextIOWrapper
 from pathlib import Path
 from typing import List, Optional, Tuple, Union
 
+import numpy as np
 import onnx
 import torch
 
@@ -51,11 +53,12 @@ class _InspectActivation(torch.autograd.Function):
         if module_idx is not None:
             depth = run_ctx.global_states.module_index_to_depth[module_idx]
 
-        input_tensor_copied = None
+        # The subscriber only reads the activation before returning, so there is no need to clone it.
+        input_tensor_detached = None
         if input_tensor is None or not isinstance(input_tensor, torch.Tensor):
-            input_tensor_copied = input_tensor
+            input_tensor_detached = input_tensor
         else:
-            input_tensor_copied = input_tensor.detach().clone()
+            input_tensor_detached = input_tensor.detach()
 
         ctx.current_step = run_ctx.global_states.execution_step
         ctx.name = activation_name
@@ -63,7 +66,7 @@ class _InspectActivation(torch.autograd.Function):
         ctx.depth = depth
         ctx.module_pre_backward = module_pre_backward
 
-        module_post_forward(input_tensor_copied, depth, activation_name, ctx.current_step)
+        module_post_forward(input_tensor_detached, depth, activation_name, ctx.current_step)
 
         return input_tensor.detach() if input_tensor is not None else None
 
@@ -73,7 +76,7 @@ class _InspectActivation(torch.autograd.Function):
         if grad_output is None or not isinstance(grad_output, torch.Tensor):
             val = grad_output
         else:
-            val = grad_output.detach().clone()
+            val = grad_output.detach()
 
         ctx.module_pre_backward(val, ctx.depth, ctx.name, ctx.current_step)
 
@@ -119,6 +122,13 @@ class StatisticsSubscriber(SubscriberBase):
     > To be extended...
 
     `merge_activation_summary.py` can be used to merge the files into one file per training step.
+
+    With `summary_format="binary"`, the subscriber runs in a low-overhead mode suitable for long training runs:
+    > The statistics of each activation are reduced on the tensor's device, without copying the tensor and without
+      synchronizing with the host.
+    > The results are buffered per step, then written into a single `step_<n>.npz` record when the step completes,
+      see `_write_binary_summary` for the layout. Sampled elements are not collected in this mode.
+    Call `flush()` after the last step to write its record (this is also done at interpreter exit).
     """
 
     def __init__(
@@ -129,6 +139,7 @@ class StatisticsSubscriber(SubscriberBase):
         override_output_dir: bool = False,
         run_on_cpu: bool = False,
         bucket_size: int = 1024 * 1024 * 1024 // 2,
+        summary_format: str = "text",
     ):
         """
         Steps in [start_step, end_step) will run subscriber actions.
@@ -141,11 +152,23 @@ class StatisticsSubscriber(SubscriberBase):
             run_on_cpu: whether to run the subscriber actions on CPU, this should be the last resort when inserted
                 inspector node affects memory peak causing the original recipe run to fail with OOM.
             bucket_size: the size of the bucket to split the statistic calculation.
+            summary_format: "text" to write one human-readable file per activation, "binary" to write one compact
+                record per step.
         """
         super().__init__(start_step=start_step, end_step=end_step)
+        if summary_format not in ("text", "binary"):
+            raise ValueError(f"summary_format must be 'text' or 'binary', got '{summary_format}'.")
+
         self._output_dir = output_dir
         self._run_on_cpu = run_on_cpu
         self._bucket_size = bucket_size
+        self._summary_format = summary_format
+
+        # Statistics of the step being recorded in binary format, written out once the next step starts.
+        self._pending_step: Optional[int] = None
+        self._pending_records: List[Tuple[str, bool, int, str, str, torch.Tensor]] = []
+        if self._summary_format == "binary":
+            atexit.register(self.flush)
         if os.path.exists(self._output_dir):
             if override_output_dir:
                 warnings.warn(f"Output directory {self._output_dir} already exists, overriding it.")
@@ -166,13 +189,49 @@ class StatisticsSubscriber(SubscriberBase):
         )
 
     def module_post_forward_impl(self, activation: torch.Tensor, depth: int, name: str, step: int):
+        if self._summary_format == "binary":
+            return self._record_activation_statistics(activation, depth, name, step, True)
         output_file_path = os.path.join(f"{self._output_dir}", f"step_{step}")
         return self._summarize_activations(activation, depth, name, output_file_path, True)
 
     def module_pre_backward_impl(self, activation: torch.Tensor, depth: int, name: str, step: int):
+        if self._summary_format == "binary":
+            return self._record_activation_statistics(activation, depth, name, step, False)
         output_file_path = os.path.join(f"{self._output_dir}", f"step_{step}")
         return self._summarize_activations(activation, depth, name, output_file_path, False)
 
+    def flush(self):
+        """Writes the buffered statistics of the current step, only needed for `summary_format="binary"`."""
+        if not self._pending_records:
+            return
+
+        _write_binary_summary(os.path.join(self._output_dir, f"step_{self._pending_step}.npz"), self._pending_records)
+        self._pending_records = []
+
+    def _record_activation_statistics(self, tensor: torch.Tensor, depth: int, name: str, step: int, is_forward: bool):
+        # Skip dump during model pre-export output schema preparison run and export run.
+        if ORT_NO_INCREASE_GLOBAL_STEP[0] is True or tensor is None or not isinstance(tensor, torch.Tensor):
+            return
+
+        # All activations of a step (including the gradients) are seen before the next step starts.
+        if step != self._pending_step:
+            self.flush()
+            self._pending_step = step
+
+        if self._run_on_cpu:
+            tensor = tensor.to("cpu")
+
+        self._pending_records.append(
+            (
+                name,
+                is_forward,
+                depth,
+                str(tensor.dtype),
+                str(list(tensor.shape)),
+                _compute_tensor_statistics(tensor),
+            )
+        )
+
     def _summarize_activations(self, tensor: torch.Tensor, depth: int, name: str, step_folder: str, is_forward: bool):
         display_name = name + " forward run" if is_forward is True else name + " backward run"
         output_file_name = name + "_forward" if is_forward is True else name + "_backward"
@@ -196,6 +255,83 @@ class StatisticsSubscriber(SubscriberBase):
                 _summarize_tensor(display_name, tensor, f, depth, self._run_on_cpu, self._bucket_size)
 
 
+# Order of the statistics computed by `_compute_tensor_statistics`.
+_STATISTIC_NAMES = ("size", "nan", "inf", "neg", "pos", "zero", "min", "max", "mean", "std")
+
+
+def _compute_tensor_statistics(tensor: torch.Tensor) -> torch.Tensor:
+    """Computes the statistics listed in `_STATISTIC_NAMES` as a float64 tensor on the device of `tensor`.
+
+    The tensor is not copied (except for non-float tensors, which are converted to float64) and no host
+    synchronization happens, the reductions are queued on the tensor's device.
+    """
+    # The reductions run on the tensor as is, flattening would copy non-contiguous tensors.
+    values = tensor if tensor.is_floating_point() else tensor.to(torch.float64)
+
+    element_count = values.numel()
+    if element_count == 0:
+        return torch.tensor(
+            [0, 0, 0, 0, 0, 0, float("nan"), float("nan"), float("nan"), float("nan")],
+            dtype=torch.float64,
+            device=values.device,
+        )
+
+    num_nan = torch.isnan(values).sum()
+    num_inf = torch.isinf(values).sum()
+    num_neg = (values < 0).sum()
+    num_pos = (values > 0).sum()
+    # NaN is neither negative, positive nor zero.
+    num_zero = element_count - num_nan - num_neg - num_pos
+    min_value, max_value = torch.aminmax(values)
+    # Accumulate in float64 to keep the single pass sum of squares accurate.
+    sum_value = torch.sum(values, dtype=torch.float64)
+    sum_of_squares = torch.linalg.vector_norm(values, dtype=torch.float64) ** 2
+    mean_value = sum_value / element_count
+    std_value = torch.sqrt(torch.clamp((sum_of_squares - sum_value * mean_value) / (element_count - 1), min=0))
+
+    return torch.stack(
+        [
+            torch.tensor(element_count, dtype=torch.float64, device=values.device),
+            num_nan.to(torch.float64),
+            num_inf.to(torch.float64),
+            num_neg.to(torch.float64),
+            num_pos.to(torch.float64),
+            num_zero.to(torch.float64),
+            min_value.to(torch.float64),
+            max_value.to(torch.float64),
+            mean_value,
+            std_value,
+        ]
+    )
+
+
+def _write_binary_summary(file_path: str, records: List[Tuple[str, bool, int, str, str, torch.Tensor]]):
+    """Writes the statistics records of one step into a npz file.
+
+    The file holds one row per record, in the order they were recorded:
+    > names, is_forward, depths, dtypes, shapes: the activation name, whether it is the forward activation (or its
+      gradient), the module depth, the tensor data type and shape.
+    > statistics: a float64 array of shape [len(records), len(statistic_names)].
+    """
+    names, is_forward, depths, dtypes, shapes, statistics = zip(*records)
+
+    # Gather the statistics on one device so they are copied to the host in one go.
+    device = statistics[0].device
+    statistics = torch.stack([s.to(device, non_blocking=True) for s in statistics]).cpu().numpy()
+
+    Path(file_path).parent.mkdir(parents=True, exist_ok=True)
+    np.savez(
+        file_path,
+        names=np.array(names),
+        is_forward=np.array(is_forward, dtype=bool),
+        depths=np.array(depths, dtype=np.int32),
+        dtypes=np.array(dtypes),
+        shapes=np.array(shapes),
+        statistic_names=np.array(_STATISTIC_NAMES),
+        statistics=statistics,
+    )
+
+
 def _summarize_tensor(
     display_name: str,
     tensor: torch.Tensor,
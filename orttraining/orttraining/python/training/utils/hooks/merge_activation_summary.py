@@ -14,6 +14,9 @@ Since ORT and PyTorch run the compute in different orders (e.g. different typolo
 implementations), when we generate a per-step summary, we want the summary to be comparable between
 ORT and PyTorch run. So during the merge, the same typological order is used.
 
+Results written with `StatisticsSubscriber(..., summary_format="binary")` (one `step_<n>.npz` per step) are read
+directly, and merged into the same per-step summary files. The two formats can be mixed between the runs.
+
 Example:
     python merge_activation_summary.py --pt_dir pt_out --ort_dir ort_out --output_dir /tmp/output
 
@@ -25,9 +28,51 @@ import os
 import shutil
 from pathlib import Path
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
 
+def _load_binary_summary(step_file_path: Path) -> dict:
+    """Loads a per-step record written by StatisticsSubscriber in binary format.
+
+    Returns a dict mapping the activation summary name (as used in text format, e.g. `Linear_1_0th_output_forward`)
+    to its formatted summary, in recorded order.
+    """
+    summaries = {}
+    with np.load(step_file_path) as record:
+        statistic_names = [str(n) for n in record["statistic_names"]]
+        for name, is_forward, depth, dtype, shape, statistics in zip(
+            record["names"],
+            record["is_forward"],
+            record["depths"],
+            record["dtypes"],
+            record["shapes"],
+            record["statistics"],
+        ):
+            stats = dict(zip(statistic_names, statistics.tolist()))
+            display_name = f"{name} forward run" if is_forward else f"{name} backward run"
+            summary_name = f"{name}_forward" if is_forward else f"{name}_backward"
+            summaries[summary_name] = (
+                f"{'>' * max(0, int(depth)) + display_name} shape: {shape} dtype: {dtype} size: {int(stats['size'])} \n"
+                f"min: {stats['min']} max: {stats['max']}, mean: {stats['mean']}, std: {stats['std']} \n"
+                f"nan: {int(stats['nan'])}, inf: {int(stats['inf'])}\n"
+                f"neg: {int(stats['neg'])}, pos: {int(stats['pos'])}, zero: {int(stats['zero'])},\n"
+                f"{'=' * 16}\n"
+            )
+    return summaries
+
+
+def _load_topo_order(dump_path: Path) -> list:
+    """Returns the activation summary names of the first step, in the order they were recorded."""
+    binary_step_path = dump_path / "step_0.npz"
+    if binary_step_path.exists():
+        return list(_load_binary_summary(binary_step_path).keys())
+
+    with (dump_path / "step_0" / "order.txt").open(mode="r", encoding="utf-8") as order_file:
+        return [line.rstrip("\n") for line in order_file.readlines()]
+
+
 def generate_summaries_per_step(args):
     pt_dir = args.pt_dir
     ort_dir = args.ort_dir
@@ -35,9 +80,9 @@ def generate_summaries_per_step(args):
 
     output_path.mkdir(parents=True, exist_ok=False)
 
-    # We should use the order.txt generated by PyTorch run, which means, we follow the PyTorch typological order to compare
-    # activation results. Here we assume to get the order.txt from pt_dir/step_0/order.txt
-    topo_order_file_path = Path(f"{pt_dir}/step_0/order.txt")
+    # We should use the order generated by PyTorch run, which means, we follow the PyTorch typological order to compare
+    # activation results. Here we assume to get the order from pt_dir/step_0/order.txt (or pt_dir/step_0.npz)
+    tensor_name_in_order = _load_topo_order(Path(pt_dir))
 
     src_ort_path = Path(ort_dir)
     src_pt_path = Path(pt_dir)
@@ -45,27 +90,35 @@ def generate_summaries_per_step(args):
     merge_ort_path = output_path / "merge_ort"
     merge_pt_path = output_path / "merge_pt"
 
-    def generate_summary_per_step(topo_order_file_path: Path, dump_src_path: Path, merge_dest_path: Path):
+    def generate_summary_per_step(pt_path: Path, dump_src_path: Path, merge_dest_path: Path):
         logger.warning(
             "Start generating summary per step for [%s] following typological order in [%s]",
             dump_src_path.as_posix(),
-            topo_order_file_path.as_posix(),
+            pt_path.as_posix(),
         )
-        with topo_order_file_path.open(mode="r", encoding="utf-8") as order_file:
-            tensor_name_in_order = order_file.readlines()
 
         if merge_dest_path.exists():
             shutil.rmtree(merge_dest_path.as_posix())
         merge_dest_path.mkdir(parents=True, exist_ok=False)
 
         for dump_step_path in dump_src_path.iterdir():
-            if dump_step_path.is_dir():
+            if dump_step_path.is_file() and dump_step_path.suffix == ".npz":
+                summaries = _load_binary_summary(dump_step_path)
+                merge_filename_for_sub_dir = merge_dest_path / f"{dump_step_path.stem}_.txt"
+                with merge_filename_for_sub_dir.open(mode="w", encoding="utf-8") as outfile:
+                    for summary_name in tensor_name_in_order:
+                        if summary_name not in summaries:
+                            logger.warning("tensor %s not exist in %s", summary_name, dump_step_path)
+                            continue
+
+                        outfile.write(summaries[summary_name])
+                        outfile.write("\n")
+            elif dump_step_path.is_dir():
                 step_name = dump_step_path.name
                 merge_filename_for_sub_dir = merge_dest_path / f"{step_name}_.txt"
                 # Open merge_filename_for_sub_dir in write mode
                 with merge_filename_for_sub_dir.open(mode="w", encoding="utf-8") as outfile:
                     for filename in tensor_name_in_order:
-                        filename = filename.rstrip("\n")  # noqa: PLW2901
                         full_filename = dump_step_path / filename
                         if not full_filename.exists():
                             # Be noted that some tensor handled in PyTorch might be missing in ORT graph
@@ -81,12 +134,12 @@ def generate_summaries_per_step(args):
         logger.warning(
             "Finish generating summary per step for [%s] following typological order in [%s], merged files are in [%s]",
             dump_src_path.as_posix(),
-            topo_order_file_path.as_posix(),
+            pt_path.as_posix(),
             merge_dest_path.as_posix(),
         )
 
-    generate_summary_per_step(topo_order_file_path, src_pt_path, merge_pt_path)
-    generate_summary_per_step(topo_order_file_path, src_ort_path, merge_ort_path)
+    generate_summary_per_step(src_pt_path, src_pt_path, merge_pt_path)
+    generate_summary_per_step(src_pt_path, src_ort_path, merge_ort_path)
 
 
 def parse_arguments():
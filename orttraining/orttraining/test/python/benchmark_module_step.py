@@ -0,0 +1,102 @@
+# -------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+# --------------------------------------------------------------------------
+
+"""
+Benchmark the Python overhead per step of onnxruntime.training.api.Module with numpy inputs, using a small
+linear model so that the time is dominated by the overhead.
+
+Example:
+    python benchmark_module_step.py --batch_size 8 --repeat 5 --number 2000
+"""
+
+import argparse
+import os
+import tempfile
+import timeit
+
+import numpy as np
+import onnx
+from onnx import TensorProto, helper, numpy_helper
+
+from onnxruntime.capi.onnxruntime_pybind11_state import OrtValueVector
+from onnxruntime.training import artifacts
+from onnxruntime.training.api import CheckpointState, Module
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Benchmark per-step overhead of training.api.Module")
+    parser.add_argument("--batch_size", type=int, default=8, help="batch size of the inputs")
+    parser.add_argument("--input_size", type=int, default=32, help="input features of the linear model")
+    parser.add_argument("--output_size", type=int, default=16, help="output features of the linear model")
+    parser.add_argument("--repeat", type=int, default=5, help="number of measurements")
+    parser.add_argument("--number", type=int, default=2000, help="number of steps per measurement")
+    return parser.parse_args()
+
+
+def create_linear_model(input_size: int, output_size: int) -> onnx.ModelProto:
+    rng = np.random.default_rng(0)
+    weight = numpy_helper.from_array(rng.standard_normal((input_size, output_size), dtype=np.float32), "weight")
+    bias = numpy_helper.from_array(np.zeros(output_size, dtype=np.float32), "bias")
+    graph = helper.make_graph(
+        [
+            helper.make_node("MatMul", ["input", "weight"], ["matmul_output"]),
+            helper.make_node("Add", ["matmul_output", "bias"], ["output"]),
+        ],
+        "linear",
+        [helper.make_tensor_value_info("input", TensorProto.FLOAT, ["batch", input_size])],
+        [helper.make_tensor_value_info("output", TensorProto.FLOAT, ["batch", output_size])],
+        [weight, bias],
+    )
+    return helper.make_model(graph, opset_imports=[helper.make_opsetid("", 17)])
+
+
+def main():
+    args = parse_arguments()
+    rng = np.random.default_rng(0)
+    inputs = rng.standard_normal((args.batch_size, args.input_size), dtype=np.float32)
+    targets = rng.standard_normal((args.batch_size, args.output_size), dtype=np.float32)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        artifacts.generate_artifacts(
+            create_linear_model(args.input_size, args.output_size),
+            requires_grad=["weight", "bias"],
+            loss=artifacts.LossType.MSELoss,
+            artifact_directory=temp_dir,
+        )
+        checkpoint_path = os.path.join(temp_dir, "checkpoint")
+        training_model_path = os.path.join(temp_dir, "training_model.onnx")
+        module = Module(training_model_path, CheckpointState.load_checkpoint(checkpoint_path), reuse_fetches=True)
+        module_with_views = Module(
+            training_model_path, CheckpointState.load_checkpoint(checkpoint_path), reuse_fetches=True, output_views=True
+        )
+
+        def previous_step():
+            # What Module.__call__ does by default: new fetches for every step, and a copy of every output.
+            fetches = OrtValueVector()
+            module._model.train_step([inputs, targets], fetches)
+            return fetches[0].numpy()
+
+        candidates = {
+            "new fetches + copy": previous_step,
+            "reused fetches + copy": lambda: module(inputs, targets),
+            "reused fetches + view": lambda: module_with_views(inputs, targets),
+        }
+
+        # Measure the candidates in turn in each repeat, so that they see similar system noise.
+        best = {name: float("inf") for name in candidates}
+        for _ in range(args.repeat):
+            for name, func in candidates.items():
+                func()  # warm up
+                best[name] = min(best[name], timeit.timeit(func, number=args.number))
+
+    baseline = None
+    for name, total_time in best.items():
+        latency = total_time / args.number * 1e6
+        baseline = baseline or latency
+        print(f"{name:<24} {latency:8.2f} us/step ({baseline / latency:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -673,3 +673,94 @@ def test_train_with_nominal_checkpoint():
         new_params_2 = model_with_nominal_state.get_contiguous_parameters()
 
         assert np.allclose(new_params_1.numpy(), new_params_2.numpy())
+
+
+def test_train_and_eval_step_with_output_views():
+    # Generating random data for testing.
+    inputs = torch.randn(64, 784).numpy()
+    labels = torch.randint(high=10, size=(64,), dtype=torch.int64).numpy()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        artifacts = _create_training_artifacts(temp_dir)
+        state = CheckpointState.load_checkpoint(artifacts.checkpoint_file_path)
+        model = Module(
+            artifacts.training_model_file_path,
+            state,
+            artifacts.eval_model_file_path,
+            reuse_fetches=True,
+            output_views=True,
+        )
+
+        pt_outputs = artifacts.pt_model(torch.from_numpy(inputs))
+        pt_loss = torch.nn.CrossEntropyLoss()(pt_outputs, torch.from_numpy(labels).long()).detach().numpy()
+
+        # Without an optimizer step, the loss stays the same across steps reusing the same fetches.
+        model.train()
+        for _ in range(3):
+            ort_loss = model(inputs, labels)
+            assert isinstance(ort_loss, np.ndarray)
+            assert np.allclose(ort_loss, pt_loss)
+
+        model.eval()
+        for _ in range(3):
+            ort_loss = model(inputs, labels)
+            assert isinstance(ort_loss, np.ndarray)
+            assert np.allclose(ort_loss, pt_loss)
+
+        # A different batch size does not reuse the fetches of the previous step.
+        model.train()
+        ort_loss = model(inputs[:32], labels[:32])
+        pt_loss = torch.nn.CrossEntropyLoss()(pt_outputs[:32], torch.from_numpy(labels[:32]).long()).detach().numpy()
+        assert np.allclose(ort_loss, pt_loss)
+
+
+@pytest.mark.parametrize("output_views", [False, True])
+def test_train_and_eval_step_with_data_dependent_output_shape(output_views):
+    # The shape of the nonzero output depends on the input data, not only on the input shapes.
+    input_size, output_size = 4, 2
+    rng = np.random.default_rng(0)
+    graph = onnx.helper.make_graph(
+        [
+            onnx.helper.make_node("MatMul", ["input", "weight"], ["matmul_output"]),
+            onnx.helper.make_node("Add", ["matmul_output", "bias"], ["output"]),
+            onnx.helper.make_node("NonZero", ["input"], ["nonzero"]),
+        ],
+        "linear_with_nonzero",
+        [onnx.helper.make_tensor_value_info("input", onnx.TensorProto.FLOAT, ["batch", input_size])],
+        [
+            onnx.helper.make_tensor_value_info("output", onnx.TensorProto.FLOAT, ["batch", output_size]),
+            onnx.helper.make_tensor_value_info("nonzero", onnx.TensorProto.INT64, [2, "num_nonzero"]),
+        ],
+        [
+            onnx.numpy_helper.from_array(rng.standard_normal((input_size, output_size), dtype=np.float32), "weight"),
+            onnx.numpy_helper.from_array(np.zeros(output_size, dtype=np.float32), "bias"),
+        ],
+    )
+    onnx_model = onnx.helper.make_model(graph, opset_imports=[onnx.helper.make_opsetid("", 17)])
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        artifacts.generate_artifacts(
+            onnx_model,
+            requires_grad=["weight", "bias"],
+            loss=artifacts.LossType.MSELoss,
+            artifact_directory=temp_dir,
+            additional_output_names=["nonzero"],
+            loss_input_names=["output"],
+        )
+        state = CheckpointState.load_checkpoint(os.path.join(temp_dir, "checkpoint"))
+        model = Module(
+            os.path.join(temp_dir, "training_model.onnx"),
+            state,
+            os.path.join(temp_dir, "eval_model.onnx"),
+            output_views=output_views,
+        )
+
+        targets = np.zeros((3, output_size), dtype=np.float32)
+        # Same input shapes with a different number of non-zero elements in each step.
+        for mode in [True, False]:
+            model.train(mode)
+            for num_nonzero in [6, 2, 9, 0]:
+                inputs = np.zeros((3, input_size), dtype=np.float32)
+                inputs.flat[:num_nonzero] = 1.0
+                _, nonzero = model(inputs, targets)
+                assert np.array_equal(nonzero, np.stack(np.nonzero(inputs)))
@@ -34,6 +34,11 @@ with tempfile.TemporaryDirectory() as temporary_dir:
     torch.onnx.export.assert_called()
     torch.onnx.export.reset_mock()
 
+    # the post-export processed and the optimized training graphs should be cached as well
+    processed_cache_files = os.listdir(os.path.join(temporary_dir, "processed"))
+    assert any(f.startswith("post_processed_") and f.endswith(".onnx") for f in processed_cache_files)
+    assert any(f.startswith("optimized_") and f.endswith(".onnx") for f in processed_cache_files)
+
     # second time seeing the model, architecture should be loaded from ORTMODULE_CACHE_DIR
     model_post_cache = Net()
     model_post_cache = ORTModule(model_post_cache, DebugOptions(log_level=LogLevel.INFO))
@@ -4,6 +4,7 @@
 import os
 import tempfile
 
+import numpy as np
 import pytest
 import torch
 
@@ -200,3 +201,63 @@ def test_statistic_subscriber_user_annotate_intermediate_tensors(device, backend
             step_dir = os.path.join(output_dir_path, f"step_{i}")
             for file in expected_files:
                 assert os.path.exists(os.path.join(step_dir, file))
+
+
+@pytest.mark.parametrize("device", ["cpu", "cuda"])
+@pytest.mark.parametrize("backend", ["torch", "ortmodule"])
+def test_statistic_subscriber_binary_summary_format(device, backend):
+    input_size = 8
+    hidden_size = 16
+    num_classes = 32
+    model = NeuralNetSingleOutput(input_size, hidden_size, num_classes)
+    model.to(device)
+    model.train()
+
+    with tempfile.TemporaryDirectory() as temporary_dir:
+        output_dir_path = os.path.join(temporary_dir, f"{backend}_out")
+        subscriber = StatisticsSubscriber(output_dir_path, override_output_dir=True, summary_format="binary")
+        GlobalSubscriberManager.subscribe(model, [subscriber])
+
+        if backend == "ortmodule":
+            model = ORTModule(model)
+
+        batch_size = 4
+        input1_tensor = torch.randn(batch_size, input_size, device=device)
+        input2_tensor = torch.randn(batch_size, input_size, device=device)
+        for _ in range(5):
+            y = model(input1_tensor, input2_tensor)
+            y.sum().backward()
+        subscriber.flush()
+
+        expected_names = {
+            "Linear_1_0th_output_forward",
+            "Linear_1_0th_output_backward",
+            "NeuralNetSingleOutput_0_0th_output_forward",
+            "NeuralNetSingleOutput_0_0th_output_backward",
+            "ReLU_2_0th_output_forward",
+            "ReLU_2_0th_output_backward",
+            "Linear_3_0th_output_forward",
+            "Linear_3_0th_output_backward",
+        }
+
+        # One record per step, no per-activation files.
+        assert sorted(os.listdir(output_dir_path)) == [f"step_{i}.npz" for i in range(5)]
+        for i in range(5):
+            with np.load(os.path.join(output_dir_path, f"step_{i}.npz")) as record:
+                names = {
+                    f"{name}_forward" if is_forward else f"{name}_backward"
+                    for name, is_forward in zip(record["names"], record["is_forward"])
+                }
+                assert names == expected_names
+                assert record["statistics"].shape == (len(expected_names), len(record["statistic_names"]))
+
+                # The statistics match the ones computed directly on the model output.
+                model_output_index = list(record["names"]).index("NeuralNetSingleOutput_0_0th_output")
+                stats = dict(zip(record["statistic_names"], record["statistics"][model_output_index]))
+                expected_output = y.detach().double()
+                assert stats["size"] == expected_output.numel()
+                assert stats["nan"] == 0
+                assert np.isclose(stats["min"], expected_output.min().item())
+                assert np.isclose(stats["max"], expected_output.max().item())
+                assert np.isclose(stats["mean"], expected_output.mean().item())
+                assert np.isclose(stats["std"], expected_output.std().item())
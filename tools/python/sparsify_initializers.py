@@ -5,15 +5,22 @@
 # This script opens an existing model in onnx format and attempts to
 # move initializers from model.graph.initializer field to model.graph.sparse_initializer field
 # and convert them into ONNX COO flat index format.
+# Optionally, 2-D initializers can also be exported in BlockSparse format that
+# can be loaded with onnxruntime.SparseTensor.sparse_blocksparse_from_numpy().
+# With --streaming, initializers stored as external data are processed one at a time
+# so that models larger than the available memory can be converted.
 
 import argparse
 import logging
+import os
 import sys
-from typing import List, Tuple  # noqa: F401
+import tempfile
+from typing import Dict, List, Optional, Tuple  # noqa: F401
 
 import numpy as np
 import onnx
 from onnx import ModelProto, SparseTensorProto, TensorProto, numpy_helper  # noqa: F401
+from onnx.external_data_helper import load_external_data_for_tensor, set_external_data, uses_external_data
 
 logger = logging.getLogger(__name__)
 
@@ -27,7 +34,14 @@ def parse_arguments():
     parser.add_argument(
         "--exclude", required=False, type=str, help="semicolon separated list of initializer names to exclude"
     )
-    parser.add_argument("--tolerance", required=False, type=float, default=1e-6, help="FP absolute tolerance.")
+    parser.add_argument(
+        "--tolerance",
+        required=False,
+        type=float,
+        default=0.0,
+        help="FP absolute tolerance. float and double elements up to this magnitude are dropped, "
+        "by default only exact zeros are dropped",
+    )
     parser.add_argument(
         "--sparsity_threshold",
         required=False,
@@ -35,8 +49,27 @@ def parse_arguments():
         default=0.5,
         help="convert to sparse initializers if sparsity is at least this much",
     )
+    parser.add_argument(
+        "--streaming",
+        required=False,
+        action="store_true",
+        help="load external data of initializers one at a time and save the output model with external data",
+    )
+    parser.add_argument(
+        "--block_size",
+        required=False,
+        type=int,
+        default=0,
+        help="also convert 2-D initializers to BlockSparse format with blocks of block_size x block_size",
+    )
+    parser.add_argument(
+        "--blocksparse_output",
+        required=False,
+        type=str,
+        help="path of the .npz file for BlockSparse initializers. Defaults to the output model path + .blocksparse.npz",
+    )
     parser.add_argument("--verbose", required=False, action="store_true")
-    parser.set_defaults(verbose=False)
+    parser.set_defaults(verbose=False, streaming=False)
     args = parser.parse_args()
     return args
 
@@ -54,50 +87,38 @@ def setup_logging(verbose):  # type: (bool)  -> None
     logger.setLevel(logging_level)
 
 
+def get_nonzero_mask(tensor_data, data_type, tolerance):  # type: (np.ndarray, int, float) -> np.ndarray
+    """returns a boolean mask of the elements that are kept in the sparse tensor"""
+    if data_type in real_types and tolerance > 0:
+        # NaN elements are kept as they are with a zero tolerance
+        return ~(np.abs(tensor_data) <= tolerance)
+    return tensor_data != 0
+
+
+def get_indices_type(max_indices_value):  # type: (int) -> Tuple[int, type]
+    """returns the smallest onnx and numpy index data types that can hold max_indices_value"""
+    if max_indices_value <= np.iinfo(np.int8).max:
+        return TensorProto.INT8, np.int8
+    if max_indices_value <= np.iinfo(np.int16).max:
+        return TensorProto.INT16, np.int16
+    if max_indices_value <= np.iinfo(np.int32).max:
+        return TensorProto.INT32, np.int32
+    return TensorProto.INT64, np.int64
+
+
 def convert_tensor_to_sparse(
     tensor, sparsity_threshold, tolerance
 ):  # type: (TensorProto, float, float) -> Tuple[SparseTensorProto, float]
     """returns a tuple of sparse_tensor and sparsity level"""
-    values = []
-    indices = []
-    nnz_count = 0
-    tensor_data = numpy_helper.to_array(tensor).flatten()
-    data_len = len(tensor_data)
-    if tensor_data.dtype in real_types:
-        for index in range(data_len):
-            el = tensor_data[index]
-            if abs(el) <= tolerance:
-                values.append(el)
-                indices.append(index)
-                nnz_count += 1
-    else:
-        for index in range(data_len):
-            el = tensor_data[index]
-            if el != 0:
-                values.append(el)
-                indices.append(index)
-                nnz_count += 1
+    tensor_data = numpy_helper.to_array(tensor).ravel()
+    data_len = tensor_data.size
+    indices = np.flatnonzero(get_nonzero_mask(tensor_data, tensor.data_type, tolerance))
+    nnz_count = indices.size
 
     sparsity = 1.0 - float(nnz_count) / data_len
 
-    ind_data_type = TensorProto.INT8
-    ind_dtype = np.int8
-    ind_len = len(indices)
-    max_indices_value = 0
-    if ind_len > 0:
-        max_indices_value = indices[-1]
-        if max_indices_value <= np.iinfo(np.int8).max:
-            ind_data_type = TensorProto.INT8
-            ind_dtype = np.int8
-        elif max_indices_value <= np.iinfo(np.int16).max:
-            ind_data_type = TensorProto.INT16
-            ind_dtype = np.int16
-        elif max_indices_value <= np.iinfo(np.int32).max:
-            ind_data_type = TensorProto.INT32
-            ind_dtype = np.int32
-        else:
-            ind_data_type = TensorProto.INT64
-            ind_dtype = np.int64
+    max_indices_value = int(indices[-1]) if nnz_count > 0 else 0
+    ind_data_type, ind_dtype = get_indices_type(max_indices_value)
 
     logger.debug(
         f"initializer={tensor.name}, dtype={tensor_data.dtype}, \
@@ -109,10 +130,9 @@ def convert_tensor_to_sparse(
         return (object(), sparsity)
 
     tensor_data_bytes = tensor_data.nbytes
-    # create np array and cast data to the appropriate type
-    np_values = np.array(values).astype(tensor_data.dtype)
-    # create np array and cast data to the inferred index type
-    np_indices = np.array(indices).astype(ind_dtype)
+    np_values = tensor_data[indices]
+    # cast indices to the inferred index type
+    np_indices = indices.astype(ind_dtype)
     total_sparse_bytes = np_values.nbytes + np_indices.nbytes
 
     logger.debug(
@@ -130,41 +150,160 @@ def convert_tensor_to_sparse(
         logger.debug(f"initializer={tensor.name}, adjusted_sparsity={sparsity}")
         return (object(), sparsity)
 
-    values_tensor = onnx.helper.make_tensor(tensor.name, tensor.data_type, [len(values)], np_values.tobytes(), raw=True)
+    values_tensor = onnx.helper.make_tensor(tensor.name, tensor.data_type, [nnz_count], np_values.tobytes(), raw=True)
 
     indicies_tensor = onnx.helper.make_tensor(
-        tensor.name + "_indicies", ind_data_type, [ind_len], np_indices.tobytes(), raw=True
+        tensor.name + "_indicies", ind_data_type, [nnz_count], np_indices.tobytes(), raw=True
     )
 
     sparse_tensor = onnx.helper.make_sparse_tensor(values_tensor, indicies_tensor, tensor.dims)
     return (sparse_tensor, sparsity)
 
 
+def convert_tensor_to_blocksparse(
+    tensor, block_size, sparsity_threshold, tolerance
+):  # type: (TensorProto, int, float, float) -> Tuple[Optional[Tuple[np.ndarray, np.ndarray]], float]
+    """
+    returns a tuple of (values, indices) in BlockSparse format and block sparsity level.
+    values have shape (num_blocks, block_size, block_size) and indices are int32 of shape (2, num_blocks)
+    holding the block row and the block column of each of the blocks that contain non-zero elements.
+    These can be used as is with onnxruntime.SparseTensor.sparse_blocksparse_from_numpy().
+    Only 2-D tensors with dimensions divisible by block_size are supported, (None, 0.0) is returned otherwise.
+    """
+    if len(tensor.dims) != 2 or tensor.dims[0] % block_size != 0 or tensor.dims[1] % block_size != 0:
+        return (None, 0.0)
+
+    tensor_data = numpy_helper.to_array(tensor)
+    rows, cols = tensor_data.shape
+    blocks = tensor_data.reshape(rows // block_size, block_size, cols // block_size, block_size).swapaxes(1, 2)
+    block_mask = get_nonzero_mask(blocks, tensor.data_type, tolerance).any(axis=(2, 3))
+    block_rows, block_cols = np.nonzero(block_mask)
+
+    sparsity = 1.0 - float(block_rows.size) / block_mask.size
+    logger.debug(f"initializer={tensor.name}, blocks={block_mask.size}, nnz_blocks={block_rows.size}")
+    if sparsity < sparsity_threshold:
+        return (None, sparsity)
+
+    values = np.ascontiguousarray(blocks[block_rows, block_cols])
+    indices = np.stack((block_rows, block_cols)).astype(np.int32)
+    if tensor_data.nbytes <= values.nbytes + indices.nbytes:
+        return (None, 1.0 - float(tensor_data.nbytes) / (values.nbytes + indices.nbytes))
+
+    return ((values, indices), sparsity)
+
+
+class ExternalDataWriter:
+    """
+    Appends the data of initializers to a single external data file as they are processed,
+    so that streaming conversion never holds more than one initializer in memory.
+
+    The data is written to a temporary file that only replaces <model_path>.data on close(),
+    since the initializers are still read from the external data of the input model, which
+    may be that very file.
+    """
+
+    def __init__(self, model_path):  # type: (str) -> None
+        self.base_dir = os.path.dirname(os.path.abspath(model_path))
+        self.location = os.path.basename(model_path) + ".data"
+        self.data_file = tempfile.NamedTemporaryFile(
+            dir=self.base_dir, prefix=self.location + ".", suffix=".tmp", delete=False
+        )
+
+    def write(self, tensor):  # type: (TensorProto) -> None
+        offset = self.data_file.tell()
+        self.data_file.write(tensor.raw_data)
+        del tensor.external_data[:]
+        set_external_data(tensor, self.location, offset, len(tensor.raw_data))
+        tensor.data_location = TensorProto.EXTERNAL
+        tensor.ClearField("raw_data")
+
+    def close(self):
+        """moves the written data to <model_path>.data"""
+        self.data_file.close()
+        os.replace(self.data_file.name, os.path.join(self.base_dir, self.location))
+
+    def discard(self):
+        """removes the written data, leaving any existing <model_path>.data untouched"""
+        self.data_file.close()
+        os.remove(self.data_file.name)
+
+
 def convert_initializers(
-    model, exclude_names, sparsity_threshold, tolerance
-):  # type: (ModelProto, List[str], float, float) -> None
+    model,
+    exclude_names,
+    sparsity_threshold,
+    tolerance,
+    base_dir=None,
+    data_writer=None,
+    block_size=0,
+):  # type: (ModelProto, List[str], float, float, Optional[str], Optional[ExternalDataWriter], int) -> Dict[str, Tuple]
+    """
+    Moves initializers that are sparse enough to graph.sparse_initializer.
+
+    When base_dir is given, initializers with external data are loaded from it one at a time and
+    dropped from memory once they are processed. The initializers that remain dense are then
+    written out by data_writer.
+
+    When block_size is given, 2-D initializers that are sparse enough in blocks of block_size x block_size
+    are also returned in BlockSparse format as a dictionary of name to (values, indices, dense_shape).
+    """
     graph = model.graph
     converted_sparse = []
     remaining_initializers = []
+    blocksparse_initializers = {}
     for initializer in graph.initializer:
+        is_external = base_dir is not None and uses_external_data(initializer)
+        if is_external:
+            load_external_data_for_tensor(initializer, base_dir)
+            # same as onnx.external_data_helper.load_external_data_for_model
+            initializer.data_location = TensorProto.DEFAULT
+            del initializer.external_data[:]
+
         if initializer.name in exclude_names:
             logger.info(f"initializer={initializer.name} was excluded")
-            continue
-        if initializer.data_type == TensorProto.BOOL:
+            remaining_initializers.append(initializer)
+        elif initializer.data_type == TensorProto.BOOL:
             logger.info(f"initializer={initializer.name} contains bool, not converted")
             remaining_initializers.append(initializer)
-            continue
-        sparse_tensor, sparsity = convert_tensor_to_sparse(initializer, sparsity_threshold, tolerance)
-        if sparsity >= sparsity_threshold:
-            logger.info(f"initializer={initializer.name} converted. sparsity={sparsity}")
-            converted_sparse.append(sparse_tensor)
         else:
+            if block_size > 0:
+                blocksparse, sparsity = convert_tensor_to_blocksparse(
+                    initializer, block_size, sparsity_threshold, tolerance
+                )
+                if blocksparse is not None:
+                    logger.info(f"initializer={initializer.name} exported in BlockSparse format. sparsity={sparsity}")
+                    blocksparse_initializers[initializer.name] = (*blocksparse, list(initializer.dims))
+
+            sparse_tensor, sparsity = convert_tensor_to_sparse(initializer, sparsity_threshold, tolerance)
+            if sparsity >= sparsity_threshold:
+                logger.info(f"initializer={initializer.name} converted. sparsity={sparsity}")
+                converted_sparse.append(sparse_tensor)
+                if is_external:
+                    initializer.ClearField("raw_data")
+                continue
             remaining_initializers.append(initializer)
             logger.info(f"initializer={initializer.name} is not converted. sparsity={sparsity}")
 
+        if data_writer is not None and (is_external or initializer.HasField("raw_data")):
+            data_writer.write(initializer)
+
     graph.sparse_initializer.extend(converted_sparse)
     del graph.initializer[:]
     graph.initializer.extend(remaining_initializers)
+    return blocksparse_initializers
+
+
+def save_blocksparse_initializers(blocksparse_initializers, path):  # type: (Dict, str) -> None
+    """
+    Saves BlockSparse initializers to a numpy .npz file with <name>.values, <name>.indices
+    and <name>.dense_shape entries for each of the initializers.
+    """
+    arrays = {}
+    for name, (values, indices, dense_shape) in blocksparse_initializers.items():
+        arrays[name + ".values"] = values
+        arrays[name + ".indices"] = indices
+        arrays[name + ".dense_shape"] = np.array(dense_shape, dtype=np.int64)
+    np.savez(path, **arrays)
 
 
 def main():
@@ -173,11 +312,37 @@ def main():
 
     exclude_names = set() if args.exclude is None else set(args.exclude.split(";"))
 
-    model = ModelProto()
-    with open(args.input, "rb") as input_file:
-        model.ParseFromString(input_file.read())
+    base_dir = None
+    data_writer = None
+    if args.streaming:
+        model = onnx.load(args.input, load_external_data=False)
+        base_dir = os.path.dirname(os.path.abspath(args.input))
+        data_writer = ExternalDataWriter(args.output)
+    else:
+        model = onnx.load(args.input)
+
+    try:
+        blocksparse_initializers = convert_initializers(
+            model,
+            exclude_names,
+            args.sparsity_threshold,
+            args.tolerance,
+            base_dir=base_dir,
+            data_writer=data_writer,
+            block_size=args.block_size,
+        )
+    except BaseException:
+        if data_writer is not None:
+            data_writer.discard()
+        raise
+
+    if data_writer is not None:
+        data_writer.close()
 
-    convert_initializers(model, exclude_names, args.sparsity_threshold, args.tolerance)
+    if args.block_size > 0:
+        blocksparse_output = args.blocksparse_output or args.output + ".blocksparse.npz"
+        save_blocksparse_initializers(blocksparse_initializers, blocksparse_output)
+        logger.info(f"{len(blocksparse_initializers)} BlockSparse initializers saved to {blocksparse_output}")
 
     with open(args.output, "wb") as output_file:
         s = model.SerializeToString()
@@ -5,8 +5,11 @@
 from __future__ import annotations
 
 import argparse
+import concurrent.futures
 import contextlib
 import enum
+import hashlib
+import json
 import os
 import pathlib
 import tempfile
@@ -59,10 +62,12 @@ def _create_session_options(
     output_model_path: pathlib.Path,
     custom_op_library: pathlib.Path,
     session_options_config_entries: dict[str, str],
+    intra_op_num_threads: int = 0,
 ):
     so = ort.SessionOptions()
     so.optimized_model_filepath = str(output_model_path)
     so.graph_optimization_level = optimization_level
+    so.intra_op_num_threads = intra_op_num_threads
 
     if custom_op_library:
         so.register_custom_ops_library(str(custom_op_library))
@@ -73,6 +78,102 @@ def _create_session_options(
     return so
 
 
+_MANIFEST_DIR_NAME = ".ort_conversion_cache"
+_MANIFEST_FILE_NAME = "manifest.json"
+
+
+class _ConversionManifest:
+    """
+    Records a hash of the inputs of each converted model so that models with up to date outputs are not converted
+    again. The hash covers the model bytes, the conversion settings and the ONNX Runtime version.
+    External data files of a model are not included in the hash.
+    """
+
+    def __init__(self, manifest_dir: pathlib.Path):
+        self._manifest_dir = manifest_dir
+        self._manifest_path = manifest_dir / _MANIFEST_FILE_NAME
+        self._entries = {}
+        with contextlib.suppress(OSError, ValueError), open(self._manifest_path, encoding="utf-8") as manifest_file:
+            self._entries = json.load(manifest_file)
+
+    def _key(self, output_path: pathlib.Path):
+        # the manifest directory is in the output directory, so keys are relative to the output directory
+        return os.path.relpath(output_path, self._manifest_dir.parent)
+
+    def is_up_to_date(self, output_paths: list[pathlib.Path], input_hash: str):
+        return all(
+            self._entries.get(self._key(output_path)) == input_hash and output_path.is_file()
+            for output_path in output_paths
+        )
+
+    def update(self, output_paths: list[pathlib.Path], input_hash: str | None):
+        for output_path in output_paths:
+            if input_hash is None:
+                self._entries.pop(self._key(output_path), None)
+            else:
+                self._entries[self._key(output_path)] = input_hash
+
+    def save(self):
+        self._manifest_dir.mkdir(parents=True, exist_ok=True)
+        # write to a temporary file first so that an interrupted run does not leave a corrupted manifest
+        temp_path = self._manifest_path.with_suffix(".tmp")
+        with open(temp_path, "w", encoding="utf-8") as manifest_file:
+            json.dump(self._entries, manifest_file, indent=1, sort_keys=True)
+        os.replace(temp_path, self._manifest_path)
+
+
+def _hash_file(file_path: pathlib.Path, hash_obj):
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            hash_obj.update(chunk)
+
+
+def _convert_model(
+    model: pathlib.Path,
+    ort_target_path: pathlib.Path,
+    optimized_target_path: pathlib.Path | None,
+    optimization_level_str: str,
+    optimization_style: OptimizationStyle,
+    custom_op_library: pathlib.Path,
+    session_options_config_entries: dict[str, str],
+    optimizer_filter: list[str] | None,
+    intra_op_num_threads: int = 0,
+):
+    # Runs in a worker process so all arguments must be picklable.
+    optimization_level = get_optimization_level(optimization_level_str)
+    providers = ["CPUExecutionProvider"]
+
+    if optimized_target_path is not None:
+        # Create an ONNX file with the same optimization level that will be used for the ORT format file.
+        # This allows the ONNX equivalent of the ORT format model to be easily viewed in Netron.
+        # If runtime optimizations are saved in the ORT format model, there may be some difference in the
+        # graphs at runtime between the ORT format model and this saved ONNX model.
+        so = _create_session_options(
+            optimization_level,
+            optimized_target_path,
+            custom_op_library,
+            session_options_config_entries,
+            intra_op_num_threads,
+        )
+        if optimization_style == OptimizationStyle.Runtime:
+            # Limit the optimizations to those that can run in a model with runtime optimizations.
+            so.add_session_config_entry("optimization.minimal_build_optimizations", "apply")
+
+        print(f"Saving optimized ONNX model {model} to {optimized_target_path}")
+        _ = ort.InferenceSession(str(model), sess_options=so, providers=providers, disabled_optimizers=optimizer_filter)
+
+    # Load ONNX model, optimize, and save to ORT format
+    so = _create_session_options(
+        optimization_level, ort_target_path, custom_op_library, session_options_config_entries, intra_op_num_threads
+    )
+    so.add_session_config_entry("session.save_model_format", "ORT")
+    if optimization_style == OptimizationStyle.Runtime:
+        so.add_session_config_entry("optimization.minimal_build_optimizations", "save")
+
+    print(f"Converting optimized ONNX model {model} to ORT format model {ort_target_path}")
+    _ = ort.InferenceSession(str(model), sess_options=so, providers=providers, disabled_optimizers=optimizer_filter)
+
+
 def _convert(
     model_path_or_dir: pathlib.Path,
     output_dir: pathlib.Path | None,
@@ -83,6 +184,8 @@ def _convert(
     allow_conversion_failures: bool,
     target_platform: str,
     session_options_config_entries: dict[str, str],
+    manifest: _ConversionManifest | None = None,
+    num_workers: int = 1,
 ) -> list[pathlib.Path]:
     model_dir = model_path_or_dir if model_path_or_dir.is_dir() else model_path_or_dir.parent
     output_dir = output_dir or model_dir
@@ -104,8 +207,6 @@ def _convert(
     if len(models) == 0:
         raise ValueError(f"No model files were found in '{model_path_or_dir}'")
 
-    providers = ["CPUExecutionProvider"]
-
     # if the optimization level is 'all' we manually exclude the NCHWc transformer. It's not applicable to ARM
     # devices, and creates a device specific model which won't run on all hardware.
     # If someone really really really wants to run it they could manually create an optimized onnx model first,
@@ -114,65 +215,113 @@ def _convert(
     if optimization_level == ort.GraphOptimizationLevel.ORT_ENABLE_ALL and target_platform != "amd64":
         optimizer_filter = ["NchwcTransformer"]
 
-    converted_models = []
-
-    for model in models:
-        try:
-            relative_model_path = model.relative_to(model_dir)
-
-            (output_dir / relative_model_path).parent.mkdir(parents=True, exist_ok=True)
-
-            ort_target_path = (output_dir / relative_model_path).with_suffix(
-                _optimization_suffix(optimization_level_str, optimization_style, ".ort")
-            )
-
-            if create_optimized_onnx_model:
-                # Create an ONNX file with the same optimization level that will be used for the ORT format file.
-                # This allows the ONNX equivalent of the ORT format model to be easily viewed in Netron.
-                # If runtime optimizations are saved in the ORT format model, there may be some difference in the
-                # graphs at runtime between the ORT format model and this saved ONNX model.
-                optimized_target_path = (output_dir / relative_model_path).with_suffix(
-                    _optimization_suffix(optimization_level_str, optimization_style, ".optimized.onnx")
-                )
-                so = _create_session_options(
-                    optimization_level, optimized_target_path, custom_op_library, session_options_config_entries
-                )
-                if optimization_style == OptimizationStyle.Runtime:
-                    # Limit the optimizations to those that can run in a model with runtime optimizations.
-                    so.add_session_config_entry("optimization.minimal_build_optimizations", "apply")
-
-                print(f"Saving optimized ONNX model {model} to {optimized_target_path}")
-                _ = ort.InferenceSession(
-                    str(model), sess_options=so, providers=providers, disabled_optimizers=optimizer_filter
-                )
-
-            # Load ONNX model, optimize, and save to ORT format
-            so = _create_session_options(
-                optimization_level, ort_target_path, custom_op_library, session_options_config_entries
-            )
-            so.add_session_config_entry("session.save_model_format", "ORT")
-            if optimization_style == OptimizationStyle.Runtime:
-                so.add_session_config_entry("optimization.minimal_build_optimizations", "save")
-
-            print(f"Converting optimized ONNX model {model} to ORT format model {ort_target_path}")
-            _ = ort.InferenceSession(
-                str(model), sess_options=so, providers=providers, disabled_optimizers=optimizer_filter
+    settings_hash = None
+    if manifest is not None:
+        settings_hash = hashlib.sha256()
+        settings = [
+            ort.__version__,
+            optimization_level_str,
+            optimization_style.name,
+            sorted(session_options_config_entries.items()),
+            optimizer_filter,
+        ]
+        settings_hash.update(json.dumps(settings).encode())
+        if custom_op_library:
+            _hash_file(custom_op_library, settings_hash)
+
+    # index of the model to ORT format model path, so that the models are returned in a deterministic order
+    converted_models = {}
+    # index, model, output paths and input hash of the models to convert
+    conversions = []
+
+    for index, model in enumerate(models):
+        relative_model_path = model.relative_to(model_dir)
+
+        ort_target_path = (output_dir / relative_model_path).with_suffix(
+            _optimization_suffix(optimization_level_str, optimization_style, ".ort")
+        )
+        optimized_target_path = None
+        if create_optimized_onnx_model:
+            optimized_target_path = (output_dir / relative_model_path).with_suffix(
+                _optimization_suffix(optimization_level_str, optimization_style, ".optimized.onnx")
             )
+        output_paths = [ort_target_path] if optimized_target_path is None else [ort_target_path, optimized_target_path]
+
+        input_hash = None
+        if manifest is not None:
+            model_hash = settings_hash.copy()
+            _hash_file(model, model_hash)
+            input_hash = model_hash.hexdigest()
+            if manifest.is_up_to_date(output_paths, input_hash):
+                print(f"Skipping {model} as ORT format model {ort_target_path} is up to date")
+                converted_models[index] = ort_target_path
+                continue
+
+        ort_target_path.parent.mkdir(parents=True, exist_ok=True)
+        conversions.append((index, model, ort_target_path, optimized_target_path, output_paths, input_hash))
+
+    num_up_to_date = len(converted_models)
+    use_workers = num_workers > 1 and len(conversions) > 1
+
+    def convert_args(conversion):
+        _, model, ort_target_path, optimized_target_path, _, _ = conversion
+        return (
+            model,
+            ort_target_path,
+            optimized_target_path,
+            optimization_level_str,
+            optimization_style,
+            custom_op_library,
+            session_options_config_entries,
+            optimizer_filter,
+            # one thread per worker process, as the workers already use the available cores
+            1 if use_workers else 0,
+        )
 
-            converted_models.append(ort_target_path)
-
-            # orig_size = os.path.getsize(onnx_target_path)
-            # new_size = os.path.getsize(ort_target_path)
-            # print("Serialized {} to {}. Sizes: orig={} new={} diff={} new:old={:.4f}:1.0".format(
-            #     onnx_target_path, ort_target_path, orig_size, new_size, new_size - orig_size, new_size / orig_size))
-        except Exception as e:
-            print(f"Error converting {model}: {e}")
-            if not allow_conversion_failures:
-                raise
-
-    print(f"Converted {len(converted_models)}/{len(models)} models successfully.")
+    def handle_result(conversion, error):
+        index, model, ort_target_path, _, output_paths, input_hash = conversion
+        if manifest is not None:
+            manifest.update(output_paths, input_hash if error is None else None)
+        if error is None:
+            converted_models[index] = ort_target_path
+            return
+        print(f"Error converting {model}: {error}")
+        if not allow_conversion_failures:
+            raise error
+
+    try:
+        if use_workers:
+            # Each model is converted in its own worker process. ORT sessions are not picklable so the workers
+            # create them from the settings.
+            with concurrent.futures.ProcessPoolExecutor(max_workers=min(num_workers, len(conversions))) as executor:
+                futures = {
+                    executor.submit(_convert_model, *convert_args(conversion)): conversion for conversion in conversions
+                }
+                try:
+                    for future in concurrent.futures.as_completed(futures):
+                        handle_result(futures[future], future.exception())
+                except BaseException:
+                    for future in futures:
+                        future.cancel()
+                    raise
+        else:
+            for conversion in conversions:
+                try:
+                    _convert_model(*convert_args(conversion))
+                except Exception as e:
+                    handle_result(conversion, e)
+                else:
+                    handle_result(conversion, None)
+    finally:
+        if manifest is not None:
+            manifest.save()
+
+    print(
+        f"Converted {len(converted_models)}/{len(models)} models successfully. "
+        f"{num_up_to_date} models were already up to date."
+    )
 
-    return converted_models
+    return [converted_models[index] for index in sorted(converted_models)]
 
 
 def parse_args():
@@ -240,6 +389,22 @@ def parse_args():
         help="Whether to proceed after encountering model conversion failures.",
     )
 
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of models to convert in parallel. When more than 1, each model is converted in a separate "
+        "worker process that uses a single thread.",
+    )
+
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Skip models whose ORT format model is up to date. A manifest with a hash of the model, the conversion "
+        f"settings and the ONNX Runtime version of each converted model is kept in the '{_MANIFEST_DIR_NAME}' "
+        "subdirectory of the output directory.",
+    )
+
     parser.add_argument(
         "--target_platform",
         type=str,
@@ -273,6 +438,8 @@ def convert_onnx_models_to_ort(
     save_optimized_onnx_model: bool = False,
     allow_conversion_failures: bool = False,
     enable_type_reduction: bool = False,
+    num_workers: int = 1,
+    incremental: bool = False,
 ):
     if output_dir is not None:
         if not output_dir.is_dir():
@@ -300,6 +467,12 @@ def convert_onnx_models_to_ort(
     else:
         session_options_config_entries["session.qdqisint8allowed"] = "0"
 
+    model_dir = model_path_or_dir if model_path_or_dir.is_dir() else model_path_or_dir.parent
+    manifest = None
+    if incremental:
+        manifest_dir = (output_dir or model_dir) / _MANIFEST_DIR_NAME
+        manifest = _ConversionManifest(manifest_dir)
+
     for optimization_style in optimization_styles:
         print(
             f"Converting models with optimization style '{optimization_style.name}' and level '{optimization_level_str}'"
@@ -315,6 +488,8 @@ def convert_onnx_models_to_ort(
             allow_conversion_failures=allow_conversion_failures,
             target_platform=target_platform,
             session_options_config_entries=session_options_config_entries,
+            manifest=manifest,
+            num_workers=num_workers,
         )
 
         with contextlib.ExitStack() as context_stack:
@@ -322,10 +497,13 @@ def convert_onnx_models_to_ort(
                 # Convert models again without runtime optimizations.
                 # Runtime optimizations may not end up being applied, so we need to use both converted models with and
                 # without runtime optimizations to get a complete set of ops that may be needed for the config file.
-                model_dir = model_path_or_dir if model_path_or_dir.is_dir() else model_path_or_dir.parent
-                temp_output_dir = context_stack.enter_context(
-                    tempfile.TemporaryDirectory(dir=model_dir, suffix=".without_runtime_opt")
-                )
+                if manifest is not None:
+                    # Keep these models with the manifest so that they are not converted again either.
+                    temp_output_dir = manifest_dir / "without_runtime_opt"
+                else:
+                    temp_output_dir = context_stack.enter_context(
+                        tempfile.TemporaryDirectory(dir=model_dir, suffix=".without_runtime_opt")
+                    )
                 session_options_config_entries_for_second_conversion = session_options_config_entries.copy()
                 # Limit the optimizations to those that can run in a model with runtime optimizations.
                 session_options_config_entries_for_second_conversion["optimization.minimal_build_optimizations"] = (
@@ -334,11 +512,15 @@ def convert_onnx_models_to_ort(
 
                 print(
                     "Converting models again without runtime optimizations to generate a complete config file. "
-                    "These converted models are temporary and will be deleted."
+                    + (
+                        f"These converted models are kept in '{temp_output_dir}'."
+                        if manifest is not None
+                        else "These converted models are temporary and will be deleted."
+                    )
                 )
                 converted_models += _convert(
                     model_path_or_dir=model_path_or_dir,
-                    output_dir=temp_output_dir,
+                    output_dir=pathlib.Path(temp_output_dir),
                     optimization_level_str=optimization_level_str,
                     optimization_style=OptimizationStyle.Fixed,
                     custom_op_library=custom_op_library,
@@ -346,6 +528,8 @@ def convert_onnx_models_to_ort(
                     allow_conversion_failures=allow_conversion_failures,
                     target_platform=target_platform,
                     session_options_config_entries=session_options_config_entries_for_second_conversion,
+                    manifest=manifest,
+                    num_workers=num_workers,
                 )
 
             print(
@@ -374,4 +558,6 @@ if __name__ == "__main__":
         save_optimized_onnx_model=args.save_optimized_onnx_model,
         allow_conversion_failures=args.allow_conversion_failures,
         enable_type_reduction=args.enable_type_reduction,
+        num_workers=args.jobs,
+        incremental=args.incremental,
     )
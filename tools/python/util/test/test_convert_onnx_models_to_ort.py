@@ -0,0 +1,175 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import contextlib
+import io
+import pathlib
+import tempfile
+import unittest
+
+import onnx
+from onnx import TensorProto, helper
+
+import onnxruntime as ort
+
+from ..convert_onnx_models_to_ort import (
+    _MANIFEST_DIR_NAME,
+    OptimizationStyle,
+    _ConversionManifest,
+    _convert,
+    _create_session_options,
+)
+
+# example usage from <ort root>/tools/python
+# python -m unittest util/test/test_convert_onnx_models_to_ort.py
+# NOTE: at least on Windows you must use that as the working directory for all the imports to be happy
+
+
+def _save_model(path: pathlib.Path, op_type: str = "Add"):
+    graph = helper.make_graph(
+        [helper.make_node(op_type, ["x", "y"], ["z"])],
+        "convert_test",
+        [
+            helper.make_tensor_value_info("x", TensorProto.FLOAT, [2]),
+            helper.make_tensor_value_info("y", TensorProto.FLOAT, [2]),
+        ],
+        [helper.make_tensor_value_info("z", TensorProto.FLOAT, [2])],
+    )
+    onnx.save(helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)]), str(path))
+
+
+class TestConvert(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.model_dir = pathlib.Path(temp_dir.name) / "models"
+        self.model_dir.mkdir()
+        self.output_dir = pathlib.Path(temp_dir.name) / "output"
+        self.output_dir.mkdir()
+
+    def _convert(self, manifest=None, num_workers=1, config_entries=None, allow_conversion_failures=False):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return _convert(
+                model_path_or_dir=self.model_dir,
+                output_dir=self.output_dir,
+                optimization_level_str="basic",
+                optimization_style=OptimizationStyle.Fixed,
+                custom_op_library=None,
+                create_optimized_onnx_model=False,
+                allow_conversion_failures=allow_conversion_failures,
+                target_platform="arm",
+                session_options_config_entries=config_entries or {},
+                manifest=manifest,
+                num_workers=num_workers,
+            )
+
+    def _ort_path(self, model_name):
+        return self.output_dir / f"{model_name}.basic.ort"
+
+    def _manifest(self):
+        return _ConversionManifest(self.output_dir / _MANIFEST_DIR_NAME)
+
+    def _mark_outputs(self, paths):
+        # converting a model again overwrites the marker
+        for path in paths:
+            path.write_bytes(b"marker")
+
+    def _converted_again(self, path):
+        return path.read_bytes() != b"marker"
+
+    def test_incremental_skips_up_to_date_models(self):
+        _save_model(self.model_dir / "a.onnx")
+        _save_model(self.model_dir / "b.onnx", "Mul")
+
+        converted = self._convert(self._manifest())
+        self.assertEqual(sorted(converted), [self._ort_path("a"), self._ort_path("b")])
+        self.assertTrue((self.output_dir / _MANIFEST_DIR_NAME / "manifest.json").is_file())
+
+        self._mark_outputs(converted)
+        self.assertEqual(self._convert(self._manifest()), converted)
+        self.assertFalse(any(self._converted_again(path) for path in converted))
+
+    def test_incremental_invalidation(self):
+        model_a = self.model_dir / "a.onnx"
+        _save_model(model_a)
+        _save_model(self.model_dir / "b.onnx", "Mul")
+        self._convert(self._manifest())
+        ort_a, ort_b = self._ort_path("a"), self._ort_path("b")
+
+        # a changed model is converted again
+        self._mark_outputs([ort_a, ort_b])
+        _save_model(model_a, "Sub")
+        self._convert(self._manifest())
+        self.assertTrue(self._converted_again(ort_a))
+        self.assertFalse(self._converted_again(ort_b))
+
+        # a missing output is converted again
+        ort_b.unlink()
+        self._mark_outputs([ort_a])
+        self._convert(self._manifest())
+        self.assertTrue(ort_b.is_file())
+        self.assertFalse(self._converted_again(ort_a))
+
+        # changed settings convert all models again
+        self._mark_outputs([ort_a, ort_b])
+        self._convert(self._manifest(), config_entries={"session.disable_prepacking": "1"})
+        self.assertTrue(self._converted_again(ort_a))
+        self.assertTrue(self._converted_again(ort_b))
+
+    def test_incremental_failed_conversion_is_not_recorded(self):
+        model_a = self.model_dir / "a.onnx"
+        _save_model(model_a)
+        (ort_a,) = self._convert(self._manifest())
+
+        model_a.write_bytes(b"not a model")
+        self.assertEqual(self._convert(self._manifest(), allow_conversion_failures=True), [])
+        self.assertNotIn(ort_a.name, self._manifest()._entries)
+
+        # the stale output of the previous model version is not reused once the model is restored
+        _save_model(model_a)
+        self._mark_outputs([ort_a])
+        self._convert(self._manifest())
+        self.assertTrue(self._converted_again(ort_a))
+
+    def test_without_manifest_converts_all_models(self):
+        _save_model(self.model_dir / "a.onnx")
+        converted = self._convert()
+        self._mark_outputs(converted)
+        self._convert()
+        self.assertTrue(self._converted_again(converted[0]))
+        self.assertFalse((self.output_dir / _MANIFEST_DIR_NAME).exists())
+
+    def test_process_pool(self):
+        op_types = ["Add", "Mul", "Sub", "Div"]
+        for i, op_type in enumerate(op_types):
+            _save_model(self.model_dir / f"model_{i}.onnx", op_type)
+
+        converted = self._convert(num_workers=2)
+        # the models are returned in the same order as with a single worker
+        self.assertEqual(converted, self._convert(num_workers=1))
+        self.assertEqual(sorted(converted), [self._ort_path(f"model_{i}") for i in range(len(op_types))])
+        self.assertTrue(all(path.is_file() for path in converted))
+
+    def test_process_pool_failures(self):
+        _save_model(self.model_dir / "a.onnx")
+        (self.model_dir / "b.onnx").write_bytes(b"not a model")
+        _save_model(self.model_dir / "c.onnx", "Mul")
+
+        converted = self._convert(self._manifest(), num_workers=2, allow_conversion_failures=True)
+        self.assertEqual(sorted(converted), [self._ort_path("a"), self._ort_path("c")])
+        self.assertEqual(sorted(self._manifest()._entries), ["a.basic.ort", "c.basic.ort"])
+
+        with self.assertRaises(Exception):  # noqa: B017
+            self._convert(num_workers=2)
+
+    def test_session_options_threads(self):
+        so = _create_session_options(
+            ort.GraphOptimizationLevel.ORT_ENABLE_BASIC, self.output_dir / "a.ort", None, {}, intra_op_num_threads=1
+        )
+        self.assertEqual(so.intra_op_num_threads, 1)
+        so = _create_session_options(ort.GraphOptimizationLevel.ORT_ENABLE_BASIC, self.output_dir / "a.ort", None, {})
+        self.assertEqual(so.intra_op_num_threads, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,202 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import onnx
+from onnx import TensorProto, helper, numpy_helper
+from onnx.external_data_helper import convert_model_to_external_data
+
+# sparsify_initializers.py is a script in <ort root>/tools/python, which is on the path when run as below
+from sparsify_initializers import (
+    ExternalDataWriter,
+    convert_initializers,
+    convert_tensor_to_blocksparse,
+    convert_tensor_to_sparse,
+    get_nonzero_mask,
+    save_blocksparse_initializers,
+)
+
+# example usage from <ort root>/tools/python
+# python -m unittest util/test/test_sparsify_initializers.py
+# NOTE: at least on Windows you must use that as the working directory for all the imports to be happy
+
+
+def _sparse_array(shape, sparsity, dtype=np.float32, seed=0):
+    rng = np.random.default_rng(seed)
+    data = rng.standard_normal(shape).astype(dtype)
+    data[rng.random(shape) < sparsity] = 0
+    return data
+
+
+def _sparse_to_dense(sparse_tensor):
+    values = numpy_helper.to_array(sparse_tensor.values)
+    indices = numpy_helper.to_array(sparse_tensor.indices)
+    dense = np.zeros(int(np.prod(sparse_tensor.dims)), dtype=values.dtype)
+    dense[indices] = values
+    return dense.reshape(sparse_tensor.dims)
+
+
+def _create_model(initializers):
+    nodes = [helper.make_node("Identity", [name], [name + "_out"]) for name in initializers]
+    graph = helper.make_graph(
+        nodes,
+        "sparsify_test",
+        [],
+        [
+            helper.make_tensor_value_info(name + "_out", TensorProto.FLOAT, data.shape)
+            for name, data in initializers.items()
+        ],
+        initializer=[numpy_helper.from_array(data, name) for name, data in initializers.items()],
+    )
+    return helper.make_model(graph)
+
+
+class TestConvertTensorToSparse(unittest.TestCase):
+    def test_matches_elementwise_conversion(self):
+        data = _sparse_array((64, 48), 0.8)
+        sparse_tensor, sparsity = convert_tensor_to_sparse(numpy_helper.from_array(data, "w"), 0.5, 0.0)
+
+        flat = data.ravel()
+        expected_indices = [i for i in range(flat.size) if flat[i] != 0]
+        self.assertAlmostEqual(sparsity, 1.0 - len(expected_indices) / flat.size)
+        self.assertEqual(list(numpy_helper.to_array(sparse_tensor.indices)), expected_indices)
+        self.assertEqual(sparse_tensor.indices.data_type, TensorProto.INT16)
+        np.testing.assert_array_equal(_sparse_to_dense(sparse_tensor), data)
+
+    def test_exact_zero_by_default(self):
+        data = np.array([0.0, 1e-9, -1e-7, 0.5, np.nan, 0.0, 0.0, 0.0], dtype=np.float32)
+        tensor = numpy_helper.from_array(data, "w")
+
+        np.testing.assert_array_equal(get_nonzero_mask(data, tensor.data_type, 0.0), data != 0)
+        sparse_tensor, _ = convert_tensor_to_sparse(tensor, 0.5, 0.0)
+        self.assertEqual(list(numpy_helper.to_array(sparse_tensor.indices)), [1, 2, 3, 4])
+
+        # a tolerance drops the small values but keeps NaN
+        sparse_tensor, _ = convert_tensor_to_sparse(tensor, 0.5, 1e-6)
+        self.assertEqual(list(numpy_helper.to_array(sparse_tensor.indices)), [3, 4])
+
+    def test_not_converted_when_dense(self):
+        data = _sparse_array((16, 16), 0.2)
+        sparse_tensor, sparsity = convert_tensor_to_sparse(numpy_helper.from_array(data, "w"), 0.5, 0.0)
+        self.assertLess(sparsity, 0.5)
+        self.assertNotIsInstance(sparse_tensor, onnx.SparseTensorProto)
+
+
+class TestConvertTensorToBlockSparse(unittest.TestCase):
+    def test_blocksparse(self):
+        block_size = 4
+        data = np.zeros((16, 12), dtype=np.float32)
+        data[4:8, 0:4] = 1.0
+        data[12, 11] = 2.0
+        blocksparse, sparsity = convert_tensor_to_blocksparse(numpy_helper.from_array(data, "w"), block_size, 0.5, 0.0)
+
+        values, indices = blocksparse
+        self.assertAlmostEqual(sparsity, 1.0 - 2 / 12)
+        self.assertEqual(values.shape, (2, block_size, block_size))
+        self.assertEqual(indices.dtype, np.int32)
+        np.testing.assert_array_equal(indices, [[1, 3], [0, 2]])
+        dense = np.zeros_like(data)
+        for block, (row, col) in zip(values, indices.T):
+            dense[row * block_size : (row + 1) * block_size, col * block_size : (col + 1) * block_size] = block
+        np.testing.assert_array_equal(dense, data)
+
+    def test_unsupported_shape(self):
+        data = np.zeros((6, 8), dtype=np.float32)
+        self.assertEqual(convert_tensor_to_blocksparse(numpy_helper.from_array(data, "w"), 4, 0.5, 0.0), (None, 0.0))
+
+    def test_save_blocksparse_initializers(self):
+        data = np.zeros((8, 8), dtype=np.float32)
+        data[0, 0] = 1.0
+        model = _create_model({"w": data, "dense": np.ones((8, 8), dtype=np.float32)})
+        blocksparse_initializers = convert_initializers(model, set(), 0.5, 0.0, block_size=4)
+        self.assertEqual(list(blocksparse_initializers), ["w"])
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "model.blocksparse.npz")
+            save_blocksparse_initializers(blocksparse_initializers, path)
+            with np.load(path) as arrays:
+                self.assertEqual(sorted(arrays.files), ["w.dense_shape", "w.indices", "w.values"])
+                np.testing.assert_array_equal(arrays["w.dense_shape"], [8, 8])
+                np.testing.assert_array_equal(arrays["w.indices"], [[0], [0]])
+                np.testing.assert_array_equal(arrays["w.values"][0], data[:4, :4])
+
+
+class TestStreaming(unittest.TestCase):
+    @staticmethod
+    def _initializers():
+        return {
+            "sparse": _sparse_array((32, 32), 0.9, seed=1),
+            "dense": _sparse_array((32, 32), 0.1, seed=2),
+            "excluded": _sparse_array((32, 32), 0.9, seed=3),
+        }
+
+    def _check_output(self, output_path, initializers):
+        model = onnx.load(output_path)
+        self.assertEqual([tensor.name for tensor in model.graph.initializer], ["dense", "excluded"])
+        for tensor in model.graph.initializer:
+            np.testing.assert_array_equal(numpy_helper.to_array(tensor), initializers[tensor.name])
+        self.assertEqual(len(model.graph.sparse_initializer), 1)
+        np.testing.assert_array_equal(_sparse_to_dense(model.graph.sparse_initializer[0]), initializers["sparse"])
+
+    def _convert(self, input_path, output_path):
+        model = onnx.load(input_path, load_external_data=False)
+        data_writer = ExternalDataWriter(output_path)
+        convert_initializers(
+            model, {"excluded"}, 0.5, 0.0, base_dir=os.path.dirname(input_path), data_writer=data_writer
+        )
+        data_writer.close()
+        for tensor in model.graph.initializer:
+            self.assertEqual(tensor.data_location, TensorProto.EXTERNAL)
+            self.assertFalse(tensor.HasField("raw_data"))
+        onnx.save(model, output_path)
+
+    def _save_with_external_data(self, initializers, path):
+        model = _create_model(initializers)
+        convert_model_to_external_data(model, location=os.path.basename(path) + ".data", size_threshold=0)
+        onnx.save(model, path)
+
+    def test_streaming(self):
+        initializers = self._initializers()
+        with tempfile.TemporaryDirectory() as tmpdir:
+            input_path = os.path.join(tmpdir, "input.onnx")
+            output_path = os.path.join(tmpdir, "output.onnx")
+            self._save_with_external_data(initializers, input_path)
+
+            self._convert(input_path, output_path)
+            self._check_output(output_path, initializers)
+            self.assertEqual(
+                sorted(os.listdir(tmpdir)), ["input.onnx", "input.onnx.data", "output.onnx", "output.onnx.data"]
+            )
+
+    def test_streaming_in_place(self):
+        # the output external data file is the one the initializers are read from
+        initializers = self._initializers()
+        with tempfile.TemporaryDirectory() as tmpdir:
+            model_path = os.path.join(tmpdir, "model.onnx")
+            self._save_with_external_data(initializers, model_path)
+
+            self._convert(model_path, model_path)
+            self._check_output(model_path, initializers)
+            self.assertEqual(sorted(os.listdir(tmpdir)), ["model.onnx", "model.onnx.data"])
+
+    def test_discard(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            data_path = os.path.join(tmpdir, "model.onnx.data")
+            with open(data_path, "wb") as data_file:
+                data_file.write(b"existing")
+
+            data_writer = ExternalDataWriter(os.path.join(tmpdir, "model.onnx"))
+            data_writer.write(numpy_helper.from_array(np.ones(4, dtype=np.float32), "w"))
+            data_writer.discard()
+
+            self.assertEqual(os.listdir(tmpdir), ["model.onnx.data"])
+            with open(data_path, "rb") as data_file:
+                self.assertEqual(data_file.read(), b"existing")
+
+
+if __name__ == "__main__":
+    unittest.main()